@@ -0,0 +1,524 @@
+"""
+DÖF Analiz Anlık Görüntüsü (Parquet)
+------------------------------------
+Analiz panolarının her gece tam Excel dışa aktarımı çekmek yerine yerel
+dosyalardan okuyabilmesi için DÖF ve işlem (DOFAction) olgularını Parquet
+dosyalarına artımlı olarak yazan modül.
+
+- Her çalıştırma sadece değişenleri okur:
+    dofs    : (updated_at, id) filigranından sonraki DÖF'ler (ix_dofs_updated_id)
+    actions : son id'den sonraki işlemler (işlemler sonradan değişmez)
+  Açık transaction'ların geç görünen satırlarının atlanmaması için son
+  ANALYTICS_SNAPSHOT_LAG saniyede değişen satırlar (işlemlerde ilk böyle
+  işlemden sonrakiler de) bir sonraki çalıştırmaya bırakılır. Okuma id/filigran sıralı sayfalarla (BATCH_SIZE) yapılır.
+- Dosyalar oluşturulma ayına göre bölümlenir (Hive biçimi):
+      <ANALYTICS_SNAPSHOT_FOLDER>/dofs/month=2026-09/delta-00000012.parquet
+      <ANALYTICS_SNAPSHOT_FOLDER>/actions/month=2026-09/base-00000010.parquet
+  Bir DÖF'ün created_at değeri değişmediği için tüm sürümleri aynı bölümdedir.
+  Her satır yazıldığı çalıştırmanın numarasını (snapshot_run) taşır; aynı
+  id'nin en büyük snapshot_run'lı satırı günceldir.
+- Sıkıştırma (compact) bir bölümdeki base ve delta dosyalarını, her id'nin
+  sadece güncel satırını tutan tek bir base dosyasında birleştirir ve
+  veritabanında artık bulunmayan (silinmiş) satırları atar. Zamanlanmış
+  çalıştırma ANALYTICS_SNAPSHOT_COMPACT_FILES kadar delta biriken bölümleri
+  sıkıştırır.
+- Dosyalar atomik yazılır; filigran (_state.json) dosyalar yerine konduktan
+  sonra güncellenir. Yarıda kalan bir çalıştırma tekrarlanırsa aynı satırlar
+  yeniden yazılır ve okurken/sıkıştırırken tekilleştirilir.
+- Aynı anda tek çalıştırma: dizindeki .lock dosyası (tüm sunucu süreçleri).
+- pyarrow paketi gerekir.
+
+Okuma (uygulama dışında da çalışır):
+    from analytics_snapshot import read_facts
+    dofs = read_facts('dofs', folder='/data/analytics', month_from='2026-01')
+
+Kullanım:
+    python analytics_snapshot.py             # değişenleri ekle, biriken bölümleri sıkıştır
+    python analytics_snapshot.py --compact   # tüm bölümleri sıkıştır
+    python analytics_snapshot.py --full      # anlık görüntüyü baştan oluştur
+    python analytics_snapshot.py --dry-run   # sadece eklenecek satır sayılarını yazdır
+"""
+
+import json
+import os
+import shutil
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, or_
+
+from extensions import db
+from models import DOF, DOFAction
+
+# Dosya şeması değiştiğinde artırılır; farklı sürümlü anlık görüntü baştan oluşturulur
+SNAPSHOT_VERSION = 1
+
+# Veritabanından bir seferde okunan satır sayısı
+BATCH_SIZE = 5000
+
+STATE_FILE = '_state.json'
+LOCK_FILE = '.lock'
+# Bu süreden eski kilit, kapanan bir sürecin bıraktığı kilit sayılır (saniye)
+LOCK_STALE_SECONDS = 3600
+
+UNKNOWN_MONTH = 'unknown'
+
+# Tablo -> (kolon, tür); türler: int, str, bool, datetime
+FACT_FIELDS = {
+    'dofs': [
+        ('id', 'int'), ('code', 'str'), ('title', 'str'), ('status', 'int'), ('dof_type', 'int'),
+        ('dof_source', 'int'), ('department_id', 'int'), ('source_department_id', 'int'),
+        ('created_by', 'int'), ('assigned_to', 'int'), ('related_dof_id', 'int'), ('is_related', 'bool'),
+        ('channel', 'str'), ('created_at', 'datetime'), ('updated_at', 'datetime'), ('due_date', 'datetime'),
+        ('deadline', 'datetime'), ('closed_at', 'datetime'), ('completion_date', 'datetime'),
+        ('complaint_date', 'datetime'),
+    ],
+    'actions': [
+        ('id', 'int'), ('dof_id', 'int'), ('user_id', 'int'), ('action_type', 'int'),
+        ('old_status', 'int'), ('new_status', 'int'), ('created_at', 'datetime'),
+    ],
+}
+
+FACT_MODELS = {'dofs': DOF, 'actions': DOFAction}
+
+# Her satıra eklenen kolonlar
+META_FIELDS = [('snapshot_run', 'int'), ('snapshot_at', 'datetime')]
+
+_schemas = {}
+
+
+def _schema(table):
+    import pyarrow as pa
+
+    if table not in _schemas:
+        types = {'int': pa.int64(), 'str': pa.string(), 'bool': pa.bool_(), 'datetime': pa.timestamp('us')}
+        _schemas[table] = pa.schema([(name, types[kind]) for name, kind in FACT_FIELDS[table] + META_FIELDS])
+    return _schemas[table]
+
+
+def snapshot_folder():
+    folder = current_app.config.get('ANALYTICS_SNAPSHOT_FOLDER') or os.path.join(current_app.instance_path, 'analytics')
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def _month(value):
+    return value.strftime('%Y-%m') if value else UNKNOWN_MONTH
+
+
+def _partition_dirs(folder, table, month_from=None, month_to=None):
+    """Tablonun bölüm dizinleri, ay sırasıyla: [(ay, yol)]"""
+    root = os.path.join(folder, table)
+    if not os.path.isdir(root):
+        return []
+    partitions = []
+    for name in sorted(os.listdir(root)):
+        if not name.startswith('month='):
+            continue
+        month = name[len('month='):]
+        if month != UNKNOWN_MONTH and ((month_from and month < month_from) or (month_to and month > month_to)):
+            continue
+        partitions.append((month, os.path.join(root, name)))
+    return partitions
+
+
+def _data_files(directory):
+    """Bölümdeki base ve delta dosyaları, yazılma sırasıyla"""
+    names = [name for name in os.listdir(directory)
+             if name.endswith('.parquet') and (name.startswith('base-') or name.startswith('delta-'))]
+    return [os.path.join(directory, name) for name in sorted(names, key=lambda name: name.split('-', 1)[1])]
+
+
+# --- Filigran ve kilit ---
+
+def _load_state(folder):
+    try:
+        with open(os.path.join(folder, STATE_FILE), encoding='utf-8') as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        state = None
+    if not state or state.get('version') != SNAPSHOT_VERSION:
+        return {'version': SNAPSHOT_VERSION, 'run': 0, 'dofs': None, 'actions': None}
+    return state
+
+
+def _save_state(folder, state):
+    path = os.path.join(folder, STATE_FILE)
+    temp_path = f'{path}.{uuid.uuid4().hex}.part'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def _acquire_lock(folder):
+    path = os.path.join(folder, LOCK_FILE)
+    for _ in range(2):
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) < LOCK_STALE_SECONDS:
+                    return False
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            continue
+        with os.fdopen(fd, 'w') as f:
+            f.write(f'{os.getpid()} {datetime.now().isoformat()}')
+        return True
+    return False
+
+
+def _release_lock(folder):
+    try:
+        os.remove(os.path.join(folder, LOCK_FILE))
+    except FileNotFoundError:
+        pass
+
+
+# --- Değişenleri okuma ---
+
+def _columns(table):
+    model = FACT_MODELS[table]
+    return [getattr(model, name) for name, _ in FACT_FIELDS[table]]
+
+
+def _dof_pages(watermark, upper):
+    """Filigrandan sonra değişen DÖF'leri (updated_at, id) sıralı sayfalarla döndürür"""
+    query = db.session.query(*_columns('dofs'))
+    if watermark is None:
+        # İlk çalıştırma: updated_at'i boş eski kayıtlar da alınır
+        condition = or_(DOF.updated_at <= upper, DOF.updated_at.is_(None))
+    else:
+        condition = DOF.updated_at <= upper
+    last_at = datetime.fromisoformat(watermark['updated_at']) if watermark and watermark['updated_at'] else None
+    last_id = watermark['id'] if watermark else 0
+
+    while True:
+        page_query = query.filter(condition)
+        if last_at is not None:
+            page_query = page_query.filter(or_(DOF.updated_at > last_at,
+                                               and_(DOF.updated_at == last_at, DOF.id > last_id)))
+        elif last_id:
+            # Sayfalar updated_at'i boş satırlardan başlar (NULL'lar önce sıralanır)
+            page_query = page_query.filter(or_(DOF.updated_at.isnot(None),
+                                               and_(DOF.updated_at.is_(None), DOF.id > last_id)))
+        page = page_query.order_by(DOF.updated_at, DOF.id).limit(BATCH_SIZE).all()
+        if not page:
+            return
+        yield page
+        last_at, last_id = page[-1].updated_at, page[-1].id
+
+
+def _action_pages(watermark, upper):
+    """
+    Son id'den sonraki işlemleri id sıralı sayfalarla döndürür
+
+    upper'dan yeni ilk işlemde durulur: filigran onu geçerse, ondan küçük id
+    almış ama henüz commit edilmemiş işlemler bir daha okunmaz.
+    """
+    query = db.session.query(*_columns('actions'))
+    last_id = watermark['id'] if watermark else 0
+    while True:
+        page = query.filter(DOFAction.id > last_id).order_by(DOFAction.id).limit(BATCH_SIZE).all()
+        for index, row in enumerate(page):
+            if row.created_at is not None and row.created_at > upper:
+                if index:
+                    yield page[:index]
+                return
+        if not page:
+            return
+        yield page
+        last_id = page[-1].id
+
+
+def _watermark(table, row):
+    """Sayfanın son satırından filigran (updated_at'i boş satırlar sadece ilk çalıştırmada okunur)"""
+    if table == 'actions':
+        return {'id': row.id}
+    return {'updated_at': row.updated_at.isoformat() if row.updated_at else None, 'id': row.id}
+
+
+class _DeltaWriter:
+    """Bir tablonun bu çalıştırmadaki satırlarını bölüm başına geçici delta dosyalarına yazar"""
+
+    def __init__(self, folder, table, run, started_at):
+        self.folder = folder
+        self.table = table
+        self.run = run
+        self.started_at = started_at
+        self.rows = 0
+        self._writers = {}
+
+    def _writer(self, month):
+        import pyarrow.parquet as pq
+
+        if month not in self._writers:
+            directory = os.path.join(self.folder, self.table, f'month={month}')
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f'delta-{self.run:08d}.parquet')
+            temp_path = f'{path}.{uuid.uuid4().hex}.part'
+            self._writers[month] = (pq.ParquetWriter(temp_path, _schema(self.table), compression='zstd'),
+                                    temp_path, path)
+        return self._writers[month][0]
+
+    def write(self, rows):
+        import pyarrow as pa
+
+        names = [name for name, _ in FACT_FIELDS[self.table]]
+        by_month = {}
+        for row in rows:
+            record = dict(zip(names, row))
+            record['snapshot_run'] = self.run
+            record['snapshot_at'] = self.started_at
+            by_month.setdefault(_month(row.created_at), []).append(record)
+        for month, records in by_month.items():
+            self._writer(month).write_table(pa.Table.from_pylist(records, schema=_schema(self.table)))
+        self.rows += len(rows)
+
+    def commit(self):
+        """Dosyaları kapatıp yerlerine koyar; yazılan bölüm aylarını döndürür"""
+        for writer, temp_path, path in self._writers.values():
+            writer.close()
+            os.replace(temp_path, path)
+        return sorted(self._writers)
+
+    def abort(self):
+        for writer, temp_path, _ in self._writers.values():
+            try:
+                writer.close()
+            except Exception:
+                pass
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+
+def run_snapshot(full=False, compact_files=None, dry_run=False):
+    """
+    Değişen DÖF ve işlemleri anlık görüntüye ekler, delta biriken bölümleri sıkıştırır
+
+    Args:
+        full: True ise anlık görüntü silinip baştan oluşturulur
+        compact_files: Bu kadar delta dosyası biriken bölümler sıkıştırılır
+                       (None: ANALYTICS_SNAPSHOT_COMPACT_FILES; 0: sıkıştırma yapılmaz)
+        dry_run: True ise dosya yazılmaz, sadece eklenecek satırlar sayılır
+
+    Returns:
+        dict: run, dofs, actions (eklenen satır), compacted (sıkıştırılan bölüm),
+              skipped (başka bir çalıştırma sürdüğü için atlandıysa True)
+    """
+    folder = snapshot_folder()
+    result = {'run': None, 'dofs': 0, 'actions': 0, 'compacted': 0, 'skipped': False}
+    if not dry_run and not _acquire_lock(folder):
+        current_app.logger.info("Analiz anlık görüntüsü başka bir süreçte çalışıyor, atlandı")
+        result['skipped'] = True
+        return result
+
+    try:
+        state = _load_state(folder)
+        if full or state['run'] == 0:
+            state = {'version': SNAPSHOT_VERSION, 'run': 0, 'dofs': None, 'actions': None}
+            if not dry_run:
+                for table in FACT_FIELDS:
+                    shutil.rmtree(os.path.join(folder, table), ignore_errors=True)
+
+        started_at = datetime.now()
+        upper = started_at - timedelta(seconds=current_app.config.get('ANALYTICS_SNAPSHOT_LAG', 120))
+        run = state['run'] + 1
+        result['run'] = run
+
+        pages = {'dofs': _dof_pages, 'actions': _action_pages}
+        writers = {}
+        watermarks = {}
+        try:
+            for table, iter_pages in pages.items():
+                watermarks[table] = state[table]
+                if not dry_run:
+                    writers[table] = _DeltaWriter(folder, table, run, started_at)
+                for page in iter_pages(state[table], upper):
+                    if not dry_run:
+                        writers[table].write(page)
+                    result[table] += len(page)
+                    watermarks[table] = _watermark(table, page[-1])
+            if dry_run:
+                return result
+            for writer in writers.values():
+                writer.commit()
+        except Exception:
+            for writer in writers.values():
+                writer.abort()
+            raise
+
+        state.update(watermarks)
+        state['run'] = run
+        state['last_run_at'] = started_at.isoformat()
+        _save_state(folder, state)
+
+        if compact_files is None:
+            compact_files = current_app.config.get('ANALYTICS_SNAPSHOT_COMPACT_FILES', 24)
+        if compact_files > 0:
+            result['compacted'] = _compact(folder, min_deltas=compact_files)
+
+        current_app.logger.info(f"Analiz anlık görüntüsü #{run}: {result['dofs']} DÖF, {result['actions']} işlem "
+                                f"eklendi, {result['compacted']} bölüm sıkıştırıldı")
+        return result
+    finally:
+        if not dry_run:
+            _release_lock(folder)
+
+
+# --- Sıkıştırma ---
+
+def _month_bounds(month):
+    start = datetime.strptime(month, '%Y-%m')
+    return start, (start + timedelta(days=32)).replace(day=1)
+
+
+def _existing_ids(table, month):
+    """Bölüm ayında veritabanında bulunan id'ler (silinen satırları atmak için)"""
+    model = FACT_MODELS[table]
+    query = db.session.query(model.id)
+    if month == UNKNOWN_MONTH:
+        query = query.filter(model.created_at.is_(None))
+    else:
+        start, end = _month_bounds(month)
+        query = query.filter(model.created_at >= start, model.created_at < end)
+    return [row_id for (row_id,) in query]
+
+
+def _latest_rows(data):
+    """Her id'nin en büyük snapshot_run'lı satırı (pyarrow tablosu, id sıralı)"""
+    import numpy as np
+
+    data = data.sort_by([('id', 'ascending'), ('snapshot_run', 'ascending')])
+    ids = data.column('id').to_numpy()
+    return data.filter(np.append(ids[1:] != ids[:-1], True)) if len(ids) else data
+
+
+def _compact_partition(table, month, directory, run):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    files = _data_files(directory)
+    data = _latest_rows(pa.concat_tables([pq.read_table(path) for path in files]))
+    data = data.filter(pc.is_in(data.column('id'), value_set=pa.array(_existing_ids(table, month), pa.int64())))
+
+    path = os.path.join(directory, f'base-{run:08d}.parquet')
+    if data.num_rows:
+        temp_path = f'{path}.{uuid.uuid4().hex}.part'
+        pq.write_table(data, temp_path, compression='zstd')
+        os.replace(temp_path, path)
+    for old_path in files:
+        if old_path != path or not data.num_rows:
+            os.remove(old_path)
+    if not data.num_rows:
+        # Tüm satırları silinen bölüm
+        os.rmdir(directory)
+    return data.num_rows
+
+
+def _compact(folder, min_deltas=0):
+    """En az min_deltas delta dosyası (veya birden fazla base) olan bölümleri sıkıştırır"""
+    state = _load_state(folder)
+    compacted = 0
+    for table in FACT_FIELDS:
+        for month, directory in _partition_dirs(folder, table):
+            files = _data_files(directory)
+            deltas = [path for path in files if os.path.basename(path).startswith('delta-')]
+            if len(deltas) < min_deltas and len(files) - len(deltas) <= 1:
+                continue
+            _compact_partition(table, month, directory, state['run'])
+            compacted += 1
+    return compacted
+
+
+def compact_snapshot(min_deltas=0):
+    """
+    Anlık görüntü bölümlerini sıkıştırır (her id'nin güncel satırı, silinenler hariç)
+
+    Args:
+        min_deltas: Sadece bu kadar delta dosyası biriken bölümler sıkıştırılır (0: tüm bölümler)
+
+    Returns:
+        int: Sıkıştırılan bölüm sayısı (başka bir çalıştırma sürüyorsa None)
+    """
+    folder = snapshot_folder()
+    if not _acquire_lock(folder):
+        return None
+    try:
+        compacted = _compact(folder, min_deltas=min_deltas)
+        current_app.logger.info(f"Analiz anlık görüntüsü: {compacted} bölüm sıkıştırıldı")
+        return compacted
+    finally:
+        _release_lock(folder)
+
+
+# --- Okuma ---
+
+def read_facts(table, columns=None, month_from=None, month_to=None, folder=None):
+    """
+    Anlık görüntüden her satırın güncel sürümünü okur
+
+    Args:
+        table: 'dofs' veya 'actions'
+        columns: Okunacak kolonlar (None: tümü; snapshot_run ve snapshot_at dahil)
+        month_from, month_to: Oluşturulma ayı aralığı, 'YYYY-MM' (dahil; sadece bu bölümler okunur)
+        folder: Anlık görüntü dizini (uygulama dışında kullanım için; None: ANALYTICS_SNAPSHOT_FOLDER)
+
+    Returns:
+        pandas.DataFrame: id sıralı satırlar
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if table not in FACT_FIELDS:
+        raise ValueError(f"Bilinmeyen tablo: {table}")
+    folder = folder or snapshot_folder()
+    schema = _schema(table)
+    wanted = list(columns) if columns else schema.names
+    read_columns = list(dict.fromkeys(wanted + ['id', 'snapshot_run']))
+
+    # Sıkıştırma dosyaları okuma sırasında değiştirebilir; listeleme bir kez tekrarlanır
+    for attempt in range(2):
+        try:
+            tables = [pq.read_table(path, columns=read_columns)
+                      for _, directory in _partition_dirs(folder, table, month_from, month_to)
+                      for path in _data_files(directory)]
+            break
+        except FileNotFoundError:
+            if attempt:
+                raise
+
+    if not tables:
+        return schema.empty_table().select(wanted).to_pandas()
+    return _latest_rows(pa.concat_tables(tables)).select(wanted).to_pandas()
+
+
+if __name__ == "__main__":
+    from app import app
+
+    dry_run = '--dry-run' in sys.argv
+    with app.app_context():
+        print("===== DÖF ANALİZ ANLIK GÖRÜNTÜSÜ =====")
+        print(f"Dizin: {snapshot_folder()}")
+        if '--compact' in sys.argv and not dry_run:
+            compacted = compact_snapshot()
+            if compacted is None:
+                print("Başka bir çalıştırma sürüyor.")
+                sys.exit(1)
+            print(f"Sıkıştırılan bölüm: {compacted}")
+        else:
+            result = run_snapshot(full='--full' in sys.argv, dry_run=dry_run)
+            if result['skipped']:
+                print("Başka bir çalıştırma sürüyor.")
+                sys.exit(1)
+            print(f"Çalıştırma #{result['run']}: {result['dofs']} DÖF, {result['actions']} işlem, "
+                  f"{result['compacted']} bölüm sıkıştırıldı")
+            if dry_run:
+                print("--dry-run: dosya yazılmadı.")
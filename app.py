@@ -57,6 +57,30 @@ app.config.from_object(Config)
 
 # Eklentileri başlat
 db.init_app(app)
+
+# DÖF durum sayaçlarını her flush'ta güncel tutan dinleyiciyi bağla
+from status_counters import register_status_counter_listeners
+register_status_counter_listeners()
+
+# Kullanıcı-departman görünürlük tablosunu ilişki değişikliklerinde yeniden oluşturan dinleyiciyi bağla
+from department_visibility import register_department_visibility_listeners
+register_department_visibility_listeners()
+
+# DÖF arama dokümanlarını DÖF ve aksiyon değişikliklerinde güncel tutan dinleyiciyi bağla
+from search_service import register_search_index_listeners
+register_search_index_listeners()
+
+# Günlük DÖF özet tablosunu (trend grafikleri) DÖF değişikliklerinde güncel tutan dinleyiciyi bağla
+from daily_facts import register_daily_fact_listeners
+register_daily_fact_listeners()
+
+# DÖF durum geçişlerini dof_status_history tablosuna yazan dinleyiciyi bağla
+from status_history import register_status_history_listeners
+register_status_history_listeners()
+
+# Dashboard önbelleğini kullanıcı kapsamındaki DÖF ve bildirim değişikliklerinde geçersiz kılan dinleyiciyi bağla
+from dashboard_cache import register_dashboard_cache_listeners
+register_dashboard_cache_listeners()
 migrate.init_app(app, db)
 login_manager.init_app(app)
 login_manager.login_view = 'auth.login'
@@ -102,6 +126,34 @@ with app.app_context():
         logger.info("Veritabanı bağlantısı başarıyla kontrol edildi.")
         db.create_all()
         logger.info("Tüm veritabanı tabloları başarıyla oluşturuldu.")
+        
+        # Durum sayaçları ilk kurulumda boşsa DÖF tablosundan doldur
+        from status_counters import ensure_status_counters
+        if ensure_status_counters():
+            logger.info("DÖF durum sayaçları DÖF tablosundan oluşturuldu.")
+        
+        # Görünürlük tablosu ilk kurulumda boşsa ilişki tablolarından doldur
+        from department_visibility import ensure_department_visibility
+        if ensure_department_visibility():
+            logger.info("Kullanıcı-departman görünürlük tablosu oluşturuldu.")
+        
+        # Arama altyapısını hazırla, doküman tablosu boşsa DÖF'lerden doldur
+        from search_service import ensure_search_index
+        if ensure_search_index():
+            logger.info("DÖF arama indeksi oluşturuldu.")
+        
+        # Günlük özet tablosu ilk kurulumda boşsa DÖF tablosundan doldur
+        from daily_facts import ensure_daily_facts
+        if ensure_daily_facts():
+            logger.info("DÖF günlük özet tablosu oluşturuldu.")
+        
+        # Durum geçmişi ilk kurulumda boşsa aksiyon kayıtlarından, süre analizleri geçmişten doldur
+        from status_history import ensure_status_history
+        if ensure_status_history():
+            logger.info("DÖF durum geçmişi aksiyon kayıtlarından oluşturuldu.")
+        from cycle_analytics import ensure_cycle_analytics
+        if ensure_cycle_analytics():
+            logger.info("DÖF süre analizleri oluşturuldu.")
     except Exception as e:
         logger.error(f"Veritabanı tabloları oluşturulurken hata: {str(e)}")
         
@@ -132,6 +184,7 @@ def register_blueprints():
     from routes.activity import activity_bp
     from routes.notifications import notifications_bp
     from routes.thank_you import thank_you_bp
+    from routes.exports import exports_bp
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(dof_bp)
@@ -142,6 +195,7 @@ def register_blueprints():
     app.register_blueprint(activity_bp)
     app.register_blueprint(notifications_bp)
     app.register_blueprint(thank_you_bp, url_prefix='/thank-you')
+    app.register_blueprint(exports_bp)
 
 # Kullanıcı yükleyiciyi tanımla (routes'tan sonra)
 @login_manager.user_loader
@@ -178,7 +232,105 @@ try:
 except Exception as e:
     logger.error(f"❌ E-posta zamanlayıcısı başlatma hatası: {str(e)}")
 
+# Günlük özet tablosunun son günlerini her gece yeniden hesapla (termini geçen DÖF'ler),
+# ardından tüm tabloyu DÖF tablosuyla karşılaştır; sapmaları logla ve onar
+def refresh_daily_facts_job():
+    with app.app_context():
+        try:
+            from job_locks import job_lock
+            from daily_facts import refresh_recent_facts, check_daily_facts
+            with job_lock('dof_daily_facts') as acquired:
+                if acquired:
+                    refresh_recent_facts()
+                    check_daily_facts()
+        except Exception as e:
+            logger.error(f"DÖF günlük özet tablosu güncellenemedi: {str(e)}")
+
+scheduler.add_job(
+    func=refresh_daily_facts_job,
+    trigger='cron', hour=0, minute=10,
+    id='dof_daily_facts',
+    name='DÖF Günlük Özet Tablosu',
+    replace_existing=True,
+    max_instances=1
+)
+
+# Son durum geçişlerinin süre ölçümlerini ve aylık yüzdelik istatistiklerini her saat güncelle
+def refresh_cycle_analytics_job():
+    with app.app_context():
+        try:
+            from job_locks import run_exclusive
+            from cycle_analytics import run_cycle_analytics
+            run_exclusive('dof_cycle_analytics', run_cycle_analytics)
+        except Exception as e:
+            logger.error(f"DÖF süre analizleri güncellenemedi: {str(e)}")
+
+scheduler.add_job(
+    func=refresh_cycle_analytics_job,
+    trigger='cron', minute=5,
+    id='dof_cycle_analytics',
+    name='DÖF Süre Analizleri',
+    replace_existing=True,
+    max_instances=1
+)
+
+# Durum sayaçlarını her gece DÖF tablosuyla karşılaştır; sapmaları logla ve onar
+def check_status_counters_job():
+    with app.app_context():
+        try:
+            from job_locks import run_exclusive
+            from status_counters import check_status_counters
+            run_exclusive('dof_status_counter_check', check_status_counters)
+        except Exception as e:
+            logger.error(f"DÖF durum sayaçları kontrol edilemedi: {str(e)}")
+
+scheduler.add_job(
+    func=check_status_counters_job,
+    trigger='cron', hour=0, minute=30,
+    id='dof_status_counter_check',
+    name='DÖF Durum Sayaçları Kontrolü',
+    replace_existing=True,
+    max_instances=1
+)
+
+# Süresi dolan dışa aktarım işlerini ve dosyalarını her saat temizle
+def cleanup_export_jobs_job():
+    with app.app_context():
+        try:
+            from export_jobs import cleanup_export_jobs
+            cleanup_export_jobs()
+        except Exception as e:
+            logger.error(f"Dışa aktarım işleri temizlenemedi: {str(e)}")
+
+scheduler.add_job(
+    func=cleanup_export_jobs_job,
+    trigger='cron', minute=20,
+    id='export_job_cleanup',
+    name='Dışa Aktarım İşleri Temizliği',
+    replace_existing=True,
+    max_instances=1
+)
+
+# Analiz anlık görüntüsüne (Parquet) her saat sadece değişen DÖF ve işlemleri ekle
+def refresh_analytics_snapshot_job():
+    with app.app_context():
+        try:
+            from analytics_snapshot import run_snapshot
+            run_snapshot()
+        except Exception as e:
+            logger.error(f"DÖF analiz anlık görüntüsü güncellenemedi: {str(e)}")
+
+scheduler.add_job(
+    func=refresh_analytics_snapshot_job,
+    trigger='cron', minute=40,
+    id='dof_analytics_snapshot',
+    name='DÖF Analiz Anlık Görüntüsü',
+    replace_existing=True,
+    max_instances=1
+)
+
 # Zamanlanmış görevleri başlat
+# (Zamanlayıcı her sunucu sürecinde çalışır; tablo yeniden yazan görevler job_locks ile tek süreçte çalışır)
 scheduler.start()
 
 # Uygulama başlatıldığında departman-kullanıcı eşleştirmelerini kontrol et
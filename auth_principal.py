@@ -0,0 +1,161 @@
+"""
+Yetki Öznesi (Principal)
+------------------------
+Yetki kontrollerinin ihtiyaç duyduğu kullanıcı bilgilerini (rol, departman,
+görebildiği departmanlar) tek bir nesnede toplayan modül. AuthService,
+utils.can_user_edit_dof / can_user_change_status ve route'lardaki kontroller
+bu nesneyi okur; böylece yönetilen departmanlar istek başına en fazla bir kez
+hesaplanır. Kaynak departman kontrolleri DÖF'ün source_department_id kolonuyla
+yapılır (DÖF listesiyle aynı kural; açan kişi departman değiştirse de DÖF
+açıldığı departmanda kalır).
+
+- İstek içinde flask.g üzerinde saklanır.
+- İstekler arasında sadece süreçler arası paylaşılan bir önbellek altyapısı
+  (DASHBOARD_CACHE_BACKEND=redis) varsa 'auth' kuşağıyla saklanır. Görünürlük
+  tablosunu etkileyen her değişiklik (eşleştirmeler, gruplar, departmanlar,
+  kullanıcı rolü/departmanı) commit sonrasında bu kuşağı artırır ve tüm
+  özneler yeniden hesaplanır. Süreç içi önbellekte kuşak sayacı diğer sunucu
+  süreçlerine ulaşmadığından (kaldırılan bir yetki diğer işçilerde TTL
+  boyunca geçerli kalırdı) özne her istekte yeniden hesaplanır.
+- Saklanan öznenin rolü veya departmanı kullanıcı satırıyla uyuşmuyorsa
+  (ör. başka bir süreçte değişmişse) özne yeniden hesaplanır.
+
+Kullanım:
+    from auth_principal import get_principal
+
+    principal = get_principal(current_user)
+    if principal.can_see_department(dof.department_id):
+        ...
+"""
+
+from dataclasses import dataclass
+from typing import Any, FrozenSet, Optional
+
+from flask import current_app, g, has_request_context
+
+from extensions import db
+
+# Özne kayıtlarının bağlı olduğu kuşak
+AUTH_GENERATION = 'auth'
+
+_REQUEST_KEY = '_auth_principals'
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Bir kullanıcının yetki kontrollerinde kullanılan değişmez görüntüsü"""
+
+    user_id: int
+    role: int
+    department_id: Optional[int]
+    # Görünürlük tablosundaki departmanlar (admin/kalite yöneticisi için boş; hepsini görürler)
+    managed_department_ids: FrozenSet[int] = frozenset()
+
+    @property
+    def sees_all(self):
+        """Tüm DÖF'leri gören roller"""
+        from models import UserRole
+        return self.role in [UserRole.ADMIN, UserRole.QUALITY_MANAGER]
+
+    def can_see_department(self, department_id):
+        """Departman kullanıcının görünürlük kapsamında mı?"""
+        if department_id is None:
+            return False
+        return self.sees_all or department_id in self.managed_department_ids
+
+    def is_source_department(self, dof):
+        """DÖF kullanıcının departmanı tarafından mı açıldı? (source_department_id)"""
+        return self.department_id is not None and dof.source_department_id == self.department_id
+
+    def to_payload(self):
+        """Önbelleğe yazılacak JSON uyumlu değer"""
+        return {
+            'user_id': self.user_id,
+            'role': self.role,
+            'department_id': self.department_id,
+            'managed_department_ids': sorted(self.managed_department_ids),
+        }
+
+    @classmethod
+    def from_payload(cls, payload):
+        return cls(
+            user_id=payload['user_id'],
+            role=payload['role'],
+            department_id=payload['department_id'],
+            managed_department_ids=frozenset(payload['managed_department_ids']),
+        )
+
+
+def _build_principal(user):
+    """Özneyi veritabanından hesaplar (en fazla bir küçük sorgu)"""
+    from models import UserRole
+    from department_visibility import visible_department_ids_select
+
+    managed_department_ids = frozenset()
+    if user.role not in [UserRole.ADMIN, UserRole.QUALITY_MANAGER]:
+        managed_department_ids = frozenset(
+            db.session.execute(visible_department_ids_select(user.id)).scalars().all())
+
+    return Principal(user_id=user.id, role=user.role, department_id=user.department_id,
+                     managed_department_ids=managed_department_ids)
+
+
+def _cache_key(user_id):
+    return f'principal:{user_id}'
+
+
+def _load_cached(user):
+    """Paylaşımlı önbellekteki özneyi döndürür; yoksa hesaplayıp saklar"""
+    import dashboard_cache
+
+    cache = dashboard_cache.get_cache()
+    if cache is None or not cache.shared:
+        return _build_principal(user)
+
+    try:
+        generations = cache.get_generations([AUTH_GENERATION])
+        entry = cache.get(_cache_key(user.id))
+    except Exception as e:
+        current_app.logger.error(f"Yetki öznesi önbellekten okunamadı: {str(e)}")
+        return _build_principal(user)
+
+    if entry is not None and entry.get('generations') == generations:
+        principal = Principal.from_payload(entry['payload'])
+        if principal.role == user.role and principal.department_id == user.department_id:
+            return principal
+
+    principal = _build_principal(user)
+    try:
+        cache.set(_cache_key(user.id), {'generations': generations, 'payload': principal.to_payload()})
+    except Exception as e:
+        current_app.logger.error(f"Yetki öznesi önbelleğe yazılamadı: {str(e)}")
+    return principal
+
+
+def get_principal(user: Any) -> Principal:
+    """
+    Kullanıcının yetki öznesini döndürür
+
+    Args:
+        user: Kullanıcı nesnesi (current_user)
+
+    Returns:
+        Principal: İstek boyunca aynı nesne
+    """
+    if not has_request_context():
+        return _load_cached(user)
+
+    principals = g.setdefault(_REQUEST_KEY, {})
+    principal = principals.get(user.id)
+    if principal is None or principal.role != user.role or principal.department_id != user.department_id:
+        principal = principals[user.id] = _load_cached(user)
+    return principal
+
+
+def invalidate_principals(session=None):
+    """Tüm yetki öznelerini commit sonrasında geçersiz kılar"""
+    import dashboard_cache
+
+    dashboard_cache.invalidate([AUTH_GENERATION], session)
+    if has_request_context():
+        g.pop(_REQUEST_KEY, None)
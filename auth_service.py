@@ -3,7 +3,9 @@ Auth Service - Yetki ve İzin Kontrol Servisi
 -------------------------------------------
 Tüm yetki kontrolleri için kullanılacak merkezi servis modülü.
 Bu modül, farklı kullanıcı rollerine göre görüntüleme ve düzenleme izinlerini yönetir.
-Proje genelinde tutarlı yetkilendirme sağlar.
+Proje genelinde tutarlı yetkilendirme sağlar. Rol, departman ve görünürlük
+bilgileri istek başına bir kez hesaplanan yetki öznesinden okunur
+(bkz. auth_principal.py).
 
 Kullanım:
     from auth_service import AuthService
@@ -35,31 +37,27 @@ class AuthService:
         """
         # Import burada yapılıyor çünkü circular import sorununu önlemek gerekiyor
         from models import UserRole
+        from auth_principal import get_principal
         
         try:
+            principal = get_principal(user)
+            
             # Admin ve kalite yöneticileri her şeyi görebilir
-            if user.role == UserRole.ADMIN or user.role == UserRole.QUALITY_MANAGER:
+            if principal.sees_all:
                 return True
             
             # Normal kullanıcılar sadece kendi oluşturdukları ve kendilerine atananları görebilir
-            if user.role == UserRole.USER:
-                return dof.created_by == user.id or dof.assigned_to == user.id
+            if principal.role == UserRole.USER:
+                return dof.created_by == principal.user_id or dof.assigned_to == principal.user_id
             
             # Departman yöneticileri kendi departmanlarını görebilir
-            if user.role == UserRole.DEPARTMENT_MANAGER and user.department_id:
-                return dof.department_id == user.department_id
+            if principal.role == UserRole.DEPARTMENT_MANAGER and principal.department_id:
+                return dof.department_id == principal.department_id
             
             # Bölge müdürleri sadece kendi yönettikleri departmanların DÖF'lerini görebilir
-            if user.role == UserRole.GROUP_MANAGER:
-                managed_departments = user.get_managed_departments()
-                managed_dept_ids = [dept.id for dept in managed_departments]
-                return dof.department_id in managed_dept_ids
-            
             # Direktörler altındaki bölge müdürlerinin yönettiği departmanların DÖF'lerini görebilir
-            if user.role == UserRole.DIRECTOR:
-                managed_departments = user.get_managed_departments()
-                managed_dept_ids = [dept.id for dept in managed_departments]
-                return dof.department_id in managed_dept_ids
+            if principal.role in [UserRole.GROUP_MANAGER, UserRole.DIRECTOR]:
+                return principal.can_see_department(dof.department_id)
             
             # Diğer tüm durumlar için yetki yok
             return False
@@ -83,61 +81,41 @@ class AuthService:
         """
         # Import burada yapılıyor çünkü circular import sorununu önlemek gerekiyor
         from models import UserRole, DOF
+        from auth_principal import get_principal
         
         try:
+            principal = get_principal(user)
+            
             # İlişkili DÖF'leri filtreleme - tüm kullanıcı rolleri için geçerli
-            # İlişkili DÖF'ler başlığında "[İlişkili #" prefix'i içerir
-            related_dof_filter = ~DOF.title.like("[İlişkili #%")
+            # İlişkili DÖF'ler is_related bayrağı ile işaretlidir (indeksli kolon)
+            related_dof_filter = DOF.is_related == False
             query = query.filter(related_dof_filter)
             current_app.logger.info("AuthService: İlişkili DÖF'ler filtrelendi")
             
             # Admin ve kalite yöneticileri için başka filtreleme yok, tümünü görebilirler
-            if user.role == UserRole.ADMIN or user.role == UserRole.QUALITY_MANAGER:
+            if principal.sees_all:
                 return query
             
             # Normal kullanıcılar sadece kendi oluşturdukları ve kendilerine atananları görebilir 
-            elif user.role == UserRole.USER:
-                return query.filter(or_(DOF.created_by == user.id, DOF.assigned_to == user.id))
+            elif principal.role == UserRole.USER:
+                return query.filter(or_(DOF.created_by == principal.user_id, DOF.assigned_to == principal.user_id))
             
             # Departman yöneticileri kendi departmanlarına ait DÖF'leri görebilir
-            elif user.role == UserRole.DEPARTMENT_MANAGER and user.department_id:
-                # Widget amacı için departman_id ile eşleşen VEYA bu departmandaki herhangi biri tarafından 
-                # oluşturulan DÖF'leri göster (oluşturan kullanıcının departmanı)
-                dept_users_ids = [u.id for u in user.department.users] if hasattr(user, 'department') and user.department else []
-                current_app.logger.debug(f"Departman yöneticisi {user.username} için dept_id={user.department_id}, dept_users={dept_users_ids}")
-                
-                if dept_users_ids:
-                    # Hem departmanın atandığı DÖF'ler hem de departman üyeleri tarafından oluşturulan DÖF'ler
-                    return query.filter(or_(DOF.department_id == user.department_id, 
-                                           DOF.created_by.in_(dept_users_ids)))
-                else:
-                    return query.filter(DOF.department_id == user.department_id)
-            
-            # Çoklu departman yöneticileri sadece yönettikleri departmanların DÖF'lerini görebilir
-            elif user.role in [UserRole.GROUP_MANAGER, UserRole.PROJECTS_QUALITY_TRACKING, UserRole.BRANCHES_QUALITY_TRACKING]:
-                managed_departments = user.get_managed_departments()
-                managed_dept_ids = [dept.id for dept in managed_departments]
-                
-                if managed_dept_ids:
-                    current_app.logger.debug(f"Çoklu departman yöneticisi ({user.role_name}) {user.username} için departman filtresi: {managed_dept_ids}")
-                    return query.filter(DOF.department_id.in_(managed_dept_ids))
-                else:
-                    current_app.logger.warning(f"Çoklu departman yöneticisi ({user.role_name}) {user.username} için yönetilen departman bulunamadı")
-                    # Hiçbir departman yönetmiyorsa boş sorgu döndür
-                    return query.filter(DOF.id == -1)  # Hiçbir zaman eşleşmeyecek bir filtre
-            
-            # Direktörler altındaki bölge müdürlerinin yönettiği departmanların DÖF'lerini görebilir
-            elif user.role == UserRole.DIRECTOR:
-                managed_departments = user.get_managed_departments()
-                managed_dept_ids = [dept.id for dept in managed_departments]
-                
-                if managed_dept_ids:
-                    current_app.logger.debug(f"Direktör {user.username} için departman filtresi: {managed_dept_ids}")
-                    return query.filter(DOF.department_id.in_(managed_dept_ids))
-                else:
-                    current_app.logger.warning(f"Direktör {user.username} için yönetilen departman bulunamadı")
-                    # Hiçbir departman yönetmiyorsa boş sorgu döndür
-                    return query.filter(DOF.id == -1)  # Hiçbir zaman eşleşmeyecek bir filtre
+            elif principal.role == UserRole.DEPARTMENT_MANAGER and principal.department_id:
+                # Widget amacı için departman_id ile eşleşen VEYA bu departman tarafından 
+                # açılan DÖF'leri göster (DÖF'ün açan departmanı)
+                return query.filter(or_(DOF.department_id == principal.department_id, 
+                                       DOF.source_department_id == principal.department_id))
+            
+            # Çoklu departman yöneticileri sadece yönettikleri departmanların DÖF'lerini görebilir,
+            # direktörler altındaki bölge müdürlerinin yönettiği departmanların DÖF'lerini görebilir.
+            # Görülebilir departmanlar user_department_visibility tablosunda önceden hesaplanmıştır;
+            # yönetilen departmanı olmayan kullanıcı için EXISTS hiçbir satır döndürmez
+            elif principal.role in [UserRole.GROUP_MANAGER, UserRole.PROJECTS_QUALITY_TRACKING,
+                                    UserRole.BRANCHES_QUALITY_TRACKING, UserRole.DIRECTOR]:
+                from department_visibility import department_visibility_exists
+                current_app.logger.debug(f"{user.role_name} {user.username} için departman görünürlük filtresi uygulanıyor")
+                return query.filter(department_visibility_exists(principal.user_id, DOF.department_id))
             
             # Diğer tüm durumlar için boş sorgu döndür - güvenli tarafta kal
             return query.filter(DOF.id == -1)  # Hiçbir zaman eşleşmeyecek bir filtre
@@ -161,21 +139,24 @@ class AuthService:
         """
         # Import burada yapılıyor çünkü circular import sorununu önlemek gerekiyor
         from models import UserRole, DOFStatus
+        from auth_principal import get_principal
         
         try:
+            principal = get_principal(user)
+            
             # Admin her şeyi düzenleyebilir
-            if user.role == UserRole.ADMIN:
+            if principal.role == UserRole.ADMIN:
                 return True
             
             # Kalite yöneticisi çoğu durumda düzenleyebilir
-            if user.role == UserRole.QUALITY_MANAGER:
+            if principal.role == UserRole.QUALITY_MANAGER:
                 # Kalite yöneticileri tamamlanan DÖF'leri düzenleyemez
                 if dof.status == DOFStatus.COMPLETED or dof.status == DOFStatus.CLOSED:
                     return False
                 return True
             
             # Hem oluşturan kişi hem de DÖF'ün durumu uygunsa düzenleme yapılabilir
-            is_creator = dof.created_by == user.id
+            is_creator = dof.created_by == principal.user_id
             is_editable_status = dof.status in [DOFStatus.DRAFT, DOFStatus.PENDING]
             
             # Oluşturucuysa ve durum uygunsa düzenlenebilir
@@ -0,0 +1,107 @@
+"""
+DÖF metin kolonlarının ertelenmesinin (deferred) etkisini ölçen betik.
+
+Rapor, departman istatistikleri, liste sayfası ve PDF dışa aktarım yollarında
+kullanılan sorgular iki şekilde çalıştırılır:
+    - önce:  tüm kolonlar (undefer_group ile açıklama/kök neden/plan dahil)
+    - sonra: uygulamanın şu an kullandığı seçenekler (ertelenmiş / load_only)
+
+Her yol için veritabanından gelen yaklaşık bayt miktarı, ORM nesnelerinin
+tepe bellek kullanımı (tracemalloc) ve 10.000 DÖF için tahmini değerler yazdırılır.
+
+Kullanım:
+    python benchmark_dof_loading.py
+    python benchmark_dof_loading.py --rows 50000   # tahmin için farklı kayıt sayısı
+"""
+import sys
+import tracemalloc
+
+from app import app, db
+from models import DOF
+from query_options import dof_summary_options, dof_text_options
+
+DEFAULT_ESTIMATE_ROWS = 10000
+
+
+def _fetched_bytes(query):
+    """Sorgunun veritabanından döndürdüğü kolon değerlerinin toplam bayt uzunluğu"""
+    total = 0
+    rows = 0
+    for row in db.session.connection().execute(query.statement):
+        rows += 1
+        for value in row:
+            if value is not None:
+                total += len(str(value).encode('utf-8'))
+    return total, rows
+
+
+def _peak_memory(query):
+    """Sorgu sonucunu ORM nesnelerine dönüştürürken oluşan tepe bellek (bayt)"""
+    db.session.expunge_all()
+    tracemalloc.start()
+    try:
+        objects = query.all()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del objects
+    db.session.expunge_all()
+    return peak
+
+
+def _paths():
+    """(ad, önceki sorgu, şimdiki sorgu) üçlüleri"""
+    full = DOF.query.options(*dof_text_options())
+    summary = DOF.query.options(*dof_summary_options())
+    recent = DOF.created_at.desc(), DOF.id.desc()
+    first_department = db.session.query(DOF.department_id).filter(DOF.department_id.isnot(None)).limit(1).scalar()
+
+    return [
+        ('Rapor (filtrelenmiş DÖF listesi)', full, summary),
+        ('Departman istatistikleri',
+         full.filter(DOF.department_id == first_department),
+         summary.filter(DOF.department_id == first_department)),
+        ('Liste sayfası (25 kayıt)', full.order_by(*recent).limit(25), DOF.query.order_by(*recent).limit(25)),
+        ('PDF dışa aktarım', full.order_by(*recent), summary.order_by(*recent)),
+    ]
+
+
+def _format_size(value):
+    for unit in ('B', 'KB', 'MB'):
+        if abs(value) < 1024:
+            return f"{value:.0f} {unit}" if unit == 'B' else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GB"
+
+
+def run_benchmark(estimate_rows=DEFAULT_ESTIMATE_ROWS):
+    """Tüm yolları ölçer ve sonuçları tablo olarak yazdırır"""
+    print(f"{'Yol':<36} {'Satır':>6} {'Bayt (önce)':>12} {'Bayt (sonra)':>12} "
+          f"{'Bellek (önce)':>14} {'Bellek (sonra)':>14} {'Tahmin önce/sonra':>22}")
+    print("-" * 124)
+
+    for name, before, after in _paths():
+        before_bytes, rows = _fetched_bytes(before)
+        after_bytes, _ = _fetched_bytes(after)
+        before_peak = _peak_memory(before)
+        after_peak = _peak_memory(after)
+
+        if rows:
+            estimate = (f"{_format_size(before_bytes / rows * estimate_rows)} / "
+                        f"{_format_size(after_bytes / rows * estimate_rows)}")
+        else:
+            estimate = "-"
+
+        print(f"{name:<36} {rows:>6} {_format_size(before_bytes):>12} {_format_size(after_bytes):>12} "
+              f"{_format_size(before_peak):>14} {_format_size(after_peak):>14} {estimate:>22}")
+
+    print(f"\nTahmin sütunu, ölçülen satır başı bayt değerinin {estimate_rows} DÖF için karşılığıdır.")
+
+
+if __name__ == '__main__':
+    estimate_rows = DEFAULT_ESTIMATE_ROWS
+    if '--rows' in sys.argv:
+        estimate_rows = int(sys.argv[sys.argv.index('--rows') + 1])
+
+    with app.app_context():
+        run_benchmark(estimate_rows)
@@ -0,0 +1,175 @@
+"""
+PDF oluşturma servisinin (pdf_renderer.py) gecikme ve verimini ölçen betik.
+
+DÖF raporu PDF'i farklı satır sayıları (dolayısıyla sayfa sayıları) için üç
+şekilde oluşturulur:
+    - soğuk : eski yol; her çağrıda şablon derlenir, CSS ayrıştırılır ve
+              font yapılandırması yeniden kurulur (süreç içinde)
+    - sıcak : pdf_renderer işçileri; şablon önbellekte, CSS ve fontlar hazır
+    - fpdf  : WeasyPrint kullanılamadığında dönülen basit PDF (düşük kalite modu)
+
+Her satır sayısı için sayfa sayısı, p50/p95 gecikme ve işçi sayısı kadar
+eşzamanlı istekle saniyedeki PDF sayısı yazdırılır. WeasyPrint bu ortamda
+yüklenemiyorsa sadece fpdf sonuçları verilir.
+
+Kullanım:
+    python benchmark_pdf_rendering.py
+    python benchmark_pdf_rendering.py --rows 25,250,1000 --repeat 10 --workers 2
+"""
+import re
+import sys
+import threading
+import time
+
+from app import app
+from models import DOF
+
+import pdf_renderer
+from export_utils import build_dof_report_context, create_simple_reports_pdf_fallback, _NameLookup
+
+DEFAULT_ROWS = (25, 100, 500, 2000)
+DEFAULT_REPEAT = 5
+
+PAGE_PATTERN = re.compile(rb'/Type\s*/Page\b')
+
+
+def _page_count(pdf):
+    return len(PAGE_PATTERN.findall(pdf))
+
+
+def _percentile(values, percent):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _timed(function, repeat):
+    """Fonksiyonu sırayla çalıştırır; (son sonuç, gecikmeler) döner"""
+    latencies = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        latencies.append(time.perf_counter() - started)
+    return result, latencies
+
+
+def _throughput(function, concurrency, total):
+    """concurrency iş parçacığıyla toplam total PDF oluşturur; saniyedeki PDF sayısı"""
+    remaining = [total]
+    lock = threading.Lock()
+
+    def run():
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            function()
+
+    threads = [threading.Thread(target=run) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return total / (time.perf_counter() - started)
+
+
+def _cold_render(context):
+    """Önceki davranış: şablon, CSS ve font yapılandırması her çağrıda sıfırdan"""
+    import os
+    import weasyprint
+    from jinja2 import Template
+    from weasyprint.text.fonts import FontConfiguration
+
+    with open(os.path.join(pdf_renderer.TEMPLATE_DIR, 'dof_report.html'), encoding='utf-8') as f:
+        template = Template(f.read(), autoescape=True)
+    with open(os.path.join(pdf_renderer.TEMPLATE_DIR, 'dof_report.css'), encoding='utf-8') as f:
+        css = f.read()
+    font_config = FontConfiguration()
+    stylesheet = weasyprint.CSS(string=css, font_config=font_config)
+    return weasyprint.HTML(string=template.render(**context)).write_pdf(stylesheets=[stylesheet],
+                                                                     font_config=font_config)
+
+
+def _sample_dofs(rows):
+    """İstenen sayıda DÖF (veritabanında daha az varsa liste tekrarlanır)"""
+    dofs = DOF.query.order_by(DOF.id.desc()).limit(rows).all()
+    if not dofs:
+        return []
+    while len(dofs) < rows:
+        dofs.extend(dofs[:rows - len(dofs)])
+    return dofs
+
+
+def _weasyprint_available():
+    try:
+        pdf_renderer.html_to_pdf(pdf_renderer.WARMUP_HTML)
+        return True
+    except pdf_renderer.PDFRendererUnavailable as e:
+        print(f"WeasyPrint kullanılamıyor ({e}); sadece fpdf ölçülecek.\n")
+        return False
+
+
+def _print_row(name, rows, pages, latencies, throughput):
+    print(f"{name:<8} {rows:>6} {pages:>6} {_percentile(latencies, 50) * 1000:>10.0f} "
+          f"{_percentile(latencies, 95) * 1000:>10.0f} "
+          f"{(f'{throughput:.2f}' if throughput else '-'):>10}")
+
+
+def run_benchmark(row_counts=DEFAULT_ROWS, repeat=DEFAULT_REPEAT, workers=None):
+    """Her satır sayısı için soğuk, sıcak ve fpdf yollarını ölçer"""
+    if workers is not None:
+        app.config['PDF_RENDER_WORKERS'] = workers
+    workers = app.config['PDF_RENDER_WORKERS']
+    concurrency = max(workers, 1)
+    available = _weasyprint_available()
+    names = _NameLookup()
+
+    print(f"İşçi sayısı: {workers}, tekrar: {repeat}, verim için eşzamanlı istek: {concurrency}")
+    print(f"{'Yol':<8} {'Satır':>6} {'Sayfa':>6} {'p50 (ms)':>10} {'p95 (ms)':>10} {'PDF/sn':>10}")
+    print("-" * 56)
+
+    for rows in row_counts:
+        dofs = _sample_dofs(rows)
+        if not dofs:
+            print("Veritabanında DÖF yok.")
+            return
+        context = build_dof_report_context(dofs, names)
+
+        if available:
+            pdf, latencies = _timed(lambda: _cold_render(context), repeat)
+            _print_row('soğuk', rows, _page_count(pdf), latencies, None)
+
+            def warm():
+                # Verim ölçümündeki iş parçacıkları ayarları uygulama bağlamından okur
+                with app.app_context():
+                    return pdf_renderer.render_pdf('dof_report', context)
+
+            pdf, latencies = _timed(warm, repeat)
+            _print_row('sıcak', rows, _page_count(pdf), latencies,
+                       _throughput(warm, concurrency, repeat * concurrency))
+
+        try:
+            output, latencies = _timed(lambda: create_simple_reports_pdf_fallback(dofs), repeat)
+            _print_row('fpdf', rows, _page_count(output.getvalue()), latencies, None)
+        except Exception as e:
+            print(f"{'fpdf':<8} {rows:>6} hata: {e}")
+
+    pdf_renderer.shutdown()
+
+
+if __name__ == '__main__':
+    row_counts = DEFAULT_ROWS
+    repeat = DEFAULT_REPEAT
+    workers = None
+    if '--rows' in sys.argv:
+        row_counts = [int(value) for value in sys.argv[sys.argv.index('--rows') + 1].split(',')]
+    if '--repeat' in sys.argv:
+        repeat = int(sys.argv[sys.argv.index('--repeat') + 1])
+    if '--workers' in sys.argv:
+        workers = int(sys.argv[sys.argv.index('--workers') + 1])
+
+    with app.app_context():
+        run_benchmark(row_counts, repeat, workers)
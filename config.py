@@ -62,6 +62,51 @@ class Config:
         }
     }
     
+    # DÖF arama altyapısı: 'mysql' (FULLTEXT), 'sqlite_fts5' veya 'like'
+    # Boş bırakılırsa veritabanı türüne göre otomatik seçilir (bkz. search_service.py)
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND')
+
+    # Dashboard önbelleği: 'redis' (paylaşımlı), 'none' veya 'memory' (süreç içi LRU, sadece tek süreçli
+    # kurulumlar için; gunicorn işçileri birbirinin geçersiz kılmasını görmez) (bkz. dashboard_cache.py)
+    DASHBOARD_CACHE_URL = os.environ.get('DASHBOARD_CACHE_URL')  # ör. redis://localhost:6379/0
+    DASHBOARD_CACHE_BACKEND = os.environ.get('DASHBOARD_CACHE_BACKEND', 'redis' if DASHBOARD_CACHE_URL else 'none')
+    DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 300))  # saniye
+    DASHBOARD_CACHE_MAX_ENTRIES = int(os.environ.get('DASHBOARD_CACHE_MAX_ENTRIES', 1000))
+
+    # DÖF durum sayaçlarının gece kontrolünde bulunan sapmalar onarılsın mı (bkz. status_counters.py)
+    STATUS_COUNTER_AUTO_REPAIR = os.environ.get('STATUS_COUNTER_AUTO_REPAIR', '1') == '1'
+    # DÖF günlük özet tablosunun gece kontrolünde bulunan sapmalar onarılsın mı (bkz. daily_facts.py)
+    DAILY_FACT_AUTO_REPAIR = os.environ.get('DAILY_FACT_AUTO_REPAIR', '1') == '1'
+
+    # Arka plan dışa aktarım işleri (bkz. export_jobs.py)
+    EXPORT_JOB_FOLDER = os.environ.get('EXPORT_JOB_FOLDER')  # Boşsa instance/exports; tüm sunucu süreçlerince paylaşılmalı
+    EXPORT_JOB_WORKERS = int(os.environ.get('EXPORT_JOB_WORKERS', 2))  # Süreç başına eşzamanlı iş
+    EXPORT_JOB_MAX_PENDING = int(os.environ.get('EXPORT_JOB_MAX_PENDING', 20))  # Kuyruktaki + çalışan iş sınırı
+    EXPORT_JOB_RETENTION = int(os.environ.get('EXPORT_JOB_RETENTION', 24 * 3600))  # Dosyaların saklanma süresi (saniye)
+    EXPORT_JOB_STALE_SECONDS = int(os.environ.get('EXPORT_JOB_STALE_SECONDS', 900))  # İlerleme yazmayan iş kayıp sayılır
+
+    # DÖF detay PDF/Excel belgesi önbelleği (bkz. detail_cache.py)
+    DETAIL_CACHE_FOLDER = os.environ.get('DETAIL_CACHE_FOLDER')  # Boşsa instance/detail_cache
+    DETAIL_CACHE_MAX_BYTES = int(os.environ.get('DETAIL_CACHE_MAX_BYTES', 256 * 1024 * 1024))  # 0: önbellek kapalı
+
+    # DÖF dosya paketi (ZIP): yazıcının önünde hazırlanan detay PDF sayısı (bkz. dossier_export.py)
+    DOSSIER_PREFETCH = int(os.environ.get('DOSSIER_PREFETCH', 4))
+
+    # DÖF analiz anlık görüntüsü, Parquet (bkz. analytics_snapshot.py)
+    ANALYTICS_SNAPSHOT_FOLDER = os.environ.get('ANALYTICS_SNAPSHOT_FOLDER')  # Boşsa instance/analytics; analiz araçlarının okuduğu dizin
+    ANALYTICS_SNAPSHOT_LAG = int(os.environ.get('ANALYTICS_SNAPSHOT_LAG', 120))  # Son bu kadar saniyede değişenler sonraki çalıştırmaya kalır
+    ANALYTICS_SNAPSHOT_COMPACT_FILES = int(os.environ.get('ANALYTICS_SNAPSHOT_COMPACT_FILES', 24))  # Bu kadar delta biriken bölüm sıkıştırılır; 0: kapalı
+
+    # WeasyPrint PDF işçileri (bkz. pdf_renderer.py)
+    PDF_RENDER_WORKERS = int(os.environ.get('PDF_RENDER_WORKERS', 1))  # Sunucu süreci başına işçi; 0: süreç içinde render
+    PDF_RENDER_TIMEOUT = int(os.environ.get('PDF_RENDER_TIMEOUT', 90))  # Tek PDF için azami süre (saniye)
+    PDF_RENDER_QUEUE_TIMEOUT = int(os.environ.get('PDF_RENDER_QUEUE_TIMEOUT', 60))  # Boş işçi bekleme süresi (saniye)
+    PDF_RENDER_MAX_JOBS = int(os.environ.get('PDF_RENDER_MAX_JOBS', 200))  # İşçi bu kadar PDF'ten sonra yenilenir
+    PDF_RENDER_RETRY_SECONDS = int(os.environ.get('PDF_RENDER_RETRY_SECONDS', 300))  # WeasyPrint yoksa fpdf modunda kalma süresi
+
+    # Test modu: ekranların bildirmediği ilişki erişimlerinde (N+1) hata fırlat (bkz. query_options.py)
+    RAISE_ON_LAZY_LOAD = os.environ.get('RAISE_ON_LAZY_LOAD', '0') == '1'
+
     # Oturum yapılandırması
     PERMANENT_SESSION_LIFETIME = timedelta(days=1)
     
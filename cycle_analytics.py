@@ -0,0 +1,384 @@
+"""
+DÖF Süre Analizleri
+-------------------
+dof_status_history tablosundan DÖF başına süre ölçümlerini (dof_cycle_metrics)
+ve ay x departman bazında ortalama/p50/p90 istatistiklerini (dof_cycle_stats)
+hesaplayan modül. Süreler veritabanında tarih çıkarma yapılmadan Python'da
+saniye olarak hesaplanır; sonuç veritabanı türünden bağımsızdır.
+
+Ölçümler (ilişkili DÖF'ler hariç):
+    - lead_time:        DÖF oluşturulmasından ilk kapatılmasına kadar geçen süre
+    - quality_approval: ilk Çözüldü/Tamamlandı durumundan ilk kapatılmaya kadar
+                        geçen süre (kalite onay süresi)
+    - time_in_status:   her durumda geçirilen süre (durum değişene kadar)
+
+Ölçümün ayı, ölçülen aralığın bittiği aydır. Departman, DÖF'ün atandığı
+departmandır (departmansız DÖF'ler için 0).
+
+Güncelleme:
+    - Zamanlayıcı her saat, en son işlenen durum geçmişi satırından (filigran,
+      analytics_watermarks tablosu) sonra geçişi olan DÖF'lerin ölçümlerini
+      yeniden hesaplar ve sadece etkilenen ayların istatistiklerini günceller;
+      iş süresi toplam geçmiş büyüklüğünden bağımsızdır. Atlanan çalıştırmaların
+      (deploy, yeniden başlatma) geçişleri bir sonraki çalıştırmada işlenir.
+      Filigrandan küçük id alıp geç commit edilen satırlar için son
+      ANALYTICS_LOOKBACK_HOURS saatteki geçişler de yeniden işlenir.
+    - Filigran satırı kilitlenerek okunur; aynı anda iki çalıştırma olmaz.
+    - run_cycle_analytics(full=True) tüm tabloları baştan oluşturur.
+
+Okumalar:
+    - monthly_cycle_stats() hazır aylık istatistikleri okur.
+    - cycle_time_summary() son N ayın ölçümlerinden (ay indeksiyle sınırlı)
+      ortalama ve yüzdelikleri hesaplar.
+
+Kullanım:
+    python cycle_analytics.py            # son geçişleri işle
+    python cycle_analytics.py --full     # tabloları baştan oluştur
+    python cycle_analytics.py --dry-run  # sadece işlenecek DÖF sayısını raporla
+"""
+
+import sys
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select, delete, func, or_
+
+from extensions import db
+from models import DOF, DOFStatus, DOFStatusHistory, DOFCycleMetric, DOFCycleStat, AnalyticsWatermark
+
+LEAD_TIME = 'lead_time'
+QUALITY_APPROVAL = 'quality_approval'
+TIME_IN_STATUS = 'time_in_status'
+
+METRICS = (LEAD_TIME, QUALITY_APPROVAL, TIME_IN_STATUS)
+
+# Kalite onayının beklendiği durumlar (onay süresi bu durumlara ilk girişte başlar)
+QUALITY_WAIT_STATUSES = (DOFStatus.RESOLVED, DOFStatus.COMPLETED)
+
+# Saatlik işin filigrana ek olarak geriye dönük taradığı süre (geç commit edilen geçişler için)
+ANALYTICS_LOOKBACK_HOURS = 2
+
+WATERMARK_NAME = 'cycle_analytics'
+
+# Tek seferde işlenen en fazla DÖF sayısı
+DOF_BATCH_SIZE = 500
+
+SECONDS_PER_DAY = 24 * 3600
+
+
+def _month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def percentile(sorted_values, fraction):
+    """
+    Sıralı değerlerin yüzdeliği (doğrusal ara değerleme)
+
+    Args:
+        sorted_values: Küçükten büyüğe sıralı sayılar
+        fraction: 0 ile 1 arası (ör. medyan için 0.5)
+    """
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    weight = position - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * weight
+
+
+def _summarize(values):
+    """Süre listesinin sayı, ortalama, p50 ve p90 değerleri (saniye)"""
+    values = sorted(values)
+    if not values:
+        return {'count': 0, 'avg': 0.0, 'p50': 0.0, 'p90': 0.0}
+    return {
+        'count': len(values),
+        'avg': sum(values) / len(values),
+        'p50': percentile(values, 0.5),
+        'p90': percentile(values, 0.9),
+    }
+
+
+def dof_metrics(dof_id, department_id, history):
+    """
+    Bir DÖF'ün süre ölçümleri
+
+    Args:
+        dof_id: DÖF ID
+        department_id: Atanan departman (None ise 0)
+        history: DÖF'ün geçmiş satırları, zamana göre sıralı (to_status, at)
+
+    Returns:
+        list: dof_cycle_metrics satırları (sözlük)
+    """
+    department_id = department_id or 0
+    rows = []
+
+    def add(metric, seconds, end, status=None):
+        if seconds < 0:
+            return
+        rows.append({
+            'dof_id': dof_id,
+            'department_id': department_id,
+            'metric': metric,
+            'status': status,
+            'month': _month_start(end),
+            'seconds': float(seconds),
+        })
+
+    # Durumda geçirilen süreler: her geçiş, bir önceki durumun bitişidir
+    for current, following in zip(history, history[1:]):
+        if current.to_status != following.to_status:
+            add(TIME_IN_STATUS, (following.at - current.at).total_seconds(), following.at, current.to_status)
+
+    if not history:
+        return rows
+
+    closed_at = next((row.at for row in history if row.to_status == DOFStatus.CLOSED), None)
+    if closed_at is None:
+        return rows
+
+    add(LEAD_TIME, (closed_at - history[0].at).total_seconds(), closed_at)
+
+    quality_start = next((row.at for row in history
+                          if row.to_status in QUALITY_WAIT_STATUSES and row.at <= closed_at), None)
+    if quality_start is not None:
+        add(QUALITY_APPROVAL, (closed_at - quality_start).total_seconds(), closed_at)
+
+    return rows
+
+
+def _compute_metrics(connection, dof_ids):
+    """Verilen DÖF'lerin ölçümleri (ilişkili ve silinmiş DÖF'ler için ölçüm üretilmez)"""
+    dofs = {row.id: row for row in connection.execute(
+        select(DOF.id, DOF.department_id).where(DOF.id.in_(dof_ids), DOF.is_related == False)
+    )}
+    if not dofs:
+        return []
+
+    histories = {}
+    for row in connection.execute(
+        select(DOFStatusHistory.dof_id, DOFStatusHistory.to_status, DOFStatusHistory.at)
+        .where(DOFStatusHistory.dof_id.in_(list(dofs)))
+        .order_by(DOFStatusHistory.dof_id, DOFStatusHistory.at, DOFStatusHistory.id)
+    ):
+        histories.setdefault(row.dof_id, []).append(row)
+
+    rows = []
+    for dof_id, history in histories.items():
+        rows.extend(dof_metrics(dof_id, dofs[dof_id].department_id, history))
+    return rows
+
+
+def _refresh_month_stats(connection, months, now):
+    """Verilen ayların istatistiklerini ölçümlerden yeniden oluşturur"""
+    for month in sorted(months):
+        groups = {}
+        for department_id, metric, status, seconds in connection.execute(
+            select(DOFCycleMetric.department_id, DOFCycleMetric.metric,
+                   DOFCycleMetric.status, DOFCycleMetric.seconds)
+            .where(DOFCycleMetric.month == month)
+        ):
+            # Departman kırılımı ve tüm departmanlar (NULL) için ayrı istatistik
+            groups.setdefault((department_id, metric, status), []).append(seconds)
+            groups.setdefault((None, metric, status), []).append(seconds)
+
+        connection.execute(delete(DOFCycleStat).where(DOFCycleStat.month == month))
+        rows = []
+        for (department_id, metric, status), values in groups.items():
+            summary = _summarize(values)
+            rows.append({
+                'month': month,
+                'department_id': department_id,
+                'metric': metric,
+                'status': status,
+                'dof_count': summary['count'],
+                'avg_seconds': summary['avg'],
+                'p50_seconds': summary['p50'],
+                'p90_seconds': summary['p90'],
+                'computed_at': now,
+            })
+        if rows:
+            connection.execute(DOFCycleStat.__table__.insert(), rows)
+
+
+def run_cycle_analytics(full=False, since=None, dry_run=False):
+    """
+    Süre ölçümlerini ve aylık istatistikleri günceller
+
+    Args:
+        full: True ise tüm DÖF'ler işlenir ve tablolar baştan oluşturulur
+        since: Filigrana ek olarak bu zamandan sonra durum geçişi olan DÖF'ler
+               de işlenir (varsayılan: son ANALYTICS_LOOKBACK_HOURS saat)
+        dry_run: True ise tablolar ve filigran değiştirilmez
+
+    Returns:
+        dict: İşlenen DÖF, yazılan ölçüm ve güncellenen ay sayıları
+    """
+    now = datetime.now()
+    try:
+        # Filigran satırı kilitlenir: eşzamanlı bir çalıştırma bu çalıştırma bitene kadar bekler
+        watermark = db.session.execute(
+            select(AnalyticsWatermark).where(AnalyticsWatermark.name == WATERMARK_NAME).with_for_update()
+        ).scalar_one_or_none()
+        upper = db.session.execute(select(func.max(DOFStatusHistory.id))).scalar() or 0
+
+        if full:
+            dof_ids = [row[0] for row in db.session.execute(
+                select(DOFStatusHistory.dof_id).distinct().order_by(DOFStatusHistory.dof_id)
+            )]
+        else:
+            since = since or now - timedelta(hours=ANALYTICS_LOOKBACK_HOURS)
+            condition = DOFStatusHistory.at >= since
+            if watermark is not None:
+                condition = or_(condition, DOFStatusHistory.id.between(watermark.last_id + 1, upper))
+            dof_ids = [row[0] for row in db.session.execute(
+                select(DOFStatusHistory.dof_id).where(condition)
+                .distinct().order_by(DOFStatusHistory.dof_id)
+            )]
+    except Exception:
+        db.session.rollback()
+        raise
+
+    result = {'dofs': len(dof_ids), 'metrics': 0, 'months': 0, 'full': full,
+              'since_id': watermark.last_id if watermark is not None else None, 'until_id': upper}
+    if dry_run:
+        db.session.rollback()
+        return result
+
+    try:
+        connection = db.session.connection()
+        months = set()
+        if full:
+            connection.execute(delete(DOFCycleMetric))
+            connection.execute(delete(DOFCycleStat))
+
+        for start in range(0, len(dof_ids), DOF_BATCH_SIZE):
+            batch = dof_ids[start:start + DOF_BATCH_SIZE]
+            if not full:
+                # Eski ölçümlerin ayları da yeniden hesaplanmalı
+                months.update(row[0] for row in connection.execute(
+                    select(DOFCycleMetric.month).where(DOFCycleMetric.dof_id.in_(batch)).distinct()
+                ))
+                connection.execute(delete(DOFCycleMetric).where(DOFCycleMetric.dof_id.in_(batch)))
+
+            rows = _compute_metrics(connection, batch)
+            if rows:
+                connection.execute(DOFCycleMetric.__table__.insert(), rows)
+            months.update(row['month'] for row in rows)
+            result['metrics'] += len(rows)
+
+        _refresh_month_stats(connection, months, now)
+        result['months'] = len(months)
+
+        if watermark is None:
+            db.session.add(AnalyticsWatermark(name=WATERMARK_NAME, last_id=upper))
+        else:
+            watermark.last_id = max(watermark.last_id, upper)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return result
+
+
+def ensure_cycle_analytics():
+    """Geçmiş var ancak istatistik tablosu boşsa (ilk kurulum) tabloları oluşturur"""
+    if DOFCycleStat.query.first() is None and DOFStatusHistory.query.first() is not None:
+        return run_cycle_analytics(full=True)
+    return None
+
+
+def cycle_time_summary(metric, months=12, department_id=None, status=None, today=None):
+    """
+    Son `months` takvim ayındaki süre ölçümlerinin özeti (gün cinsinden)
+
+    Args:
+        metric: LEAD_TIME, QUALITY_APPROVAL veya TIME_IN_STATUS
+        months: Geriye dönük takvim ayı sayısı (içinde bulunulan ay dahil)
+        department_id: Verilirse sadece bu departman
+        status: TIME_IN_STATUS için durum filtresi
+
+    Returns:
+        dict: count, avg, p50, p90 (gün)
+    """
+    from daily_facts import month_ranges
+
+    first_month = month_ranges(months, today)[0][1]
+    query = select(DOFCycleMetric.seconds).where(
+        DOFCycleMetric.month >= first_month,
+        DOFCycleMetric.metric == metric,
+    )
+    if department_id is not None:
+        query = query.where(DOFCycleMetric.department_id == department_id)
+    if status is not None:
+        query = query.where(DOFCycleMetric.status == status)
+
+    summary = _summarize([row[0] for row in db.session.execute(query)])
+    return {
+        'count': summary['count'],
+        'avg': round(summary['avg'] / SECONDS_PER_DAY, 1),
+        'p50': round(summary['p50'] / SECONDS_PER_DAY, 1),
+        'p90': round(summary['p90'] / SECONDS_PER_DAY, 1),
+    }
+
+
+def monthly_cycle_stats(month_list, metric, department_id=None, status=None):
+    """
+    Aylık süre istatistikleri (gün cinsinden), hazır istatistik tablosundan
+
+    Args:
+        month_list: daily_facts.month_ranges() sonucu
+        metric: LEAD_TIME, QUALITY_APPROVAL veya TIME_IN_STATUS
+        department_id: Verilmezse tüm departmanlar
+        status: TIME_IN_STATUS için durum filtresi
+
+    Returns:
+        dict: avg, p50, p90 ve count listeleri (month_list sırasıyla)
+    """
+    stats = {}
+    if month_list:
+        query = DOFCycleStat.query.filter(
+            DOFCycleStat.month >= month_list[0][1],
+            DOFCycleStat.month < month_list[-1][2],
+            DOFCycleStat.metric == metric,
+            DOFCycleStat.department_id == department_id if department_id is not None
+            else DOFCycleStat.department_id.is_(None),
+            DOFCycleStat.status == status if status is not None else DOFCycleStat.status.is_(None),
+        )
+        stats = {row.month: row for row in query}
+
+    result = {'avg': [], 'p50': [], 'p90': [], 'count': []}
+    for _, start, _ in month_list:
+        row = stats.get(start)
+        result['avg'].append(round(row.avg_seconds / SECONDS_PER_DAY, 1) if row else 0)
+        result['p50'].append(round(row.p50_seconds / SECONDS_PER_DAY, 1) if row else 0)
+        result['p90'].append(round(row.p90_seconds / SECONDS_PER_DAY, 1) if row else 0)
+        result['count'].append(row.dof_count if row else 0)
+    return result
+
+
+# Bu script doğrudan çalıştırıldığında
+if __name__ == "__main__":
+    from app import app
+
+    full = '--full' in sys.argv
+    dry_run = '--dry-run' in sys.argv
+    with app.app_context():
+        print("===== DÖF SÜRE ANALİZLERİ =====")
+        print(f"Başlangıç: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}")
+
+        result = run_cycle_analytics(full=full, dry_run=dry_run)
+
+        print(f"İşlenecek DÖF: {result['dofs']} (durum geçmişi id {result['since_id']} -> {result['until_id']})")
+        if dry_run:
+            print("--dry-run: tablolar değiştirilmedi.")
+        else:
+            print(f"{result['metrics']} ölçüm yazıldı, {result['months']} ayın istatistiği güncellendi.")
+            for metric in (LEAD_TIME, QUALITY_APPROVAL):
+                summary = cycle_time_summary(metric)
+                print(f"{metric}: {summary['count']} DÖF, ort. {summary['avg']} gün, "
+                      f"p50 {summary['p50']} gün, p90 {summary['p90']} gün")
+
+        print(f"Bitiş: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}")
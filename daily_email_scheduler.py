@@ -156,6 +156,8 @@ def get_dof_statistics(department_ids):
         # Lazy import to avoid circular import
         from models import DOF, DOFStatus, DOFAction
         from extensions import db
+        from sqlalchemy import and_
+        from stats_utils import count_dof_statuses, STATUS_KEYS
         
         if not department_ids:
             return {}
@@ -163,49 +165,41 @@ def get_dof_statistics(department_ids):
         today = datetime.now()
         week_ago = today - timedelta(days=7)
         
-        # İlişkili DÖF'leri filtrele (başlığında "[İlişkili #" olan)
-        related_dof_filter = ~DOF.title.like("[İlişkili #%")
+        # İlişkili DÖF'leri filtrele (is_related bayrağı)
+        related_dof_filter = DOF.is_related == False
         
-        # Açık DÖF'ler
-        open_dofs = DOF.query.filter(
+        next_week = today + timedelta(days=7)
+        scope_query = DOF.query.filter(
             DOF.department_id.in_(department_ids),
-            DOF.status != DOFStatus.CLOSED,
             related_dof_filter
-        ).all()
+        )
         
-        # Kapalı DÖF'ler (son 7 gün) - updated_at ile kontrol et
-        closed_dofs = DOF.query.filter(
-            DOF.department_id.in_(department_ids),
-            DOF.status == DOFStatus.CLOSED,
-            DOF.updated_at >= week_ago,
-            related_dof_filter
-        ).all()
+        # Açık / kapatılan / termin sayaçları tek bir toplama sorgusu ile hesaplanır
+        is_open = DOF.status != DOFStatus.CLOSED
+        upcoming_filter = [is_open, DOF.due_date.isnot(None), DOF.due_date <= next_week, DOF.due_date >= today]
+        overdue_filter = [is_open, DOF.due_date.isnot(None), DOF.due_date < today]
+        
+        counts = count_dof_statuses(scope_query, extra_counts={
+            'open': is_open,
+            # Kapalı DÖF'ler (son 7 gün) - updated_at ile kontrol et
+            'closed_week': and_(DOF.status == DOFStatus.CLOSED, DOF.updated_at >= week_ago),
+            # Yaklaşan termin tarihleri (gelecek 7 gün) - due_date kullan
+            'upcoming': and_(*upcoming_filter),
+            # Geçmiş termin tarihleri - due_date kullan
+            'overdue': and_(*overdue_filter),
+        })
         
-        # Durum dağılımı
+        # Durum dağılımı (açık DÖF'ler)
         status_distribution = {}
-        for dof in open_dofs:
-            status_name = DOFStatus.get_label(dof.status)
-            status_distribution[status_name] = status_distribution.get(status_name, 0) + 1
+        for status, key in STATUS_KEYS.items():
+            if status != DOFStatus.CLOSED and counts[key]:
+                status_distribution[DOFStatus.get_label(status)] = counts[key]
         
-        # Yaklaşan termin tarihleri (gelecek 7 gün) - due_date kullan
-        next_week = today + timedelta(days=7)
-        upcoming_deadlines = DOF.query.filter(
-            DOF.department_id.in_(department_ids),
-            DOF.status != DOFStatus.CLOSED,
-            DOF.due_date.isnot(None),
-            DOF.due_date <= next_week,
-            DOF.due_date >= today,
-            related_dof_filter
-        ).all()
-        
-        # Geçmiş termin tarihleri - due_date kullan
-        overdue_dofs = DOF.query.filter(
-            DOF.department_id.in_(department_ids),
-            DOF.status != DOFStatus.CLOSED,
-            DOF.due_date.isnot(None),
-            DOF.due_date < today,
-            related_dof_filter
-        ).all()
+        # Raporda yalnızca ilk 5 termin gösterildiği için listeler sınırlı çekilir
+        upcoming_deadlines = scope_query.filter(*upcoming_filter)\
+                                        .order_by(DOF.due_date.asc()).limit(5).all()
+        overdue_dofs = scope_query.filter(*overdue_filter)\
+                                  .order_by(DOF.due_date.asc()).limit(5).all()
         
         # Son aksiyonlar (son 7 gün)
         recent_actions = db.session.query(DOFAction).join(DOF).filter(
@@ -215,16 +209,14 @@ def get_dof_statistics(department_ids):
         ).order_by(DOFAction.created_at.desc()).limit(10).all()
         
         return {
-            'open_dofs': open_dofs,
-            'closed_dofs': closed_dofs,
             'status_distribution': status_distribution,
             'upcoming_deadlines': upcoming_deadlines,
             'overdue_dofs': overdue_dofs,
             'recent_actions': recent_actions,
-            'total_open': len(open_dofs),
-            'total_closed_week': len(closed_dofs),
-            'total_upcoming': len(upcoming_deadlines),
-            'total_overdue': len(overdue_dofs)
+            'total_open': counts['open'],
+            'total_closed_week': counts['closed_week'],
+            'total_upcoming': counts['upcoming'],
+            'total_overdue': counts['overdue']
         }
         
     except Exception as e:
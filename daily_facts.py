@@ -0,0 +1,445 @@
+"""
+DÖF Günlük Özet Tablosu
+-----------------------
+dof_daily_facts tablosunu (tarih, departman, kaynak departman, tip, kaynak,
+durum, ilişkili) anahtarıyla güncel tutan ve trend grafiklerinin aylık
+sayılarını bu tablodan okuyan modül.
+
+Her satır o günün üç sayısını tutar:
+    - opened:  o gün açılan DÖF'ler (created_at)
+    - closed:  o gün kapatılan DÖF'ler (closed_at)
+    - overdue: termini o gün olup zamanında kapanmayan DÖF'ler (deadline);
+               termini bugün veya ileride olan günler için 0
+
+Güncelleme:
+    - Her session flush'ında eklenen, silinen ve tarih/durum/departman alanı
+      değişen DÖF'lerin eski katkısı düşülür, yeni katkısı eklenir; farklar
+      aynı transaction içinde upsert edilir (status_counters ile aynı yöntem).
+      Eski değerler DÖF satırları kilitlenerek okunur; aynı günü etkileyen
+      eşzamanlı transaction'lar birbirinin sayısını ezmez.
+    - Zamanlayıcı her gece son FACT_REFRESH_DAYS günü yeniden hesaplar; böylece
+      termini geçen günlerin overdue sayısı kesinleşir. Ardından
+      check_daily_facts() tüm tabloyu DÖF tablosuyla karşılaştırır, sapmaları
+      loglar ve DAILY_FACT_AUTO_REPAIR açıksa tabloyu yeniden oluşturur.
+    - rebuild_daily_facts() tabloyu baştan oluşturur ve sapmaları raporlar.
+
+Okumalar takvim ayları üzerinden yapılır (month_ranges) ve DÖF geçmişinin
+büyüklüğünden bağımsız olarak sadece istenen ayların günlük satırlarını okur.
+
+Kullanım:
+    python daily_facts.py            # tabloyu yeniden oluştur
+    python daily_facts.py --dry-run  # sadece sapmaları raporla
+"""
+
+import sys
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import event, select, delete, func, case, and_, or_, inspect as sa_inspect
+
+from extensions import db
+from models import DOF, DOFStatus, DOFDailyFact
+
+# Gün anahtarını ve sayıları etkileyen DÖF alanları
+TRACKED_ATTRIBUTES = ('created_at', 'closed_at', 'deadline', 'status', 'department_id',
+                      'source_department_id', 'dof_type', 'dof_source', 'is_related')
+
+# Gün içeren DÖF alanları (bir DÖF en fazla bu üç günü etkiler)
+DATE_ATTRIBUTES = ('created_at', 'closed_at', 'deadline')
+
+# Gece çalışan işin yeniden hesapladığı gün sayısı
+FACT_REFRESH_DAYS = 3
+
+# Tek sorguda yeniden hesaplanan en fazla gün sayısı
+DAY_BATCH_SIZE = 50
+
+FACT_DIMENSIONS = ('department_id', 'source_department_id', 'dof_type', 'dof_source', 'status', 'is_related')
+
+_PENDING_DELTAS_KEY = 'dof_daily_fact_deltas'
+
+_listeners_registered = False
+
+
+def month_ranges(count, today=None):
+    """
+    Son `count` takvim ayı - eskiden yeniye (etiket, ay başı, sonraki ay başı)
+
+    Ay başı ve sonraki ay başı date nesneleridir; aralık [başlangıç, bitiş) şeklindedir.
+    """
+    today = today or date.today()
+    year, month = today.year, today.month
+    months = []
+    for _ in range(count):
+        start = date(year, month, 1)
+        end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+        months.append((start.strftime('%B %Y'), start, end))
+        year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+    months.reverse()
+    return months
+
+
+def _as_date(value):
+    """DATE() sonucunu (MySQL: date, SQLite: 'YYYY-MM-DD') date nesnesine çevirir"""
+    if value is None or isinstance(value, date) and not isinstance(value, datetime):
+        return value
+    if isinstance(value, datetime):
+        return value.date()
+    return date.fromisoformat(str(value)[:10])
+
+
+def _day_filter(column, days):
+    """Kolonun verilen günlerden birine düştüğü DÖF'ler (indeks dostu aralık karşılaştırması)"""
+    if days is None:
+        return column.isnot(None)
+    return or_(*[
+        and_(column >= datetime.combine(day, datetime.min.time()),
+             column < datetime.combine(day + timedelta(days=1), datetime.min.time()))
+        for day in days
+    ])
+
+
+def _fact_key(day, department_id, source_department_id, dof_type, dof_source, status, is_related):
+    return (day, department_id or 0, source_department_id or 0, dof_type or 0, dof_source or 0,
+            status or 0, bool(is_related))
+
+
+def compute_facts(connection, days=None, today=None):
+    """
+    Verilen günlerin (None: tüm geçmiş) özet satırlarını DÖF tablosundan hesaplar
+
+    Returns:
+        dict: fact anahtarı -> [opened, closed, overdue]
+    """
+    today = today or date.today()
+    today_start = datetime.combine(today, datetime.min.time())
+    dimensions = [DOF.department_id, DOF.source_department_id, DOF.dof_type,
+                  DOF.dof_source, DOF.status, DOF.is_related]
+
+    # Zamanında kapanmayan: hâlâ açık veya termin geçtikten sonra kapatılmış
+    not_closed_in_time = or_(
+        and_(DOF.status.notin_([DOFStatus.CLOSED, DOFStatus.REJECTED]), DOF.closed_at.is_(None)),
+        DOF.closed_at > DOF.deadline,
+    )
+    measures = (
+        (0, DOF.created_at, None),
+        (1, DOF.closed_at, None),
+        (2, DOF.deadline, and_(DOF.deadline < today_start, not_closed_in_time)),
+    )
+
+    facts = {}
+    for index, column, condition in measures:
+        day = func.date(column)
+        stmt = select(day, *dimensions, func.count(DOF.id)).where(_day_filter(column, days))
+        if condition is not None:
+            stmt = stmt.where(condition)
+        for row in connection.execute(stmt.group_by(day, *dimensions)):
+            key = _fact_key(_as_date(row[0]), *row[1:7])
+            facts.setdefault(key, [0, 0, 0])[index] += row[7]
+    return facts
+
+
+def _fact_rows(facts, now):
+    rows = []
+    for key, (opened, closed, overdue) in facts.items():
+        if opened or closed or overdue:
+            row = dict(zip(FACT_DIMENSIONS, key[1:]))
+            row.update(fact_date=key[0], opened=opened, closed=closed, overdue=overdue, updated_at=now)
+            rows.append(row)
+    return rows
+
+
+def refresh_fact_days(connection, days, today=None):
+    """Verilen günlerin özet satırlarını verilen bağlantı (transaction) üzerinde yeniden yazar"""
+    days = sorted({day for day in days if day is not None})
+    table = DOFDailyFact.__table__
+    now = datetime.now()
+    written = 0
+
+    for start in range(0, len(days), DAY_BATCH_SIZE):
+        batch = days[start:start + DAY_BATCH_SIZE]
+        # Önce silinir: silme, günlerin satırlarını kilitler ve bu günlere fark yazan
+        # transaction'ların commit etmesini bekler; sayılar ondan sonra okunur
+        connection.execute(delete(table).where(table.c.fact_date.in_(batch)))
+        facts = compute_facts(connection, batch, today)
+        rows = _fact_rows(facts, now)
+        if rows:
+            connection.execute(table.insert(), rows)
+        written += len(rows)
+
+    return written
+
+
+def _is_overdue(status, closed_at, deadline, today_start):
+    """compute_facts'taki overdue koşulunun tek DÖF için karşılığı"""
+    if deadline is None or deadline >= today_start:
+        return False
+    if closed_at is None:
+        return status is not None and status not in (DOFStatus.CLOSED, DOFStatus.REJECTED)
+    return closed_at > deadline
+
+
+def _add_contribution(deltas, values, sign, today_start):
+    """Bir DÖF'ün (değerleri: kolon adı -> değer) özet satırlarına katkısını ekler"""
+    dimensions = [values[name] for name in FACT_DIMENSIONS]
+    measures = (
+        (0, values['created_at']),
+        (1, values['closed_at']),
+        (2, values['deadline'] if _is_overdue(values['status'], values['closed_at'],
+                                               values['deadline'], today_start) else None),
+    )
+    for index, value in measures:
+        if value is not None:
+            deltas[(_fact_key(_as_date(value), *dimensions), index)] += sign
+
+
+def _changed_dofs(session):
+    """Flush edilecek, özet tabloyu etkileyen DÖF değişiklikleri (değişen, silinen)"""
+    changed = []
+    for obj in session.dirty:
+        if isinstance(obj, DOF) and obj.id is not None:
+            state = sa_inspect(obj)
+            if any(state.attrs[name].history.has_changes() for name in TRACKED_ATTRIBUTES):
+                changed.append(obj)
+    deleted = [obj for obj in session.deleted if isinstance(obj, DOF) and obj.id is not None]
+    return changed, deleted
+
+
+def _upsert_statement(connection, values):
+    """Veritabanı türüne göre 'ekle ya da artır' ifadesi üretir"""
+    table = DOFDailyFact.__table__
+    dialect = connection.dialect.name
+
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table).values(values)
+        return stmt.on_duplicate_key_update(
+            opened=table.c.opened + stmt.inserted.opened,
+            closed=table.c.closed + stmt.inserted.closed,
+            overdue=table.c.overdue + stmt.inserted.overdue,
+            updated_at=stmt.inserted.updated_at
+        )
+
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(table).values(values)
+    return stmt.on_conflict_do_update(
+        index_elements=['fact_date'] + list(FACT_DIMENSIONS),
+        set_={
+            'opened': table.c.opened + stmt.excluded.opened,
+            'closed': table.c.closed + stmt.excluded.closed,
+            'overdue': table.c.overdue + stmt.excluded.overdue,
+            'updated_at': stmt.excluded.updated_at,
+        }
+    )
+
+
+def apply_fact_deltas(connection, deltas):
+    """Özet satır farklarını verilen bağlantı (transaction) üzerinde uygular"""
+    facts = {}
+    for (key, index), delta in deltas.items():
+        if delta:
+            facts.setdefault(key, [0, 0, 0])[index] += delta
+    if not facts:
+        return
+    now = datetime.now()
+    values = []
+    # Anahtar sırasıyla yazılır: eşzamanlı transaction'lar satırları aynı sırada kilitler
+    for key, (opened, closed, overdue) in sorted(facts.items()):
+        row = dict(zip(FACT_DIMENSIONS, key[1:]))
+        row.update(fact_date=key[0], opened=opened, closed=closed, overdue=overdue, updated_at=now)
+        values.append(row)
+    connection.execute(_upsert_statement(connection, values))
+
+
+def _before_flush(session, flush_context, instances):
+    # Eski katkılar veritabanından okunur; sayılar veritabanındaki hali yansıtır.
+    # Satırlar kilitlenerek okunur: aynı DÖF'ü değiştiren eşzamanlı transaction
+    # commit edene kadar beklenir ve onun yazdığı değerler eski değer kabul edilir.
+    changed, deleted = _changed_dofs(session)
+    if not (changed or deleted):
+        return
+
+    columns = [getattr(DOF, name) for name in DATE_ATTRIBUTES + FACT_DIMENSIONS]
+    rows = session.connection().execute(
+        select(*columns)
+        .where(DOF.id.in_([obj.id for obj in changed + deleted]))
+        .with_for_update()
+    ).all()
+    today_start = datetime.combine(date.today(), datetime.min.time())
+    deltas = session.info.setdefault(_PENDING_DELTAS_KEY, Counter())
+    for row in rows:
+        _add_contribution(deltas, row._mapping, -1, today_start)
+
+
+def _after_flush(session, flush_context):
+    # Yeni katkılar flush sonrasında eklenir (yeni DÖF'lerin created_at/status varsayılanları dolmuş olur)
+    deltas = session.info.pop(_PENDING_DELTAS_KEY, Counter())
+
+    changed, _ = _changed_dofs(session)
+    today_start = datetime.combine(date.today(), datetime.min.time())
+    for obj in [obj for obj in session.new if isinstance(obj, DOF)] + changed:
+        values = {name: getattr(obj, name) for name in DATE_ATTRIBUTES + FACT_DIMENSIONS}
+        _add_contribution(deltas, values, 1, today_start)
+
+    if deltas:
+        apply_fact_deltas(session.connection(), deltas)
+
+
+def register_daily_fact_listeners():
+    """Flush dinleyicilerini uygulama oturumuna bir kez bağlar"""
+    global _listeners_registered
+    if _listeners_registered:
+        return
+    event.listen(db.session, 'before_flush', _before_flush)
+    event.listen(db.session, 'after_flush', _after_flush)
+    _listeners_registered = True
+
+
+def refresh_recent_facts(days=FACT_REFRESH_DAYS):
+    """Son `days` günün özet satırlarını yeniden hesaplar (zamanlayıcı işi)"""
+    today = date.today()
+    try:
+        written = refresh_fact_days(db.session.connection(),
+                                    [today - timedelta(days=offset) for offset in range(days + 1)])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return written
+
+
+def rebuild_daily_facts(dry_run=False):
+    """
+    Özet tabloyu DÖF tablosundan yeniden hesaplar ve sapmaları raporlar
+
+    Args:
+        dry_run: True ise sadece sapmalar raporlanır, tablo değiştirilmez
+
+    Returns:
+        dict: Hesaplanan satır sayısı ve sapma bulunan günler
+    """
+    connection = db.session.connection()
+    actual = {key: tuple(values) for key, values in compute_facts(connection).items() if any(values)}
+    stored = {
+        _fact_key(row.fact_date, row.department_id, row.source_department_id, row.dof_type,
+                  row.dof_source, row.status, row.is_related): (row.opened, row.closed, row.overdue)
+        for row in DOFDailyFact.query.all()
+        if row.opened or row.closed or row.overdue
+    }
+
+    drift_days = sorted({key[0] for key in set(actual) | set(stored) if actual.get(key) != stored.get(key)})
+
+    if drift_days and not dry_run:
+        try:
+            connection.execute(delete(DOFDailyFact.__table__))
+            rows = _fact_rows(actual, datetime.now())
+            if rows:
+                connection.execute(DOFDailyFact.__table__.insert(), rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    return {
+        'total_rows': len(actual),
+        'drift_days': drift_days,
+        'rebuilt': bool(drift_days) and not dry_run,
+    }
+
+
+def check_daily_facts():
+    """
+    Özet tabloyu DÖF tablosuyla karşılaştırır (zamanlanmış görev)
+
+    Sapma varsa loglanır; DAILY_FACT_AUTO_REPAIR açıksa tablo yeniden
+    oluşturulur.
+
+    Returns:
+        dict: rebuild_daily_facts sonucu
+    """
+    from flask import current_app
+
+    result = rebuild_daily_facts(dry_run=True)
+    if not result['drift_days']:
+        current_app.logger.info(f"DÖF günlük özet tablosu tutarlı: {result['total_rows']} satır")
+        return result
+
+    days = ', '.join(day.strftime('%d.%m.%Y') for day in result['drift_days'][:20])
+    current_app.logger.warning(f"DÖF günlük özet tablosunda {len(result['drift_days'])} günde sapma var: {days}")
+
+    if current_app.config.get('DAILY_FACT_AUTO_REPAIR', True):
+        result = rebuild_daily_facts()
+        current_app.logger.warning("DÖF günlük özet tablosu yeniden oluşturuldu")
+    else:
+        current_app.logger.warning("DÖF günlük özet tablosu otomatik onarımı kapalı; "
+                                   "python daily_facts.py ile onarılabilir")
+    return result
+
+
+def ensure_daily_facts():
+    """Özet tablo boşsa (ilk kurulum) DÖF tablosundan doldurur"""
+    if DOFDailyFact.query.first() is None and DOF.query.first() is not None:
+        return rebuild_daily_facts()
+    return None
+
+
+def monthly_fact_counts(months, measure='opened', department_id=None, status=None,
+                        include_related=True, date_range=None):
+    """
+    Takvim ayları için özet tablodan toplam sayılar
+
+    Args:
+        months: month_ranges() sonucu
+        measure: 'opened', 'closed' veya 'overdue'
+        department_id: Atanan departman filtresi
+        status: Güncel durum filtresi
+        include_related: False ise ilişkili DÖF'ler hariç
+        date_range: (başlangıç, bitiş) date aralığı filtresi - bitiş dahil
+
+    Returns:
+        list: Her ay için sayı (months sırasıyla)
+    """
+    value = getattr(DOFDailyFact, measure)
+    columns = [
+        func.sum(case((and_(DOFDailyFact.fact_date >= start, DOFDailyFact.fact_date < end), value), else_=0))
+        for _, start, end in months
+    ]
+    query = db.session.query(*columns).filter(DOFDailyFact.fact_date >= months[0][1],
+                                              DOFDailyFact.fact_date < months[-1][2])
+    if department_id is not None:
+        query = query.filter(DOFDailyFact.department_id == department_id)
+    if status is not None:
+        query = query.filter(DOFDailyFact.status == status)
+    if not include_related:
+        query = query.filter(DOFDailyFact.is_related == False)
+    if date_range is not None:
+        query = query.filter(DOFDailyFact.fact_date.between(*date_range))
+
+    return [int(count or 0) for count in query.one()]
+
+
+# Bu script doğrudan çalıştırıldığında
+if __name__ == "__main__":
+    from app import app
+
+    dry_run = '--dry-run' in sys.argv
+    with app.app_context():
+        print("===== DÖF GÜNLÜK ÖZET TABLOSU MUTABAKATI =====")
+        print(f"Başlangıç: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}")
+
+        result = rebuild_daily_facts(dry_run=dry_run)
+
+        print(f"Hesaplanan satır: {result['total_rows']}")
+        print(f"Sapma bulunan gün: {len(result['drift_days'])}")
+        for day in result['drift_days'][:20]:
+            print(f"  {day.strftime('%d.%m.%Y')}")
+
+        if result['rebuilt']:
+            print("Özet tablo yeniden oluşturuldu.")
+        elif dry_run and result['drift_days']:
+            print("--dry-run: özet tablo değiştirilmedi.")
+
+        print(f"Bitiş: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}")
+        sys.exit(1 if result['drift_days'] and dry_run else 0)
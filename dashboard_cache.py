@@ -0,0 +1,398 @@
+"""
+Dashboard Önbelleği
+-------------------
+DashboardService'in DÖF'e bağlı sonuçlarını (durum sayaçları, kalite sayaçları,
+widget DÖF listeleri, okunmamış bildirimler) kullanıcı bazında saklayan modül.
+
+- Anahtar: (kullanıcı, rol, departman, seçili departmanlar)
+- Değer: sadece sayılar ve ID listeleri; DÖF ve bildirim nesneleri isabet
+  durumunda ID ile tek sorguda yeniden yüklenir. Böylece değer paylaşımlı
+  altyapıda JSON olarak saklanabilir ve şablon her zaman güncel satırı görür.
+- Geçersiz kılma kuşak (generation) sayaçlarıyla yapılır. Her kayıt bağlı
+  olduğu kuşakların değerini tutar:
+      all          : tüm DÖF'leri gören roller (admin, kalite yöneticisi)
+      dept:<id>    : kullanıcının görünürlük kapsamındaki departmanlar
+      user:<id>    : kullanıcının açtığı/atandığı DÖF'ler ve bildirimleri
+      auth         : yetki özneleri (bkz. auth_principal.py)
+  DÖF eklendiğinde, silindiğinde veya durum/departman/atama/termin alanları
+  değiştiğinde eski ve yeni değerlerin kuşakları; bildirim değiştiğinde
+  kullanıcının kuşağı commit sonrasında artırılır. Kapsam dışındaki
+  değişiklikler kullanıcının kaydını geçersiz kılmaz.
+- Altyapı DASHBOARD_CACHE_BACKEND ayarıyla seçilir:
+    redis  : paylaşımlı önbellek (DASHBOARD_CACHE_URL, redis paketi gerekir;
+             URL verilmişse varsayılan)
+    none   : önbellek kapalı (URL verilmemişse varsayılan)
+    memory : süreç içi LRU + TTL; sadece tek süreçli kurulumlar (geliştirme
+             sunucusu) için. Kuşaklar sadece yazan süreçte artar; gunicorn'un
+             diğer işçileri TTL boyunca eski sayaçları gösterirdi.
+  Redis'e bağlanılamazsa önbellek kapatılır (süreç içi önbelleğe düşülmez).
+- İsabet/ıska sayaçları /admin/cache sayfasında görüntülenir (süreç bazında).
+
+Kullanım:
+    from dashboard_cache import lookup, store
+
+    payload, generations = lookup(key, dependencies)
+    if payload is None:
+        payload = ...
+        store(key, generations, payload)
+"""
+
+import json
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from sqlalchemy import event, select, inspect as sa_inspect
+
+from extensions import db
+from models import DOF, Notification
+
+# Kapsamı etkileyen DÖF alanları (başlık gibi alanlar isabette zaten güncel yüklenir)
+TRACKED_ATTRIBUTES = ('status', 'department_id', 'source_department_id', 'assigned_to',
+                      'created_by', 'deadline', 'created_at', 'is_related')
+
+DEFAULT_TTL = 300
+DEFAULT_MAX_ENTRIES = 1000
+
+KEY_PREFIX = 'dofdash:'
+
+_PENDING_BUMP_KEY = 'dashboard_cache_bump'
+
+_listeners_registered = False
+_cache = None
+_cache_ready = False
+_cache_lock = threading.Lock()
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+class MemoryCacheBackend:
+    """Süreç içi LRU önbellek; kayıtlar TTL sonunda veya en eski kullanımdan itibaren atılır"""
+    name = 'memory'
+    # Kayıtlar ve kuşaklar sadece bu süreçte geçerlidir (diğer gunicorn işçileri görmez);
+    # bu yüzden sadece tek süreçli kurulumlarda seçilmelidir
+    shared = False
+
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # Kuşak sayaçları LRU dışında tutulur; atılırlarsa eski kayıtlar yanlışlıkla geçerli sayılabilir
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                _count('evictions')
+
+    def get_generations(self, names):
+        with self._lock:
+            return {name: self._generations.get(name, 0) for name in names}
+
+    def bump_generations(self, names):
+        with self._lock:
+            for name in names:
+                self._generations[name] = self._generations.get(name, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def size(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class RedisCacheBackend:
+    """Uygulama süreçleri arasında paylaşılan Redis önbelleği (değerler JSON)"""
+    name = 'redis'
+    shared = True
+
+    def __init__(self, url, ttl=DEFAULT_TTL):
+        import redis
+
+        self.ttl = ttl
+        self.max_entries = None
+        self._client = redis.Redis.from_url(url)
+        self._client.ping()
+
+    def get(self, key):
+        raw = self._client.get(KEY_PREFIX + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value):
+        self._client.set(KEY_PREFIX + key, json.dumps(value), ex=self.ttl)
+
+    def get_generations(self, names):
+        values = self._client.mget([f'{KEY_PREFIX}gen:{name}' for name in names]) if names else []
+        return {name: int(value or 0) for name, value in zip(names, values)}
+
+    def bump_generations(self, names):
+        pipeline = self._client.pipeline(transaction=False)
+        for name in names:
+            pipeline.incr(f'{KEY_PREFIX}gen:{name}')
+        pipeline.execute()
+
+    def clear(self):
+        # Kuşak sayaçları korunur
+        keys = [key for key in self._client.scan_iter(f'{KEY_PREFIX}dashboard:*')]
+        if keys:
+            self._client.delete(*keys)
+
+    def size(self):
+        return sum(1 for _ in self._client.scan_iter(f'{KEY_PREFIX}dashboard:*'))
+
+
+def get_cache():
+    """DASHBOARD_CACHE_BACKEND ayarına göre önbellek altyapısını döndürür (kapalıysa None)"""
+    global _cache, _cache_ready
+    from flask import current_app
+
+    configured = (current_app.config.get('DASHBOARD_CACHE_BACKEND') or 'none').lower()
+    if configured == 'none':
+        return None
+    if _cache_ready:
+        return _cache
+
+    ttl = int(current_app.config.get('DASHBOARD_CACHE_TTL') or DEFAULT_TTL)
+    with _cache_lock:
+        if not _cache_ready:
+            cache = None
+            if configured == RedisCacheBackend.name:
+                try:
+                    cache = RedisCacheBackend(current_app.config.get('DASHBOARD_CACHE_URL') or 'redis://localhost:6379/0', ttl)
+                except Exception as e:
+                    # Süreç içi önbelleğe düşülmez: diğer işçiler geçersiz kılmaları göremezdi
+                    current_app.logger.warning(f"Dashboard önbelleği Redis'e bağlanamadı, önbellek kapatıldı: {str(e)}")
+            else:
+                cache = MemoryCacheBackend(
+                    ttl, int(current_app.config.get('DASHBOARD_CACHE_MAX_ENTRIES') or DEFAULT_MAX_ENTRIES))
+            _cache = cache
+            _cache_ready = True
+    return _cache
+
+
+def cache_key(user, selected_departments=None, section='summary'):
+    """Kullanıcının dashboard kaydının anahtarı (bölüm başına ayrı kayıt)"""
+    selected = ','.join(str(dept_id) for dept_id in sorted(selected_departments or []))
+    return f'dashboard:{section}:{user.id}:{user.role}:{user.department_id or 0}:{selected}'
+
+
+def dependencies(user, scope_dept_ids=(), visible_dept_ids=()):
+    """Kaydın bağlı olduğu kuşak adları"""
+    from models import UserRole
+
+    names = {f'user:{user.id}'}
+    if user.role in [UserRole.ADMIN, UserRole.QUALITY_MANAGER]:
+        # Her DÖF değişikliği 'all' kuşağını artırır; departman kuşaklarına gerek yok
+        names.add('all')
+        return sorted(names)
+    dept_ids = set(scope_dept_ids) | set(visible_dept_ids)
+    if user.department_id:
+        dept_ids.add(user.department_id)
+    names.update(f'dept:{dept_id}' for dept_id in dept_ids if dept_id)
+    return sorted(names)
+
+
+def lookup(key, dependency_names):
+    """
+    Geçerli kaydı döndürür
+
+    Returns:
+        tuple: (değer veya None, kuşak değerleri). Iskada hesaplanan değer bu
+        kuşaklarla store() ile saklanır; hesaplama sırasında gelen bir
+        değişiklik kuşağı artırdığından kayıt bir sonraki okumada geçersiz olur.
+    """
+    cache = get_cache()
+    if cache is None:
+        return None, None
+
+    try:
+        generations = cache.get_generations(dependency_names)
+        entry = cache.get(key)
+    except Exception as e:
+        from flask import current_app
+        current_app.logger.error(f"Dashboard önbelleği okunamadı: {str(e)}")
+        _count('errors')
+        return None, None
+
+    if entry is None:
+        _count('misses')
+    elif entry.get('generations') != generations:
+        _count('misses')
+        _count('stale')
+    else:
+        _count('hits')
+        return entry['payload'], generations
+    return None, generations
+
+
+def store(key, generations, payload):
+    """Iskada hesaplanan değeri lookup() sırasında okunan kuşaklarla saklar"""
+    cache = get_cache()
+    if cache is None or generations is None:
+        return
+    try:
+        cache.set(key, {'generations': generations, 'payload': payload})
+        _count('stores')
+    except Exception as e:
+        from flask import current_app
+        current_app.logger.error(f"Dashboard önbelleğine yazılamadı: {str(e)}")
+        _count('errors')
+
+
+def invalidate(names, session=None):
+    """Verilen kuşakları commit sonrasında artırır"""
+    session = session or db.session
+    session.info.setdefault(_PENDING_BUMP_KEY, set()).update(names)
+
+
+def invalidate_users(user_ids, session=None):
+    """
+    Kullanıcıların kayıtlarını commit sonrasında geçersiz kılar
+    (ör. toplu UPDATE ile değişen bildirimler flush dinleyicisine görünmez)
+    """
+    invalidate([f'user:{user_id}' for user_id in user_ids if user_id], session)
+
+
+def clear_cache():
+    """Tüm dashboard kayıtlarını siler"""
+    cache = get_cache()
+    if cache is not None:
+        cache.clear()
+
+
+def cache_stats():
+    """Admin sayfası için önbellek bilgileri ve sayaçları"""
+    cache = get_cache()
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats.get('hits', 0) + stats.get('misses', 0)
+    try:
+        size = cache.size() if cache is not None else 0
+    except Exception:
+        size = None
+    return {
+        'backend': cache.name if cache is not None else 'none',
+        'ttl': cache.ttl if cache is not None else 0,
+        'max_entries': cache.max_entries if cache is not None else 0,
+        'size': size,
+        'hits': stats.get('hits', 0),
+        'misses': stats.get('misses', 0),
+        'stale': stats.get('stale', 0),
+        'stores': stats.get('stores', 0),
+        'invalidations': stats.get('invalidations', 0),
+        'evictions': stats.get('evictions', 0),
+        'errors': stats.get('errors', 0),
+        'hit_ratio': round(stats.get('hits', 0) / lookups * 100, 1) if lookups else 0,
+    }
+
+
+def _dof_generations(values):
+    """DÖF alanlarından (durum hariç) etkilenen kuşak adları"""
+    department_id, source_department_id, created_by, assigned_to = values
+    names = {'all'}
+    names.update(f'dept:{dept_id}' for dept_id in (department_id, source_department_id) if dept_id)
+    names.update(f'user:{user_id}' for user_id in (created_by, assigned_to) if user_id)
+    return names
+
+
+def _dof_values(obj):
+    return obj.department_id, obj.source_department_id, obj.created_by, obj.assigned_to
+
+
+def _changed_dofs(session):
+    changed = []
+    for obj in session.dirty:
+        if not isinstance(obj, DOF) or obj.id is None:
+            continue
+        state = sa_inspect(obj)
+        if any(state.attrs[name].history.has_changes() for name in TRACKED_ATTRIBUTES):
+            changed.append(obj)
+    deleted = [obj for obj in session.deleted if isinstance(obj, DOF) and obj.id is not None]
+    return changed, deleted
+
+
+def _before_flush(session, flush_context, instances):
+    # Eski departman/kullanıcı değerleri veritabanından okunur; eski kapsamdaki kayıtlar da geçersiz olur
+    changed, deleted = _changed_dofs(session)
+    if not (changed or deleted):
+        return
+
+    rows = session.connection().execute(
+        select(DOF.department_id, DOF.source_department_id, DOF.created_by, DOF.assigned_to)
+        .where(DOF.id.in_([obj.id for obj in changed + deleted]))
+    ).all()
+    pending = session.info.setdefault(_PENDING_BUMP_KEY, set())
+    for row in rows:
+        pending.update(_dof_generations(tuple(row)))
+
+
+def _after_flush(session, flush_context):
+    pending = session.info.setdefault(_PENDING_BUMP_KEY, set())
+
+    changed, _ = _changed_dofs(session)
+    for obj in [obj for obj in session.new if isinstance(obj, DOF)] + changed:
+        pending.update(_dof_generations(_dof_values(obj)))
+
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Notification) and obj.user_id:
+            pending.add(f'user:{obj.user_id}')
+
+    if not pending:
+        session.info.pop(_PENDING_BUMP_KEY, None)
+
+
+def _after_commit(session):
+    # Kuşaklar commit sonrasında artırılır; aksi halde eşzamanlı bir istek eski veriyi yeniden saklayabilir
+    pending = session.info.pop(_PENDING_BUMP_KEY, None)
+    if not pending:
+        return
+    try:
+        cache = get_cache()
+        if cache is not None:
+            cache.bump_generations(sorted(pending))
+            _count('invalidations', len(pending))
+    except Exception as e:
+        from flask import current_app
+        current_app.logger.error(f"Dashboard önbelleği geçersiz kılınamadı: {str(e)}")
+        _count('errors')
+
+
+def _after_rollback(session):
+    session.info.pop(_PENDING_BUMP_KEY, None)
+
+
+def register_dashboard_cache_listeners():
+    """Geçersiz kılma dinleyicilerini uygulama oturumuna bir kez bağlar"""
+    global _listeners_registered
+    if _listeners_registered:
+        return
+    event.listen(db.session, 'before_flush', _before_flush)
+    event.listen(db.session, 'after_flush', _after_flush)
+    event.listen(db.session, 'after_commit', _after_commit)
+    event.listen(db.session, 'after_rollback', _after_rollback)
+    _listeners_registered = True
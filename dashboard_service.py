@@ -0,0 +1,509 @@
+"""
+Dashboard Service - Dashboard Veri Servisi
+-------------------------------------------
+/dashboard sayfasının ihtiyaç duyduğu tüm sayaçları ve widget listelerini
+sabit ve az sayıda SQL sorgusu ile hesaplayan servis modülü.
+
+- Genel sayaçlar (inceleme/çözüm bekleyen, departman toplamı) tek bir koşullu
+  toplama (SUM(CASE ...)) sorgusu ile,
+- Yetki kapsamındaki durum dağılımı stats_utils.count_dof_statuses ile tek satırlık
+  bir toplama sorgusu ile,
+- Tüm "son 5 DÖF" widget'ları ise ROW_NUMBER() pencere fonksiyonu kullanan
+  tek bir UNION ALL sorgusu ile hesaplanır.
+- DÖF'e bağlı sonuçlar dashboard_cache ile kullanıcı bazında saklanır; isabette
+  sadece widget DÖF'leri ve bildirimler ID ile yüklenir.
+- Sayfa ilk açılışta sadece özet bölümünü (SUMMARY) hesaplar; termin ve
+  aktivite widget'ları /dashboard/widgets uç noktasından toplu olarak yüklenir.
+
+Kullanım:
+    from dashboard_service import DashboardService
+
+    snapshot = DashboardService.build_snapshot(current_user)
+    return render_template('dashboard.html', snapshot=snapshot)
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from flask import current_app
+from sqlalchemy import and_, case, func, literal, or_, union_all
+from sqlalchemy.orm import aliased, joinedload
+
+from extensions import db
+
+# Widget başına gösterilecek DÖF sayısı
+WIDGET_LIMIT = 5
+
+# Termin widget'larında dikkate alınan aktif durumlar
+DEADLINE_STATUSES = [3, 4, 8, 9]  # ASSIGNED, IN_PROGRESS, PLANNING, IMPLEMENTATION
+
+# "Son N DÖF" widget'ları (DashboardSnapshot alan adları)
+WIDGET_NAMES = ('recent_dofs', 'assigned_dofs', 'dept_created_dofs', 'dept_assigned_dofs', 'department_dofs',
+                'assigned_upcoming_deadlines', 'created_upcoming_deadlines',
+                'assigned_overdue_deadlines', 'created_overdue_deadlines')
+
+# Snapshot bölümleri: sayaçlar (ilk açılış), widget listeleri, aktivite/log listeleri
+SUMMARY = 'summary'
+WIDGETS = 'widgets'
+ACTIVITIES = 'activities'
+ALL_SECTIONS = (SUMMARY, WIDGETS, ACTIVITIES)
+
+# Toplu widget uç noktasının (/dashboard/widgets) sunduğu widget'lar.
+# section: widget'ın ihtiyaç duyduğu snapshot bölümü; diğer alanlar şablona verilir
+DASHBOARD_WIDGETS = {
+    'assigned_upcoming_deadlines': {'section': WIDGETS, 'template': 'dof/partials/dashboard_deadline_table.html',
+                                    'empty_message': 'Departmanıma atanan yaklaşan termin bulunmamaktadır'},
+    'created_upcoming_deadlines': {'section': WIDGETS, 'template': 'dof/partials/dashboard_deadline_table.html',
+                                   'empty_message': 'Departmanımın açtığı yaklaşan termin bulunmamaktadır'},
+    'assigned_overdue_deadlines': {'section': WIDGETS, 'template': 'dof/partials/dashboard_deadline_table.html',
+                                   'empty_message': 'Departmanıma atanan geçmiş termin bulunmamaktadır', 'overdue': True},
+    'created_overdue_deadlines': {'section': WIDGETS, 'template': 'dof/partials/dashboard_deadline_table.html',
+                                  'empty_message': 'Departmanımın açtığı geçmiş termin bulunmamaktadır', 'overdue': True},
+    'user_activities': {'section': ACTIVITIES, 'template': 'dof/partials/dashboard_user_activities.html'},
+    'system_logs': {'section': ACTIVITIES, 'template': 'dof/partials/dashboard_system_logs.html'},
+}
+
+# Tek adla istenebilen widget grupları
+WIDGET_GROUPS = {
+    'deadlines': ['assigned_upcoming_deadlines', 'created_upcoming_deadlines',
+                  'assigned_overdue_deadlines', 'created_overdue_deadlines'],
+    'activities': ['user_activities', 'system_logs'],
+}
+
+# Birden fazla departman yönetebilen roller (UserRole değerleri)
+MULTI_DEPARTMENT_ROLES = [3, 8, 9]  # GROUP_MANAGER, PROJECTS_QUALITY_TRACKING, BRANCHES_QUALITY_TRACKING
+
+
+@dataclass
+class DashboardSnapshot:
+    """Dashboard şablonunun tükettiği, tek seferde hesaplanmış veri kümesi"""
+
+    status_counts: Dict[str, int] = field(default_factory=dict)
+    waiting_review_count: int = 0
+    waiting_resolution_count: int = 0
+
+    # Widget listeleri (her biri en fazla WIDGET_LIMIT DÖF)
+    recent_dofs: List[Any] = field(default_factory=list)
+    assigned_dofs: List[Any] = field(default_factory=list)
+    dept_created_dofs: List[Any] = field(default_factory=list)
+    dept_assigned_dofs: List[Any] = field(default_factory=list)
+    department_dofs: List[Any] = field(default_factory=list)
+    assigned_upcoming_deadlines: List[Any] = field(default_factory=list)
+    created_upcoming_deadlines: List[Any] = field(default_factory=list)
+    assigned_overdue_deadlines: List[Any] = field(default_factory=list)
+    created_overdue_deadlines: List[Any] = field(default_factory=list)
+
+    notifications: List[Any] = field(default_factory=list)
+    user_activities: List[Any] = field(default_factory=list)
+    system_logs: List[Any] = field(default_factory=list)
+
+    # Departman kapsamı ve bölge müdürü filtreleri
+    user_departments: List[Any] = field(default_factory=list)
+    managed_departments: List[Any] = field(default_factory=list)
+    selected_department: Optional[Any] = None
+    selected_departments: List[int] = field(default_factory=list)
+    selected_department_names: List[str] = field(default_factory=list)
+
+    current_date: Optional[datetime] = None
+    future_date: Optional[datetime] = None
+
+    @property
+    def upcoming_deadlines(self):
+        """Geriye uyumluluk: atanan + açılan yaklaşan terminler"""
+        return self.assigned_upcoming_deadlines + self.created_upcoming_deadlines
+
+    @property
+    def past_deadlines(self):
+        """Geriye uyumluluk: atanan + açılan geçmiş terminler"""
+        return self.assigned_overdue_deadlines + self.created_overdue_deadlines
+
+
+class DashboardService:
+    """Dashboard verilerini toplu olarak hesaplayan servis"""
+
+    @staticmethod
+    def build_snapshot(user: Any, department_id: Optional[int] = None,
+                       departments_param: Optional[str] = None,
+                       sections=ALL_SECTIONS) -> DashboardSnapshot:
+        """
+        Kullanıcının yetki kapsamına göre dashboard verilerini hesaplar
+
+        Args:
+            user: Kullanıcı nesnesi (current_user)
+            department_id: Eski format tek departman filtresi (bölge müdürleri için)
+            departments_param: "1,2,3" formatında çoklu departman filtresi
+            sections: Hesaplanacak bölümler (SUMMARY, WIDGETS, ACTIVITIES)
+
+        Returns:
+            DashboardSnapshot: Şablona verilecek veri kümesi
+        """
+        from models import UserRole, Department
+
+        current_date = datetime.now()
+        future_date = current_date + timedelta(days=30)
+
+        # Yönetilen departmanlar istek başına yalnızca bir kez hesaplanır
+        is_multi_manager = user.role in MULTI_DEPARTMENT_ROLES
+        needs_managed = is_multi_manager or user.role == UserRole.DIRECTOR
+        managed_departments = user.get_managed_departments() if needs_managed else []
+        managed_ids = [dept.id for dept in managed_departments]
+
+        selected_departments, selected_department, selected_department_names = \
+            DashboardService._resolve_selected_departments(
+                user, managed_departments, managed_ids, department_id, departments_param)
+
+        user_departments = DashboardService._resolve_user_departments(user, managed_departments)
+        if is_multi_manager and selected_departments:
+            user_departments = [dept for dept in managed_departments if dept.id in selected_departments]
+        scope_dept_ids = [dept.id for dept in user_departments if dept is not None]
+
+        data = {}
+        if SUMMARY in sections or WIDGETS in sections:
+            dependencies = DashboardService._cache_dependencies(user, scope_dept_ids)
+            viewable_query = DashboardService._viewable_query(user)
+            for section in (SUMMARY, WIDGETS):
+                if section in sections:
+                    data.update(DashboardService._cached_section(
+                        section, user, selected_departments, dependencies,
+                        viewable_query, scope_dept_ids, current_date, future_date))
+
+        user_activities, system_logs = [], []
+        if ACTIVITIES in sections:
+            user_activities, system_logs = DashboardService._activity_lists(user)
+
+        if SUMMARY in sections:
+            current_app.logger.info(f"DASHBOARD: Kullanıcı {user.username} için gösterilen toplam DÖF sayısı: {data['status_counts']['total']}")
+
+        return DashboardSnapshot(
+            user_activities=user_activities,
+            system_logs=system_logs,
+            user_departments=user_departments,
+            managed_departments=managed_departments if is_multi_manager else [],
+            selected_department=selected_department,
+            selected_departments=selected_departments,
+            selected_department_names=selected_department_names,
+            current_date=current_date,
+            future_date=future_date,
+            **data
+        )
+
+    @staticmethod
+    def widget_names(names_param: Optional[str]) -> List[str]:
+        """
+        /dashboard/widgets?names=... parametresini widget adlarına çevirir
+
+        Grup adları (ör. 'deadlines') içerdiği widget'lara açılır; bilinmeyen
+        adlar atlanır, sıra korunur.
+        """
+        names = []
+        for name in (names_param or '').split(','):
+            name = name.strip()
+            for expanded in WIDGET_GROUPS.get(name, [name]):
+                if expanded in DASHBOARD_WIDGETS and expanded not in names:
+                    names.append(expanded)
+        return names
+
+    @staticmethod
+    def widget_sections(names: List[str]) -> List[str]:
+        """Widget'ların ihtiyaç duyduğu snapshot bölümleri"""
+        return [section for section in ALL_SECTIONS
+                if any(DASHBOARD_WIDGETS[name]['section'] == section for name in names)]
+
+    @staticmethod
+    def _cached_section(section, user, selected_departments, dependencies,
+                        viewable_query, scope_dept_ids, current_date, future_date):
+        """
+        DÖF'e bağlı bir bölümü kullanıcı bazında önbellekten okur, yoksa hesaplar
+        (bkz. dashboard_cache.py). Özet ve widget'lar ayrı kayıtlardır; ilk
+        açılış widget sorgularını beklemez.
+        """
+        import dashboard_cache
+
+        cache_key = dashboard_cache.cache_key(user, selected_departments, section)
+        payload, generations = dashboard_cache.lookup(cache_key, dependencies)
+        if section == SUMMARY:
+            if payload is not None:
+                return DashboardService._hydrate_summary(payload)
+            data = DashboardService._compute_summary(user, viewable_query)
+            dashboard_cache.store(cache_key, generations, DashboardService._summary_payload(data))
+            return data
+
+        if payload is not None:
+            return DashboardService._hydrate_widgets(payload)
+        data = DashboardService._widget_lists(user, viewable_query, scope_dept_ids, current_date, future_date)
+        dashboard_cache.store(cache_key, generations,
+                              {name: [dof.id for dof in data[name]] for name in WIDGET_NAMES})
+        return data
+
+    @staticmethod
+    def _compute_summary(user, viewable_query):
+        """Önbellekte olmayan sayaçları ve okunmamış bildirimleri hesaplar"""
+        from models import Notification
+
+        status_counts = DashboardService._status_counts(user, viewable_query)
+        global_counters = DashboardService._global_counters(user)
+        if global_counters['scope_total'] is not None:
+            status_counts['total'] = global_counters['scope_total']
+
+        notifications = Notification.query.filter_by(user_id=user.id, is_read=False)\
+                                          .order_by(Notification.created_at.desc())\
+                                          .limit(WIDGET_LIMIT).all()
+
+        return dict(
+            status_counts=status_counts,
+            waiting_review_count=global_counters['waiting_review'],
+            waiting_resolution_count=global_counters['waiting_resolution'],
+            notifications=notifications,
+        )
+
+    @staticmethod
+    def _summary_payload(data):
+        """Önbelleğe yazılacak özet: sayılar ve bildirim ID'leri (JSON uyumlu)"""
+        return {
+            'status_counts': dict(data['status_counts']),
+            'waiting_review_count': data['waiting_review_count'],
+            'waiting_resolution_count': data['waiting_resolution_count'],
+            'notification_ids': [notification.id for notification in data['notifications']],
+        }
+
+    @staticmethod
+    def _hydrate_summary(payload):
+        """Önbellekteki özetin bildirimlerini ID ile tek sorguda yükler"""
+        from models import Notification
+
+        notifications = []
+        if payload['notification_ids']:
+            notifications = Notification.query.filter(Notification.id.in_(payload['notification_ids']))\
+                                              .order_by(Notification.created_at.desc()).all()
+        return dict(
+            status_counts=dict(payload['status_counts']),
+            waiting_review_count=payload['waiting_review_count'],
+            waiting_resolution_count=payload['waiting_resolution_count'],
+            notifications=notifications,
+        )
+
+    @staticmethod
+    def _hydrate_widgets(payload):
+        """Önbellekteki widget DÖF ID'lerini tek sorguda yükler"""
+        from models import DOF
+        from query_options import dof_row_options
+
+        dof_ids = {dof_id for ids in payload.values() for dof_id in ids}
+        dofs = {}
+        if dof_ids:
+            dofs = {dof.id: dof for dof in db.session.query(DOF).options(*dof_row_options())
+                                             .filter(DOF.id.in_(dof_ids))}
+        return {name: [dofs[dof_id] for dof_id in payload.get(name, []) if dof_id in dofs]
+                for name in WIDGET_NAMES}
+
+    @staticmethod
+    def _cache_dependencies(user, scope_dept_ids):
+        """Kullanıcının kaydını geçersiz kılan kuşaklar: görünürlük kapsamındaki departmanlar"""
+        import dashboard_cache
+        from models import UserRole
+        from auth_principal import get_principal
+
+        visible_dept_ids = []
+        if user.role in MULTI_DEPARTMENT_ROLES or user.role == UserRole.DIRECTOR:
+            visible_dept_ids = sorted(get_principal(user).managed_department_ids)
+        return dashboard_cache.dependencies(user, scope_dept_ids, visible_dept_ids)
+
+    @staticmethod
+    def _resolve_selected_departments(user, managed_departments, managed_ids, department_id, departments_param):
+        """Bölge müdürlerinin URL ile seçtiği departmanları doğrular"""
+        from models import Department
+
+        selected_departments = []
+        selected_department = None
+        selected_department_names = []
+
+        if user.role not in MULTI_DEPARTMENT_ROLES:
+            return selected_departments, selected_department, selected_department_names
+
+        if departments_param:
+            try:
+                department_ids = [int(d) for d in departments_param.split(',')]
+                # Sadece kullanıcının yönettiği departmanlara izin ver
+                selected_departments = [d_id for d_id in department_ids if d_id in managed_ids]
+                selected_department_names = [dept.name for dept in managed_departments
+                                             if dept.id in selected_departments]
+            except Exception as e:
+                current_app.logger.error(f"Departman filtre parametresi hatası: {str(e)}")
+                selected_departments = []
+        elif department_id and department_id in managed_ids:
+            selected_department = Department.query.get(department_id)
+            selected_departments = [department_id]
+            selected_department_names = [selected_department.name]
+
+        return selected_departments, selected_department, selected_department_names
+
+    @staticmethod
+    def _resolve_user_departments(user, managed_departments):
+        """Widget'larda kullanılacak departman kapsamını rolüne göre belirler"""
+        from models import UserRole, Department
+
+        if user.role in [UserRole.ADMIN, UserRole.QUALITY_MANAGER]:
+            return Department.query.filter_by(is_active=True).all()
+
+        if user.role in [UserRole.DEPARTMENT_MANAGER, UserRole.FRANCHISE_DEPARTMENT_MANAGER]:
+            if user.department_id:
+                return [Department.query.get(user.department_id)]
+            return []
+
+        if user.role in MULTI_DEPARTMENT_ROLES or user.role == UserRole.DIRECTOR:
+            return list(managed_departments)
+
+        # Normal kullanıcı sadece kendi departmanını görür
+        if user.department_id:
+            dept = Department.query.get(user.department_id)
+            if dept:
+                return [dept]
+        return []
+
+    @staticmethod
+    def _viewable_query(user):
+        """Kullanıcının görebileceği DÖF'leri içeren temel sorgu"""
+        from models import DOF, UserRole
+        from auth_service import AuthService
+
+        base_query = db.session.query(DOF).filter(DOF.is_related == False)
+        if user.role in [UserRole.ADMIN, UserRole.QUALITY_MANAGER]:
+            return base_query
+        return AuthService.filter_viewable_dofs(user, base_query)
+
+    @staticmethod
+    def _status_counts(user, viewable_query):
+        """Yetki kapsamındaki DÖF'lerin durum dağılımı - tek toplama sorgusu"""
+        from models import UserRole
+        from stats_utils import count_dof_statuses
+        from status_counters import get_counter_status_counts
+
+        # Tüm DÖF'leri gören roller için DÖF tablosu taranmaz, sayaçlar okunur
+        if user.role in [UserRole.ADMIN, UserRole.QUALITY_MANAGER]:
+            return get_counter_status_counts()
+        return count_dof_statuses(viewable_query)
+
+    @staticmethod
+    def _global_counters(user):
+        """
+        Kalite sayaçlarını ve departman yöneticisi toplamını tek satırlık
+        koşullu toplama sorgusu ile hesaplar
+        """
+        from models import DOF, UserRole, DOFStatus
+
+        not_related = DOF.is_related == False
+        columns = [
+            func.sum(case((DOF.status.in_([DOFStatus.SUBMITTED, DOFStatus.IN_REVIEW]), 1), else_=0)),
+            func.sum(case((DOF.status == DOFStatus.ASSIGNED, 1), else_=0)),
+        ]
+
+        # Admin/kalite yöneticisi toplamı durum dağılımı ile zaten aynıdır.
+        # Departman yöneticileri için toplam: departmana atanan veya departmanın açtığı DÖF'ler
+        is_dept_manager = user.role in [UserRole.DEPARTMENT_MANAGER, UserRole.FRANCHISE_DEPARTMENT_MANAGER] \
+            and user.department_id
+        if is_dept_manager:
+            in_dept = and_(not_related, or_(DOF.department_id == user.department_id,
+                                            DOF.source_department_id == user.department_id))
+            columns.append(func.sum(case((in_dept, 1), else_=0)))
+
+        row = db.session.query(*columns).select_from(DOF).one()
+
+        return {
+            'waiting_review': int(row[0] or 0),
+            'waiting_resolution': int(row[1] or 0),
+            'scope_total': int(row[2] or 0) if is_dept_manager else None,
+        }
+
+    @staticmethod
+    def _widget_lists(user, viewable_query, scope_dept_ids, current_date, future_date):
+        """
+        Tüm "son N DÖF" widget'larını tek sorguda getirir.
+
+        Her widget UNION ALL içinde ayrı bir kol olarak yazılır; kol içindeki
+        ROW_NUMBER() kendi sıralamasına göre numara verir ve dış sorgu her
+        widget'tan ilk WIDGET_LIMIT satırı alır.
+        """
+        from models import DOF, UserRole, DOFStatus
+        from query_options import dof_row_options
+
+        dof_columns = list(DOF.__table__.c)
+        deadline_filter = [DOF.deadline.isnot(None), DOF.status.in_(DEADLINE_STATUSES)]
+        newest_first = [DOF.created_at.desc(), DOF.id.desc()]
+
+        def branch(name, query, order_by):
+            return query.with_entities(
+                *dof_columns,
+                literal(name).label('widget'),
+                func.row_number().over(order_by=order_by).label('rn')
+            ).order_by(None).statement
+
+        base = db.session.query(DOF)
+        branches = [
+            branch('recent_dofs', base, newest_first),
+            branch('assigned_dofs',
+                   base.filter(DOF.assigned_to == user.id, DOF.status != DOFStatus.CLOSED),
+                   newest_first),
+        ]
+
+        if scope_dept_ids:
+            branches.append(branch('dept_created_dofs',
+                                   base.filter(DOF.source_department_id.in_(scope_dept_ids),
+                                               DOF.status != DOFStatus.CLOSED),
+                                   newest_first))
+            branches.append(branch('dept_assigned_dofs',
+                                   viewable_query.filter(DOF.department_id.in_(scope_dept_ids),
+                                                         DOF.status != DOFStatus.CLOSED),
+                                   newest_first))
+
+        if user.role in [UserRole.DEPARTMENT_MANAGER, UserRole.FRANCHISE_DEPARTMENT_MANAGER] and user.department_id:
+            branches.append(branch('department_dofs',
+                                   base.filter(DOF.department_id == user.department_id,
+                                               DOF.status != DOFStatus.CLOSED),
+                                   newest_first))
+
+        if user.department_id:
+            upcoming = [DOF.deadline > current_date, DOF.deadline <= future_date]
+            overdue = [DOF.deadline <= current_date]
+            branches.extend([
+                branch('assigned_upcoming_deadlines',
+                       base.filter(*deadline_filter, *upcoming, DOF.department_id == user.department_id),
+                       [DOF.deadline.asc(), DOF.id.asc()]),
+                branch('created_upcoming_deadlines',
+                       base.filter(*deadline_filter, *upcoming, DOF.source_department_id == user.department_id),
+                       [DOF.deadline.asc(), DOF.id.asc()]),
+                branch('assigned_overdue_deadlines',
+                       base.filter(*deadline_filter, *overdue, DOF.department_id == user.department_id),
+                       [DOF.deadline.desc(), DOF.id.desc()]),
+                branch('created_overdue_deadlines',
+                       base.filter(*deadline_filter, *overdue, DOF.source_department_id == user.department_id),
+                       [DOF.deadline.desc(), DOF.id.desc()]),
+            ])
+
+        ranked = union_all(*branches).subquery('dashboard_widgets')
+        widget_dof = aliased(DOF, ranked)
+        rows = db.session.query(widget_dof, ranked.c.widget)\
+                         .options(*dof_row_options(widget_dof))\
+                         .filter(ranked.c.rn <= WIDGET_LIMIT)\
+                         .order_by(ranked.c.widget, ranked.c.rn).all()
+
+        widgets = {name: [] for name in WIDGET_NAMES}
+        for dof, widget in rows:
+            widgets[widget].append(dof)
+        return widgets
+
+    @staticmethod
+    def _activity_lists(user):
+        """Admin ve kalite yöneticileri için aktivite ve sistem logu listeleri"""
+        from models import UserActivity, SystemLog
+
+        user_activities = []
+        system_logs = []
+        if user.is_admin() or user.is_quality_manager():
+            user_activities = UserActivity.query.options(joinedload(UserActivity.user))\
+                                          .order_by(UserActivity.created_at.desc())\
+                                          .limit(10)\
+                                          .all()
+            if user.is_admin():
+                system_logs = SystemLog.query.order_by(SystemLog.created_at.desc()).limit(5).all()
+        return user_activities, system_logs
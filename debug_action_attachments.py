@@ -27,7 +27,7 @@ def debug_action_attachments():
         print(f"\n📋 Son 10 DOFAction:")
         
         for action in recent_actions:
-            attachments = action.attachments.all()
+            attachments = action.attachments
             print(f"   Action #{action.id} (DÖF #{action.dof_id}) - {len(attachments)} ek")
             if action.new_status == 10:
                 print(f"      🎯 TAMAMLANDI! Ek sayısı: {len(attachments)}")
@@ -39,7 +39,7 @@ def debug_action_attachments():
         print(f"\n✅ Tamamlama Action'ları: {len(completion_actions)}")
         
         for action in completion_actions:
-            attachments = action.attachments.all()
+            attachments = action.attachments
             print(f"   DÖF #{action.dof_id} - {action.created_at.strftime('%d.%m.%Y %H:%M')} - {len(attachments)} kanıt dosyası")
             for att in attachments:
                 print(f"      📁 {att.filename}")
@@ -0,0 +1,248 @@
+"""
+Department Stats - Departman İstatistikleri Servisi
+---------------------------------------------------
+Departman bazında DÖF istatistiklerini (atanan/açılan toplamlar, durum
+dağılımı, aktif/kapalı/reddedilen, termini geçen, ortalama çözüm süresi)
+DÖF'leri Python'a yüklemeden hesaplayan servis modülü.
+
+- Departmana atanan DÖF'ler (department_id) ve departmanın açtığı DÖF'ler
+  (source_department_id) için (departman, durum) bazında birer GROUP BY
+  sorgusu çalışır; ek sayılar aynı sorgularda koşullu SUM ile hesaplanır.
+- Ortalama çözüm süresi kapatılan DÖF'lerin created_at -> closed_at farkıdır.
+- Departman grupları (DepartmentGroup) için değerler gruptaki departmanların
+  toplamından, ek DÖF sorgusu çalıştırmadan hesaplanır.
+
+Kullanım:
+    from department_stats import DepartmentStatsService
+
+    stats = DepartmentStatsService.department_stats()
+    groups = DepartmentStatsService.group_stats(stats)
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, case, func
+
+from extensions import db
+
+SECONDS_PER_DAY = 24 * 3600
+
+# Toplanabilir sayı anahtarları (grup toplamlarında kullanılır)
+ASSIGNED_COUNT_KEYS = ('total', 'active', 'closed', 'rejected', 'recent', 'overdue', 'recently_closed')
+CREATED_COUNT_KEYS = ('total', 'active', 'closed', 'rejected', 'recent')
+EXTRA_COUNT_KEYS = ('corrective_count', 'preventive_count', 'cycle_time_count', 'cycle_time_seconds')
+
+
+class DepartmentStatsService:
+    """Departman ve departman grubu istatistiklerini toplu olarak hesaplayan servis"""
+
+    @staticmethod
+    def department_stats(include_related: bool = True, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Tüm departmanların DÖF istatistikleri
+
+        Args:
+            include_related: False ise ilişkili DÖF'ler sayılmaz
+            now: Hesaplama anı (varsayılan: şimdi)
+
+        Returns:
+            list: Departman başına sözlük; atanan + açılan toplama göre büyükten küçüğe
+        """
+        from models import Department
+
+        now = now or datetime.now()
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        assigned = DepartmentStatsService._assigned_counts(today, include_related)
+        created = DepartmentStatsService._created_counts(today, include_related)
+
+        stats = []
+        for dept_id, name in db.session.query(Department.id, Department.name).order_by(Department.id):
+            row = {'department_id': dept_id, 'department': name, 'name': name}
+            row.update(assigned.get(dept_id) or DepartmentStatsService._empty_assigned())
+            row.update(created.get(dept_id) or DepartmentStatsService._empty_created())
+            DepartmentStatsService._finalize(row)
+            stats.append(row)
+
+        stats.sort(key=lambda x: (x['assigned_total'] + x['created_total']), reverse=True)
+        return stats
+
+    @staticmethod
+    def group_stats(department_stats: Optional[List[Dict[str, Any]]] = None,
+                    include_related: bool = True) -> List[Dict[str, Any]]:
+        """
+        Aktif departman gruplarının istatistikleri (gruptaki departmanların toplamı)
+
+        Args:
+            department_stats: department_stats() sonucu (verilmezse hesaplanır)
+            include_related: department_stats verilmezse kullanılır
+
+        Returns:
+            list: Grup başına sözlük; atanan + açılan toplama göre büyükten küçüğe
+        """
+        from models import DepartmentGroup, GroupDepartment
+
+        if department_stats is None:
+            department_stats = DepartmentStatsService.department_stats(include_related)
+        by_department = {row['department_id']: row for row in department_stats}
+
+        groups = {}
+        members = db.session.query(DepartmentGroup.id, DepartmentGroup.name, GroupDepartment.department_id)\
+            .join(GroupDepartment, GroupDepartment.group_id == DepartmentGroup.id)\
+            .filter(DepartmentGroup.is_active == True)\
+            .order_by(DepartmentGroup.id)
+        for group_id, group_name, dept_id in members:
+            group = groups.get(group_id)
+            if group is None:
+                group = {'group_id': group_id, 'name': group_name, 'department_ids': []}
+                group.update(DepartmentStatsService._empty_assigned())
+                group.update(DepartmentStatsService._empty_created())
+                groups[group_id] = group
+            row = by_department.get(dept_id)
+            if row is None or dept_id in group['department_ids']:
+                continue
+            group['department_ids'].append(dept_id)
+            for key in DepartmentStatsService._summable_keys():
+                group[key] += row[key]
+
+        result = []
+        for group in groups.values():
+            group['department_count'] = len(group['department_ids'])
+            DepartmentStatsService._finalize(group)
+            result.append(group)
+
+        result.sort(key=lambda x: (x['assigned_total'] + x['created_total']), reverse=True)
+        return result
+
+    @staticmethod
+    def _summable_keys():
+        from stats_utils import STATUS_KEYS
+
+        keys = [f'assigned_{key}' for key in ASSIGNED_COUNT_KEYS]
+        keys += [f'created_{key}' for key in CREATED_COUNT_KEYS]
+        keys += [f'{side}_{key}' for side in ('assigned', 'created') for key in STATUS_KEYS.values()
+                 if key not in ('closed', 'rejected')]
+        keys += list(EXTRA_COUNT_KEYS)
+        return keys
+
+    @staticmethod
+    def _empty_assigned():
+        from stats_utils import STATUS_KEYS
+
+        row = {f'assigned_{key}': 0 for key in ASSIGNED_COUNT_KEYS}
+        row.update({f'assigned_{key}': 0 for key in STATUS_KEYS.values()})
+        row.update({key: 0 for key in EXTRA_COUNT_KEYS})
+        return row
+
+    @staticmethod
+    def _empty_created():
+        from stats_utils import STATUS_KEYS
+
+        row = {f'created_{key}': 0 for key in CREATED_COUNT_KEYS}
+        row.update({f'created_{key}': 0 for key in STATUS_KEYS.values()})
+        return row
+
+    @staticmethod
+    def _assigned_counts(today, include_related):
+        """Departmana atanan DÖF'ler - (departman, durum) bazında tek GROUP BY sorgusu"""
+        from models import DOF, DOFStatus, DOFType
+        from stats_utils import STATUS_KEYS, seconds_between
+
+        def count_if(condition):
+            return func.sum(case((condition, 1), else_=0))
+
+        is_closed = DOF.status == DOFStatus.CLOSED
+        has_cycle = and_(is_closed, DOF.closed_at.isnot(None), DOF.created_at.isnot(None))
+        query = db.session.query(
+            DOF.department_id,
+            DOF.status,
+            func.count(DOF.id),
+            count_if(DOF.created_at >= today - timedelta(days=30)),
+            count_if(and_(DOF.deadline.isnot(None), DOF.deadline < today,
+                          DOF.status.notin_([DOFStatus.CLOSED, DOFStatus.REJECTED]))),
+            count_if(and_(is_closed, DOF.closed_at >= today - timedelta(days=7))),
+            count_if(DOF.dof_type == DOFType.CORRECTIVE),
+            count_if(DOF.dof_type == DOFType.PREVENTIVE),
+            count_if(has_cycle),
+            func.sum(case((has_cycle, seconds_between(DOF.created_at, DOF.closed_at)), else_=0)),
+        ).filter(DOF.department_id.isnot(None))
+        if not include_related:
+            query = query.filter(DOF.is_related == False)
+
+        result = {}
+        for (dept_id, status, total, recent, overdue, recently_closed,
+             corrective, preventive, cycle_count, cycle_seconds) in query.group_by(DOF.department_id, DOF.status):
+            row = result.get(dept_id)
+            if row is None:
+                row = result[dept_id] = DepartmentStatsService._empty_assigned()
+            total = int(total or 0)
+            row['assigned_total'] += total
+            if status in STATUS_KEYS:
+                row[f'assigned_{STATUS_KEYS[status]}'] += total
+            row['assigned_recent'] += int(recent or 0)
+            row['assigned_overdue'] += int(overdue or 0)
+            row['assigned_recently_closed'] += int(recently_closed or 0)
+            row['corrective_count'] += int(corrective or 0)
+            row['preventive_count'] += int(preventive or 0)
+            row['cycle_time_count'] += int(cycle_count or 0)
+            row['cycle_time_seconds'] += float(cycle_seconds or 0)
+        return result
+
+    @staticmethod
+    def _created_counts(today, include_related):
+        """Departmanın açtığı DÖF'ler - (kaynak departman, durum) bazında tek GROUP BY sorgusu"""
+        from models import DOF
+        from stats_utils import STATUS_KEYS
+
+        query = db.session.query(
+            DOF.source_department_id,
+            DOF.status,
+            func.count(DOF.id),
+            func.sum(case((DOF.created_at >= today - timedelta(days=30), 1), else_=0)),
+        ).filter(DOF.source_department_id.isnot(None))
+        if not include_related:
+            query = query.filter(DOF.is_related == False)
+
+        result = {}
+        for dept_id, status, total, recent in query.group_by(DOF.source_department_id, DOF.status):
+            row = result.get(dept_id)
+            if row is None:
+                row = result[dept_id] = DepartmentStatsService._empty_created()
+            total = int(total or 0)
+            row['created_total'] += total
+            if status in STATUS_KEYS:
+                row[f'created_{STATUS_KEYS[status]}'] += total
+            row['created_recent'] += int(recent or 0)
+        return result
+
+    @staticmethod
+    def _finalize(row):
+        """Türetilmiş değerler: aktif sayılar, yüzdeler, ortalama süre ve eski anahtar adları"""
+        for side in ('assigned', 'created'):
+            row[f'{side}_active'] = row[f'{side}_total'] - row[f'{side}_closed'] - row[f'{side}_rejected']
+
+        total = row['assigned_total']
+        row['total'] = total
+        row['closed'] = row['assigned_closed']
+        row['active'] = row['assigned_active']
+        row['rejected'] = row['assigned_rejected']
+        row['closed_percent'] = round((row['closed'] / total * 100) if total > 0 else 0, 1)
+        row['active_percent'] = round((row['active'] / total * 100) if total > 0 else 0, 1)
+        row['rejected_percent'] = round((row['rejected'] / total * 100) if total > 0 else 0, 1)
+
+        # Ortalama çözüm süresi (gün)
+        row['avg_resolution_time'] = round(row['cycle_time_seconds'] / row['cycle_time_count'] / SECONDS_PER_DAY, 1) \
+            if row['cycle_time_count'] else 0
+
+        # Öncelik alanı kaldırıldı
+        row['assigned_high_priority'] = 0
+        row['assigned_medium_priority'] = 0
+        row['assigned_low_priority'] = 0
+
+        # Rapor şablonu ve Excel dışa aktarımının kullandığı anahtarlar
+        row['open'] = row['open_dofs'] = row['active']
+        row['closed_dofs'] = row['closed']
+        row['total_dofs'] = total
+        row['recent'] = row['assigned_recent']
+        return row
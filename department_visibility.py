@@ -0,0 +1,318 @@
+"""
+Kullanıcı -> Departman Görünürlük Tablosu
+-----------------------------------------
+user_department_visibility tablosunu (kullanıcı, departman, neden) satırları
+olarak güncel tutan modül.
+
+Çoklu departman yöneticilerinin (Bölge Müdürü, Projeler/Şubeler Kalite Takip),
+direktörlerin ve departman yöneticilerinin görebildiği departmanlar
+DepartmentGroup, GroupDepartment, UserDepartmentMapping ve
+DirectorManagerMapping tablolarından türetilir. Böylece yetki filtresi her
+istekte bu ilişkileri Python tarafında dolaşmak yerine tek bir indeksli
+EXISTS sorgusu olur.
+
+- Kullanıcı eklendiğinde/silindiğinde, rolü/departmanı değiştiğinde veya
+  kullanıcı-departman / direktör-yönetici eşleştirmeleri değiştiğinde sadece
+  etkilenen kullanıcıların (ve onlara bağlı direktörlerin) satırları aynı
+  transaction içinde silinip küme tabanlı sorgularla yeniden yazılır. Böylece
+  INSERT ... SELECT diğer kullanıcıların ilişki satırlarını kilitlemez.
+- Grup, grup-departman ilişkisi veya departmanın aktifliği/yöneticisi/grubu
+  değiştiğinde (çok sayıda kullanıcıyı etkileyen, seyrek yönetim işlemleri)
+  tablonun tamamı yeniden oluşturulur.
+- Admin ve kalite yöneticileri tabloya yazılmaz (tüm departmanları görürler).
+- rebuild_department_visibility() tabloyu yeniden hesaplar ve sapmaları
+  raporlar (doğrudan çalıştırılabilir).
+
+Kullanım:
+    python department_visibility.py            # tabloyu yeniden oluştur
+    python department_visibility.py --dry-run  # sadece sapmaları raporla
+"""
+
+import sys
+from datetime import datetime
+
+from sqlalchemy import event, select, literal, union, inspect as sa_inspect
+from sqlalchemy.orm import aliased
+
+from extensions import db
+from models import (UserRole, User, Department, DepartmentGroup, GroupDepartment,
+                    UserDepartmentMapping, DirectorManagerMapping, UserDepartmentVisibility)
+
+# Birden fazla departmanı yönetebilen roller
+MULTI_DEPARTMENT_ROLES = [UserRole.GROUP_MANAGER, UserRole.PROJECTS_QUALITY_TRACKING,
+                          UserRole.BRANCHES_QUALITY_TRACKING]
+
+# Kendi departmanını yöneten roller
+DEPARTMENT_MANAGER_ROLES = [UserRole.DEPARTMENT_MANAGER, UserRole.FRANCHISE_DEPARTMENT_MANAGER]
+
+# Değişikliği tabloyu etkileyen model alanları (None: her değişiklik etkiler)
+TRACKED_ATTRIBUTES = {
+    UserDepartmentMapping: None,
+    GroupDepartment: None,
+    DirectorManagerMapping: None,
+    DepartmentGroup: ('manager_id',),
+    Department: ('is_active', 'manager_id', 'group_id'),
+    User: ('role', 'department_id'),
+}
+
+# Değişikliği sadece belirli kullanıcıların satırlarını etkileyen modeller ve kullanıcı alanları
+# (diğer modellerdeki değişiklikler tablonun tamamını yeniden oluşturur)
+USER_SCOPED_ATTRIBUTES = {
+    User: ('id',),
+    UserDepartmentMapping: ('user_id',),
+    DirectorManagerMapping: ('director_id', 'manager_id'),
+}
+
+_listeners_registered = False
+
+
+def _visibility_selects(user_ids=None):
+    """
+    Her görünürlük nedeni için (user_id, department_id, reason) satırlarını üreten sorgular
+
+    Args:
+        user_ids: Verilirse sadece bu kullanıcıların satırları (koşul her sorgunun
+                  kendi kullanıcı kolonuna uygulanır; diğer kullanıcılar okunmaz)
+    """
+    active_department = Department.is_active == True  # noqa: E712
+
+    # Departman yöneticisi: yöneticisi olduğu kendi departmanı
+    department_manager = select(User.id, Department.id, literal('department_manager'))\
+        .join(Department, Department.id == User.department_id)\
+        .where(User.role.in_(DEPARTMENT_MANAGER_ROLES),
+               Department.manager_id == User.id,
+               active_department)
+
+    # Çoklu departman yöneticisi: yöneticisi olduğu grubun departmanları
+    group = select(DepartmentGroup.manager_id, Department.id, literal('group'))\
+        .join(Department, Department.group_id == DepartmentGroup.id)\
+        .join(User, User.id == DepartmentGroup.manager_id)\
+        .where(User.role.in_(MULTI_DEPARTMENT_ROLES), active_department)
+
+    # Çoklu departman yöneticisi: grup-departman ara tablosundaki departmanlar
+    group_mapping = select(DepartmentGroup.manager_id, Department.id, literal('group_mapping'))\
+        .join(GroupDepartment, GroupDepartment.group_id == DepartmentGroup.id)\
+        .join(Department, Department.id == GroupDepartment.department_id)\
+        .join(User, User.id == DepartmentGroup.manager_id)\
+        .where(User.role.in_(MULTI_DEPARTMENT_ROLES), active_department)
+
+    # Çoklu departman yöneticisi: kullanıcı-departman eşleştirmeleri
+    user_mapping = select(UserDepartmentMapping.user_id, Department.id, literal('user_mapping'))\
+        .join(Department, Department.id == UserDepartmentMapping.department_id)\
+        .join(User, User.id == UserDepartmentMapping.user_id)\
+        .where(User.role.in_(MULTI_DEPARTMENT_ROLES), active_department)
+
+    # Direktör: bağlı çoklu departman yöneticilerinin eşleştirilmiş departmanları
+    director_user = aliased(User)
+    manager_user = aliased(User)
+    director = select(DirectorManagerMapping.director_id, Department.id, literal('director'))\
+        .join(director_user, director_user.id == DirectorManagerMapping.director_id)\
+        .join(manager_user, manager_user.id == DirectorManagerMapping.manager_id)\
+        .join(UserDepartmentMapping, UserDepartmentMapping.user_id == DirectorManagerMapping.manager_id)\
+        .join(Department, Department.id == UserDepartmentMapping.department_id)\
+        .where(director_user.role == UserRole.DIRECTOR,
+               manager_user.role.in_(MULTI_DEPARTMENT_ROLES),
+               active_department)
+
+    selects = [
+        (department_manager, User.id),
+        (group, DepartmentGroup.manager_id),
+        (group_mapping, DepartmentGroup.manager_id),
+        (user_mapping, UserDepartmentMapping.user_id),
+        (director, DirectorManagerMapping.director_id),
+    ]
+    if user_ids is None:
+        return [stmt for stmt, _ in selects]
+    return [stmt.where(user_column.in_(user_ids)) for stmt, user_column in selects]
+
+
+def _expected_rows_select(user_ids=None):
+    """Tablonun olması gereken içeriği (tekrarsız)"""
+    return union(*_visibility_selects(user_ids))
+
+
+def _rebuild(connection, user_ids=None):
+    """
+    Tabloyu verilen bağlantı (transaction) üzerinde küme tabanlı olarak yeniden oluşturur
+
+    Args:
+        user_ids: Verilirse sadece bu kullanıcıların satırları yeniden yazılır
+    """
+    table = UserDepartmentVisibility.__table__
+    if user_ids is None:
+        connection.execute(table.delete())
+    else:
+        user_ids = sorted(user_ids)
+        if not user_ids:
+            return
+        connection.execute(table.delete().where(table.c.user_id.in_(user_ids)))
+    connection.execute(
+        table.insert().from_select(['user_id', 'department_id', 'reason'], _expected_rows_select(user_ids))
+    )
+
+
+def _changed_objects(session):
+    """Flush edilen, görünürlük tablosunu etkileyen nesneler"""
+    changed = [obj for obj in list(session.new) + list(session.deleted) if type(obj) in TRACKED_ATTRIBUTES]
+
+    for obj in session.dirty:
+        attributes = TRACKED_ATTRIBUTES.get(type(obj), ())
+        if attributes is None:
+            changed.append(obj)
+        elif attributes:
+            state = sa_inspect(obj)
+            if any(state.attrs[name].history.has_changes() for name in attributes):
+                changed.append(obj)
+
+    return changed
+
+
+def _affected_user_ids(connection, changed):
+    """
+    Değişikliklerden etkilenen kullanıcılar; tablonun tamamı yeniden oluşturulmalıysa None
+
+    Kullanıcının kendisi ve eşleştirmelerinin eski/yeni kullanıcıları, ayrıca bu
+    kullanıcılara bağlı direktörler (direktör satırları yöneticinin rolüne ve
+    eşleştirmelerine bağlıdır).
+    """
+    user_ids = set()
+    for obj in changed:
+        attributes = USER_SCOPED_ATTRIBUTES.get(type(obj))
+        if attributes is None:
+            return None
+        state = sa_inspect(obj)
+        for name in attributes:
+            # Güncel değer ve (değiştiyse) eski değer
+            values = [state.dict.get(name)] + list(state.attrs[name].history.deleted or ())
+            user_ids.update(value for value in values if value is not None)
+
+    if user_ids:
+        user_ids.update(connection.execute(
+            select(DirectorManagerMapping.director_id)
+            .where(DirectorManagerMapping.manager_id.in_(sorted(user_ids)))
+        ).scalars().all())
+    return user_ids
+
+
+def _after_flush(session, flush_context):
+    # Yeni satırlar yazıldıktan sonra çalışır; INSERT ... SELECT güncel ilişkileri görür
+    changed = _changed_objects(session)
+    if changed:
+        connection = session.connection()
+        _rebuild(connection, _affected_user_ids(connection, changed))
+        # Yetki özneleri (yönetilen departmanlar, departman kullanıcıları) yeniden hesaplanmalı
+        from auth_principal import invalidate_principals
+        invalidate_principals(session)
+
+
+def register_department_visibility_listeners():
+    """Flush dinleyicisini uygulama oturumuna bir kez bağlar"""
+    global _listeners_registered
+    if _listeners_registered:
+        return
+    event.listen(db.session, 'after_flush', _after_flush)
+    _listeners_registered = True
+
+
+def rebuild_department_visibility(dry_run=False):
+    """
+    Görünürlük tablosunu ilişki tablolarından yeniden hesaplar ve sapmaları raporlar
+
+    Args:
+        dry_run: True ise sadece sapmalar raporlanır, tablo değiştirilmez
+
+    Returns:
+        dict: Olması gereken satır sayısı, eksik ve fazla satırlar
+    """
+    expected = {tuple(row) for row in db.session.execute(_expected_rows_select()).all()}
+    stored = {
+        (row.user_id, row.department_id, row.reason)
+        for row in UserDepartmentVisibility.query.all()
+    }
+
+    missing = sorted(expected - stored)
+    extra = sorted(stored - expected)
+
+    if (missing or extra) and not dry_run:
+        try:
+            _rebuild(db.session.connection())
+            from auth_principal import invalidate_principals
+            invalidate_principals()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    return {
+        'total_rows': len(expected),
+        'missing': missing,
+        'extra': extra,
+        'rebuilt': bool(missing or extra) and not dry_run,
+    }
+
+
+def ensure_department_visibility():
+    """Görünürlük tablosu boşsa (ilk kurulum) ilişki tablolarından doldurur"""
+    if UserDepartmentVisibility.query.first() is None:
+        result = rebuild_department_visibility()
+        return result if result['rebuilt'] else None
+    return None
+
+
+def visible_department_ids_select(user_id):
+    """Kullanıcının görebildiği departman ID'lerini veren alt sorgu"""
+    return select(UserDepartmentVisibility.department_id)\
+        .where(UserDepartmentVisibility.user_id == user_id)
+
+
+def department_visibility_exists(user_id, department_column):
+    """
+    Verilen departman kolonu için görünürlük koşulunu EXISTS olarak döndürür
+
+    Args:
+        user_id: Kullanıcı ID
+        department_column: Dış sorgudaki departman kolonu (ör. DOF.department_id)
+    """
+    return select(UserDepartmentVisibility.id)\
+        .where(UserDepartmentVisibility.user_id == user_id,
+               UserDepartmentVisibility.department_id == department_column)\
+        .exists()
+
+
+def can_see_department(user_id, department_id):
+    """Kullanıcının tabloda verilen departman için satırı var mı?"""
+    if department_id is None:
+        return False
+    return db.session.query(
+        select(UserDepartmentVisibility.id)
+        .where(UserDepartmentVisibility.user_id == user_id,
+               UserDepartmentVisibility.department_id == department_id)
+        .exists()
+    ).scalar()
+
+
+# Bu script doğrudan çalıştırıldığında
+if __name__ == "__main__":
+    from app import app
+
+    dry_run = '--dry-run' in sys.argv
+    with app.app_context():
+        print("===== KULLANICI-DEPARTMAN GÖRÜNÜRLÜK MUTABAKATI =====")
+        print(f"Başlangıç: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}")
+
+        result = rebuild_department_visibility(dry_run=dry_run)
+
+        print(f"Olması gereken satır: {result['total_rows']}")
+        print(f"Eksik satır: {len(result['missing'])}, fazla satır: {len(result['extra'])}")
+        for user_id, department_id, reason in result['missing']:
+            print(f"  + kullanıcı={user_id} departman={department_id} neden={reason}")
+        for user_id, department_id, reason in result['extra']:
+            print(f"  - kullanıcı={user_id} departman={department_id} neden={reason}")
+
+        if result['rebuilt']:
+            print("Görünürlük tablosu yeniden oluşturuldu.")
+        elif dry_run and (result['missing'] or result['extra']):
+            print("--dry-run: tablo değiştirilmedi.")
+
+        print(f"Bitiş: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}")
+        sys.exit(1 if (result['missing'] or result['extra']) and dry_run else 0)
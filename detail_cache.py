@@ -0,0 +1,297 @@
+"""
+DÖF Detay Belgesi Önbelleği
+---------------------------
+/dof/<id>/export/pdf ve /dof/<id>/export/excel belgelerini diskte saklayan modül.
+
+- Anahtar: DÖF id'si + içerik özeti (sha256). Özet DÖF'ün updated_at değeri,
+  işlem (DOFAction) id'leri, DÖF ve işlem eki id'leri ile PDF şablon
+  dosyalarının içeriğinden hesaplanır. DÖF satırı her güncellemede yeni
+  updated_at alır (onupdate), işlem ve ek eklenmesi id listelerini değiştirir;
+  değişen DÖF yeni bir anahtara düştüğü için ayrıca geçersiz kılma gerekmez.
+- Dosyalar <DETAIL_CACHE_FOLDER>/<dof id>/<tür>-<özet>.<uzantı> olarak atomik
+  yazılır. Aynı DÖF ve türün eski sürümleri yeni sürüm yazılınca silinir.
+- Toplam boyut DETAIL_CACHE_MAX_BYTES'ı aşınca en uzun süredir kullanılmayan
+  dosyalar silinir (LRU; isabette dosyanın mtime'ı güncellenir). Dizin tüm
+  sunucu süreçlerince paylaşılabilir. DETAIL_CACHE_MAX_BYTES=0 önbelleği kapatır.
+- Özet ETag olarak döner; If-None-Match eşleşirse belge hiç üretilmeden 304
+  verilebilir (bkz. routes/dof.py).
+- WeasyPrint kullanılamadığında üretilen basit (fpdf) PDF önbelleğe alınmaz.
+- Kapatılan DÖF'lerin belgeleri close_dof sonrasında arka planda hazırlanır
+  (prerender_dof).
+
+Kullanım:
+    python detail_cache.py            # boyut sınırını uygular
+    python detail_cache.py --dry-run  # sadece silinecek dosya sayısını yazdırır
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+from extensions import db
+from models import DOF, DOFAction, Attachment, ActionAttachment
+
+# Belge biçimi değiştiğinde artırılır; eski dosyalar yeni anahtarlarla eşleşmez
+CACHE_VERSION = 1
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+PDF_MIMETYPE = 'application/pdf'
+
+# tür -> (uzantı, mimetype)
+DOCUMENT_KINDS = {
+    'pdf': ('pdf', PDF_MIMETYPE),
+    'excel': ('xlsx', XLSX_MIMETYPE),
+}
+
+PDF_TEMPLATE_FILES = ('dof_detail.html', 'dof_detail.css')
+
+# Boyut sınırı aşıldığında dizin bu orana inene kadar temizlenir
+TRIM_TARGET_RATIO = 0.9
+# Dizin taraması en fazla bu aralıkla yapılır (saniye)
+TRIM_INTERVAL = 30
+
+# path: önbellekteki dosya (isabet veya yeni yazılan); data: önbelleğe alınmayan belge
+DetailDocument = namedtuple('DetailDocument', ['etag', 'path', 'data', 'mimetype'])
+
+_template_fingerprint = None
+_last_trim = 0.0
+_trim_lock = threading.Lock()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def cache_folder():
+    folder = current_app.config.get('DETAIL_CACHE_FOLDER') or os.path.join(current_app.instance_path, 'detail_cache')
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def _max_bytes():
+    return current_app.config.get('DETAIL_CACHE_MAX_BYTES', 256 * 1024 * 1024)
+
+
+def _pdf_template_fingerprint():
+    """PDF şablonu değişince özetin de değişmesi için şablon dosyalarının özeti"""
+    global _template_fingerprint
+    if _template_fingerprint is None:
+        from pdf_renderer import TEMPLATE_DIR
+
+        digest = hashlib.sha256()
+        for name in PDF_TEMPLATE_FILES:
+            with open(os.path.join(TEMPLATE_DIR, name), 'rb') as f:
+                digest.update(f.read())
+        _template_fingerprint = digest.hexdigest()
+    return _template_fingerprint
+
+
+def document_digest(dof, kind):
+    """DÖF'ün belge içeriğini belirleyen alanların özeti (ETag olarak da kullanılır)"""
+    action_ids = [action_id for (action_id,) in
+                  db.session.query(DOFAction.id).filter(DOFAction.dof_id == dof.id).order_by(DOFAction.id)]
+    attachment_ids = [attachment_id for (attachment_id,) in
+                      db.session.query(Attachment.id).filter(Attachment.dof_id == dof.id).order_by(Attachment.id)]
+    action_attachment_ids = [attachment_id for (attachment_id,) in
+                             db.session.query(ActionAttachment.id)
+                             .join(DOFAction, ActionAttachment.action_id == DOFAction.id)
+                             .filter(DOFAction.dof_id == dof.id)
+                             .order_by(ActionAttachment.id)]
+
+    payload = [
+        CACHE_VERSION,
+        kind,
+        dof.id,
+        dof.updated_at.isoformat() if dof.updated_at else None,
+        action_ids,
+        attachment_ids,
+        action_attachment_ids,
+        _pdf_template_fingerprint() if kind == 'pdf' else None,
+    ]
+    return hashlib.sha256(json.dumps(payload, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+
+def _document_path(dof_id, kind, digest):
+    extension, _ = DOCUMENT_KINDS[kind]
+    return os.path.join(cache_folder(), str(dof_id), f'{kind}-{digest}.{extension}')
+
+
+def _render(dof, kind):
+    """Belgeyi üretir; (baytlar, basit PDF'e dönüldü mü) döner"""
+    from export_utils import render_dof_detail_pdf, create_dof_detail_excel
+
+    if kind == 'pdf':
+        return render_dof_detail_pdf(dof)
+    return create_dof_detail_excel(dof).getvalue(), False
+
+
+def _store(path, kind, data):
+    """Belgeyi atomik yazar ve aynı DÖF/türün eski sürümlerini siler"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+
+    temp_path = f'{path}.{uuid.uuid4().hex}.part'
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+    current_name = os.path.basename(path)
+    for name in os.listdir(directory):
+        if name.startswith(f'{kind}-') and name != current_name and not name.endswith('.part'):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+def get_document(dof, kind, digest=None):
+    """
+    DÖF detay belgesini önbellekten döndürür, yoksa üretip saklar
+
+    Args:
+        dof: DÖF
+        kind: 'pdf' veya 'excel'
+        digest: Önceden hesaplanmış document_digest (tekrar sorgu yapılmaması için)
+
+    Returns:
+        DetailDocument: etag, path (önbellekteki dosya) veya data (önbelleğe alınmayan belge), mimetype
+    """
+    _, mimetype = DOCUMENT_KINDS[kind]
+    enabled = _max_bytes() > 0
+    digest = digest or document_digest(dof, kind)
+
+    if enabled:
+        path = _document_path(dof.id, kind, digest)
+        try:
+            # LRU için son kullanım zamanı
+            os.utime(path)
+            return DetailDocument(digest, path, None, mimetype)
+        except FileNotFoundError:
+            pass
+
+    data, degraded = _render(dof, kind)
+    if degraded:
+        return DetailDocument(None, None, data, mimetype)
+    if not enabled:
+        return DetailDocument(digest, None, data, mimetype)
+
+    try:
+        _store(path, kind, data)
+    except OSError as e:
+        current_app.logger.warning(f"DÖF #{dof.id} {kind} belgesi önbelleğe yazılamadı: {str(e)}")
+        return DetailDocument(digest, None, data, mimetype)
+
+    _maybe_trim()
+    return DetailDocument(digest, path, None, mimetype)
+
+
+def _maybe_trim():
+    global _last_trim
+    with _trim_lock:
+        if time.monotonic() - _last_trim < TRIM_INTERVAL:
+            return
+        _last_trim = time.monotonic()
+    trim_cache()
+
+
+def trim_cache(dry_run=False):
+    """
+    Toplam boyut sınırı aşıldıysa en eski kullanılan dosyaları siler
+
+    Returns:
+        dict: files (dosya sayısı), bytes (toplam boyut), removed (silinen), freed (açılan bayt)
+    """
+    folder = cache_folder()
+    entries = []
+    total = 0
+    for directory, _, names in os.walk(folder):
+        for name in names:
+            path = os.path.join(directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            # Yazımı yarıda kalan geçici dosyalar bir saat sonra silinir
+            if name.endswith('.part'):
+                if stat.st_mtime < time.time() - 3600 and not dry_run:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+    result = {'files': len(entries), 'bytes': total, 'removed': 0, 'freed': 0}
+    limit = _max_bytes()
+    if total <= limit:
+        return result
+
+    target = limit * TRIM_TARGET_RATIO
+    for _, size, path in sorted(entries):
+        if total <= target:
+            break
+        if not dry_run:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            try:
+                os.rmdir(os.path.dirname(path))
+            except OSError:
+                pass
+        total -= size
+        result['removed'] += 1
+        result['freed'] += size
+
+    if result['removed'] and not dry_run:
+        current_app.logger.info(f"DÖF belge önbelleği: {result['removed']} dosya silindi "
+                                f"({result['freed'] // 1024} KB)")
+    return result
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='detail-cache')
+        return _executor
+
+
+def _prerender(app, dof_id):
+    with app.app_context():
+        try:
+            dof = DOF.query.get(dof_id)
+            if dof is None:
+                return
+            for kind in DOCUMENT_KINDS:
+                get_document(dof, kind)
+            app.logger.info(f"DÖF #{dof_id} detay belgeleri önbelleğe hazırlandı")
+        except Exception as e:
+            app.logger.error(f"DÖF #{dof_id} detay belgeleri hazırlanamadı: {str(e)}")
+
+
+def prerender_dof(dof_id):
+    """DÖF'ün PDF ve Excel belgelerini arka planda önbelleğe hazırlar (kapatılan DÖF'ler için)"""
+    if _max_bytes() <= 0:
+        return
+    _get_executor().submit(_prerender, current_app._get_current_object(), dof_id)
+
+
+if __name__ == "__main__":
+    from app import app
+
+    dry_run = '--dry-run' in sys.argv
+    with app.app_context():
+        print("===== DÖF BELGE ÖNBELLEĞİ =====")
+        result = trim_cache(dry_run=dry_run)
+        print(f"Dosya: {result['files']}, toplam: {result['bytes'] // 1024} KB, "
+              f"silinen: {result['removed']} ({result['freed'] // 1024} KB)")
+        if dry_run:
+            print("--dry-run: dosya silinmedi.")
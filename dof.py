@@ -553,6 +553,8 @@ def review_dof(dof_id):
                             created_at=datetime.now()
                         )
                         
+                        new_dof.link_related(dof)
+                        
                         db.session.add(new_dof)
                         db.session.flush()  # ID oluşturmak için flush yap
                         
@@ -0,0 +1,298 @@
+"""
+DÖF Dosya Paketi (ZIP)
+----------------------
+Filtrelenmiş DÖF'ler için denetim paketi: her DÖF'ün detay PDF'i, işlem
+geçmişi (CSV) ve tüm ekleri (Attachment, ActionAttachment) tek bir ZIP'te.
+
+- ZIP yanıt akışı olarak üretilir; diske veya belleğe toplanmaz. zipfile
+  seek edilemeyen bir akışa (veri tanımlayıcıları ve ZIP64 ile) yazar, ekler
+  UPLOAD_FOLDER'dan CHUNK_SIZE'lık parçalarla okunup doğrudan akışa verilir.
+- DÖF id'leri sayfa sayfa (id sıralı keyset) okunur. Detay PDF'leri
+  DOSSIER_PREFETCH kadar önden iş parçacıklarında hazırlanır
+  (detail_cache üzerinden; önbellekte varsa oradan okunur). Bellekte en
+  fazla önden hazırlanan PDF'ler ve bir okuma parçası bulunur; kullanım
+  DÖF sayısından bağımsızdır. İçindekiler listesi de bellek yerine
+  SpooledTemporaryFile'da biriktirilir.
+- Sorgudaki her DÖF yazılmadan önce DÖF listesiyle aynı kuralla
+  (AuthService.filter_viewable_dofs) yeniden denetlenir; paket hazırlanırken
+  silinen veya yetkisi kalkan DÖF pakete girmez.
+- Bir DÖF'ün PDF'i üretilemezse veya ek dosyası bulunamazsa paket kesilmez;
+  durum icindekiler.csv'de belirtilir.
+
+ZIP yapısı:
+    DOF_<id>/DOF_<id>_Detay.pdf
+    DOF_<id>/islem_gecmisi.csv
+    DOF_<id>/ekler/<ek id>_<dosya adı>
+    DOF_<id>/aksiyon_ekleri/<işlem id>_<ek id>_<dosya adı>
+    icindekiler.csv
+
+Kullanım (route içinde):
+    query = AuthService.filter_viewable_dofs(current_user, apply_dof_export_filters(DOF.query, request.args))
+    return Response(stream_with_context(stream_dossier(query, current_user._get_current_object())),
+                    mimetype='application/zip')
+"""
+
+import csv
+import io
+import os
+import tempfile
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+from models import DOF, DOFAction, Attachment, ActionAttachment
+
+# Akışa bir seferde verilen ve eklerden okunan parça boyutu
+CHUNK_SIZE = 64 * 1024
+
+# DÖF id'lerinin sayfa boyutu
+ID_PAGE_SIZE = 500
+
+MANIFEST_COLUMNS = ['DOF ID', 'DOF Kodu', 'Baslik', 'Durum', 'Detay PDF', 'Islem Sayisi',
+                    'Ek Sayisi', 'Aksiyon Eki Sayisi', 'Bulunamayan Ekler']
+
+ACTION_COLUMNS = ['Tarih', 'Kullanici', 'Islem Tipi', 'Eski Durum', 'Yeni Durum', 'Aciklama']
+
+
+class _ZipStream:
+    """zipfile'ın yazdığı baytları biriktirir; üretici her parçada boşaltır (seek desteklemez)"""
+
+    def __init__(self):
+        self._chunks = []
+        self._pending = 0
+        self._offset = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._pending += len(data)
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def flush(self):
+        pass
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        self._pending = 0
+        return data
+
+
+def _iter_dof_ids(query):
+    """Sorgudaki DÖF id'lerini id sırasıyla sayfa sayfa döndürür"""
+    ids = query.with_entities(DOF.id).order_by(None)
+    last_id = 0
+    while True:
+        page = [dof_id for (dof_id,) in
+                ids.filter(DOF.id > last_id).order_by(DOF.id).limit(ID_PAGE_SIZE)]
+        if not page:
+            return
+        yield from page
+        last_id = page[-1]
+
+
+def _render_pdf(app, dof_id):
+    """İş parçacığında çalışır: DÖF'ün detay PDF'ini (önbellekten veya yeni üreterek) döndürür"""
+    from detail_cache import get_document
+    from export_utils import create_dof_detail_pdf
+
+    with app.app_context():
+        dof = DOF.query.get(dof_id)
+        document = get_document(dof, 'pdf')
+        if document.path:
+            try:
+                with open(document.path, 'rb') as f:
+                    return f.read()
+            except FileNotFoundError:
+                # Önbellekten tam bu sırada silindiyse yeniden üret
+                return create_dof_detail_pdf(dof)
+        return document.data
+
+
+def _attachment_source(file_path):
+    """Ek dosyasının diskteki yolu (indirme route'larıyla aynı klasörler); yoksa None"""
+    if not file_path:
+        return None
+    candidates = [
+        os.path.join(current_app.config['UPLOAD_FOLDER'], os.path.basename(file_path)),
+        os.path.join(os.getcwd(), 'static', file_path),
+    ]
+    for candidate in candidates:
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def _archive_name(name):
+    """Dosya adını ZIP içinde güvenli hale getirir (klasör ayırıcıları ve baştaki noktalar atılır)"""
+    name = os.path.basename((name or '').replace('\\', '/')).lstrip('.')
+    return name or 'dosya'
+
+
+def _action_type(action):
+    if action.old_status is not None and action.new_status is not None:
+        return 'Tamamlandı' if action.new_status == 10 else 'Durum Değişikliği'
+    return 'İşlem'
+
+
+def _action_history_csv(actions, names):
+    from export_utils import get_dof_status_name
+
+    output = io.StringIO()
+    writer = csv.writer(output, delimiter=';')
+    writer.writerow(ACTION_COLUMNS)
+    for action in actions:
+        writer.writerow([
+            action.created_at.strftime('%d.%m.%Y %H:%M') if action.created_at else '',
+            names.user(action.user_id),
+            _action_type(action),
+            get_dof_status_name(action.old_status) if action.old_status is not None else '',
+            get_dof_status_name(action.new_status) if action.new_status is not None else '',
+            action.comment or '',
+        ])
+    # Excel'in Türkçe karakterleri doğru açması için BOM
+    return '\ufeff' + output.getvalue()
+
+
+def stream_dossier(query, user):
+    """
+    Filtrelenmiş DÖF'lerin dosya paketini ZIP olarak parça parça üretir
+
+    Args:
+        query: Kullanıcının görebileceği DOF sorgusu (AuthService.filter_viewable_dofs)
+        user: Paketi indiren kullanıcı (her DÖF yazılmadan önce görünürlüğü yeniden denetlenir)
+
+    Yields:
+        bytes: ZIP akışının parçaları
+    """
+    from auth_service import AuthService
+    from export_utils import _NameLookup, get_dof_status_name
+
+    app = current_app._get_current_object()
+    prefetch = max(app.config.get('DOSSIER_PREFETCH', 4), 1)
+    names = _NameLookup()
+
+    stream = _ZipStream()
+    archive = zipfile.ZipFile(stream, mode='w', compression=zipfile.ZIP_DEFLATED, compresslevel=1)
+    executor = ThreadPoolExecutor(max_workers=prefetch, thread_name_prefix='dossier-pdf')
+    manifest = tempfile.SpooledTemporaryFile(max_size=1024 * 1024, mode='w+', encoding='utf-8', newline='')
+    manifest_writer = csv.writer(manifest, delimiter=';')
+    manifest_writer.writerow(MANIFEST_COLUMNS)
+    pending = deque()
+    dof_ids = _iter_dof_ids(query)
+    count = 0
+
+    def viewable(dof_id):
+        # DÖF listesiyle aynı görünürlük kuralı (paket sorgusunu üreten filtre) tek DÖF'e uygulanır
+        dof = AuthService.filter_viewable_dofs(user, DOF.query.filter(DOF.id == dof_id)).first()
+        if dof is None:
+            current_app.logger.warning(f"Dosya paketi: DÖF #{dof_id} {user.username} için görünür değil, atlandı")
+        return dof
+
+    def fill():
+        # PDF'leri yazıcının önünde DOSSIER_PREFETCH kadar hazırla (görülemeyen DÖF'ler için üretilmez)
+        while len(pending) < prefetch:
+            dof_id = next(dof_ids, None)
+            if dof_id is None:
+                return
+            if viewable(dof_id) is None:
+                continue
+            pending.append((dof_id, executor.submit(_render_pdf, app, dof_id)))
+
+    def copy_file(source, arcname):
+        with open(source, 'rb') as src, archive.open(arcname, mode='w', force_zip64=True) as dest:
+            while True:
+                chunk = src.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                dest.write(chunk)
+                if stream.pending >= CHUNK_SIZE:
+                    yield stream.drain()
+
+    try:
+        fill()
+        while pending:
+            dof_id, future = pending.popleft()
+            fill()
+
+            # Paket hazırlanırken silinen veya yetkisi kalkan DÖF yazılmaz
+            dof = viewable(dof_id)
+            if dof is None:
+                future.cancel()
+                continue
+            folder = f'DOF_{dof_id}'
+
+            try:
+                pdf = future.result()
+                archive.writestr(f'{folder}/DOF_{dof_id}_Detay.pdf', pdf)
+                pdf_status = 'var'
+            except Exception as e:
+                current_app.logger.error(f"Dosya paketi: DÖF #{dof_id} PDF'i üretilemedi: {str(e)}")
+                pdf_status = 'üretilemedi'
+            if stream.pending:
+                yield stream.drain()
+
+            actions = DOFAction.query.filter_by(dof_id=dof_id).order_by(DOFAction.created_at, DOFAction.id).all()
+            archive.writestr(f'{folder}/islem_gecmisi.csv', _action_history_csv(actions, names))
+
+            missing = []
+            attachments = Attachment.query.filter_by(dof_id=dof_id).order_by(Attachment.id).all()
+            for attachment in attachments:
+                source = _attachment_source(attachment.file_path)
+                if source is None:
+                    missing.append(attachment.filename)
+                    continue
+                yield from copy_file(source, f'{folder}/ekler/{attachment.id}_{_archive_name(attachment.filename)}')
+
+            action_attachments = (ActionAttachment.query
+                                  .join(DOFAction, ActionAttachment.action_id == DOFAction.id)
+                                  .filter(DOFAction.dof_id == dof_id)
+                                  .order_by(ActionAttachment.id).all())
+            for attachment in action_attachments:
+                source = _attachment_source(attachment.file_path)
+                if source is None:
+                    missing.append(attachment.filename)
+                    continue
+                arcname = (f'{folder}/aksiyon_ekleri/{attachment.action_id}_{attachment.id}_'
+                           f'{_archive_name(attachment.filename)}')
+                yield from copy_file(source, arcname)
+
+            manifest_writer.writerow([
+                dof_id,
+                dof.code or f'DOF-{dof_id}',
+                dof.title,
+                get_dof_status_name(dof.status),
+                pdf_status,
+                len(actions),
+                len(attachments),
+                len(action_attachments),
+                ', '.join(missing),
+            ])
+            count += 1
+            if stream.pending:
+                yield stream.drain()
+
+        manifest.seek(0)
+        with archive.open('icindekiler.csv', mode='w', force_zip64=True) as dest:
+            dest.write('\ufeff'.encode('utf-8'))
+            while True:
+                text = manifest.read(CHUNK_SIZE)
+                if not text:
+                    break
+                dest.write(text.encode('utf-8'))
+        archive.close()
+        yield stream.drain()
+        current_app.logger.info(f"Dosya paketi tamamlandı: {count} DÖF")
+    finally:
+        # İstemci bağlantıyı kestiyse önden hazırlanan PDF'ler iptal edilir
+        executor.shutdown(wait=False, cancel_futures=True)
+        manifest.close()
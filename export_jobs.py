@@ -0,0 +1,453 @@
+"""
+Arka Plan Dışa Aktarım İşleri
+-----------------------------
+Büyük Excel/PDF dışa aktarımlarını istek dışında, süreç başına sınırlı bir iş
+havuzunda hazırlayan modül. gunicorn'un 120 saniyelik zaman aşımı uzun süren
+dışa aktarımları yarıda kesiyordu; artık istek sadece iş kaydı oluşturur.
+
+- İş kaydı export_jobs tablosunda tutulur; böylece durum ve indirme istekleri
+  hangi sunucu sürecine düşerse düşsün yanıtlanır. Dosyalar EXPORT_JOB_FOLDER
+  klasörüne (varsayılan instance/exports) yazılır.
+- Aynı tür + görünürlük kapsamı + filtre için kuyrukta/çalışan bir iş varsa
+  yeni iş açılmaz, mevcut iş döndürülür (dedupe_key tekil indeksi süreçler
+  arasındaki yarışı da çözer).
+- İşler EXPORT_JOB_WORKERS iş parçacıklı havuzda çalışır; kuyruktaki ve
+  çalışan iş sayısı EXPORT_JOB_MAX_PENDING'i aşarsa ExportQueueFull fırlatılır.
+- İlerleme ayrı bir bağlantıyla en fazla saniyede bir yazılır. Süreç
+  kapanırsa (max_requests, yeniden başlatma) EXPORT_JOB_STALE_SECONDS boyunca
+  ilerleme yazmayan iş başarısız sayılır.
+- Biten/başarısız işler EXPORT_JOB_RETENTION sonra dosyasıyla birlikte
+  silinir (app.py'deki saatlik zamanlanmış görev ve bu betik).
+
+Kullanım:
+    from export_jobs import submit_export_job
+
+    job = submit_export_job('dof_list_excel', current_user, request.args)
+
+    python export_jobs.py --dry-run   # süresi dolan işleri listeler
+    python export_jobs.py             # süresi dolan işleri ve dosyaları siler
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Tuple
+
+from flask import current_app
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from werkzeug.datastructures import MultiDict
+
+from extensions import db
+from models import ExportJob
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+PDF_MIMETYPE = 'application/pdf'
+
+# İlerleme en fazla bu aralıkla (saniye) veritabanına yazılır
+PROGRESS_INTERVAL = 1.0
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class ExportQueueFull(Exception):
+    """Kuyruktaki ve çalışan iş sayısı sınırda"""
+
+
+@dataclass(frozen=True)
+class ExportKind:
+    """
+    Bir dışa aktarım türü
+
+    render(user, args, progress) -> (dosya nesnesi, indirme adı, mimetype)
+    scope(user) -> işin paylaşılabileceği görünürlük kapsamı
+    """
+
+    label: str
+    render: Callable[[Any, MultiDict, Callable[[float], None]], Tuple[Any, str, str]]
+    scope: Callable[[Any], str]
+    params: Tuple[str, ...] = ()
+
+
+def _visibility_scope(user):
+    """Tüm DÖF'leri görenler aynı işi paylaşır, diğerleri sadece kendi işlerini"""
+    from auth_principal import get_principal
+
+    return 'all' if get_principal(user).sees_all else f'user:{user.id}'
+
+
+def _admin_scope(user):
+    from models import UserRole
+
+    return 'admin' if user.role == UserRole.ADMIN else f'user:{user.id}'
+
+
+def _timestamp():
+    return datetime.now().strftime('%Y%m%d_%H%M%S')
+
+
+def _render_dof_list_excel(user, args, progress):
+    from routes.dof import build_dof_export_query
+    from export_utils import export_dof_query_to_excel
+
+    output = export_dof_query_to_excel(build_dof_export_query(user, args), progress=progress)
+    return output, f'DOF_Listesi_{_timestamp()}.xlsx', XLSX_MIMETYPE
+
+
+def _render_dof_list_pdf(user, args, progress):
+    from models import DOF
+    from routes.dof import build_dof_export_query
+    from export_utils import export_dofs_to_pdf
+    from query_options import dof_summary_options
+
+    dofs = build_dof_export_query(user, args).options(*dof_summary_options()).order_by(DOF.created_at.desc()).all()
+    progress(0.3)
+    return export_dofs_to_pdf(dofs), f'DOF_Listesi_{_timestamp()}.pdf', PDF_MIMETYPE
+
+
+def _render_report_excel(user, args, progress):
+    from report_service import ReportService
+    from export_utils import export_dof_query_to_excel
+
+    output = export_dof_query_to_excel(ReportService.build_query(user, args), progress=progress)
+    return output, f'DOF_Raporu_{_timestamp()}.xlsx', XLSX_MIMETYPE
+
+
+def _render_report_pdf(user, args, progress):
+    from models import DOF
+    from report_service import ReportService
+    from export_utils import export_dofs_to_pdf
+    from query_options import dof_summary_options
+
+    dofs = ReportService.build_query(user, args).options(*dof_summary_options()).order_by(DOF.created_at.desc()).all()
+    progress(0.3)
+    return export_dofs_to_pdf(dofs), f'DOF_Raporu_{_timestamp()}.pdf', PDF_MIMETYPE
+
+
+def _render_admin_report(format_type):
+    def render(user, args, progress):
+        from routes.admin import build_admin_report
+
+        return build_admin_report(format_type)
+    return render
+
+
+def _render_thank_you(format_type):
+    def render(user, args, progress):
+        from routes.thank_you import thank_you_export_query, export_thank_you_to_excel, export_thank_you_to_pdf
+
+        thank_yous = thank_you_export_query(user).all()
+        progress(0.3)
+        name = f'tesekkur_bildirimleri_{datetime.now().strftime("%Y%m%d%H%M%S")}'
+        if format_type == 'pdf':
+            return export_thank_you_to_pdf(thank_yous), f'{name}.pdf', PDF_MIMETYPE
+        return export_thank_you_to_excel(thank_yous), f'{name}.xlsx', XLSX_MIMETYPE
+    return render
+
+
+DOF_LIST_PARAMS = ('status', 'department', 'keyword', 'date_from', 'date_to', 'dof_type')
+REPORT_PARAMS = ('department_id', 'month', 'status')
+
+EXPORT_KINDS = {
+    'dof_list_excel': ExportKind('DÖF Listesi (Excel)', _render_dof_list_excel, _visibility_scope, DOF_LIST_PARAMS),
+    'dof_list_pdf': ExportKind('DÖF Listesi (PDF)', _render_dof_list_pdf, _visibility_scope, DOF_LIST_PARAMS),
+    'report_excel': ExportKind('DÖF Raporu (Excel)', _render_report_excel, _visibility_scope, REPORT_PARAMS),
+    'report_pdf': ExportKind('DÖF Raporu (PDF)', _render_report_pdf, _visibility_scope, REPORT_PARAMS),
+    'admin_report_excel': ExportKind('Sistem Raporu (Excel)', _render_admin_report('excel'), _admin_scope),
+    'admin_report_pdf': ExportKind('Sistem Raporu (PDF)', _render_admin_report('pdf'), _admin_scope),
+    'thank_you_excel': ExportKind('Teşekkür Bildirimleri (Excel)', _render_thank_you('excel'), _visibility_scope),
+    'thank_you_pdf': ExportKind('Teşekkür Bildirimleri (PDF)', _render_thank_you('pdf'), _visibility_scope),
+}
+
+
+def normalize_params(kind_name, args):
+    """İşin kullandığı filtreleri boş/varsayılan değerler atılarak döndürür"""
+    params = {}
+    for name in EXPORT_KINDS[kind_name].params:
+        value = (args.get(name) or '').strip()
+        if value and value != '0':
+            params[name] = value
+    return params
+
+
+def job_scope(kind_name, user):
+    return EXPORT_KINDS[kind_name].scope(user)
+
+
+def can_access_job(job, user):
+    """İşi başlatan veya aynı kapsamdaki kullanıcılar durum görebilir ve indirebilir"""
+    if job.kind not in EXPORT_KINDS:
+        return False
+    return job.user_id == user.id or job.scope == job_scope(job.kind, user)
+
+
+def export_folder():
+    folder = current_app.config.get('EXPORT_JOB_FOLDER') or os.path.join(current_app.instance_path, 'exports')
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def _stale_cutoff():
+    return datetime.now() - timedelta(seconds=current_app.config.get('EXPORT_JOB_STALE_SECONDS', 900))
+
+
+def _retention():
+    return timedelta(seconds=current_app.config.get('EXPORT_JOB_RETENTION', 24 * 3600))
+
+
+def _fail_stale_jobs():
+    """İlerleme yazmayı bırakmış (süreci kapanmış) işleri başarısız olarak işaretler"""
+    now = datetime.now()
+    failed = db.session.execute(
+        update(ExportJob)
+        .where(ExportJob.status.in_(ACTIVE_STATUSES), ExportJob.updated_at < _stale_cutoff())
+        .values(status=FAILED, dedupe_key=None, message='İş yarıda kaldı, lütfen tekrar deneyin.',
+                finished_at=now, expires_at=now + _retention())
+    ).rowcount
+    if failed:
+        current_app.logger.warning(f"{failed} dışa aktarım işi yarıda kaldığı için başarısız sayıldı")
+    return failed
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=current_app.config.get('EXPORT_JOB_WORKERS', 2),
+                                           thread_name_prefix='export-job')
+        return _executor
+
+
+def submit_export_job(kind_name, user, args):
+    """
+    Dışa aktarım işini kuyruğa ekler veya aynı filtreli aktif işi döndürür
+
+    Args:
+        kind_name: EXPORT_KINDS anahtarı
+        user: İşi başlatan kullanıcı (current_user)
+        args: request.args veya filtre sözlüğü
+
+    Returns:
+        ExportJob: Yeni veya paylaşılan iş
+
+    Raises:
+        ValueError: Bilinmeyen tür
+        ExportQueueFull: Kuyruk dolu
+    """
+    if kind_name not in EXPORT_KINDS:
+        raise ValueError(f"Bilinmeyen dışa aktarım türü: {kind_name}")
+
+    params = normalize_params(kind_name, args)
+    scope = job_scope(kind_name, user)
+    dedupe_key = hashlib.sha256(json.dumps([kind_name, scope, params], sort_keys=True).encode('utf-8')).hexdigest()
+
+    _fail_stale_jobs()
+    db.session.commit()
+
+    job = ExportJob.query.filter_by(dedupe_key=dedupe_key).first()
+    if job is not None:
+        current_app.logger.info(f"Dışa aktarım işi paylaşıldı: {job.id} ({kind_name})")
+        return job
+
+    pending = ExportJob.query.filter(ExportJob.status.in_(ACTIVE_STATUSES)).count()
+    if pending >= current_app.config.get('EXPORT_JOB_MAX_PENDING', 20):
+        raise ExportQueueFull()
+
+    job = ExportJob(id=uuid.uuid4().hex, kind=kind_name, params=json.dumps(params), scope=scope,
+                    dedupe_key=dedupe_key, user_id=user.id, status=QUEUED, progress=0,
+                    created_at=datetime.now(), updated_at=datetime.now())
+    db.session.add(job)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Aynı anda başka bir süreç aynı işi açtı
+        db.session.rollback()
+        job = ExportJob.query.filter_by(dedupe_key=dedupe_key).first()
+        if job is not None:
+            return job
+        raise
+
+    _get_executor().submit(_run_job, current_app._get_current_object(), job.id)
+    current_app.logger.info(f"Dışa aktarım işi kuyruğa eklendi: {job.id} ({kind_name}, {scope}, {params})")
+    return job
+
+
+def get_export_job(job_id):
+    """İşi döndürür; yarıda kalmış işler önce başarısız olarak işaretlenir"""
+    job = db.session.get(ExportJob, job_id)
+    if job is not None and job.status in ACTIVE_STATUSES and job.updated_at < _stale_cutoff():
+        _fail_stale_jobs()
+        db.session.commit()
+        db.session.refresh(job)
+    return job
+
+
+class _ProgressWriter:
+    """İlerlemeyi ayrı bir bağlantıyla yazar (dışa aktarım sorgusunun imleci açık kalır)"""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self._last_write = 0.0
+        self._last_value = 0
+        # SQLite'ta açık bir okuma sürerken başka bağlantı yazamaz (geliştirme ortamı); sadece sonuç yazılır
+        self.enabled = db.engine.dialect.name != 'sqlite'
+
+    def __call__(self, fraction):
+        if not self.enabled:
+            return
+        value = max(0, min(99, int(fraction * 100)))
+        now = time.monotonic()
+        if value <= self._last_value or now - self._last_write < PROGRESS_INTERVAL:
+            return
+        self._last_write = now
+        self._last_value = value
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(update(ExportJob.__table__).where(ExportJob.__table__.c.id == self.job_id)
+                             .values(progress=value, updated_at=datetime.now()))
+        except Exception as e:
+            current_app.logger.warning(f"Dışa aktarım ilerlemesi yazılamadı ({self.job_id}): {str(e)}")
+
+
+def _write_artifact(output, path):
+    """Dışa aktarım çıktısını atomik olarak dosyaya yazar ve boyutunu döndürür"""
+    partial = f'{path}.part'
+    try:
+        output.seek(0)
+        with open(partial, 'wb') as target:
+            shutil.copyfileobj(output, target, 1024 * 1024)
+        os.replace(partial, path)
+    finally:
+        output.close()
+        if os.path.exists(partial):
+            os.remove(partial)
+    return os.path.getsize(path)
+
+
+def _run_job(app, job_id):
+    """İş havuzunda çalışır: işi sahiplenir, dosyayı üretir ve sonucu yazar"""
+    with app.app_context():
+        try:
+            now = datetime.now()
+            claimed = db.session.execute(
+                update(ExportJob).where(ExportJob.id == job_id, ExportJob.status == QUEUED)
+                .values(status=RUNNING, started_at=now, updated_at=now)
+            ).rowcount
+            db.session.commit()
+            if not claimed:
+                return
+
+            from models import User
+
+            job = db.session.get(ExportJob, job_id)
+            user = db.session.get(User, job.user_id)
+            if user is None:
+                raise ValueError("İşi başlatan kullanıcı bulunamadı")
+
+            started = time.monotonic()
+            output, file_name, mimetype = EXPORT_KINDS[job.kind].render(
+                user, MultiDict(json.loads(job.params or '{}')), _ProgressWriter(job_id))
+
+            path = os.path.join(export_folder(), job_id + os.path.splitext(file_name)[1])
+            file_size = _write_artifact(output, path)
+
+            now = datetime.now()
+            db.session.execute(
+                update(ExportJob).where(ExportJob.id == job_id)
+                .values(status=DONE, progress=100, dedupe_key=None, file_name=file_name, file_path=path,
+                        file_size=file_size, mimetype=mimetype, finished_at=now, updated_at=now,
+                        expires_at=now + _retention())
+            )
+            db.session.commit()
+            current_app.logger.info(f"Dışa aktarım işi tamamlandı: {job_id} ({file_size} bayt, "
+                                    f"{time.monotonic() - started:.1f} sn)")
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Dışa aktarım işi başarısız: {job_id}: {str(e)}")
+            try:
+                now = datetime.now()
+                db.session.execute(
+                    update(ExportJob).where(ExportJob.id == job_id)
+                    .values(status=FAILED, dedupe_key=None, message=str(e)[:255], finished_at=now,
+                            updated_at=now, expires_at=now + _retention())
+                )
+                db.session.commit()
+            except Exception as write_error:
+                db.session.rollback()
+                current_app.logger.error(f"Dışa aktarım işi durumu yazılamadı: {job_id}: {str(write_error)}")
+
+
+def _remove_file(path):
+    try:
+        if path and os.path.exists(path):
+            os.remove(path)
+    except OSError as e:
+        current_app.logger.warning(f"Dışa aktarım dosyası silinemedi ({path}): {str(e)}")
+
+
+def cleanup_export_jobs(dry_run=False):
+    """
+    Süresi dolan işleri ve dosyalarını, kaydı olmayan eski dosyaları siler
+
+    Returns:
+        dict: expired (silinen iş), stale (yarıda kalan iş), orphans (sahipsiz dosya)
+    """
+    now = datetime.now()
+    result = {'expired': 0, 'stale': 0, 'orphans': 0}
+
+    if dry_run:
+        result['stale'] = ExportJob.query.filter(ExportJob.status.in_(ACTIVE_STATUSES),
+                                                 ExportJob.updated_at < _stale_cutoff()).count()
+    else:
+        result['stale'] = _fail_stale_jobs()
+
+    expired = ExportJob.query.filter(ExportJob.expires_at < now).all()
+    result['expired'] = len(expired)
+    if not dry_run:
+        for job in expired:
+            _remove_file(job.file_path)
+            db.session.delete(job)
+    db.session.commit()
+
+    # Süreç işi bitirmeden kapandığında kalan yarım/sahipsiz dosyalar
+    folder = export_folder()
+    known = {job_id for (job_id,) in db.session.query(ExportJob.id)}
+    cutoff = time.time() - _retention().total_seconds()
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        if name.split('.', 1)[0] in known or not os.path.isfile(path) or os.path.getmtime(path) > cutoff:
+            continue
+        result['orphans'] += 1
+        if not dry_run:
+            _remove_file(path)
+
+    return result
+
+
+if __name__ == "__main__":
+    from app import app
+
+    dry_run = '--dry-run' in sys.argv
+    with app.app_context():
+        print("===== DIŞA AKTARIM İŞLERİ TEMİZLİĞİ =====")
+        result = cleanup_export_jobs(dry_run=dry_run)
+        print(f"Süresi dolan iş: {result['expired']}, yarıda kalan iş: {result['stale']}, "
+              f"sahipsiz dosya: {result['orphans']}")
+        if dry_run:
+            print("--dry-run: kayıt ve dosya silinmedi.")
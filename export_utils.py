@@ -45,6 +45,21 @@ def get_dof_source_name(source_code):
     }
     return source_names.get(source_code, f"Bilinmeyen Kaynak ({source_code})")
 
+# Türkçe karakterlerin ASCII karşılıkları (str.translate ile tek geçişte dönüştürülür)
+TR_ASCII_TABLE = str.maketrans({'ş': 's', 'Ş': 'S', 'ı': 'i', 'İ': 'I', 'ğ': 'g', 'Ğ': 'G',
+                                'ü': 'u', 'Ü': 'U', 'ö': 'o', 'Ö': 'O', 'ç': 'c', 'Ç': 'C'})
+
+# Excel dışa aktarımında bir seferde okunan satır sayısı
+EXCEL_BATCH_SIZE = 1000
+
+DOF_SHEET_COLUMNS = ['ID', 'Kod', 'Baslik', 'Aciklama', 'Durum', 'Tip', 'Kaynak', 'Departman',
+                     'Olusturan', 'Atanan Kisi', 'Olusturma Tarihi', 'Son Guncelleme', 'Termin Tarihi',
+                     'Kapanis Tarihi', 'Kok Neden 1', 'Kok Neden 2', 'Kok Neden 3', 'Kok Neden 4',
+                     'Kok Neden 5', 'Aksiyon Plani', 'Son Tarih', 'Tamamlanma Tarihi']
+
+ACTION_SHEET_COLUMNS = ['DOF ID', 'DOF Kodu', 'Aksiyon ID', 'Aciklama', 'Olusturan',
+                        'Olusturma Tarihi', 'Durum', 'Yeni Durum']
+
 def get_department_name(department_id):
     """Departman ID'sini departman adina cevirir"""
     if not department_id:
@@ -53,16 +68,7 @@ def get_department_name(department_id):
     department = Department.query.get(department_id)
     if department:
         # Türkçe karakterleri ASCII karakterlere dönüştür
-        dept_name = department.name
-        
-        # Karakter dönüşümleri
-        tr_chars = {'ş': 's', 'Ş': 'S', 'ı': 'i', 'İ': 'I', 'ğ': 'g', 'Ğ': 'G', 
-                   'ü': 'u', 'Ü': 'U', 'ö': 'o', 'Ö': 'O', 'ç': 'c', 'Ç': 'C'}
-        
-        for tr_char, eng_char in tr_chars.items():
-            dept_name = dept_name.replace(tr_char, eng_char)
-            
-        return dept_name
+        return department.name.translate(TR_ASCII_TABLE)
     else:
         return f"Bilinmeyen Departman ({department_id})"
 
@@ -74,97 +80,194 @@ def get_user_name(user_id):
     user = User.query.get(user_id)
     if user:
         # Türkçe karakterleri ASCII karakterlere dönüştür
-        first_name = user.first_name
-        last_name = user.last_name
-        
-        # Karakter dönüşümleri
-        tr_chars = {'ş': 's', 'Ş': 'S', 'ı': 'i', 'İ': 'I', 'ğ': 'g', 'Ğ': 'G', 
-                   'ü': 'u', 'Ü': 'U', 'ö': 'o', 'Ö': 'O', 'ç': 'c', 'Ç': 'C'}
-        
-        for tr_char, eng_char in tr_chars.items():
-            first_name = first_name.replace(tr_char, eng_char)
-            last_name = last_name.replace(tr_char, eng_char)
-            
-        return f"{first_name} {last_name}"
+        return f"{user.first_name} {user.last_name}".translate(TR_ASCII_TABLE)
     else:
         return f"Bilinmeyen Kullanici ({user_id})"
 
-def export_dofs_to_excel(dofs):
-    """DOF listesini Excel dosyasına dönüştürür"""
-    # Ana liste için veri hazırla
-    main_data = []
-    action_data = []  # Aksiyonlar için ayrı bir tablo
+class _NameLookup:
+    """Kullanıcı ve departman adlarını tek sorguda yükleyip ASCII olarak saklar"""
     
-    for dof in dofs:
-        # Ana DOF bilgileri
-        row = {
-            'ID': dof.id,
-            'Kod': dof.code if dof.code else f"DOF-{dof.id}",
-            'Baslik': dof.title,
-            'Aciklama': dof.description,
-            'Durum': get_dof_status_name(dof.status),
-            'Tip': get_dof_type_name(dof.dof_type),
-            'Kaynak': get_dof_source_name(dof.dof_source),
-            'Departman': get_department_name(dof.department_id),
-            'Olusturan': get_user_name(dof.created_by),
-            'Atanan Kisi': get_user_name(dof.assigned_to),
-            'Olusturma Tarihi': dof.created_at.strftime("%d.%m.%Y %H:%M") if dof.created_at else "",
-            'Son Guncelleme': dof.updated_at.strftime("%d.%m.%Y %H:%M") if dof.updated_at else "",
-            'Termin Tarihi': dof.due_date.strftime("%d.%m.%Y") if dof.due_date else "",
-            'Kapanis Tarihi': dof.closed_at.strftime("%d.%m.%Y") if dof.closed_at else "",
-            # Kök neden analizi
-            'Kok Neden 1': dof.root_cause1 if dof.root_cause1 else "",
-            'Kok Neden 2': dof.root_cause2 if dof.root_cause2 else "",
-            'Kok Neden 3': dof.root_cause3 if dof.root_cause3 else "",
-            'Kok Neden 4': dof.root_cause4 if dof.root_cause4 else "",
-            'Kok Neden 5': dof.root_cause5 if dof.root_cause5 else "",
-            # Aksiyon planı ve tarihler
-            'Aksiyon Plani': dof.action_plan if dof.action_plan else "",
-            'Son Tarih': dof.deadline.strftime("%d.%m.%Y") if dof.deadline else "",
-            'Tamamlanma Tarihi': dof.completion_date.strftime("%d.%m.%Y") if dof.completion_date else (dof.closed_at.strftime("%d.%m.%Y") if dof.closed_at else "")
-        }
-        main_data.append(row)
+    def __init__(self):
+        from extensions import db
         
-        # DOF'a ait aksiyonları ekle
-        actions = DOFAction.query.filter_by(dof_id=dof.id).order_by(DOFAction.created_at.desc()).all()
-        for action in actions:
-            action_row = {
-                'DOF ID': dof.id,
-                'DOF Kodu': dof.code if dof.code else f"DOF-{dof.id}",
-                'Aksiyon ID': action.id,
-    
-                'Aciklama': action.comment,
-                'Olusturan': get_user_name(action.user_id),
-                'Olusturma Tarihi': action.created_at.strftime("%d.%m.%Y %H:%M") if action.created_at else "",
-                'Durum': action.old_status if action.old_status is not None else 'N/A',
-                'Yeni Durum': action.new_status if action.new_status is not None else 'N/A'
-            }
-            action_data.append(action_row)
-    
-    # DataFrames oluştur
-    df_main = pd.DataFrame(main_data)
-    df_actions = pd.DataFrame(action_data) if action_data else pd.DataFrame()
+        self.users = {
+            row.id: f"{row.first_name or ''} {row.last_name or ''}".translate(TR_ASCII_TABLE)
+            for row in db.session.query(User.id, User.first_name, User.last_name)
+        }
+        self.departments = {
+            row.id: (row.name or '').translate(TR_ASCII_TABLE)
+            for row in db.session.query(Department.id, Department.name)
+        }
     
-    # Excel dosyası oluştur
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df_main.to_excel(writer, sheet_name='DOF_Listesi', index=False)
-        
-        # Sütun genişliklerini ayarla (Ana liste)
-        worksheet = writer.sheets['DOF_Listesi']
-        for idx, col in enumerate(df_main.columns):
-            max_len = max(df_main[col].astype(str).apply(len).max(), len(col)) + 2
-            worksheet.column_dimensions[chr(65 + idx)].width = max_len
-        
-        # Aksiyonlar tablosunu ekle (varsa)
-        if not df_actions.empty:
-            df_actions.to_excel(writer, sheet_name='Aksiyonlar', index=False)
-            
-            # Sütun genişliklerini ayarla (Aksiyonlar)
-            worksheet = writer.sheets['Aksiyonlar']
-            for idx, col in enumerate(df_actions.columns):
-                max_len = max(df_actions[col].astype(str).apply(len).max(), len(col)) + 2
-                worksheet.column_dimensions[chr(65 + idx)].width = max_len
+    def user(self, user_id):
+        if not user_id:
+            return "Atanmadi"
+        return self.users.get(user_id, f"Bilinmeyen Kullanici ({user_id})")
+    
+    def department(self, department_id):
+        if not department_id:
+            return "Atanmadi"
+        return self.departments.get(department_id, f"Bilinmeyen Departman ({department_id})")
+
+def _format_datetime(value, fmt):
+    return value.strftime(fmt) if value else ""
+
+def _dof_sheet_row(dof, names):
+    """DOF_Listesi sayfasının bir satırı (dof: DÖF nesnesi veya aynı adlı kolonları taşıyan satır)"""
+    closed_at = _format_datetime(dof.closed_at, "%d.%m.%Y")
+    return [
+        dof.id,
+        dof.code if dof.code else f"DOF-{dof.id}",
+        dof.title,
+        dof.description,
+        get_dof_status_name(dof.status),
+        get_dof_type_name(dof.dof_type),
+        get_dof_source_name(dof.dof_source),
+        names.department(dof.department_id),
+        names.user(dof.created_by),
+        names.user(dof.assigned_to),
+        _format_datetime(dof.created_at, "%d.%m.%Y %H:%M"),
+        _format_datetime(dof.updated_at, "%d.%m.%Y %H:%M"),
+        _format_datetime(dof.due_date, "%d.%m.%Y"),
+        closed_at,
+        # Kök neden analizi
+        dof.root_cause1 or "",
+        dof.root_cause2 or "",
+        dof.root_cause3 or "",
+        dof.root_cause4 or "",
+        dof.root_cause5 or "",
+        # Aksiyon planı ve tarihler
+        dof.action_plan or "",
+        _format_datetime(dof.deadline, "%d.%m.%Y"),
+        _format_datetime(dof.completion_date, "%d.%m.%Y") or closed_at,
+    ]
+
+def _action_sheet_row(action, dof_code, names):
+    """Aksiyonlar sayfasının bir satırı"""
+    return [
+        action.dof_id,
+        dof_code,
+        action.id,
+        action.comment,
+        names.user(action.user_id),
+        _format_datetime(action.created_at, "%d.%m.%Y %H:%M"),
+        action.old_status if action.old_status is not None else 'N/A',
+        action.new_status if action.new_status is not None else 'N/A',
+    ]
+
+def _dof_export_columns():
+    """DOF_Listesi sayfası için okunan kolonlar (ORM nesnesi oluşturulmaz)"""
+    from models import DOF
+    return [DOF.id, DOF.code, DOF.title, DOF.description, DOF.status, DOF.dof_type, DOF.dof_source,
+            DOF.department_id, DOF.created_by, DOF.assigned_to, DOF.created_at, DOF.updated_at,
+            DOF.due_date, DOF.closed_at, DOF.root_cause1, DOF.root_cause2, DOF.root_cause3,
+            DOF.root_cause4, DOF.root_cause5, DOF.action_plan, DOF.deadline, DOF.completion_date]
+
+def _action_export_columns():
+    return [DOFAction.id, DOFAction.dof_id, DOFAction.comment, DOFAction.user_id,
+            DOFAction.created_at, DOFAction.old_status, DOFAction.new_status]
+
+def _new_workbook():
+    """Geçici dosyaya yazan, sabit bellekli Excel çalışma kitabı (bkz. xlsx_stream.py)"""
+    from xlsx_stream import StreamingWorkbook
+    
+    output = tempfile.TemporaryFile()
+    return output, StreamingWorkbook(output)
+
+def export_dof_query_to_excel(query, progress=None):
+    """
+    DÖF sorgusunu sabit bellekle Excel dosyasına dönüştürür
+    
+    DÖF'ler ve aksiyonları yield_per ile parça parça okunur, kullanıcı ve
+    departman adları tek seferde yüklenir ve satırlar xlsx_stream ile geçici
+    dosyaya yazılır. Satırlar en yeni DÖF önce sıralanır; aksiyonlar DÖF
+    sırasını izler.
+    
+    Args:
+        query: Filtrelenmiş DÖF sorgusu (sıralaması yok sayılır)
+        progress: İsteğe bağlı ilerleme bildirimi, progress(0..1) (bkz. export_jobs.py)
+    
+    Returns:
+        file: Başa sarılmış geçici dosya (send_file ile gönderilebilir)
+    """
+    from flask import current_app
+    from models import DOF
+    
+    names = _NameLookup()
+    dof_query = query.order_by(None).with_entities(*_dof_export_columns())\
+                     .order_by(DOF.created_at.desc(), DOF.id.desc())
+    
+    # Aksiyonlar filtrelenmiş DÖF'lerle birleştirilerek aynı sırada okunur
+    scope = query.order_by(None).with_entities(DOF.id, DOF.code, DOF.created_at).subquery('export_dofs')
+    action_query = query.session.query(*_action_export_columns(), scope.c.code)\
+                        .join(scope, scope.c.id == DOFAction.dof_id)\
+                        .order_by(scope.c.created_at.desc(), scope.c.id.desc(),
+                                  DOFAction.created_at.desc(), DOFAction.id.desc())
+    
+    total = 0
+    if progress is not None:
+        total = dof_query.order_by(None).count() + action_query.order_by(None).count()
+    
+    output, workbook = _new_workbook()
+    try:
+        dof_sheet = workbook.add_sheet('DOF_Listesi', DOF_SHEET_COLUMNS)
+        for dof in dof_query.yield_per(EXCEL_BATCH_SIZE):
+            dof_sheet.append(_dof_sheet_row(dof, names))
+            if total and dof_sheet.rows % EXCEL_BATCH_SIZE == 0:
+                progress(dof_sheet.rows / total)
+        
+        action_sheet = None
+        for action in action_query.yield_per(EXCEL_BATCH_SIZE):
+            if action_sheet is None:
+                action_sheet = workbook.add_sheet('Aksiyonlar', ACTION_SHEET_COLUMNS)
+            action_sheet.append(_action_sheet_row(action, action.code if action.code else f"DOF-{action.dof_id}", names))
+            if total and action_sheet.rows % EXCEL_BATCH_SIZE == 0:
+                progress((dof_sheet.rows + action_sheet.rows) / total)
+        
+        workbook.close()
+    except Exception:
+        output.close()
+        raise
+    
+    current_app.logger.info(f"Excel dışa aktarımı: {dof_sheet.rows} DÖF, {action_sheet.rows if action_sheet else 0} aksiyon")
+    output.seek(0)
+    return output
+
+def export_dofs_to_excel(dofs):
+    """
+    DOF listesini Excel dosyasına dönüştürür
+    
+    Büyük listeler için export_dof_query_to_excel tercih edilmelidir; burada
+    aksiyonlar EXCEL_BATCH_SIZE'lık DÖF grupları için tek sorguda okunur.
+    """
+    from extensions import db
+    
+    dofs = list(dofs)
+    names = _NameLookup()
+    output, workbook = _new_workbook()
+    try:
+        dof_sheet = workbook.add_sheet('DOF_Listesi', DOF_SHEET_COLUMNS)
+        for dof in dofs:
+            dof_sheet.append(_dof_sheet_row(dof, names))
+        
+        action_sheet = None
+        for start in range(0, len(dofs), EXCEL_BATCH_SIZE):
+            batch = dofs[start:start + EXCEL_BATCH_SIZE]
+            actions = {}
+            for action in db.session.query(*_action_export_columns())\
+                                    .filter(DOFAction.dof_id.in_([dof.id for dof in batch]))\
+                                    .order_by(DOFAction.created_at.desc(), DOFAction.id.desc()):
+                actions.setdefault(action.dof_id, []).append(action)
+            for dof in batch:
+                for action in actions.get(dof.id, []):
+                    if action_sheet is None:
+                        action_sheet = workbook.add_sheet('Aksiyonlar', ACTION_SHEET_COLUMNS)
+                    action_sheet.append(_action_sheet_row(action, dof.code if dof.code else f"DOF-{dof.id}", names))
+        
+        workbook.close()
+    except Exception:
+        output.close()
+        raise
     
     output.seek(0)
     return output
@@ -173,412 +276,109 @@ def replace_turkish_chars(text):
     """Türkçe karakterleri ASCII eşdeğerlerine dönüştürür"""
     if not text:
         return ""
-    tr_chars = {'ş': 's', 'Ş': 'S', 'ı': 'i', 'İ': 'I', 'ğ': 'g', 'Ğ': 'G', 
-               'ü': 'u', 'Ü': 'U', 'ö': 'o', 'Ö': 'O', 'ç': 'c', 'Ç': 'C'}
-    result = text
-    for tr_char, eng_char in tr_chars.items():
-        result = result.replace(tr_char, eng_char)
-    return result
+    return text.translate(TR_ASCII_TABLE)
 
-def export_dofs_to_pdf(dofs):
-    """DÖF listesini reports sayfası görünümünde güzel PDF olarak oluşturur"""
-    try:
-        import weasyprint
-        from jinja2 import Template
-        from collections import Counter
-        from datetime import datetime
-        import logging
-        
-        # WeasyPrint log seviyesini düşür (çok verbose olmasın)
-        logging.getLogger('weasyprint').setLevel(logging.ERROR)
-        
-        # İstatistikleri hesapla
-        total_dofs = len(dofs)
-        status_counts = Counter()
-        type_counts = Counter()
-        source_counts = Counter()
-        dept_counts = Counter()
-        
-        for dof in dofs:
-            if dof.status is not None:
-                status_counts[dof.status] += 1
-            if dof.dof_type is not None:
-                type_counts[dof.dof_type] += 1
-            if dof.dof_source is not None:
-                source_counts[dof.dof_source] += 1
-            if dof.department_id is not None:
-                dept_counts[dof.department_id] += 1
-        
-        # HTML template oluştur - reports sayfası benzeri
-        html_template = Template("""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <title>DÖF Raporu</title>
-            <style>
-                body { 
-                    font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; 
-                    margin: 20px; 
-                    font-size: 12px; 
-                    color: #333;
-                    line-height: 1.4;
-                }
-                .header { 
-                    text-align: center; 
-                    border-bottom: 3px solid #007bff; 
-                    padding-bottom: 20px; 
-                    margin-bottom: 30px; 
-                }
-                .header h1 { 
-                    color: #007bff; 
-                    margin: 0; 
-                    font-size: 24px; 
-                    font-weight: bold;
-                }
-                .header p { 
-                    margin: 8px 0 0 0; 
-                    color: #6c757d; 
-                    font-size: 14px; 
-                }
-                .stats-container {
-                    display: flex;
-                    flex-wrap: wrap;
-                    gap: 20px;
-                    margin-bottom: 30px;
-                }
-                .stat-card { 
-                    flex: 1;
-                    min-width: 200px;
-                    border: 1px solid #dee2e6; 
-                    border-radius: 8px; 
-                    padding: 20px;
-                    background: linear-gradient(135deg, #f8f9fa 0%, #e9ecef 100%);
-                    text-align: center;
-                }
-                .stat-number {
-                    font-size: 28px;
-                    font-weight: bold;
-                    color: #007bff;
-                    margin-bottom: 5px;
-                }
-                .stat-label {
-                    font-size: 12px;
-                    color: #6c757d;
-                    font-weight: 500;
-                }
-                .section-title {
-                    font-size: 18px;
-                    font-weight: bold;
-                    color: #495057;
-                    border-bottom: 2px solid #007bff;
-                    padding-bottom: 8px;
-                    margin: 30px 0 20px 0;
-                }
-                .charts-container {
-                    display: flex;
-                    flex-wrap: wrap;
-                    gap: 30px;
-                    margin-bottom: 30px;
-                }
-                .chart-card {
-                    flex: 1;
-                    min-width: 300px;
-                    border: 1px solid #dee2e6;
-                    border-radius: 8px;
-                    padding: 20px;
-                    background-color: #fff;
-                }
-                .chart-title {
-                    font-size: 16px;
-                    font-weight: bold;
-                    color: #495057;
-                    margin-bottom: 15px;
-                    text-align: center;
-                    border-bottom: 1px solid #dee2e6;
-                    padding-bottom: 8px;
-                }
-                .chart-item {
-                    display: flex;
-                    justify-content: space-between;
-                    align-items: center;
-                    padding: 8px 0;
-                    border-bottom: 1px solid #f8f9fa;
-                }
-                .chart-label {
-                    font-size: 11px;
-                    color: #495057;
-                }
-                .chart-value {
-                    font-weight: bold;
-                    color: #007bff;
-                    font-size: 12px;
-                }
-                .chart-bar {
-                    height: 4px;
-                    background-color: #007bff;
-                    border-radius: 2px;
-                    margin-top: 4px;
-                }
-                .table-container {
-                    margin-top: 30px;
-                }
-                .table { 
-                    width: 100%; 
-                    border-collapse: collapse; 
-                    margin: 20px 0;
-                    font-size: 10px;
-                    background-color: #fff;
-                    border-radius: 8px;
-                    overflow: hidden;
-                    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-                }
-                .table th { 
-                    background: linear-gradient(135deg, #007bff 0%, #0056b3 100%);
-                    color: white;
-                    padding: 12px 8px; 
-                    text-align: left;
-                    font-weight: bold;
-                    font-size: 11px;
-                }
-                .table td { 
-                    border-bottom: 1px solid #dee2e6; 
-                    padding: 10px 8px; 
-                    vertical-align: top;
-                }
-                .table tr:nth-child(even) {
-                    background-color: #f8f9fa;
-                }
-                .table tr:hover {
-                    background-color: #e3f2fd;
-                }
-                .badge { 
-                    display: inline-block;
-                    padding: 3px 8px; 
-                    border-radius: 12px; 
-                    font-size: 9px;
-                    font-weight: bold;
-                    text-align: center;
-                    min-width: 60px;
-                }
-                .badge-primary { background-color: #007bff; color: white; }
-                .badge-success { background-color: #28a745; color: white; }
-                .badge-warning { background-color: #ffc107; color: #212529; }
-                .badge-info { background-color: #17a2b8; color: white; }
-                .badge-danger { background-color: #dc3545; color: white; }
-                .badge-secondary { background-color: #6c757d; color: white; }
-                .badge-light { background-color: #f8f9fa; color: #495057; border: 1px solid #dee2e6; }
-                .footer {
-                    margin-top: 40px;
-                    text-align: center;
-                    font-size: 10px;
-                    color: #6c757d;
-                    border-top: 1px solid #dee2e6;
-                    padding-top: 15px;
-                }
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>📊 DÖF Raporu</h1>
-                <p>{{ filter_info }}</p>
-                <p>Rapor Tarihi: {{ report_date }}</p>
-            </div>
-
-            <!-- Genel İstatistikler -->
-            <div class="stats-container">
-                <div class="stat-card">
-                    <div class="stat-number">{{ total_dofs }}</div>
-                    <div class="stat-label">Toplam DÖF</div>
-                </div>
-                <div class="stat-card">
-                    <div class="stat-number">{{ active_dofs }}</div>
-                    <div class="stat-label">Devam Eden</div>
-                </div>
-                <div class="stat-card">
-                    <div class="stat-number">{{ closed_dofs }}</div>
-                    <div class="stat-label">Kapatılan</div>
-                </div>
-                <div class="stat-card">
-                    <div class="stat-number">{{ this_month_dofs }}</div>
-                    <div class="stat-label">Bu Ay</div>
-                </div>
-            </div>
-
-            <!-- Dağılım Grafikleri -->
-            <div class="charts-container">
-                <div class="chart-card">
-                    <div class="chart-title">🎯 Durum Dağılımı</div>
-                    {% for status_code, count in status_distribution %}
-                    <div class="chart-item">
-                        <div class="chart-label">{{ get_dof_status_name(status_code) }}</div>
-                        <div class="chart-value">{{ count }}</div>
-                    </div>
-                    <div class="chart-bar" style="width: {{ (count * 100 / max_status_count)|round(1) }}%;"></div>
-                    {% endfor %}
-                </div>
+# Rapor PDF'indeki durum rozetleri
+REPORT_BADGE_CLASSES = {
+    0: 'badge-secondary',  # Taslak
+    1: 'badge-info',       # Gönderildi
+    2: 'badge-warning',    # İnceleniyor
+    3: 'badge-primary',    # Atanmış
+    4: 'badge-warning',    # Devam ediyor
+    5: 'badge-info',       # Çözülmüş
+    6: 'badge-success',    # Kapalı
+    7: 'badge-danger',     # Reddedildi
+    8: 'badge-info',       # Planlama
+    9: 'badge-warning',    # Uygulama
+    10: 'badge-success',   # Tamamlandı
+    11: 'badge-primary'    # Kaynak İncelemesi
+}
 
-                <div class="chart-card">
-                    <div class="chart-title">🏢 Departman Dağılımı</div>
-                    {% for dept_id, count in dept_distribution %}
-                    <div class="chart-item">
-                        <div class="chart-label">{{ get_department_name(dept_id) }}</div>
-                        <div class="chart-value">{{ count }}</div>
-                    </div>
-                    <div class="chart-bar" style="width: {{ (count * 100 / max_dept_count)|round(1) }}%;"></div>
-                    {% endfor %}
-                </div>
-            </div>
+def _report_status_badge_class(status):
+    return REPORT_BADGE_CLASSES.get(status, 'badge-secondary')
 
-            <div class="charts-container">
-                <div class="chart-card">
-                    <div class="chart-title">📋 Tür Dağılımı</div>
-                    {% for type_code, count in type_distribution %}
-                    <div class="chart-item">
-                        <div class="chart-label">{{ get_dof_type_name(type_code) }}</div>
-                        <div class="chart-value">{{ count }}</div>
-                    </div>
-                    <div class="chart-bar" style="width: {{ (count * 100 / max_type_count)|round(1) }}%;"></div>
-                    {% endfor %}
-                </div>
+def build_dof_report_context(dofs, names=None):
+    """
+    templates/pdf/dof_report.html için context hazırlar
 
-                <div class="chart-card">
-                    <div class="chart-title">🔍 Kaynak Dağılımı</div>
-                    {% for source_code, count in source_distribution %}
-                    <div class="chart-item">
-                        <div class="chart-label">{{ get_dof_source_name(source_code) }}</div>
-                        <div class="chart-value">{{ count }}</div>
-                    </div>
-                    <div class="chart-bar" style="width: {{ (count * 100 / max_source_count)|round(1) }}%;"></div>
-                    {% endfor %}
-                </div>
-            </div>
-
-            <!-- DÖF Listesi -->
-            <div class="section-title">📋 DÖF Listesi</div>
-            <div class="table-container">
-                <table class="table">
-                    <thead>
-                        <tr>
-                            <th style="width: 8%;">ID</th>
-                            <th style="width: 35%;">Başlık</th>
-                            <th style="width: 15%;">Oluşturan</th>
-                            <th style="width: 15%;">Departman</th>
-                            <th style="width: 12%;">Durum</th>
-                            <th style="width: 15%;">Tarih</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-                        {% for dof in dofs %}
-                        <tr>
-                            <td><strong>#{{ dof.id }}</strong></td>
-                            <td style="font-weight: 500;">{{ dof.title }}</td>
-                            <td>{{ get_user_name(dof.created_by) }}</td>
-                            <td>{{ get_department_name(dof.department_id) }}</td>
-                            <td>
-                                <span class="badge {{ get_status_badge_class(dof.status) }}">
-                                    {{ get_dof_status_name(dof.status) }}
-                                </span>
-                            </td>
-                            <td>{{ dof.created_at.strftime('%d.%m.%Y') if dof.created_at else '-' }}</td>
-                        </tr>
-                        {% endfor %}
-                    </tbody>
-                </table>
-            </div>
+    Args:
+        dofs: DÖF listesi
+        names: user/department metotları olan ad çözücü (varsayılan: _NameLookup ile toplu yükleme)
+    """
+    from collections import Counter
+    
+    if names is None:
+        names = _NameLookup()
+    
+    # İstatistikleri hesapla
+    total_dofs = len(dofs)
+    status_counts = Counter()
+    type_counts = Counter()
+    source_counts = Counter()
+    dept_counts = Counter()
+    
+    for dof in dofs:
+        if dof.status is not None:
+            status_counts[dof.status] += 1
+        if dof.dof_type is not None:
+            type_counts[dof.dof_type] += 1
+        if dof.dof_source is not None:
+            source_counts[dof.dof_source] += 1
+        if dof.department_id is not None:
+            dept_counts[dof.department_id] += 1
+    
+    active_dofs = len([dof for dof in dofs if dof.status not in [6, 7]])  # Kapalı ve reddedilen hariç
+    closed_dofs = len([dof for dof in dofs if dof.status == 6])  # Kapalı
+    this_month_dofs = len([dof for dof in dofs if dof.created_at and dof.created_at.month == datetime.now().month])
+    
+    # Dağılımları hazırla
+    status_distribution = list(status_counts.most_common())
+    dept_distribution = list(dept_counts.most_common())
+    type_distribution = list(type_counts.most_common())
+    source_distribution = list(source_counts.most_common())
+    
+    return {
+        'total_dofs': total_dofs,
+        'active_dofs': active_dofs,
+        'closed_dofs': closed_dofs,
+        'this_month_dofs': this_month_dofs,
+        'dofs': dofs,
+        'report_date': datetime.now().strftime('%d.%m.%Y %H:%M'),
+        'filter_info': f"Filtrelenmiş Sonuçlar (Toplam: {total_dofs} DÖF)",
+        'status_distribution': status_distribution,
+        'dept_distribution': dept_distribution,
+        'type_distribution': type_distribution,
+        'source_distribution': source_distribution,
+        # Maksimum değerler (grafik çubukları için)
+        'max_status_count': max([count for _, count in status_distribution], default=1),
+        'max_dept_count': max([count for _, count in dept_distribution], default=1),
+        'max_type_count': max([count for _, count in type_distribution], default=1),
+        'max_source_count': max([count for _, count in source_distribution], default=1),
+        'get_dof_status_name': get_dof_status_name,
+        'get_dof_type_name': get_dof_type_name,
+        'get_dof_source_name': get_dof_source_name,
+        'get_department_name': names.department,
+        'get_user_name': names.user,
+        'get_status_badge_class': _report_status_badge_class
+    }
 
-            <div class="footer">
-                <p>Bu rapor sistem tarafından otomatik olarak oluşturulmuştur.</p>
-                <p>Toplam {{ total_dofs }} DÖF kaydı listelendi.</p>
-            </div>
-        </body>
-        </html>
-        """)
-        
-        # İstatistikleri hesapla
-        active_dofs = len([dof for dof in dofs if dof.status not in [6, 7]])  # Kapalı ve reddedilen hariç
-        closed_dofs = len([dof for dof in dofs if dof.status == 6])  # Kapalı
-        this_month_dofs = len([dof for dof in dofs if dof.created_at and dof.created_at.month == datetime.now().month])
-        
-        # Dağılımları hazırla
-        status_distribution = list(status_counts.most_common())
-        dept_distribution = list(dept_counts.most_common())
-        type_distribution = list(type_counts.most_common())
-        source_distribution = list(source_counts.most_common())
-        
-        # Maksimum değerleri hesapla (grafik çubukları için)
-        max_status_count = max([count for _, count in status_distribution], default=1)
-        max_dept_count = max([count for _, count in dept_distribution], default=1)
-        max_type_count = max([count for _, count in type_distribution], default=1)
-        max_source_count = max([count for _, count in source_distribution], default=1)
-        
-        # Status badge class fonksiyonu
-        def get_status_badge_class(status):
-            status_classes = {
-                0: 'badge-secondary',  # Taslak
-                1: 'badge-info',       # Gönderildi
-                2: 'badge-warning',    # İnceleniyor
-                3: 'badge-primary',    # Atanmış
-                4: 'badge-warning',    # Devam ediyor
-                5: 'badge-info',       # Çözülmüş
-                6: 'badge-success',    # Kapalı
-                7: 'badge-danger',     # Reddedildi
-                8: 'badge-info',       # Planlama
-                9: 'badge-warning',    # Uygulama
-                10: 'badge-success',   # Tamamlandı
-                11: 'badge-primary'    # Kaynak İncelemesi
-            }
-            return status_classes.get(status, 'badge-secondary')
-        
-        # Template için context hazırla
-        context = {
-            'total_dofs': total_dofs,
-            'active_dofs': active_dofs,
-            'closed_dofs': closed_dofs,
-            'this_month_dofs': this_month_dofs,
-            'dofs': dofs,
-            'report_date': datetime.now().strftime('%d.%m.%Y %H:%M'),
-            'filter_info': f"Filtrelenmiş Sonuçlar (Toplam: {total_dofs} DÖF)",
-            'status_distribution': status_distribution,
-            'dept_distribution': dept_distribution,
-            'type_distribution': type_distribution,
-            'source_distribution': source_distribution,
-            'max_status_count': max_status_count,
-            'max_dept_count': max_dept_count,
-            'max_type_count': max_type_count,
-            'max_source_count': max_source_count,
-            'get_dof_status_name': get_dof_status_name,
-            'get_dof_type_name': get_dof_type_name,
-            'get_dof_source_name': get_dof_source_name,
-            'get_department_name': get_department_name,
-            'get_user_name': get_user_name,
-            'get_status_badge_class': get_status_badge_class
-        }
-        
-        # HTML'i render et
-        html_content = html_template.render(**context)
-        
-        # PDF oluştur
-        pdf = weasyprint.HTML(string=html_content).write_pdf()
-        
-        # BytesIO'ya yaz
-        from io import BytesIO
-        output = BytesIO()
-        output.write(pdf)
-        output.seek(0)
-        
-        return output
-        
-    except ImportError as e:
+def export_dofs_to_pdf(dofs):
+    """DÖF listesini reports sayfası görünümünde güzel PDF olarak oluşturur"""
+    import logging
+    from pdf_renderer import render_pdf, PDFRendererUnavailable
+    
+    try:
+        pdf = render_pdf('dof_report', build_dof_report_context(dofs))
+    except PDFRendererUnavailable as e:
         # WeasyPrint yoksa basit PDF'e geri dön
-        import logging
-        logging.error(f"WeasyPrint import hatası: {str(e)}")
+        logging.warning(f"WeasyPrint kullanılamıyor, basit PDF oluşturuluyor: {str(e)}")
         return create_simple_reports_pdf_fallback(dofs)
     except Exception as e:
         # Başka bir hata durumunda basit PDF'e geç
-        import logging
         logging.error(f"WeasyPrint PDF oluşturma hatası: {str(e)}")
         return create_simple_reports_pdf_fallback(dofs)
+    
+    return BytesIO(pdf)
 
 def create_simple_reports_pdf_fallback(dofs):
     """WeasyPrint yoksa Reports sayfası benzeri güzel PDF oluşturur"""
@@ -800,11 +600,12 @@ def create_dof_detail_excel(dof):
             ['Aksiyon Planı', dof.action_plan]
         ])
     
-    # Çözüm
-    if dof.resolution:
+    # Çözüm (DOF modelinde resolution kolonu yok; PDF şablonundaki gibi varsa yazılır)
+    resolution = getattr(dof, 'resolution', None)
+    if resolution:
         basic_data.extend([
             ['', ''],
-            ['Çözüm', dof.resolution]
+            ['Çözüm', resolution]
         ])
     
     # İşlem geçmişi
@@ -854,435 +655,72 @@ def create_dof_detail_excel(dof):
     output.seek(0)
     return output
 
-def create_dof_detail_pdf(dof):
-    """Tek bir DÖF'ün detayını ekran görünümüne benzer PDF olarak oluşturur"""
-    try:
-        import weasyprint
-        from jinja2 import Template
-        
-        # Status name'i al
-        status_name = get_dof_status_name(dof.status)
-        
-        # Progress bar için adımları hesapla
-        def get_progress_status(step_status, current_status):
-            if current_status == 6:  # Kapatıldı
-                return "active"
-            elif step_status <= current_status or (current_status in [5, 10, 11] and step_status <= 11):
-                return "active"
-            elif step_status == current_status:
-                return "current"
-            else:
-                return ""
-        
-        # HTML template oluştur - detay sayfasının sadeleştirilmiş hali
-        html_template = Template("""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <title>DÖF #{{ dof.id }} - {{ dof.title }}</title>
-            <style>
-                body { 
-                    font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; 
-                    margin: 15px; 
-                    font-size: 11px; 
-                    color: #333;
-                    line-height: 1.4;
-                }
-                .header { 
-                    text-align: center; 
-                    border-bottom: 3px solid #007bff; 
-                    padding-bottom: 15px; 
-                    margin-bottom: 25px; 
-                }
-                .header h1 { 
-                    color: #007bff; 
-                    margin: 0; 
-                    font-size: 20px; 
-                }
-                .header p { 
-                    margin: 5px 0 0 0; 
-                    color: #6c757d; 
-                    font-size: 10px; 
-                }
-                .card { 
-                    border: 1px solid #dee2e6; 
-                    border-radius: 6px; 
-                    margin-bottom: 15px; 
-                    background-color: #fff;
-                    page-break-inside: avoid;
-                }
-                .card-header { 
-                    background: linear-gradient(135deg, #f8f9fa 0%, #e9ecef 100%);
-                    padding: 12px 15px; 
-                    border-bottom: 1px solid #dee2e6;
-                    font-weight: bold;
-                    font-size: 12px;
-                    border-radius: 6px 6px 0 0;
-                    color: #495057;
-                }
-                .card-body { 
-                    padding: 15px; 
-                }
-                .badge { 
-                    display: inline-block;
-                    padding: 4px 8px; 
-                    border-radius: 4px; 
-                    font-size: 9px;
-                    font-weight: bold;
-                }
-                .badge-primary { background-color: #007bff; color: white; }
-                .badge-success { background-color: #28a745; color: white; }
-                .badge-warning { background-color: #ffc107; color: #212529; }
-                .badge-info { background-color: #17a2b8; color: white; }
-                .badge-danger { background-color: #dc3545; color: white; }
-                .badge-secondary { background-color: #6c757d; color: white; }
-                
-                .info-row { 
-                    display: flex; 
-                    margin-bottom: 8px; 
-                }
-                .info-label { 
-                    flex: 0 0 25%; 
-                    font-weight: bold; 
-                    color: #495057; 
-                    font-size: 10px;
-                }
-                .info-value { 
-                    flex: 1; 
-                    color: #212529; 
-                    font-size: 10px;
-                }
-                .section-title {
-                    font-size: 12px;
-                    font-weight: bold;
-                    color: #495057;
-                    border-bottom: 1px solid #dee2e6;
-                    padding-bottom: 5px;
-                    margin: 15px 0 10px 0;
-                }
-                .progress-container { 
-                    margin: 15px 0; 
-                }
-                .progressbar { 
-                    display: flex; 
-                    list-style: none; 
-                    padding: 0; 
-                    margin: 0;
-                    border: 1px solid #dee2e6;
-                    border-radius: 4px;
-                    overflow: hidden;
-                }
-                .progressbar li { 
-                    flex: 1; 
-                    text-align: center; 
-                    padding: 8px 2px; 
-                    font-size: 8px;
-                    background-color: #f8f9fa;
-                    border-right: 1px solid #dee2e6;
-                    font-weight: 500;
-                }
-                .progressbar li:last-child { border-right: none; }
-                .progressbar li.active { background-color: #28a745; color: white; }
-                .progressbar li.current { background-color: #007bff; color: white; font-weight: bold; }
-                .description-box {
-                    background-color: #f8f9fa;
-                    border: 1px solid #e9ecef;
-                    border-radius: 4px;
-                    padding: 10px;
-                    margin: 10px 0;
-                    font-size: 10px;
-                    line-height: 1.5;
-                }
-                .table { 
-                    width: 100%; 
-                    border-collapse: collapse; 
-                    margin: 10px 0;
-                    font-size: 9px;
-                }
-                .table th, .table td { 
-                    border: 1px solid #dee2e6; 
-                    padding: 6px 8px; 
-                    text-align: left;
-                }
-                .table th { 
-                    background-color: #f8f9fa; 
-                    font-weight: bold; 
-                    color: #495057;
-                }
-                .table td {
-                    vertical-align: top;
-                }
-                .root-cause-item {
-                    margin: 8px 0;
-                    padding: 8px;
-                    background-color: #fff3cd;
-                    border-left: 4px solid #ffc107;
-                    border-radius: 0 4px 4px 0;
-                    font-size: 10px;
-                }
-                .root-cause-label {
-                    font-weight: bold;
-                    color: #856404;
-                    margin-bottom: 3px;
-                }
-                .action-plan-box {
-                    background-color: #d4edda;
-                    border: 1px solid #c3e6cb;
-                    border-radius: 4px;
-                    padding: 10px;
-                    margin: 10px 0;
-                    font-size: 10px;
-                    line-height: 1.5;
-                }
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>DÖF #{{ dof.id }} - Detay Raporu</h1>
-                <p>{{ dof.title }}</p>
-                <p>Rapor Tarihi: {{ report_date }}</p>
-            </div>
-
-            <!-- DÖF Süreç Rehberi -->
-            <div class="card">
-                <div class="card-header">🔄 DÖF Süreç Rehberi</div>
-                <div class="card-body">
-                    <div class="progress-container">
-                        <ul class="progressbar">
-                            <li class="{{ get_progress_class(0, dof.status) }}">1. Taslak</li>
-                            <li class="{{ get_progress_class(1, dof.status) }}">2. İnceleme</li>
-                            <li class="{{ get_progress_class(3, dof.status) }}">3. Atanmış</li>
-                            <li class="{{ get_progress_class(8, dof.status) }}">4. Aksiyon Planı</li>
-                            <li class="{{ get_progress_class(9, dof.status) }}">5. Uygulama</li>
-                            <li class="{{ get_progress_class(10, dof.status) }}">6. Tamamlandı</li>
-                            <li class="{{ get_progress_class(11, dof.status) }}">7. Kaynak Değ.</li>
-                            <li class="{{ get_progress_class(5, dof.status) }}">8. Çözüldü</li>
-                            <li class="{{ get_progress_class(6, dof.status) }}">9. Kapatıldı</li>
-                        </ul>
-                    </div>
-                    <div style="text-align: center; margin-top: 10px;">
-                        <strong>Şu An:</strong> <span class="badge {{ get_status_badge_class(dof.status) }}">{{ status_name }}</span>
-                    </div>
-                </div>
-            </div>
-
-            <!-- Kaynak Bilgileri -->
-            <div class="card">
-                <div class="card-header">📋 Kaynak Bilgileri</div>
-                <div class="card-body">
-                    <div class="info-row">
-                        <div class="info-label">Oluşturan:</div>
-                        <div class="info-value">{{ dof.creator.full_name if dof.creator else 'Belirtilmemiş' }}</div>
-                    </div>
-                    <div class="info-row">
-                        <div class="info-label">Kaynak Departman:</div>
-                        <div class="info-value">{{ dof.creator.department.name if dof.creator and dof.creator.department else 'Belirtilmemiş' }}</div>
-                    </div>
-                    <div class="info-row">
-                        <div class="info-label">DÖF Türü:</div>
-                        <div class="info-value">{{ get_dof_type_name(dof.dof_type) }}</div>
-                    </div>
-                    <div class="info-row">
-                        <div class="info-label">DÖF Kaynağı:</div>
-                        <div class="info-value">{{ get_dof_source_name(dof.dof_source) }}</div>
-                    </div>
-                </div>
-            </div>
+def _detail_progress_class(step_status, current_status):
+    """Detay PDF'indeki süreç adımının sınıfı"""
+    if (current_status == 6 or step_status <= current_status
+            or (current_status in [5, 10, 11] and step_status <= 11)):
+        return 'active'
+    if step_status == current_status:
+        return 'current'
+    return ''
 
-            <!-- Atama Bilgileri -->
-            <div class="card">
-                <div class="card-header">👥 Atama Bilgileri</div>
-                <div class="card-body">
-                    <div class="info-row">
-                        <div class="info-label">Atanan Departman:</div>
-                        <div class="info-value">{{ dof.department.name if dof.department else 'Henüz atanmadı' }}</div>
-                    </div>
-                    <div class="info-row">
-                        <div class="info-label">Oluşturma Tarihi:</div>
-                        <div class="info-value">{{ dof.created_at.strftime('%d.%m.%Y %H:%M') if dof.created_at else 'Belirtilmemiş' }}</div>
-                    </div>
-                    {% if dof.updated_at and dof.updated_at != dof.created_at %}
-                    <div class="info-row">
-                        <div class="info-label">Son Güncelleme:</div>
-                        <div class="info-value">{{ dof.updated_at.strftime('%d.%m.%Y %H:%M') }}</div>
-                    </div>
-                    {% endif %}
-                </div>
-            </div>
+def _detail_status_badge_class(status):
+    if status in [5, 6, 10]:
+        return 'badge-success'
+    if status == 7:
+        return 'badge-danger'
+    if status in [8, 9]:
+        return 'badge-warning'
+    return 'badge-info'
 
-            <!-- Zaman Bilgileri -->
-            <div class="card">
-                <div class="card-header">⏰ Zaman Bilgileri</div>
-                <div class="card-body">
-                    <div class="info-row">
-                        <div class="info-label">Son Tarih:</div>
-                        <div class="info-value">{{ dof.due_date.strftime('%d.%m.%Y') if dof.due_date else 'Belirtilmemiş' }}</div>
-                    </div>
-                    <div class="info-row">
-                        <div class="info-label">Termin:</div>
-                        <div class="info-value">{{ dof.deadline.strftime('%d.%m.%Y') if dof.deadline else 'Belirtilmemiş' }}</div>
-                    </div>
-                    {% if dof.closed_at %}
-                    <div class="info-row">
-                        <div class="info-label">Kapanış Tarihi:</div>
-                        <div class="info-value">{{ dof.closed_at.strftime('%d.%m.%Y') }}</div>
-                    </div>
-                    {% endif %}
-                </div>
-            </div>
+def build_dof_detail_context(dof, actions=None, user_name=get_user_name):
+    """
+    templates/pdf/dof_detail.html için context hazırlar
 
-            <!-- Uygunsuzluk Açıklaması -->
-            <div class="card">
-                <div class="card-header">📝 Uygunsuzluk Açıklaması</div>
-                <div class="card-body">
-                    <div class="description-box">
-                        {{ dof.description if dof.description else 'Açıklama bulunmuyor.' }}
-                    </div>
-                </div>
-            </div>
-
-            <!-- Kök Neden Analizi -->
-            {% if dof.root_cause1 or dof.root_cause2 or dof.root_cause3 or dof.root_cause4 or dof.root_cause5 %}
-            <div class="card">
-                <div class="card-header">🔍 Kök Neden Analizi (5 Neden Tekniği)</div>
-                <div class="card-body">
-                    {% if dof.root_cause1 %}
-                    <div class="root-cause-item">
-                        <div class="root-cause-label">1. Neden:</div>
-                        {{ dof.root_cause1 }}
-                    </div>
-                    {% endif %}
-                    {% if dof.root_cause2 %}
-                    <div class="root-cause-item">
-                        <div class="root-cause-label">2. Neden:</div>
-                        {{ dof.root_cause2 }}
-                    </div>
-                    {% endif %}
-                    {% if dof.root_cause3 %}
-                    <div class="root-cause-item">
-                        <div class="root-cause-label">3. Neden:</div>
-                        {{ dof.root_cause3 }}
-                    </div>
-                    {% endif %}
-                    {% if dof.root_cause4 %}
-                    <div class="root-cause-item">
-                        <div class="root-cause-label">4. Neden:</div>
-                        {{ dof.root_cause4 }}
-                    </div>
-                    {% endif %}
-                    {% if dof.root_cause5 %}
-                    <div class="root-cause-item" style="background-color: #fff3cd; border-left-color: #fd7e14; border-left-width: 6px;">
-                        <div class="root-cause-label" style="color: #dc3545;">5. Neden (Kök Neden):</div>
-                        {{ dof.root_cause5 }}
-                    </div>
-                    {% endif %}
-                </div>
-            </div>
-            {% endif %}
-
-            <!-- Aksiyon Planı -->
-            {% if dof.action_plan %}
-            <div class="card">
-                <div class="card-header">✅ Aksiyon Planı</div>
-                <div class="card-body">
-                    <div class="action-plan-box">
-                        {{ dof.action_plan }}
-                    </div>
-                </div>
-            </div>
-            {% endif %}
+    Args:
+        dof: DÖF
+        actions: İşlem geçmişi (varsayılan: DÖF'ün işlemleri, yeniden eskiye)
+        user_name: Kullanıcı ID'sini ada çeviren fonksiyon
+    """
+    if actions is None:
+        actions = DOFAction.query.filter_by(dof_id=dof.id).order_by(DOFAction.created_at.desc()).all()
+    
+    return {
+        'dof': dof,
+        'status_name': get_dof_status_name(dof.status),
+        'report_date': datetime.now().strftime('%d.%m.%Y %H:%M'),
+        'get_dof_type_name': get_dof_type_name,
+        'get_dof_source_name': get_dof_source_name,
+        'get_user_name': user_name,
+        'actions': actions,
+        'get_progress_class': _detail_progress_class,
+        'get_status_badge_class': _detail_status_badge_class
+    }
 
-            <!-- Çözüm -->
-            {% if dof.resolution %}
-            <div class="card">
-                <div class="card-header">🎯 Çözüm</div>
-                <div class="card-body">
-                    <div class="description-box" style="background-color: #d1ecf1; border-color: #bee5eb;">
-                        {{ dof.resolution }}
-                    </div>
-                </div>
-            </div>
-            {% endif %}
+def render_dof_detail_pdf(dof):
+    """
+    DÖF detay PDF'ini oluşturur
 
-            <!-- İşlem Geçmişi -->
-            <div class="card">
-                <div class="card-header">📊 İşlem Geçmişi</div>
-                <div class="card-body">
-                    <table class="table">
-                        <thead>
-                            <tr>
-                                <th>Tarih</th>
-                                <th>Kullanıcı</th>
-                                <th>İşlem</th>
-                                <th>Açıklama</th>
-                            </tr>
-                        </thead>
-                        <tbody>
-                            {% for action in actions %}
-                            <tr>
-                                <td>{{ action.created_at.strftime('%d.%m.%Y %H:%M') if action.created_at else '-' }}</td>
-                                <td>{{ get_user_name(action.user_id) }}</td>
-                                <td>
-                                    {% if action.new_status == 10 %}
-                                        Tamamlandı
-                                    {% elif action.old_status != action.new_status %}
-                                        Durum Değişikliği
-                                    {% else %}
-                                        İşlem
-                                    {% endif %}
-                                </td>
-                                <td>{{ action.comment if action.comment else '-' }}</td>
-                            </tr>
-                            {% endfor %}
-                        </tbody>
-                    </table>
-                </div>
-            </div>
-        </body>
-        </html>
-        """)
-        
-        # Template için context hazırla
-        context = {
-            'dof': dof,
-            'status_name': status_name,
-            'report_date': datetime.now().strftime('%d.%m.%Y %H:%M'),
-            'get_dof_type_name': get_dof_type_name,
-            'get_dof_source_name': get_dof_source_name,
-            'get_user_name': get_user_name,
-            'actions': DOFAction.query.filter_by(dof_id=dof.id).order_by(DOFAction.created_at.desc()).all(),
-            'get_progress_class': lambda step_status, current_status: (
-                'active' if (current_status == 6) or 
-                          (step_status <= current_status) or 
-                          (current_status in [5, 10, 11] and step_status <= 11) 
-                else 'current' if step_status == current_status 
-                else ''
-            ),
-            'get_status_badge_class': lambda status: (
-                'badge-success' if status in [5, 6, 10] 
-                else 'badge-danger' if status == 7 
-                else 'badge-warning' if status in [8, 9] 
-                else 'badge-info'
-            )
-        }
-        
-        # HTML render et
-        html_content = html_template.render(**context)
-        
-        # PDF oluştur
-        pdf_bytes = weasyprint.HTML(string=html_content).write_pdf()
-        
-        return pdf_bytes
-        
-    except ImportError:
+    Returns:
+        tuple: (PDF baytları, basit PDF'e dönüldü mü)
+    """
+    import logging
+    from pdf_renderer import render_pdf, PDFRendererUnavailable
+    
+    try:
+        return render_pdf('dof_detail', build_dof_detail_context(dof)), False
+    except PDFRendererUnavailable as e:
         # WeasyPrint yoksa basit PDF oluştur
-        return create_simple_pdf_fallback(dof)
+        logging.warning(f"WeasyPrint kullanılamıyor, basit detay PDF'i oluşturuluyor: {str(e)}")
     except Exception as e:
         # Başka bir hata durumunda basit PDF'e geç
-        import logging
         logging.error(f"WeasyPrint detay PDF hatası: {str(e)}")
-        return create_simple_pdf_fallback(dof)
+    return create_simple_pdf_fallback(dof).getvalue(), True
+
+def create_dof_detail_pdf(dof):
+    """Tek bir DÖF'ün detayını ekran görünümüne benzer PDF olarak oluşturur"""
+    pdf, _ = render_dof_detail_pdf(dof)
+    return pdf
 
 def create_simple_pdf_fallback(dof):
     """WeasyPrint olmadığında basit PDF oluştur"""
@@ -0,0 +1,109 @@
+"""
+Zamanlanmış Görev Kilitleri
+---------------------------
+Zamanlayıcı her gunicorn işçisinde ayrı başlatıldığından aynı görev aynı
+dakikada birden fazla süreçte tetiklenir. Tabloları silip yeniden yazan
+görevler (süre analizleri, günlük özet tablosu, durum sayaçları) bu
+modüldeki kilitle sarılır; kilidi alamayan süreç görevi atlar.
+
+- MySQL: GET_LOCK ile veritabanı kilidi (tüm sunucular için geçerlidir).
+  Kilit ayrı bir bağlantıda tutulur ve bağlantı kapanınca kendiliğinden düşer.
+- Diğer veritabanları: instance/locks altında .lock dosyası (aynı sunucudaki
+  süreçler için). Süreç çökerse dosya JOB_LOCK_STALE_SECONDS sonunda bayat
+  kabul edilir.
+
+Kullanım:
+    from job_locks import run_exclusive
+
+    run_exclusive('dof_cycle_analytics', run_cycle_analytics)
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import text
+
+from extensions import db
+
+# Bu süreden eski kilit dosyası (çöken süreç) bayat sayılır
+JOB_LOCK_STALE_SECONDS = 3600
+
+LOCK_PREFIX = 'dof_job:'
+
+
+def _lock_folder():
+    folder = os.path.join(current_app.instance_path, 'locks')
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+@contextmanager
+def _mysql_lock(name):
+    with db.engine.connect() as connection:
+        acquired = connection.execute(text('SELECT GET_LOCK(:name, 0)'), {'name': LOCK_PREFIX + name}).scalar() == 1
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                connection.execute(text('SELECT RELEASE_LOCK(:name)'), {'name': LOCK_PREFIX + name})
+
+
+def _acquire_file_lock(path):
+    for _ in range(2):
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) < JOB_LOCK_STALE_SECONDS:
+                    return False
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            continue
+        with os.fdopen(fd, 'w') as f:
+            f.write(f'{os.getpid()} {datetime.now().isoformat()}')
+        return True
+    return False
+
+
+@contextmanager
+def _file_lock(name):
+    path = os.path.join(_lock_folder(), f'{name}.lock')
+    acquired = _acquire_file_lock(path)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def job_lock(name):
+    """
+    Görev kilidi (context manager); değer kilidin alınıp alınmadığıdır
+
+    Args:
+        name: Görev adı (zamanlayıcı görev id'si)
+    """
+    if db.engine.dialect.name == 'mysql':
+        return _mysql_lock(name)
+    return _file_lock(name)
+
+
+def run_exclusive(name, func, *args, **kwargs):
+    """
+    Görevi kilit alınabilirse çalıştırır; başka süreç çalıştırıyorsa atlar
+
+    Returns:
+        Görevin sonucu; görev atlandıysa None
+    """
+    with job_lock(name) as acquired:
+        if not acquired:
+            current_app.logger.info(f"Zamanlanmış görev '{name}' başka bir süreçte çalışıyor, atlandı")
+            return None
+        return func(*args, **kwargs)
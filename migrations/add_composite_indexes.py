@@ -0,0 +1,120 @@
+"""
+Sık kullanılan sorgu kalıpları için bileşik indeksleri ekleyen migrasyon betiği.
+
+İndeksler models.py içinde __table_args__ ile tanımlıdır (yeni kurulumlarda
+db.create_all() tarafından oluşturulur). Bu betik mevcut veritabanında eksik
+olanları oluşturur; --drop ile geri alır.
+
+Kullanım:
+    python migrations/add_composite_indexes.py          # eksik indeksleri oluştur
+    python migrations/add_composite_indexes.py --drop   # indeksleri kaldır
+
+Öncesi/sonrası sorgu planları için: python migrations/explain_hot_queries.py --apply
+"""
+import sys
+import os
+
+# Proje ana dizinini sys.path'e ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect
+
+from app import app, db
+from models import DOF, DOFAction, Notification, EmailTrack
+
+# Tablo -> eklenecek bileşik indeks adları
+COMPOSITE_INDEXES = {
+    DOF.__table__: [
+        'ix_dofs_department_status_created',  # departman listeleri, created_at sıralı
+        'ix_dofs_created_by_status',          # açtığım DÖF'ler
+        'ix_dofs_assigned_to_status',         # bana atanan DÖF'ler
+        'ix_dofs_deadline_status',            # termin widget'ları
+        'ix_dofs_due_date_status',            # günlük rapor gecikenler
+        'ix_dofs_updated_id',                 # analiz anlık görüntüsü değişiklik filigranı
+    ],
+    Notification.__table__: [
+        'ix_notifications_user_read_created',  # okunmamış bildirimler
+    ],
+    DOFAction.__table__: [
+        'ix_dof_actions_dof_created',      # DÖF geçmişi
+        'ix_dof_actions_type_new_status',  # durum geçişleri (kapanış tarihleri, raporlar)
+    ],
+    EmailTrack.__table__: [
+        'ix_email_tracks_status_created',  # e-posta takip ekranı
+    ],
+}
+
+
+def _composite_indexes():
+    for table, names in COMPOSITE_INDEXES.items():
+        for index in table.indexes:
+            if index.name in names:
+                yield table, index
+
+
+def analyze_tables(conn, tables):
+    """
+    Tablo istatistiklerini günceller. İstatistik olmadan sorgu planlayıcı
+    düşük seçicilikteki tek kolonlu indeksleri (ör. is_related) bileşik
+    indekslere tercih edebilir.
+    """
+    for table in tables:
+        if conn.dialect.name == 'mysql':
+            conn.exec_driver_sql(f"ANALYZE TABLE {table.name}").fetchall()
+        else:
+            conn.exec_driver_sql(f"ANALYZE {table.name}")
+
+
+def create_composite_indexes(conn):
+    """Eksik indeksleri oluşturur ve oluşturulanların adlarını döndürür"""
+    inspector = inspect(conn)
+    created = []
+    changed_tables = []
+    for table, index in _composite_indexes():
+        existing = {item['name'] for item in inspector.get_indexes(table.name)}
+        if index.name in existing:
+            print(f"'{index.name}' indeksi zaten mevcut.")
+            continue
+        index.create(bind=conn)
+        created.append(index.name)
+        if table not in changed_tables:
+            changed_tables.append(table)
+        print(f"'{index.name}' indeksi oluşturuldu ({table.name}).")
+
+    if changed_tables:
+        analyze_tables(conn, changed_tables)
+        print(f"{len(changed_tables)} tablo için istatistikler güncellendi.")
+    return created
+
+
+def drop_composite_indexes(conn):
+    """Bu betiğin eklediği indeksleri kaldırır"""
+    inspector = inspect(conn)
+    dropped = []
+    for table, index in _composite_indexes():
+        existing = {item['name'] for item in inspector.get_indexes(table.name)}
+        if index.name not in existing:
+            continue
+        index.drop(bind=conn)
+        dropped.append(index.name)
+        print(f"'{index.name}' indeksi kaldırıldı ({table.name}).")
+    return dropped
+
+
+def add_composite_indexes(drop=False):
+    """İndeksleri oluştur (drop=True ise kaldır)"""
+    with app.app_context():
+        try:
+            with db.engine.begin() as conn:
+                if drop:
+                    drop_composite_indexes(conn)
+                else:
+                    create_composite_indexes(conn)
+            return True
+        except Exception as e:
+            print(f"Migrasyon hatası: {str(e)}")
+            return False
+
+
+if __name__ == "__main__":
+    add_composite_indexes(drop='--drop' in sys.argv)
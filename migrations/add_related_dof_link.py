@@ -0,0 +1,114 @@
+"""
+İlişkili DÖF bağlantısı için dofs tablosuna related_dof_id ve is_related
+kolonlarını ekleyen migrasyon betiği.
+
+Mevcut kayıtlar başlıktaki "[İlişkili #<id>]" önekinden doldurulur. Bu adımdan
+sonra tüm sayım ve listeler başlık üzerinde LIKE taraması yerine indeksli
+is_related kolonunu kullanır.
+"""
+import re
+import sys
+import os
+
+# Proje ana dizinini sys.path'e ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, select, text
+
+from app import app, db
+from models import DOF
+
+RELATED_TITLE_PREFIX = "[İlişkili #"
+RELATED_TITLE_PATTERN = re.compile(r"^\[İlişkili #(\d+)\]")
+BATCH_SIZE = 500
+
+
+def add_columns(conn):
+    """Eksik kolonları, indeksleri ve yabancı anahtarı ekler"""
+    inspector = inspect(conn)
+    columns = {column['name'] for column in inspector.get_columns('dofs')}
+
+    if 'related_dof_id' not in columns:
+        conn.execute(text("ALTER TABLE dofs ADD COLUMN related_dof_id INTEGER NULL"))
+        print("'related_dof_id' sütunu eklendi.")
+        if conn.dialect.name == 'mysql':
+            conn.execute(text(
+                "ALTER TABLE dofs ADD CONSTRAINT fk_dofs_related_dof "
+                "FOREIGN KEY (related_dof_id) REFERENCES dofs (id)"
+            ))
+    else:
+        print("'related_dof_id' sütunu zaten mevcut.")
+
+    if 'is_related' not in columns:
+        conn.execute(text("ALTER TABLE dofs ADD COLUMN is_related BOOLEAN NOT NULL DEFAULT 0"))
+        print("'is_related' sütunu eklendi.")
+    else:
+        print("'is_related' sütunu zaten mevcut.")
+
+    existing_indexes = {index['name'] for index in inspect(conn).get_indexes('dofs')}
+    for index in DOF.__table__.indexes:
+        if index.name in ('ix_dofs_related_dof_id', 'ix_dofs_is_related') and index.name not in existing_indexes:
+            index.create(bind=conn)
+            print(f"'{index.name}' indeksi oluşturuldu.")
+
+
+def backfill(conn):
+    """Mevcut DÖF'lerin bağlantısını başlıktaki önekten doldurur"""
+    # Tek seferlik tarama: öneki olan tüm DÖF'leri işaretle
+    result = conn.execute(
+        text("UPDATE dofs SET is_related = :flag WHERE title LIKE :prefix AND is_related = :unset"),
+        {'flag': True, 'unset': False, 'prefix': RELATED_TITLE_PREFIX + '%'}
+    )
+    print(f"{result.rowcount} DÖF ilişkili olarak işaretlendi.")
+
+    rows = conn.execute(
+        text("SELECT id, title FROM dofs WHERE is_related = :flag AND related_dof_id IS NULL"),
+        {'flag': True}
+    ).all()
+
+    links = {}
+    for dof_id, title in rows:
+        match = RELATED_TITLE_PATTERN.match(title or '')
+        if match:
+            links[dof_id] = int(match.group(1))
+
+    # Sadece hâlâ var olan DÖF'lere bağlantı kur (yabancı anahtar ihlalini önle)
+    existing_ids = set()
+    target_ids = sorted(set(links.values()))
+    for start in range(0, len(target_ids), BATCH_SIZE):
+        batch = target_ids[start:start + BATCH_SIZE]
+        existing_ids.update(
+            row[0] for row in conn.execute(select(DOF.id).where(DOF.id.in_(batch)))
+        )
+
+    updates = [
+        {'dof_id': dof_id, 'related_dof_id': related_id}
+        for dof_id, related_id in sorted(links.items())
+        if related_id in existing_ids and related_id != dof_id
+    ]
+    for start in range(0, len(updates), BATCH_SIZE):
+        conn.execute(
+            text("UPDATE dofs SET related_dof_id = :related_dof_id WHERE id = :dof_id"),
+            updates[start:start + BATCH_SIZE]
+        )
+
+    print(f"{len(updates)} DÖF kaynak DÖF'e bağlandı, "
+          f"{len(rows) - len(updates)} DÖF için kaynak bulunamadı.")
+
+
+def add_related_dof_link():
+    """Kolonları ekle ve mevcut kayıtları doldur"""
+    with app.app_context():
+        try:
+            with db.engine.begin() as conn:
+                add_columns(conn)
+            with db.engine.begin() as conn:
+                backfill(conn)
+            return True
+        except Exception as e:
+            print(f"Migrasyon hatası: {str(e)}")
+            return False
+
+
+if __name__ == "__main__":
+    add_related_dof_link()
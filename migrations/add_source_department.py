@@ -0,0 +1,73 @@
+"""
+DÖF'ü açan departman için dofs tablosuna source_department_id kolonunu ekleyen
+migrasyon betiği.
+
+Mevcut kayıtlar oluşturan kullanıcının şu anki departmanından doldurulur.
+Bundan sonra kolon DÖF oluşturulurken bir kez yazılır ve kullanıcı departman
+değiştirse bile güncellenmez.
+"""
+import sys
+import os
+
+# Proje ana dizinini sys.path'e ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+
+from app import app, db
+from models import DOF
+
+INDEX_NAME = 'ix_dofs_source_department_status'
+
+
+def add_column(conn):
+    """Eksik kolonu, indeksi ve yabancı anahtarı ekler"""
+    columns = {column['name'] for column in inspect(conn).get_columns('dofs')}
+
+    if 'source_department_id' not in columns:
+        conn.execute(text("ALTER TABLE dofs ADD COLUMN source_department_id INTEGER NULL"))
+        print("'source_department_id' sütunu eklendi.")
+        if conn.dialect.name == 'mysql':
+            conn.execute(text(
+                "ALTER TABLE dofs ADD CONSTRAINT fk_dofs_source_department "
+                "FOREIGN KEY (source_department_id) REFERENCES departments (id)"
+            ))
+    else:
+        print("'source_department_id' sütunu zaten mevcut.")
+
+    existing_indexes = {index['name'] for index in inspect(conn).get_indexes('dofs')}
+    if INDEX_NAME not in existing_indexes:
+        for index in DOF.__table__.indexes:
+            if index.name == INDEX_NAME:
+                index.create(bind=conn)
+                print(f"'{INDEX_NAME}' indeksi oluşturuldu.")
+
+
+def backfill(conn):
+    """Açan departmanı boş olan DÖF'leri oluşturanın departmanı ile doldurur"""
+    result = conn.execute(text(
+        "UPDATE dofs SET source_department_id = "
+        "(SELECT users.department_id FROM users WHERE users.id = dofs.created_by) "
+        "WHERE source_department_id IS NULL AND EXISTS "
+        "(SELECT 1 FROM users WHERE users.id = dofs.created_by AND users.department_id IS NOT NULL)"
+    ))
+    print(f"{result.rowcount} DÖF için açan departman dolduruldu.")
+
+
+def add_source_department():
+    """Kolonu ekle ve mevcut kayıtları doldur"""
+    with app.app_context():
+        try:
+            with db.engine.begin() as conn:
+                add_column(conn)
+            with db.engine.begin() as conn:
+                backfill(conn)
+            return True
+        except Exception as e:
+            print(f"Migrasyon hatası: {str(e)}")
+            return False
+
+
+if __name__ == "__main__":
+    if add_source_department():
+        print("Durum sayaçları kontrolü için: python status_counters.py --dry-run")
@@ -0,0 +1,157 @@
+"""
+Ana ekranların sık çalışan DÖF/bildirim/aksiyon/e-posta sorguları için
+veritabanı sorgu planlarını (EXPLAIN) yazdıran betik.
+
+Bileşik indekslerin etkisini göstermek için kullanılır:
+    python migrations/explain_hot_queries.py            # mevcut planları yazdır
+    python migrations/explain_hot_queries.py --apply    # önce plan, indeksleri ekle, sonra plan
+
+MySQL'de EXPLAIN, SQLite'ta EXPLAIN QUERY PLAN çalıştırılır. Sorgular
+uygulamadaki filtre ve sıralama kalıplarıyla aynıdır; parametreler
+veritabanındaki gerçek kayıtlardan seçilir.
+"""
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Proje ana dizinini sys.path'e ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, func, case
+
+from app import app, db
+from models import DOF, DOFAction, DOFStatus, DOFActionType, Notification, EmailTrack
+
+# MySQL EXPLAIN çıktısından gösterilecek kolonlar
+MYSQL_PLAN_COLUMNS = ('table', 'type', 'key', 'rows', 'Extra')
+
+DEADLINE_STATUSES = [DOFStatus.ASSIGNED, DOFStatus.IN_PROGRESS, DOFStatus.PLANNING, DOFStatus.IMPLEMENTATION]
+
+
+def _sample_values():
+    """Sorgu parametrelerini veritabanındaki gerçek kayıtlardan seçer"""
+    def first(column, *filters):
+        value = db.session.query(column).filter(column.isnot(None), *filters).limit(1).scalar()
+        return value if value is not None else 0
+
+    return {
+        'department_id': first(DOF.department_id),
+        'creator_id': first(DOF.created_by),
+        'assignee_id': first(DOF.assigned_to),
+        'dof_id': first(DOFAction.dof_id),
+        'notified_user_id': first(Notification.user_id),
+        'now': datetime.now(),
+    }
+
+
+def hot_queries():
+    """(ekran, sorgu) çiftleri; sorgular uygulamadaki kalıpları izler"""
+    values = _sample_values()
+    now = values['now']
+    not_related = DOF.is_related == False
+    open_dof = DOF.status != DOFStatus.CLOSED
+
+    return [
+        ("dashboard: departmana atanan açık DÖF'ler (created_at sıralı)",
+         select(DOF.id).where(not_related, DOF.department_id == values['department_id'], open_dof)
+         .order_by(DOF.created_at.desc()).limit(5)),
+        ("list_dofs / reports: departman + durum dağılımı",
+         select(DOF.status, func.count(DOF.id))
+         .where(not_related, DOF.department_id == values['department_id']).group_by(DOF.status)),
+        ("dashboard: açtığım DÖF'ler",
+         select(DOF.id).where(not_related, DOF.created_by == values['creator_id'], open_dof)
+         .order_by(DOF.created_at.desc()).limit(5)),
+        ("dashboard: bana atanan açık DÖF'ler",
+         select(DOF.id).where(not_related, DOF.assigned_to == values['assignee_id'], open_dof)
+         .order_by(DOF.created_at.desc()).limit(5)),
+        ("dashboard: yaklaşan terminler",
+         select(DOF.id).where(not_related, DOF.deadline > now, DOF.deadline <= now + timedelta(days=7),
+                              DOF.status.in_(DEADLINE_STATUSES))
+         .order_by(DOF.deadline.asc()).limit(5)),
+        ("daily_email_scheduler: geciken DÖF'ler",
+         select(DOF.id).where(not_related, DOF.due_date < now,
+                              DOF.status.notin_([DOFStatus.CLOSED, DOFStatus.REJECTED]))
+         .order_by(DOF.due_date.asc()).limit(5)),
+        ("notifications: okunmamış bildirimler",
+         select(Notification.id).where(Notification.user_id == values['notified_user_id'],
+                                       Notification.is_read == False)
+         .order_by(Notification.created_at.desc()).limit(10)),
+        ("dof detail: aksiyon geçmişi",
+         select(DOFAction.id).where(DOFAction.dof_id == values['dof_id'])
+         .order_by(DOFAction.created_at.asc())),
+        ("reports: kapanış geçişleri",
+         select(DOFAction.dof_id, func.max(DOFAction.created_at))
+         .where(DOFAction.action_type == DOFActionType.STATUS_CHANGE, DOFAction.new_status == DOFStatus.CLOSED)
+         .group_by(DOFAction.dof_id)),
+        ("email_tracking: başarısız e-postalar",
+         select(EmailTrack.id).where(EmailTrack.status == 'failed')
+         .order_by(EmailTrack.created_at.desc()).limit(20)),
+        ("email_tracking: durum sayıları",
+         select(func.sum(case((EmailTrack.status == 'sent', 1), else_=0)),
+                func.sum(case((EmailTrack.status == 'failed', 1), else_=0)))
+         .where(EmailTrack.created_at >= now - timedelta(days=7))),
+    ]
+
+
+def explain(conn, statement):
+    """Sorgunun planını satır listesi olarak döndürür"""
+    compiled = statement.compile(dialect=conn.dialect, compile_kwargs={'render_postcompile': True})
+    if compiled.positional:
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+    else:
+        params = compiled.params
+
+    if conn.dialect.name == 'mysql':
+        result = conn.exec_driver_sql("EXPLAIN " + compiled.string, params)
+        rows = [dict(row._mapping) for row in result]
+        return [" | ".join(f"{column}={row.get(column)}" for column in MYSQL_PLAN_COLUMNS) for row in rows]
+
+    if conn.dialect.name == 'sqlite':
+        result = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + compiled.string, params)
+        return [row[-1] for row in result]
+
+    result = conn.exec_driver_sql("EXPLAIN " + compiled.string, params)
+    return [str(row[0]) for row in result]
+
+
+def collect_plans():
+    with db.engine.connect() as conn:
+        return [(label, explain(conn, statement)) for label, statement in hot_queries()]
+
+
+def print_plans(title, plans):
+    print(f"\n===== {title} =====")
+    for label, plan in plans:
+        print(f"\n▶ {label}")
+        for line in plan:
+            print(f"    {line}")
+
+
+def print_comparison(before, after):
+    print("\n===== ÖNCESİ / SONRASI =====")
+    for (label, old_plan), (_, new_plan) in zip(before, after):
+        marker = "değişti" if old_plan != new_plan else "aynı"
+        print(f"\n▶ {label} [{marker}]")
+        for line in old_plan:
+            print(f"    önce : {line}")
+        for line in new_plan:
+            print(f"    sonra: {line}")
+
+
+# Bu script doğrudan çalıştırıldığında
+if __name__ == "__main__":
+    with app.app_context():
+        print(f"Veritabanı: {db.engine.dialect.name}")
+
+        if '--apply' in sys.argv:
+            from migrations.add_composite_indexes import create_composite_indexes
+
+            before = collect_plans()
+            with db.engine.begin() as conn:
+                created = create_composite_indexes(conn)
+            after = collect_plans()
+
+            print_comparison(before, after)
+            print(f"\nOluşturulan indeks sayısı: {len(created)}")
+        else:
+            print_plans("SORGU PLANLARI", collect_plans())
@@ -168,85 +168,36 @@ class User(UserMixin, db.Model):
     def is_department_manager(self):
         """Kullanıcının departman yöneticisi olup olmadığını kontrol eder"""
         return (self.role == UserRole.DEPARTMENT_MANAGER or self.role == UserRole.FRANCHISE_DEPARTMENT_MANAGER) and self.department_id is not None
-    
+
+    def notification_counts(self):
+        """Okunmamış ve toplam bildirim sayısını tek sorguda döndürür: (okunmamış, toplam)"""
+        unread, total = db.session.query(
+            db.func.sum(db.case((Notification.is_read == False, 1), else_=0)),
+            db.func.count(Notification.id)
+        ).filter(Notification.user_id == self.id).one()
+        return int(unread or 0), int(total or 0)
+
     def get_managed_departments(self):
         """Kullanıcının yönettiği tüm departmanları döndürür"""
-        departments = []
-        
         # Admin ise tüm departmanlar
         if self.role == UserRole.ADMIN:
             return Department.query.filter_by(is_active=True).all()
-            
-        # Departman yöneticisi veya franchise departman yöneticisi ise, kendi yönettiği departman
-        if (self.role == UserRole.DEPARTMENT_MANAGER or self.role == UserRole.FRANCHISE_DEPARTMENT_MANAGER) and self.department_id:
-            dept = Department.query.get(self.department_id)
-            if dept and dept.manager_id == self.id:
-                departments.append(dept)
-        
-        # Grup yöneticisi, Projeler Kalite Takip, Şubeler Kalite Takip rolleri ise
-        if self.role in [UserRole.GROUP_MANAGER, UserRole.PROJECTS_QUALITY_TRACKING, UserRole.BRANCHES_QUALITY_TRACKING]:
-            # 1. Yönetici olduğu gruplar
-            managed_groups = DepartmentGroup.query.filter_by(manager_id=self.id).all()
-            
-            # Grupların departmanları
-            for group in managed_groups:
-                # Doğrudan departman-grup ilişkisi
-                direct_depts = Department.query.filter_by(group_id=group.id).all()
-                departments.extend(direct_depts)
-                
-                # Grup-Departman ara tablosundaki ilişkiler
-                mapped_depts = [gd.department for gd in group.department_mappings]
-                departments.extend(mapped_depts)
-            
-            # 2. UserDepartmentMapping tablosundaki ilişkiler
-            # Bölge Müdürü için kullanıcı-departman eşleştirmelerini kontrol et
-            from app import db
-            user_dept_mappings = UserDepartmentMapping.query.filter_by(user_id=self.id).all()
-            
-            if user_dept_mappings:
-                mapped_depts = [udm.department for udm in user_dept_mappings if udm.department and udm.department.is_active]
-                departments.extend(mapped_depts)
-                
-            # Log kayıtları ekle
-            try:
-                from flask import current_app
-                current_app.logger.debug(f"Grup yöneticisi {self.username} için departman eşleştirmeleri: {len(user_dept_mappings) if 'user_dept_mappings' in locals() else 0}")
-                current_app.logger.debug(f"Grup yöneticisi {self.username} için toplam departman sayısı: {len(departments)}")
-            except:
-                pass  # Flask context yoksa log kaydı yapma
         
-        # Direktör ise - altındaki bölge müdürlerinin yönettiği departmanları getir
-        if self.role == UserRole.DIRECTOR:
-            # DirectorManagerMapping tablosundan bu direktörün yönettiği bölge müdürlerini al
-            director_mappings = DirectorManagerMapping.query.filter_by(director_id=self.id).all()
-            
-            for mapping in director_mappings:
-                manager = mapping.manager
-                if manager and manager.role in [UserRole.GROUP_MANAGER, UserRole.PROJECTS_QUALITY_TRACKING, UserRole.BRANCHES_QUALITY_TRACKING]:
-                    # Bu çoklu departman yöneticisinin yönettiği departmanları al
-                    manager_dept_mappings = UserDepartmentMapping.query.filter_by(user_id=manager.id).all()
-                    for dept_mapping in manager_dept_mappings:
-                        if dept_mapping.department and dept_mapping.department.is_active:
-                            departments.append(dept_mapping.department)
-            
-            # Log kayıtları ekle
-            try:
-                from flask import current_app
-                current_app.logger.debug(f"Direktör {self.username} için {len(director_mappings)} bölge müdürü eşleştirmesi bulundu")
-                current_app.logger.debug(f"Direktör {self.username} için toplam departman sayısı: {len(departments)}")
-            except:
-                pass  # Flask context yoksa log kaydı yapma
-            
-        # Tekil bir liste haline getir (aynı departmanı iki kez listelemeyi önle)
-        unique_departments = []
-        seen_ids = set()
-        
-        for dept in departments:
-            if dept.id not in seen_ids and dept.is_active:
-                seen_ids.add(dept.id)
-                unique_departments.append(dept)
-                
-        return unique_departments
+        # Departman yöneticisi (kendi departmanı), çoklu departman yöneticisi (grup ve
+        # departman eşleştirmeleri) ve direktör (bağlı bölge müdürlerinin departmanları)
+        # ilişkileri user_department_visibility tablosunda önceden hesaplanmıştır
+        from department_visibility import visible_department_ids_select
+        return Department.query\
+            .filter(Department.id.in_(visible_department_ids_select(self.id)),
+                    Department.is_active == True)\
+            .order_by(Department.id)\
+            .all()
+    
+    @property
+    def principal(self):
+        """İstek boyunca paylaşılan yetki öznesi (bkz. auth_principal.py)"""
+        from auth_principal import get_principal
+        return get_principal(self)
     
     def can_manage_department(self, department_id):
         """Kullanıcının belirli bir departmanı yönetme yetkisi var mı?"""
@@ -281,10 +232,8 @@ class User(UserMixin, db.Model):
         
         # Direktör ise - altındaki bölge müdürlerinin yönettiği departmanları yönetebilir
         if self.role == UserRole.DIRECTOR:
-            # Bu direktörün yönettiği tüm departmanları kontrol et
-            managed_departments = self.get_managed_departments()
-            managed_dept_ids = [dept.id for dept in managed_departments]
-            return department_id in managed_dept_ids
+            # Görünürlük kapsamı yetki öznesinden okunur (istek başına bir kez hesaplanır)
+            return self.principal.can_see_department(department_id)
         
         return False
     
@@ -338,24 +287,32 @@ class Department(db.Model):
     # İlişkiler
     manager = db.relationship('User', foreign_keys=[manager_id], backref='managed_department', uselist=False)
     group = db.relationship('DepartmentGroup', foreign_keys=[group_id], backref='direct_departments')
-    dofs = db.relationship('DOF', backref='department', lazy='dynamic')
+    dofs = db.relationship('DOF', backref='department', foreign_keys='DOF.department_id', lazy='dynamic')
     
     def __repr__(self):
         return f'<Department {self.name}>'
 
 # DÖF modeli
+# DÖF'ün büyük metin kolonları (açıklama, kök nedenler, aksiyon planı) bu grupta ertelenir:
+# liste/sayım sorguları bunları çekmez, ilk erişimde grup tek sorguda yüklenir
+# (detay ve dışa aktarma ekranları için bkz. query_options.dof_text_options)
+DOF_TEXT_GROUP = 'dof_text'
+
 class DOF(db.Model):
     __tablename__ = 'dofs'
     
     id = db.Column(db.Integer, primary_key=True)
     code = db.Column(db.String(20), unique=True, nullable=True)  # DOF kodu: Örn. DEKNEM-001
     title = db.Column(db.String(200), nullable=False)
-    description = db.Column(db.Text, nullable=False)
+    description = db.deferred(db.Column(db.Text, nullable=False), group=DOF_TEXT_GROUP)
     dof_type = db.Column(db.Integer, nullable=False)
     dof_source = db.Column(db.Integer, nullable=False)
     status = db.Column(db.Integer, default=DOFStatus.DRAFT)
     # priority alanı kaldırıldı - artık kullanılmıyor
     department_id = db.Column(db.Integer, db.ForeignKey('departments.id'), nullable=True)
+    # DÖF'ü açan departman: oluşturulduğu anda oluşturanın departmanıdır ve sonradan değişmez
+    # (kullanıcı başka departmana geçse bile açtığı DÖF'ler eski departmanında kalır)
+    source_department_id = db.Column(db.Integer, db.ForeignKey('departments.id'), nullable=True)
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     assigned_to = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.now)
@@ -367,21 +324,41 @@ class DOF(db.Model):
     channel = db.Column(db.String(50), nullable=True)  # Şikayet/Talep kanalı: Trendyol, Yemeksepeti, vs.
     complaint_date = db.Column(db.DateTime, nullable=True)  # Şikayet/Talep tarihi
     # Kök neden analizi alanları (ilk 3'ü zorunlu)
-    root_cause1 = db.Column(db.Text, nullable=True)
-    root_cause2 = db.Column(db.Text, nullable=True)
-    root_cause3 = db.Column(db.Text, nullable=True)
-    root_cause4 = db.Column(db.Text, nullable=True)
-    root_cause5 = db.Column(db.Text, nullable=True)
+    root_cause1 = db.deferred(db.Column(db.Text, nullable=True), group=DOF_TEXT_GROUP)
+    root_cause2 = db.deferred(db.Column(db.Text, nullable=True), group=DOF_TEXT_GROUP)
+    root_cause3 = db.deferred(db.Column(db.Text, nullable=True), group=DOF_TEXT_GROUP)
+    root_cause4 = db.deferred(db.Column(db.Text, nullable=True), group=DOF_TEXT_GROUP)
+    root_cause5 = db.deferred(db.Column(db.Text, nullable=True), group=DOF_TEXT_GROUP)
     # Termin tarihi
     deadline = db.Column(db.DateTime, nullable=True)
     # Aksiyon planı
-    action_plan = db.Column(db.Text, nullable=True)
+    action_plan = db.deferred(db.Column(db.Text, nullable=True), group=DOF_TEXT_GROUP)
     # Tamamlanma tarihi
     completion_date = db.Column(db.DateTime, nullable=True)
+    # İlişkili DÖF bağlantısı (başka bir DÖF'ten türetilen DÖF'ler sayımlara ve listelere dahil edilmez)
+    related_dof_id = db.Column(db.Integer, db.ForeignKey('dofs.id'), nullable=True, index=True)
+    is_related = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false(), index=True)
     
     # İlişkiler
-    actions = db.relationship('DOFAction', backref='dof', lazy='dynamic')
-    attachments = db.relationship('Attachment', backref='dof', lazy='dynamic')
+    # DÖF başına sınırlı koleksiyonlar: selectinload ile önceden yüklenebilsin diye 'dynamic' değil (bkz. query_options.py)
+    actions = db.relationship('DOFAction', backref='dof', lazy='select')
+    attachments = db.relationship('Attachment', backref='dof', lazy='select')
+    related_dof = db.relationship('DOF', remote_side=[id], foreign_keys=[related_dof_id],
+                                  backref=db.backref('related_dofs', lazy='dynamic'))
+    source_department = db.relationship('Department', foreign_keys=[source_department_id])
+    
+    __table_args__ = (
+        # Açan departman + durum filtreleri (departman yöneticisi görünümü, raporlar)
+        db.Index('ix_dofs_source_department_status', 'source_department_id', 'status'),
+        # Sık kullanılan filtre/sıralama kalıpları (migrations/add_composite_indexes.py)
+        db.Index('ix_dofs_department_status_created', 'department_id', 'status', 'created_at'),
+        db.Index('ix_dofs_created_by_status', 'created_by', 'status'),
+        db.Index('ix_dofs_assigned_to_status', 'assigned_to', 'status'),
+        db.Index('ix_dofs_deadline_status', 'deadline', 'status'),
+        db.Index('ix_dofs_due_date_status', 'due_date', 'status'),
+        # Analiz anlık görüntüsü değişen DÖF'leri (updated_at, id) filigranından okur (analytics_snapshot.py)
+        db.Index('ix_dofs_updated_id', 'updated_at', 'id'),
+    )
     
     @property
     def status_name(self):
@@ -425,6 +402,11 @@ class DOF(db.Model):
     
     # priority_name property'si kaldırıldı - artık kullanılmıyor
     
+    def link_related(self, related_dof):
+        """DÖF'ü, türetildiği DÖF'e bağlar ve ilişkili olarak işaretler"""
+        self.related_dof_id = related_dof.id
+        self.is_related = True
+    
     def auto_assign_department(self):
         """Eğer DÖF'ün departmanı atanmamışsa, oluşturan kullanıcının departmanını ata"""
         if self.department_id is None and self.created_by is not None:
@@ -461,11 +443,184 @@ class DOFAction(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.now)
     
     # Yorumlara ek dosyalar için ilişki
-    attachments = db.relationship('ActionAttachment', backref='action', lazy='dynamic', cascade='all, delete-orphan')
+    attachments = db.relationship('ActionAttachment', backref='action', lazy='select', cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        # DÖF geçmişi (dof_id + tarih sıralı) ve durum geçişi sorguları
+        db.Index('ix_dof_actions_dof_created', 'dof_id', 'created_at'),
+        db.Index('ix_dof_actions_type_new_status', 'action_type', 'new_status'),
+    )
     
     def __repr__(self):
         return f'<DOFAction {self.id} for DOF {self.dof_id}>'
 
+# DÖF Durum Sayaçları (departman x kaynak departman x durum)
+# Her durum geçişiyle aynı transaction içinde status_counters modülü tarafından güncellenir
+class DOFStatusCounter(db.Model):
+    __tablename__ = 'dof_status_counters'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    department_id = db.Column(db.Integer, nullable=False, default=0)  # Atanan departman (0: departmansız)
+    source_department_id = db.Column(db.Integer, nullable=False, default=0)  # DÖF'ü açan departman (0: bilinmiyor)
+    status = db.Column(db.Integer, nullable=False)
+    dof_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+    
+    __table_args__ = (
+        # Upsert işlemleri bu anahtar üzerinden yapılır
+        db.UniqueConstraint('department_id', 'source_department_id', 'status', name='uq_dof_status_counter'),
+        db.Index('ix_dof_status_counters_source', 'source_department_id', 'status'),
+    )
+    
+    def __repr__(self):
+        return f'<DOFStatusCounter dept={self.department_id} source={self.source_department_id} status={self.status}: {self.dof_count}>'
+
+# DÖF arama dokümanı (search_service tarafından güncel tutulur)
+class DOFSearchDocument(db.Model):
+    __tablename__ = 'dof_search_documents'
+
+    # DÖF silinirken doküman aynı flush içinde silinir; yabancı anahtar sıralama sorunu çıkarmasın diye FK yok
+    dof_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    content = db.Column(db.Text, nullable=False, default='')  # Normalize edilmiş başlık, açıklama, kök nedenler, plan ve yorumlar
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+
+    __table_args__ = (
+        # Sadece MySQL'de oluşturulur; SQLite'ta FTS5 sanal tablosu kullanılır
+        db.Index('ix_dof_search_documents_content', 'content', mysql_prefix='FULLTEXT').ddl_if(dialect='mysql'),
+    )
+
+    def __repr__(self):
+        return f'<DOFSearchDocument dof={self.dof_id}>'
+
+# Günlük DÖF özet tablosu (daily_facts tarafından güncel tutulur)
+class DOFDailyFact(db.Model):
+    __tablename__ = 'dof_daily_facts'
+
+    id = db.Column(db.Integer, primary_key=True)
+    fact_date = db.Column(db.Date, nullable=False)
+    department_id = db.Column(db.Integer, nullable=False, default=0)  # Atanan departman (0: departmansız)
+    source_department_id = db.Column(db.Integer, nullable=False, default=0)  # DÖF'ü açan departman (0: bilinmiyor)
+    dof_type = db.Column(db.Integer, nullable=False, default=0)
+    dof_source = db.Column(db.Integer, nullable=False, default=0)
+    status = db.Column(db.Integer, nullable=False, default=0)  # DÖF'ün güncel durumu
+    is_related = db.Column(db.Boolean, nullable=False, default=False)
+    opened = db.Column(db.Integer, nullable=False, default=0)  # O gün açılan DÖF sayısı
+    closed = db.Column(db.Integer, nullable=False, default=0)  # O gün kapatılan DÖF sayısı
+    overdue = db.Column(db.Integer, nullable=False, default=0)  # Termini o gün olup zamanında kapanmayan DÖF sayısı
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+
+    __table_args__ = (
+        # Tarih aralığı sorguları bu anahtarın ilk kolonu üzerinden indeksi kullanır
+        db.UniqueConstraint('fact_date', 'department_id', 'source_department_id', 'dof_type', 'dof_source',
+                            'status', 'is_related', name='uq_dof_daily_fact'),
+    )
+
+    def __repr__(self):
+        return f'<DOFDailyFact {self.fact_date} dept={self.department_id} status={self.status}: +{self.opened}/-{self.closed}>'
+
+# DÖF durum geçmişi - sadece ekleme yapılır (status_history tarafından her durum geçişinde yazılır)
+class DOFStatusHistory(db.Model):
+    __tablename__ = 'dof_status_history'
+
+    # DÖF silinse de geçmiş korunur; bu yüzden yabancı anahtar yok
+    id = db.Column(db.Integer, primary_key=True)
+    dof_id = db.Column(db.Integer, nullable=False)
+    from_status = db.Column(db.Integer, nullable=True)  # DÖF oluşturulurken boş
+    to_status = db.Column(db.Integer, nullable=False)
+    at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    user_id = db.Column(db.Integer, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_dof_status_history_dof_at', 'dof_id', 'at'),
+        db.Index('ix_dof_status_history_at', 'at'),
+    )
+
+    def __repr__(self):
+        return f'<DOFStatusHistory dof={self.dof_id} {self.from_status}->{self.to_status}>'
+
+# DÖF başına süre ölçümleri (cycle_analytics tarafından durum geçmişinden hesaplanır)
+class DOFCycleMetric(db.Model):
+    __tablename__ = 'dof_cycle_metrics'
+
+    id = db.Column(db.Integer, primary_key=True)
+    dof_id = db.Column(db.Integer, nullable=False, index=True)
+    department_id = db.Column(db.Integer, nullable=False, default=0)  # Atanan departman (0: departmansız)
+    metric = db.Column(db.String(20), nullable=False)  # lead_time, quality_approval, time_in_status
+    status = db.Column(db.Integer, nullable=True)  # Sadece time_in_status için: geçirilen süredeki durum
+    month = db.Column(db.Date, nullable=False)  # Ölçülen aralığın bittiği ayın ilk günü
+    seconds = db.Column(db.Float, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_dof_cycle_metrics_month_metric', 'month', 'metric', 'department_id'),
+    )
+
+    def __repr__(self):
+        return f'<DOFCycleMetric dof={self.dof_id} {self.metric}: {self.seconds}s>'
+
+# Ay x departman bazında süre istatistikleri (ortalama ve yüzdelikler)
+class DOFCycleStat(db.Model):
+    __tablename__ = 'dof_cycle_stats'
+
+    id = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.Date, nullable=False)
+    department_id = db.Column(db.Integer, nullable=True)  # NULL: tüm departmanlar
+    metric = db.Column(db.String(20), nullable=False)
+    status = db.Column(db.Integer, nullable=True)
+    dof_count = db.Column(db.Integer, nullable=False, default=0)
+    avg_seconds = db.Column(db.Float, nullable=False, default=0)
+    p50_seconds = db.Column(db.Float, nullable=False, default=0)
+    p90_seconds = db.Column(db.Float, nullable=False, default=0)
+    computed_at = db.Column(db.DateTime, default=datetime.now)
+
+    __table_args__ = (
+        db.Index('ix_dof_cycle_stats_month_metric', 'month', 'metric'),
+    )
+
+    def __repr__(self):
+        return f'<DOFCycleStat {self.month} dept={self.department_id} {self.metric}: p50={self.p50_seconds}>'
+
+# Artımlı analiz işlerinin filigranı (cycle_analytics: en son işlenen durum geçmişi satırı)
+class AnalyticsWatermark(db.Model):
+    __tablename__ = 'analytics_watermarks'
+
+    name = db.Column(db.String(50), primary_key=True)  # ör. cycle_analytics
+    last_id = db.Column(db.Integer, nullable=False, default=0)  # İşlenen en büyük kaynak satır id'si
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+
+    def __repr__(self):
+        return f'<AnalyticsWatermark {self.name}: {self.last_id}>'
+
+# Arka planda hazırlanan dışa aktarım işleri (export_jobs tarafından yönetilir)
+class ExportJob(db.Model):
+    __tablename__ = 'export_jobs'
+
+    id = db.Column(db.String(32), primary_key=True)  # Tahmin edilemeyen iş kimliği (uuid4 hex)
+    kind = db.Column(db.String(40), nullable=False)  # ör. dof_list_excel (bkz. export_jobs.EXPORT_KINDS)
+    params = db.Column(db.Text, nullable=True)  # Normalize edilmiş filtreler (JSON)
+    scope = db.Column(db.String(64), nullable=False)  # Görünürlük kapsamı: 'all' veya 'user:<id>'
+    # Aynı tür + kapsam + filtre için tekil; iş bittiğinde veya başarısız olduğunda boşaltılır
+    dedupe_key = db.Column(db.String(64), nullable=True, unique=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+    progress = db.Column(db.Integer, nullable=False, default=0)  # 0-100
+    message = db.Column(db.String(255), nullable=True)  # Hata mesajı
+    file_name = db.Column(db.String(255), nullable=True)  # İndirme adı
+    file_path = db.Column(db.String(500), nullable=True)
+    file_size = db.Column(db.Integer, nullable=True)
+    mimetype = db.Column(db.String(100), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.now)  # İlerleme yazıldıkça güncellenir
+    expires_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_export_jobs_status_updated', 'status', 'updated_at'),
+    )
+
+    def __repr__(self):
+        return f'<ExportJob {self.id} {self.kind} {self.status} {self.progress}%>'
+
 # Dosya Eki modeli
 class Attachment(db.Model):
     __tablename__ = 'attachments'
@@ -515,6 +670,11 @@ class Notification(db.Model):
     is_read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.now)
     
+    __table_args__ = (
+        # Kullanıcının okunmamış bildirimleri, tarih sıralı
+        db.Index('ix_notifications_user_read_created', 'user_id', 'is_read', 'created_at'),
+    )
+    
     def __repr__(self):
         return f'<Notification {self.id} for User {self.user_id}>'
 
@@ -621,6 +781,25 @@ class DirectorManagerMapping(db.Model):
     def __repr__(self):
         return f'<DirectorManagerMapping Director:{self.director_id} - Manager:{self.manager_id}>'
 
+# Kullanıcı -> Görülebilir Departman kapanış tablosu
+# Grup, eşleştirme ve direktör ilişkilerinden department_visibility modülü tarafından türetilir;
+# ilişkiler değiştiğinde aynı transaction içinde yeniden oluşturulur
+class UserDepartmentVisibility(db.Model):
+    __tablename__ = 'user_department_visibility'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    department_id = db.Column(db.Integer, nullable=False)
+    reason = db.Column(db.String(32), nullable=False)  # department_manager, group, group_mapping, user_mapping, director
+
+    __table_args__ = (
+        # Yetki filtresi (user_id, department_id) üzerinden EXISTS ile bu anahtarı kullanır
+        db.UniqueConstraint('user_id', 'department_id', 'reason', name='uq_user_department_visibility'),
+    )
+
+    def __repr__(self):
+        return f'<UserDepartmentVisibility user={self.user_id} dept={self.department_id} ({self.reason})>'
+
 # Kullanıcı Aktiviteleri modeli
 class UserActivity(db.Model):
     __tablename__ = 'user_activities'
@@ -672,6 +851,11 @@ class EmailTrack(db.Model):
     # İlişkiler
     dof = db.relationship('DOF', backref='email_tracks', foreign_keys=[related_dof_id])
     
+    __table_args__ = (
+        # Durum bazlı e-posta takibi (kuyruk, başarısız, son gönderilenler)
+        db.Index('ix_email_tracks_status_created', 'status', 'created_at'),
+    )
+    
     def __repr__(self):
         return f'<EmailTrack {self.id[:8]}: {self.status}>'
     
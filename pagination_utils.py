@@ -0,0 +1,187 @@
+"""
+Anahtar Kümesi (Keyset) Sayfalama
+---------------------------------
+DÖF listeleri için (created_at, id) imleçli sayfalama yardımcıları.
+
+OFFSET/LIMIT sayfalamasının aksine sayfa ne kadar derin olursa olsun her
+istek indeks üzerinden sadece bir sonraki per_page + 1 satırı okur ve
+COUNT(*) çalıştırmaz. Toplam kayıt sayısı sadece istenirse hesaplanır ve
+kısa bir süre önbellekte tutulur (yaklaşık toplam).
+
+Kullanım:
+    from pagination_utils import keyset_paginate
+
+    page = keyset_paginate(query, per_page=10,
+                           after=request.args.get('after'),
+                           before=request.args.get('before'))
+    for dof in page:
+        ...
+    url_for('dof.list_dofs', after=page.next_cursor)
+"""
+
+import base64
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import and_, or_, func
+
+# Yaklaşık toplamların önbellekte tutulma süresi (saniye)
+TOTAL_CACHE_TTL = 60
+TOTAL_CACHE_MAX_ENTRIES = 500
+
+_total_cache = {}
+_total_cache_lock = threading.Lock()
+
+
+def encode_cursor(created_at, row_id):
+    """(created_at, id) çiftini URL'de taşınabilir imlece dönüştürür"""
+    if created_at is None or row_id is None:
+        return None
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """İmleci (created_at, id) çiftine çözer; geçersiz imleç için None döner"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8').rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def _cached_total(cache_key, compute):
+    """Toplamı önbellekten döndürür, yoksa veya süresi dolduysa hesaplar"""
+    now = time.monotonic()
+    if cache_key is not None:
+        with _total_cache_lock:
+            entry = _total_cache.get(cache_key)
+            if entry and entry[0] > now:
+                return entry[1]
+
+    total = compute()
+
+    if cache_key is not None:
+        with _total_cache_lock:
+            if len(_total_cache) >= TOTAL_CACHE_MAX_ENTRIES:
+                # Süresi dolanları at, hâlâ doluysa tamamen temizle
+                for key in [key for key, entry in _total_cache.items() if entry[0] <= now]:
+                    del _total_cache[key]
+                if len(_total_cache) >= TOTAL_CACHE_MAX_ENTRIES:
+                    _total_cache.clear()
+            _total_cache[cache_key] = (now + TOTAL_CACHE_TTL, total)
+    return total
+
+
+class KeysetPage:
+    """
+    Tek bir imleçli sayfa. Şablonlarda doğrudan döngüye alınabilir.
+
+    total özelliği ilk erişimde COUNT sorgusu çalıştırır (önbellekli);
+    erişilmezse hiç sayım yapılmaz.
+    """
+
+    def __init__(self, items, per_page, has_next, has_prev, sort_column, id_column, count_query, count_cache_key):
+        self.items = items
+        self.per_page = per_page
+        self.has_next = has_next
+        self.has_prev = has_prev
+        self._sort_column = sort_column
+        self._id_column = id_column
+        self._count_query = count_query
+        self._count_cache_key = count_cache_key
+        self._total = None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def _cursor_for(self, item):
+        return encode_cursor(getattr(item, self._sort_column.key), getattr(item, self._id_column.key))
+
+    @property
+    def next_cursor(self):
+        return self._cursor_for(self.items[-1]) if self.items and self.has_next else None
+
+    @property
+    def prev_cursor(self):
+        return self._cursor_for(self.items[0]) if self.items and self.has_prev else None
+
+    @property
+    def total(self):
+        """Filtrelenmiş sorgunun yaklaşık toplam kayıt sayısı"""
+        if self._total is None:
+            query = self._count_query
+            self._total = _cached_total(
+                self._count_cache_key,
+                lambda: query.order_by(None).with_entities(func.count(self._id_column)).scalar() or 0
+            )
+        return self._total
+
+
+def _seek_condition(sort_column, id_column, cursor, forward, descending):
+    """İmleçten sonraki (forward) veya önceki satırlar için koşul"""
+    created_at, row_id = cursor
+    go_lower = descending == forward
+    if go_lower:
+        return or_(sort_column < created_at, and_(sort_column == created_at, id_column < row_id))
+    return or_(sort_column > created_at, and_(sort_column == created_at, id_column > row_id))
+
+
+def keyset_paginate(query, per_page, after=None, before=None, descending=True,
+                    sort_column=None, id_column=None, count_cache_key=None, options=None):
+    """
+    Sorguyu (sort_column, id_column) imlecine göre sayfalar
+
+    Args:
+        query: Filtrelenmiş sorgu (sıralama uygulanmamış)
+        per_page: Sayfa başına kayıt
+        after: Bu imleçten sonraki sayfa (Sonraki)
+        before: Bu imleçten önceki sayfa (Önceki)
+        descending: True ise en yeni kayıtlar önce
+        sort_column / id_column: Varsayılan DOF.created_at / DOF.id
+        count_cache_key: Yaklaşık toplamın önbellek anahtarı (None: önbelleksiz)
+        options: Sadece sayfa sorgusuna uygulanacak loader seçenekleri (sayım sorgusuna değil)
+
+    Returns:
+        KeysetPage
+    """
+    if sort_column is None or id_column is None:
+        from models import DOF
+        sort_column = DOF.created_at if sort_column is None else sort_column
+        id_column = DOF.id if id_column is None else id_column
+
+    after_cursor = decode_cursor(after)
+    before_cursor = decode_cursor(before) if after_cursor is None else None
+
+    page_query = query.options(*options) if options else query
+    forward = before_cursor is None
+    if after_cursor:
+        page_query = page_query.filter(_seek_condition(sort_column, id_column, after_cursor, True, descending))
+    elif before_cursor:
+        page_query = page_query.filter(_seek_condition(sort_column, id_column, before_cursor, False, descending))
+
+    # Geriye giderken sıralama ters çevrilir, sonuç tekrar düz sıraya alınır
+    scan_descending = descending if forward else not descending
+    if scan_descending:
+        ordering = [sort_column.desc(), id_column.desc()]
+    else:
+        ordering = [sort_column.asc(), id_column.asc()]
+
+    rows = page_query.order_by(None).order_by(*ordering).limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    if forward:
+        has_next, has_prev = has_more, after_cursor is not None
+    else:
+        rows.reverse()
+        has_next, has_prev = True, has_more
+
+    return KeysetPage(rows, per_page, has_next, has_prev, sort_column, id_column, query, count_cache_key)
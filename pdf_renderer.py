@@ -0,0 +1,425 @@
+"""
+PDF Oluşturma Servisi
+---------------------
+DÖF raporu ve DÖF detay PDF'lerini WeasyPrint ile, sıcak tutulan ayrı
+işçi süreçlerde oluşturan modül.
+
+- Şablonlar (templates/pdf/*.html) süreç başına bir kez derlenir ve ana
+  süreçte işlenir; şablon yardımcıları veritabanına eriştiği için HTML
+  üretimi uygulama bağlamında kalır.
+- Stil dosyaları (templates/pdf/*.css) ve font yapılandırması her işçide
+  açılışta bir kez ayrıştırılır; işçi küçük bir belgeyle ısıtılır. Böylece
+  her PDF'te font taraması ve CSS ayrıştırması tekrarlanmaz.
+- İşçiler stdin/stdout boruları üzerinden iş alır. Boş işçiler kuyrukta
+  bekler; kuyruk beklemesi ve boru okuma/yazma selectors ile yapıldığından
+  gunicorn gevent işçisinde olay döngüsü bloklanmaz (gevent select,
+  subprocess ve queue modüllerini yamar).
+- İşçi PDF_RENDER_MAX_JOBS belgeden sonra yenilenir, zaman aşımında
+  öldürülüp yeniden başlatılır. Ana süreç kapanınca stdin kapanır ve işçi
+  kendiliğinden çıkar.
+- WeasyPrint yüklenemezse (ör. pango eksik) PDFRendererUnavailable
+  fırlatılır ve servis PDF_RENDER_RETRY_SECONDS boyunca tekrar denenmez.
+  Çağıranlar bu durumda fpdf ile basit PDF oluşturur (düşük kalite modu,
+  bkz. export_utils.create_simple_pdf_fallback).
+
+Yapılandırma (config.py):
+    PDF_RENDER_WORKERS       : Süreç başına işçi sayısı (0: süreç içinde render)
+    PDF_RENDER_TIMEOUT       : Tek PDF için azami süre (saniye)
+    PDF_RENDER_QUEUE_TIMEOUT : Boş işçi için azami bekleme (saniye)
+    PDF_RENDER_MAX_JOBS      : İşçinin yenilenmeden önce oluşturacağı PDF sayısı
+    PDF_RENDER_RETRY_SECONDS : WeasyPrint kullanılamadığında tekrar deneme aralığı
+
+Kullanım:
+    from pdf_renderer import render_pdf
+    pdf_bytes = render_pdf('dof_report', context)   # templates/pdf/dof_report.html + .css
+
+İşçi süreç (servis tarafından başlatılır):
+    python pdf_renderer.py --worker
+"""
+
+import atexit
+import logging
+import os
+import queue
+import selectors
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+from config import Config
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_DIR = os.path.join(BASE_DIR, 'templates', 'pdf')
+
+# Boru protokolü:
+#   istek : '>II' (stil dosyası adı uzunluğu, HTML uzunluğu) + ad + HTML (UTF-8)
+#   yanıt : '>cI' (durum, uzunluk) + veri
+REQUEST_HEADER = struct.Struct('>II')
+RESPONSE_HEADER = struct.Struct('>cI')
+STATUS_READY = b'R'
+STATUS_OK = b'O'
+STATUS_ERROR = b'E'
+
+READ_CHUNK = 64 * 1024
+
+# Isınma belgesi: font yapılandırması ve yerleşim motoru ilk istekten önce yüklenir
+WARMUP_HTML = '<!DOCTYPE html><html><body><p>DÖF</p></body></html>'
+
+logger = logging.getLogger(__name__)
+
+
+class PDFRenderError(Exception):
+    """PDF oluşturulamadı (tek belge için; servis çalışmaya devam eder)"""
+
+
+class PDFRendererUnavailable(PDFRenderError):
+    """WeasyPrint kullanılamıyor; çağıran basit PDF'e dönmeli"""
+
+
+class _Renderer:
+    """WeasyPrint modülünü, font yapılandırmasını ve ayrıştırılmış stil dosyalarını tutar"""
+
+    def __init__(self):
+        import weasyprint
+        from weasyprint.text.fonts import FontConfiguration
+
+        # WeasyPrint log seviyesini düşür (çok verbose olmasın)
+        logging.getLogger('weasyprint').setLevel(logging.ERROR)
+
+        self.weasyprint = weasyprint
+        self.font_config = FontConfiguration()
+        self.stylesheets = {}
+        for file_name in sorted(os.listdir(TEMPLATE_DIR)):
+            if file_name.endswith('.css'):
+                with open(os.path.join(TEMPLATE_DIR, file_name), encoding='utf-8') as f:
+                    self.stylesheets[file_name] = weasyprint.CSS(string=f.read(), font_config=self.font_config)
+
+        self.render(WARMUP_HTML, None)
+
+    def render(self, html, stylesheet):
+        stylesheets = []
+        if stylesheet:
+            if stylesheet not in self.stylesheets:
+                raise PDFRenderError(f"Stil dosyası bulunamadı: {stylesheet}")
+            stylesheets.append(self.stylesheets[stylesheet])
+        document = self.weasyprint.HTML(string=html, base_url=TEMPLATE_DIR)
+        return document.write_pdf(stylesheets=stylesheets, font_config=self.font_config)
+
+
+# ---------------------------------------------------------------------------
+# İşçi süreç tarafı
+# ---------------------------------------------------------------------------
+
+def _read_stream(stream, size):
+    data = stream.read(size) if size else b''
+    if len(data) != size:
+        raise EOFError
+    return data
+
+
+def _send(stream, status, payload):
+    stream.write(RESPONSE_HEADER.pack(status, len(payload)))
+    stream.write(payload)
+    stream.flush()
+
+
+def _worker_main():
+    """stdin'den HTML okuyup stdout'a PDF yazan işçi döngüsü"""
+    # Protokol kanalını ayır; kütüphanelerin stdout çıktısı stderr'e gitsin
+    channel = os.fdopen(os.dup(1), 'wb')
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+    requests = sys.stdin.buffer
+
+    try:
+        renderer = _Renderer()
+    except Exception as e:
+        _send(channel, STATUS_ERROR, f"{type(e).__name__}: {e}".encode('utf-8', 'replace'))
+        return 1
+    _send(channel, STATUS_READY, b'')
+
+    while True:
+        try:
+            name_length, html_length = REQUEST_HEADER.unpack(_read_stream(requests, REQUEST_HEADER.size))
+            stylesheet = _read_stream(requests, name_length).decode('utf-8')
+            html = _read_stream(requests, html_length).decode('utf-8')
+        except EOFError:
+            return 0
+
+        try:
+            pdf = renderer.render(html, stylesheet or None)
+        except Exception as e:
+            _send(channel, STATUS_ERROR, f"{type(e).__name__}: {e}".encode('utf-8', 'replace'))
+        else:
+            _send(channel, STATUS_OK, pdf)
+
+
+# ---------------------------------------------------------------------------
+# Ana süreç tarafı
+# ---------------------------------------------------------------------------
+
+class _Worker:
+    """Tek bir işçi süreç ve boruları"""
+
+    def __init__(self, timeout):
+        self.jobs = 0
+        self.broken = False
+        self.process = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--worker'],
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        cwd=BASE_DIR, close_fds=True)
+        self._stdin = self.process.stdin.fileno()
+        self._stdout = self.process.stdout.fileno()
+        self._readable = selectors.DefaultSelector()
+        self._readable.register(self._stdout, selectors.EVENT_READ)
+        self._writable = selectors.DefaultSelector()
+        self._writable.register(self._stdin, selectors.EVENT_WRITE)
+
+        try:
+            status, payload = self._receive(time.monotonic() + timeout)
+        except PDFRenderError as e:
+            self.close()
+            raise PDFRendererUnavailable(f"PDF işçisi başlatılamadı: {e}")
+        if status != STATUS_READY:
+            self.close()
+            raise PDFRendererUnavailable(payload.decode('utf-8', 'replace'))
+
+    def _wait(self, selector, deadline):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not selector.select(remaining):
+            self.broken = True
+            raise PDFRenderError("PDF oluşturma zaman aşımına uğradı")
+
+    def _write(self, data, deadline):
+        view = memoryview(data)
+        while view:
+            self._wait(self._writable, deadline)
+            try:
+                written = os.write(self._stdin, view)
+            except BlockingIOError:
+                continue
+            except OSError as e:
+                self.broken = True
+                raise PDFRenderError(f"PDF işçisine yazılamadı: {e}")
+            view = view[written:]
+
+    def _read(self, size, deadline):
+        chunks = []
+        while size:
+            self._wait(self._readable, deadline)
+            try:
+                chunk = os.read(self._stdout, min(size, READ_CHUNK))
+            except BlockingIOError:
+                continue
+            if not chunk:
+                self.broken = True
+                raise PDFRenderError("PDF işçisi beklenmedik şekilde sonlandı")
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b''.join(chunks)
+
+    def _receive(self, deadline):
+        status, length = RESPONSE_HEADER.unpack(self._read(RESPONSE_HEADER.size, deadline))
+        return status, self._read(length, deadline)
+
+    def render(self, html, stylesheet, timeout):
+        deadline = time.monotonic() + timeout
+        name = (stylesheet or '').encode('utf-8')
+        body = html.encode('utf-8')
+        self._write(REQUEST_HEADER.pack(len(name), len(body)) + name + body, deadline)
+        status, payload = self._receive(deadline)
+        self.jobs += 1
+        if status != STATUS_OK:
+            raise PDFRenderError(payload.decode('utf-8', 'replace'))
+        return payload
+
+    def close(self):
+        for selector in (self._readable, self._writable):
+            selector.close()
+        for stream in (self.process.stdin, self.process.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+        if self.process.poll() is None:
+            self.process.kill()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            pass
+
+
+class RendererPool:
+    """
+    Sıcak işçi havuzu
+
+    Kuyrukta ya boş bir işçi ya da None (işçi başlatılabilir boş yer) bulunur.
+    LIFO sırası sayesinde önce en son kullanılan (sıcak) işçi alınır.
+    """
+
+    def __init__(self, size, timeout, queue_timeout, max_jobs):
+        self.size = size
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self.max_jobs = max_jobs
+        self.pid = os.getpid()
+        self.closed = False
+        self._idle = queue.LifoQueue()
+        for _ in range(size):
+            self._idle.put(None)
+
+    def render(self, html, stylesheet):
+        try:
+            worker = self._idle.get(timeout=self.queue_timeout)
+        except queue.Empty:
+            raise PDFRenderError("Tüm PDF işçileri meşgul")
+
+        if worker is None:
+            try:
+                worker = _Worker(self.timeout)
+            except Exception:
+                self._idle.put(None)
+                raise
+
+        try:
+            return worker.render(html, stylesheet, self.timeout)
+        finally:
+            # Belge hatasında işçi sağlamdır; zaman aşımı veya çökmede yenilenir
+            if not worker.broken and not self.closed and worker.jobs < self.max_jobs:
+                self._idle.put(worker)
+            else:
+                worker.close()
+                self._idle.put(None)
+
+    def close(self):
+        self.closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if worker is not None:
+                worker.close()
+
+
+_pool = None
+_local_renderer = None
+_state_lock = threading.Lock()
+_unavailable_until = 0.0
+_unavailable_reason = None
+_environment = None
+
+
+def _setting(name):
+    from flask import current_app, has_app_context
+
+    if has_app_context():
+        return current_app.config.get(name, getattr(Config, name))
+    return getattr(Config, name)
+
+
+def _get_environment():
+    """templates/pdf için derlenmiş şablonları önbelleğe alan Jinja ortamı"""
+    global _environment
+    if _environment is None:
+        from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+        _environment = Environment(loader=FileSystemLoader(TEMPLATE_DIR),
+                                   autoescape=select_autoescape(['html']),
+                                   auto_reload=False)
+    return _environment
+
+
+def _get_pool():
+    global _pool
+    with _state_lock:
+        if _pool is None or _pool.pid != os.getpid():
+            _pool = RendererPool(size=_setting('PDF_RENDER_WORKERS'),
+                                 timeout=_setting('PDF_RENDER_TIMEOUT'),
+                                 queue_timeout=_setting('PDF_RENDER_QUEUE_TIMEOUT'),
+                                 max_jobs=_setting('PDF_RENDER_MAX_JOBS'))
+        return _pool
+
+
+def _get_local_renderer():
+    global _local_renderer
+    with _state_lock:
+        if _local_renderer is None:
+            try:
+                _local_renderer = _Renderer()
+            except Exception as e:
+                raise PDFRendererUnavailable(f"{type(e).__name__}: {e}")
+        return _local_renderer
+
+
+def _mark_unavailable(reason):
+    global _unavailable_until, _unavailable_reason
+    _unavailable_until = time.monotonic() + _setting('PDF_RENDER_RETRY_SECONDS')
+    _unavailable_reason = reason
+    logger.warning(f"WeasyPrint kullanılamıyor, basit PDF moduna geçildi: {reason}")
+
+
+def render_html(template_name, context):
+    """templates/pdf altındaki şablonu verilen context ile işler"""
+    return _get_environment().get_template(template_name).render(**context)
+
+
+def html_to_pdf(html, stylesheet=None):
+    """
+    HTML'i PDF'e çevirir
+
+    Args:
+        html: Belge HTML'i
+        stylesheet: templates/pdf altındaki stil dosyası adı (ör. 'dof_report.css')
+
+    Raises:
+        PDFRendererUnavailable: WeasyPrint kullanılamıyor (basit PDF'e dönülmeli)
+        PDFRenderError: Bu belge oluşturulamadı
+    """
+    if time.monotonic() < _unavailable_until:
+        raise PDFRendererUnavailable(_unavailable_reason)
+
+    try:
+        if _setting('PDF_RENDER_WORKERS') <= 0:
+            return _get_local_renderer().render(html, stylesheet)
+        return _get_pool().render(html, stylesheet)
+    except PDFRendererUnavailable as e:
+        _mark_unavailable(str(e))
+        raise
+
+
+def render_pdf(name, context):
+    """templates/pdf/<name>.html şablonunu <name>.css stiliyle PDF'e çevirir (bytes)"""
+    stylesheet = f'{name}.css'
+    if not os.path.exists(os.path.join(TEMPLATE_DIR, stylesheet)):
+        stylesheet = None
+    return html_to_pdf(render_html(f'{name}.html', context), stylesheet)
+
+
+def renderer_status():
+    """Servis durumu (tanılama ve ölçüm betiği için)"""
+    return {
+        'workers': _setting('PDF_RENDER_WORKERS'),
+        'available': time.monotonic() >= _unavailable_until,
+        'reason': _unavailable_reason,
+    }
+
+
+def shutdown():
+    """İşçi süreçleri kapatır"""
+    global _pool
+    with _state_lock:
+        if _pool is not None and _pool.pid == os.getpid():
+            _pool.close()
+        _pool = None
+
+
+atexit.register(shutdown)
+
+
+if __name__ == '__main__':
+    if '--worker' in sys.argv:
+        sys.exit(_worker_main())
+    print("Bu betik PDF işçisi olarak çalışır: python pdf_renderer.py --worker")
+    sys.exit(2)
@@ -0,0 +1,84 @@
+"""
+Sorgu Yükleme Seçenekleri
+-------------------------
+DÖF liste, dashboard, rapor ve detay ekranlarının şablonlarda kullandığı
+ilişkileri önceden (eager) yükleyen SQLAlchemy loader seçenekleri.
+
+Her ekran kendi seçenek listesini buradan alır; böylece sayfa başına sorgu
+sayısı satır sayısından bağımsız kalır (N+1 yok):
+    - Çoka-bir ilişkiler (departman, oluşturan, atanan) joinedload/selectinload
+    - Bire-çok ilişkiler (aksiyonlar, ekler) selectinload
+
+DÖF'ün büyük metin kolonları modelde ertelenmiştir (DOF_TEXT_GROUP). Sayım ve
+istatistik yolları dof_summary_options() ile sadece gereken kolonları çeker;
+metinleri gösteren ekranlar (detay, Excel) dof_text_options() ile tek sorguda
+yükler.
+
+RAISE_ON_LAZY_LOAD ayarı açıkken (testler ve yerel kontrol için) seçeneklerin
+sonuna raiseload('*') eklenir: şablona eklenen ve burada bildirilmemiş bir
+ilişki erişimi sessizce ek sorgu çalıştırmak yerine hata fırlatır.
+
+Kullanım:
+    from query_options import dof_row_options
+
+    dofs = query.options(*dof_row_options()).all()
+"""
+
+from flask import current_app
+from sqlalchemy.orm import joinedload, selectinload, raiseload, load_only, undefer_group
+
+from models import DOF, DOFAction, User, DOF_TEXT_GROUP
+
+# Sayım, istatistik ve rapor hesaplamalarında kullanılan DÖF kolonları
+DOF_SUMMARY_COLUMNS = ('id', 'code', 'title', 'status', 'dof_type', 'dof_source', 'department_id',
+                       'source_department_id', 'created_by', 'assigned_to', 'created_at', 'updated_at',
+                       'deadline', 'due_date', 'closed_at', 'completion_date', 'is_related')
+
+
+def raise_on_lazy_load():
+    """Test modunda bildirilmemiş ilişki erişimlerini hataya çeviren seçenek listesi"""
+    if current_app.config.get('RAISE_ON_LAZY_LOAD'):
+        return [raiseload('*')]
+    return []
+
+
+def dof_row_options(entity=DOF):
+    """
+    Liste/widget satırları için: departman, oluşturan ve oluşturanın departmanı
+
+    Args:
+        entity: DOF veya aliased(DOF, ...) (ör. dashboard UNION sorgusu)
+    """
+    return [
+        selectinload(entity.department),
+        selectinload(entity.creator).selectinload(User.department),
+        *raise_on_lazy_load(),
+    ]
+
+
+def dof_summary_options():
+    """Sayım/istatistik yolları için: sadece özet kolonlar (metin ve müşteri alanları yok)"""
+    return [load_only(*[getattr(DOF, column) for column in DOF_SUMMARY_COLUMNS])]
+
+
+def dof_text_options():
+    """Açıklama, kök neden ve aksiyon planı kolonlarını ana sorguyla birlikte yükler"""
+    return [undefer_group(DOF_TEXT_GROUP)]
+
+
+def dof_detail_options():
+    """Detay ekranı için: DÖF'ün tüm ilişkileri, aksiyonlar ve aksiyon ekleri"""
+    return [
+        *dof_text_options(),
+        joinedload(DOF.department),
+        joinedload(DOF.source_department),
+        joinedload(DOF.creator).joinedload(User.department),
+        joinedload(DOF.assignee),
+        joinedload(DOF.related_dof),
+        selectinload(DOF.attachments),
+        selectinload(DOF.actions).options(
+            joinedload(DOFAction.user),
+            selectinload(DOFAction.attachments),
+        ),
+        *raise_on_lazy_load(),
+    ]
@@ -0,0 +1,263 @@
+"""
+Report Service - DÖF Rapor Servisi
+----------------------------------
+/dof/reports sayfasının ve rapor dışa aktarımlarının kullandığı filtreli DÖF
+sorgusunu kuran ve rapor sayılarını DÖF'leri Python'a yüklemeden hesaplayan
+servis modülü.
+
+- Genel sayılar (toplam, bu ay/hafta/bugün, oluşturulan/atanan/departman
+  toplamları) tek bir koşullu toplama (SUM(CASE ...)) sorgusu ile,
+- Son 6 takvim ayının trendi admin/kalite yöneticisi için günlük özet
+  tablosundan (daily_facts), diğer roller için aynı toplama sorgusunda,
+- Durum, tip ve kaynak dağılımları GROUP BY sorgularının UNION ALL ile
+  birleştirildiği tek bir sorgu ile hesaplanır.
+
+Sayfadaki DÖF tablosu ayrı bir parça (fragment) olarak imleçli sayfalama ile
+sunulur (bkz. routes/dof.py:report_table).
+
+Kullanım:
+    from report_service import ReportService
+
+    query = ReportService.build_query(current_user, request.args)
+    summary = ReportService.build_summary(current_user, query)
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, case, func, literal, or_
+
+# Rapor tablosunda sayfa başına gösterilen DÖF sayısı
+REPORT_TABLE_PAGE_SIZE = 20
+
+# Trend grafiğinde gösterilen ay sayısı
+TREND_MONTHS = 6
+
+# Tablo parçası bağlantılarında taşınan rapor filtreleri
+REPORT_FILTER_ARGS = ('department_id', 'month', 'status')
+
+
+@dataclass
+class ReportSummary:
+    """Rapor şablonunun tükettiği sayılar ve dağılımlar"""
+
+    stats: Dict[str, int]
+    status_counts: List[Tuple[int, int]] = field(default_factory=list)
+    type_counts: List[Tuple[int, int]] = field(default_factory=list)
+    source_counts: List[Tuple[int, int]] = field(default_factory=list)
+    monthly_data: List[Dict[str, Any]] = field(default_factory=list)
+
+
+class ReportService:
+    """Rapor sorgularını ve sayılarını hesaplayan servis"""
+
+    @staticmethod
+    def build_query(user: Any, args: Any):
+        """
+        Kullanıcının rolüne ve URL filtrelerine göre rapor DÖF sorgusu
+
+        Args:
+            user: Kullanıcı nesnesi (current_user)
+            args: request.args (department_id, month, status)
+
+        Returns:
+            Sıralanmamış DOF sorgusu
+        """
+        from models import DOF, UserRole
+
+        base_query = DOF.query
+
+        # Normal kullanıcılar sadece kendi DÖF'lerini görebilir
+        if user.role == UserRole.USER:
+            base_query = base_query.filter(
+                or_(
+                    DOF.created_by == user.id,
+                    DOF.assigned_to == user.id
+                )
+            )
+        # Departman yöneticileri kendi departmanlarını görebilir
+        elif user.role == UserRole.DEPARTMENT_MANAGER or user.role == UserRole.FRANCHISE_DEPARTMENT_MANAGER:
+            if user.department_id:
+                base_query = base_query.filter(
+                    or_(
+                        DOF.source_department_id == user.department_id,
+                        DOF.department_id == user.department_id,
+                        DOF.assigned_to == user.id
+                    )
+                )
+        # Admin ve kalite yöneticileri tüm DÖF'leri görebilir; filtreler sadece onlar için geçerli
+        filters = ReportService.quality_filters(user, args)
+        if filters is None:
+            return base_query
+
+        if filters['department_id']:
+            base_query = base_query.filter(DOF.department_id == filters['department_id'])
+        if filters['month_range']:
+            base_query = base_query.filter(DOF.created_at.between(*filters['month_range']))
+        if filters['status'] is not None:
+            base_query = base_query.filter(DOF.status == filters['status'])
+
+        return base_query
+
+    @staticmethod
+    def quality_filters(user: Any, args: Any) -> Optional[Dict[str, Any]]:
+        """
+        Admin ve kalite yöneticileri için URL filtreleri (diğer roller için None)
+
+        Returns:
+            dict: department_id, month_range (başlangıç, bitiş datetime), status
+        """
+        from models import UserRole
+
+        if user.role not in [UserRole.ADMIN, UserRole.QUALITY_MANAGER]:
+            return None
+
+        month_range = None
+        month_filter = args.get('month')
+        if month_filter:
+            # YYYY-MM formatından datetime aralığına çevir
+            try:
+                year, month = map(int, month_filter.split('-'))
+                month_start = datetime(year, month, 1)
+                if month == 12:
+                    month_end = datetime(year + 1, 1, 1) - timedelta(seconds=1)
+                else:
+                    month_end = datetime(year, month + 1, 1) - timedelta(seconds=1)
+                month_range = (month_start, month_end)
+            except (ValueError, TypeError):
+                pass  # Geçersiz tarih formatı, filtreleme yapma
+
+        return {
+            'department_id': args.get('department_id', type=int),
+            'month_range': month_range,
+            'status': args.get('status', type=int),
+        }
+
+    @staticmethod
+    def build_summary(user: Any, base_query, today: Optional[datetime] = None,
+                      args: Any = None) -> ReportSummary:
+        """
+        Rapor sayılarını ve dağılımlarını en fazla üç sorgu ile hesaplar
+
+        Args:
+            user: Kullanıcı nesnesi (current_user)
+            base_query: build_query() sonucu
+            today: Gün başlangıcı (varsayılan: bugün 00:00)
+            args: build_query() ile aynı URL filtreleri
+
+        Returns:
+            ReportSummary
+        """
+        from daily_facts import month_ranges, monthly_fact_counts
+
+        if today is None:
+            today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+        months = month_ranges(TREND_MONTHS, today.date())
+
+        # Tüm DÖF'leri gören roller için trend günlük özet tablosundan okunur;
+        # kullanıcıya göre kapsamlanan raporlarda DÖF sorgusuna eklenir
+        filters = ReportService.quality_filters(user, args) if args is not None else None
+        if filters is not None:
+            month_range = filters['month_range']
+            stats, _ = ReportService._aggregate_counts(user, base_query, today, [])
+            month_counts = monthly_fact_counts(
+                months, department_id=filters['department_id'] or None, status=filters['status'],
+                date_range=(month_range[0].date(), month_range[1].date()) if month_range else None)
+        else:
+            stats, month_counts = ReportService._aggregate_counts(user, base_query, today, months)
+        summary = ReportSummary(
+            stats=stats,
+            monthly_data=[{'month': label, 'count': count}
+                          for (label, _, _), count in zip(months, month_counts)],
+        )
+
+        if stats['total_dofs']:
+            distributions = ReportService._distributions(base_query)
+            summary.status_counts = distributions['status']
+            summary.type_counts = distributions['type']
+            summary.source_counts = distributions['source']
+
+        return summary
+
+    @staticmethod
+    def _aggregate_counts(user, base_query, today, months):
+        """Genel sayılar ve aylık trend - tek satırlık koşullu toplama sorgusu"""
+        from models import DOF, UserRole, DOFStatus
+
+        def count_if(condition):
+            return func.sum(case((condition, 1), else_=0))
+
+        active = or_(DOF.status.is_(None), DOF.status.notin_([DOFStatus.CLOSED, DOFStatus.REJECTED]))
+        closed = DOF.status == DOFStatus.CLOSED
+        is_quality = user.role in [UserRole.ADMIN, UserRole.QUALITY_MANAGER]
+        is_dept_manager = user.role == UserRole.DEPARTMENT_MANAGER or \
+            user.role == UserRole.FRANCHISE_DEPARTMENT_MANAGER and user.department_id
+
+        columns = {
+            'total_dofs': func.count(DOF.id),
+            'this_month': count_if(DOF.created_at >= today.replace(day=1)),
+            'this_week': count_if(DOF.created_at >= today - timedelta(days=7)),
+            'today': count_if(DOF.created_at >= today),
+        }
+        if is_quality:
+            # Admin ve kalite yöneticileri için filtrelenmiş sistemin tamamı
+            columns['created_active'] = count_if(active)
+            columns['created_closed'] = count_if(closed)
+        else:
+            created = DOF.created_by == user.id
+            assigned = DOF.assigned_to == user.id
+            columns.update({
+                'created_total': count_if(created),
+                'created_active': count_if(and_(created, active)),
+                'created_closed': count_if(and_(created, closed)),
+                'assigned_total': count_if(assigned),
+                'assigned_active': count_if(and_(assigned, active)),
+                'assigned_closed': count_if(and_(assigned, closed)),
+            })
+            if is_dept_manager:
+                in_dept = DOF.department_id == user.department_id
+                columns.update({
+                    'dept_total': count_if(in_dept),
+                    'dept_active': count_if(and_(in_dept, active)),
+                    'dept_closed': count_if(and_(in_dept, closed)),
+                })
+
+        month_columns = [
+            count_if(and_(DOF.created_at >= datetime.combine(start, datetime.min.time()),
+                          DOF.created_at < datetime.combine(end, datetime.min.time())))
+            for _, start, end in months
+        ]
+
+        row = base_query.order_by(None).with_entities(*columns.values(), *month_columns).one()
+        stats = {name: int(value or 0) for name, value in zip(columns, row)}
+        if is_quality:
+            stats['created_total'] = stats['total_dofs']
+            stats['assigned_total'] = stats['total_dofs']
+            stats['assigned_active'] = stats['created_active']
+            stats['assigned_closed'] = stats['created_closed']
+
+        month_counts = [int(value or 0) for value in row[len(columns):]]
+        return stats, month_counts
+
+    @staticmethod
+    def _distributions(base_query):
+        """Durum, tip ve kaynak dağılımları - GROUP BY sorgularının UNION ALL birleşimi"""
+        from models import DOF
+
+        base_query = base_query.order_by(None)
+        parts = []
+        for name, column in (('status', DOF.status), ('type', DOF.dof_type), ('source', DOF.dof_source)):
+            parts.append(base_query.with_entities(literal(name).label('dimension'),
+                                                  column.label('value'),
+                                                  func.count(DOF.id).label('count'))
+                                   .filter(column.isnot(None))
+                                   .group_by(column))
+
+        distributions = {'status': [], 'type': [], 'source': []}
+        for dimension, value, count in parts[0].union_all(*parts[1:]).all():
+            distributions[dimension].append((int(value), int(count)))
+        for items in distributions.values():
+            items.sort()
+        return distributions
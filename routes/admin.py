@@ -626,8 +626,8 @@ def edit_workflow_step(workflow_id, step_id):
 @admin_required
 def reports():
     # DÖF sayıları - İlişkili DÖF'leri filtreleme
-    # İlişkili DÖF'ler başlığında "[İlişkili #" prefix'i içerir
-    related_dof_filter = ~DOF.title.like("[İlişkili #%")
+    # İlişkili DÖF'ler is_related bayrağı ile işaretlidir (indeksli kolon)
+    related_dof_filter = DOF.is_related == False
     dof_counts = db.session.query(DOF.status, func.count(DOF.id)).filter(related_dof_filter).group_by(DOF.status).all()
     
     # Departman istatistikleri
@@ -668,77 +668,18 @@ def reports():
         related_dof_filter
     ).count()
     
-    # Kalite onay süresi (Çözüldü durumundan Kapatıldı durumuna geçiş süresi)
-    quality_subquery = db.session.query(
-        DOFAction.dof_id,
-        func.min(DOFAction.created_at).label('solved_date')
-    ).filter(
-        DOFAction.action_type == 2,  # 2: Durum Değişikliği
-        DOFAction.new_status == 5    # 5: Çözüldü
-    ).group_by(DOFAction.dof_id).subquery('quality_subquery')
-    
-    closed_subquery = db.session.query(
-        DOFAction.dof_id,
-        func.min(DOFAction.created_at).label('closed_date')
-    ).filter(
-        DOFAction.action_type == 2,  # 2: Durum Değişikliği
-        DOFAction.new_status == 6    # 6: Kapatıldı
-    ).group_by(DOFAction.dof_id).subquery('closed_subquery')
-    
-    quality_approval_time_result = db.session.query(
-        func.avg(closed_subquery.c.closed_date - quality_subquery.c.solved_date)
-    ).join(
-        quality_subquery,
-        closed_subquery.c.dof_id == quality_subquery.c.dof_id
-    ).scalar()
-    
-    if quality_approval_time_result is not None:
-        # Decimal nesnesini float'a çevirip saniye cinsinden gün sayısına dönüştür
-        try:
-            # Eğer timedelta nesnesi ise
-            if hasattr(quality_approval_time_result, 'total_seconds'):
-                quality_approval_time = quality_approval_time_result.total_seconds() / (24 * 3600)
-            else:
-                # Decimal nesnesini doğrudan float'a çevirip gün cinsine dönüştür (saniye varsayımı)
-                quality_approval_time = float(quality_approval_time_result) / (24 * 3600)
-        except (AttributeError, TypeError):
-            # Hata durumunda varsayılan değer
-            quality_approval_time = 0
-    else:
-        quality_approval_time = 0
-    
-    # Son 6 ayın DÖF sayıları - İlişkili DÖF'leri filtrele
-    months = []
-    monthly_counts = []
-    
-    for i in range(5, -1, -1):
-        date = datetime.now() - timedelta(days=30 * i)
-        month_name = date.strftime('%B %Y')
-        months.append(month_name)
-        
-        start_date = date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        if i > 0:
-            end_date = (date.replace(day=1) + timedelta(days=32)).replace(day=1) - timedelta(seconds=1)
-        else:
-            end_date = datetime.now()
-            
-        count = DOF.query.filter(DOF.created_at.between(start_date, end_date), related_dof_filter).count()
-        monthly_counts.append(count)
-    
-    # Ortalama çözüm süresi - İlişkili DÖF'leri filtrele
-    avg_resolution_time = db.session.query(
-        func.avg(DOFAction.created_at - DOF.created_at)
-    ).join(DOF).filter(
-        DOFAction.action_type == 2,     # 2: Durum Değişikliği
-        DOFAction.new_status == 6,      # 6: Kapatıldı
-        related_dof_filter              # İlişkili DÖF'leri filtrele
-    ).scalar()
-    
-    if avg_resolution_time is not None:
-        # Decimal nesnesini doğrudan float'a çevirip gün cinsine dönüştür
-        avg_resolution_time = float(avg_resolution_time) / (24 * 3600)  # Gün cinsinden
-    else:
-        avg_resolution_time = 0
+    # Çözüm ve kalite onay süreleri - son 12 ayın durum geçmişi ölçümlerinden (ortalama, p50, p90)
+    from cycle_analytics import cycle_time_summary, LEAD_TIME, QUALITY_APPROVAL
+    resolution_summary = cycle_time_summary(LEAD_TIME)
+    quality_summary = cycle_time_summary(QUALITY_APPROVAL)
+    avg_resolution_time = resolution_summary['avg']
+    quality_approval_time = quality_summary['avg']
+    
+    # Son 6 takvim ayının DÖF sayıları (günlük özet tablosundan) - İlişkili DÖF'leri filtrele
+    from daily_facts import month_ranges, monthly_fact_counts
+    month_list = month_ranges(6)
+    months = [label for label, _, _ in month_list]
+    monthly_counts = monthly_fact_counts(month_list, include_related=False)
     
     # En aktif kullanıcılar
     active_users = db.session.query(User.username, func.count(DOFAction.id).label('action_count'))\
@@ -761,16 +702,21 @@ def reports():
                           weekly_count=weekly_count,
                           high_priority_count=urgent_count,  # Template uyumlulugu icin eski ad korundu
                           overdue_count=overdue_count,
-                          quality_approval_time=quality_approval_time)
+                          quality_approval_time=quality_approval_time,
+                          resolution_summary=resolution_summary,
+                          quality_summary=quality_summary)
 
-@admin_bp.route('/reports/export')
-@admin_required
-def export_reports():
-    # Raporlar sayfasındaki aynı veriyi al
-    format_type = request.args.get('format', 'excel')
+def build_admin_report(format_type):
+    """
+    Sistem raporunu (durum, departman, grup ve özet sayıları) dosya olarak üretir
     
-    # İlişkili DÖF'leri filtreleme (başlığında "[İlişkili #" içerenler)
-    related_dof_filter = ~DOF.title.like("[İlişkili #%")
+    Dışa aktarım işlerinde istek dışında çalışır (bkz. export_jobs.py).
+    
+    Returns:
+        tuple: (dosya nesnesi, indirme adı, mimetype)
+    """
+    # İlişkili DÖF'leri filtreleme (is_related bayrağı)
+    related_dof_filter = DOF.is_related == False
     
     # DOF sayıları - ilişkili DÖF'leri filtrele
     dof_counts = db.session.query(DOF.status, func.count(DOF.id))\
@@ -839,6 +785,25 @@ def export_reports():
         dept_df = pd.DataFrame(dept_data)
         dept_df.to_excel(writer, sheet_name='Departman_İstatistikleri', index=False)
         
+        # Departman Grubu İstatistikleri (departman değerlerinin toplamı)
+        from department_stats import DepartmentStatsService
+        group_data = []
+        for stat in DepartmentStatsService.group_stats(department_stats):
+            group_data.append({
+                'Grup': stat['name'],
+                'Departman Sayısı': stat['department_count'],
+                'Toplam DÖF': stat['total'],
+                'Açık DÖF': stat['open'],
+                'Kapalı DÖF': stat['closed'],
+                'Termini Geçen': stat['assigned_overdue'],
+                'Son 30 Gün DÖF': stat['recent'],
+                'Ortalama Çözüm Süresi (Gün)': stat['avg_resolution_time']
+            })
+        
+        if group_data:
+            group_df = pd.DataFrame(group_data)
+            group_df.to_excel(writer, sheet_name='Grup_İstatistikleri', index=False)
+        
         # Özet Bilgiler
         summary_data = [
             {'Metrik': 'Toplam DÖF', 'Değer': sum([count for _, count in dof_counts])},
@@ -855,16 +820,13 @@ def export_reports():
         writer.close()
         output.seek(0)
         
-        return send_file(
-            output,
-            as_attachment=True,
-            download_name=f"DOF_Rapor_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx",
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
+        return (output, f"DOF_Rapor_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx",
+                'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
     
     # PDF formatında dışa aktarma
     elif format_type == 'pdf':
         from fpdf import FPDF
+        from io import BytesIO
         import tempfile
         import os
         
@@ -929,21 +891,28 @@ def export_reports():
             pdf.output(tmp.name)
             tmp_path = tmp.name
         
-        return_value = send_file(
-            tmp_path,
-            as_attachment=True,
-            download_name=f"DOF_Rapor_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf"
-        )
+        with open(tmp_path, 'rb') as pdf_file:
+            output = BytesIO(pdf_file.read())
         
         # Geçici dosyayı sil
         os.unlink(tmp_path)
         
-        return return_value
+        return output, f"DOF_Rapor_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf", 'application/pdf'
+    
+    raise ValueError(f"Geçersiz rapor formatı: {format_type}")
+
+@admin_bp.route('/reports/export')
+@admin_required
+def export_reports():
+    """Sistem raporunu arka plan işi olarak hazırlar (bkz. export_jobs.py)"""
+    from routes.exports import export_job_response
     
-    # Geçersiz format
-    else:
+    format_type = request.args.get('format', 'excel')
+    if format_type not in ('excel', 'pdf'):
         flash('Geçersiz rapor formatı.', 'danger')
         return redirect(url_for('admin.reports'))
+    
+    return export_job_response(f'admin_report_{format_type}', url_for('admin.reports'))
 
 @admin_bp.route('/logs')
 @admin_required
@@ -956,6 +925,27 @@ def logs():
     return render_template('admin/logs.html', logs=logs)
 
 
+@admin_bp.route('/cache', methods=['GET', 'POST'])
+@admin_required
+def cache_stats():
+    # Dashboard önbelleği isabet/ıska sayaçları (bkz. dashboard_cache.py)
+    import dashboard_cache
+    
+    if request.method == 'POST':
+        dashboard_cache.clear_cache()
+        log_activity(
+            user_id=current_user.id,
+            action="Önbellek Temizleme",
+            details="Dashboard önbelleği temizlendi",
+            ip_address=request.remote_addr,
+            user_agent=request.user_agent.string
+        )
+        flash('Dashboard önbelleği temizlendi.', 'success')
+        return redirect(url_for('admin.cache_stats'))
+    
+    return render_template('admin/cache.html', stats=dashboard_cache.cache_stats())
+
+
 @admin_bp.route('/email-settings', methods=['GET', 'POST'])
 @admin_required
 def email_settings():
@@ -10,8 +10,8 @@ import os
 
 def fixed_reports():
     # DÖF sayıları - İlişkili DÖF'leri filtreleme
-    # İlişkili DÖF'ler başlığında "[İlişkili #" prefix'i içerir
-    related_dof_filter = ~DOF.title.like("[İlişkili #%")
+    # İlişkili DÖF'ler is_related bayrağı ile işaretlidir (indeksli kolon)
+    related_dof_filter = DOF.is_related == False
     dof_counts = db.session.query(DOF.status, func.count(DOF.id)).filter(related_dof_filter).group_by(DOF.status).all()
     
     # Departman istatistikleri
@@ -49,6 +49,9 @@ def mark_notification_read():
 def mark_all_notifications_read():
     """Tüm bildirimleri okundu olarak işaretler"""
     Notification.query.filter_by(user_id=current_user.id, is_read=False).update({'is_read': True})
+    # Toplu UPDATE flush dinleyicisine görünmez; dashboard önbelleği açıkça geçersiz kılınır
+    from dashboard_cache import invalidate_users
+    invalidate_users([current_user.id])
     db.session.commit()
     
     return jsonify({'success': True, 'message': 'Tüm bildirimler okundu olarak işaretlendi'})
@@ -92,26 +95,12 @@ def dof_status_chart_data():
 @api_bp.route('/chart-data/monthly-dofs')
 @login_required
 def monthly_dofs_chart_data():
-    """Aylık DÖF sayılarını döndürür"""
-    from datetime import datetime, timedelta
+    """Aylık DÖF sayılarını döndürür (son 6 takvim ayı, günlük özet tablosundan)"""
+    from daily_facts import month_ranges, monthly_fact_counts
     
-    labels = []
-    data = []
-    
-    for i in range(5, -1, -1):
-        date = datetime.now() - timedelta(days=30 * i)
-        month_name = date.strftime('%B %Y')
-        start_date = date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        
-        if i > 0:
-            end_date = (date.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0, second=0, microsecond=0) - timedelta(seconds=1)
-        else:
-            end_date = datetime.now()
-        
-        count = DOF.query.filter(DOF.created_at.between(start_date, end_date)).count()
-        
-        labels.append(month_name)
-        data.append(count)
+    months = month_ranges(6)
+    labels = [label for label, _, _ in months]
+    data = monthly_fact_counts(months)
     
     return jsonify({
         'labels': labels,
@@ -217,3 +206,73 @@ def get_departments():
         })
     
     return jsonify(result)
+
+@api_bp.route('/dof/search')
+@login_required
+def search_dofs():
+    """Kullanıcının görebildiği DÖF'lerde tam metin arama yapar (en iyi eşleşme önce)"""
+    from search_service import search_dofs as run_search, search_terms
+    from flask import url_for
+    
+    query = request.args.get('q', '')
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    
+    if not search_terms(query):
+        return jsonify({'query': query, 'results': []})
+    
+    try:
+        matches = run_search(current_user, query, limit=limit, offset=offset)
+    except Exception as e:
+        current_app.logger.error(f"DÖF arama hatası: {str(e)}")
+        return jsonify({'query': query, 'results': [], 'error': 'Arama yapılamadı'}), 500
+    
+    result = []
+    for dof, score in matches:
+        result.append({
+            'id': dof.id,
+            'code': dof.code,
+            'title': dof.title,
+            'status': dof.status,
+            'status_name': dof.status_name,
+            'department': dof.department.name if dof.department else None,
+            'created_at': dof.created_at.strftime('%d.%m.%Y %H:%M') if dof.created_at else None,
+            'score': float(score or 0),
+            'url': url_for('dof.detail', dof_id=dof.id)
+        })
+    
+    return jsonify({'query': query, 'results': result})
+
+def _stream_dof_export(fmt):
+    """DÖF listesini Excel dışa aktarımının filtreleriyle satır satır akıtır (bkz. stream_export.py)"""
+    from flask import Response, stream_with_context
+    from datetime import datetime
+    from auth_service import AuthService
+    from routes.dof import apply_dof_export_filters
+    from stream_export import stream_dof_rows, FORMATS
+    
+    actions = request.args.get('actions', type=int, default=0) == 1
+    query = AuthService.filter_viewable_dofs(current_user, apply_dof_export_filters(DOF.query, request.args))
+    
+    current_app.logger.info(f"DÖF satır akışı başlatıldı: {current_user.username}, format={fmt}, "
+                            f"filtre={dict(request.args)}")
+    
+    file_name = f"DOF_Listesi_{datetime.now().strftime('%Y%m%d_%H%M')}.{fmt}"
+    response = Response(stream_with_context(stream_dof_rows(query, fmt, actions=actions)), mimetype=FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename="{file_name}"'
+    response.headers['Cache-Control'] = 'no-store'
+    # Ters vekil sunucu (nginx) yanıtı tamponlamadan iletsin
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@api_bp.route('/dofs/export.csv')
+@login_required
+def export_dofs_csv():
+    """Görünür DÖF'leri CSV olarak akıtır (actions=1: işlemler düzleştirilmiş satırlar halinde)"""
+    return _stream_dof_export('csv')
+
+@api_bp.route('/dofs/export.ndjson')
+@login_required
+def export_dofs_ndjson():
+    """Görünür DÖF'leri satır başına bir JSON nesnesi olarak akıtır (actions=1: işlemlerle birlikte)"""
+    return _stream_dof_export('ndjson')
@@ -6,11 +6,13 @@ from forms import DOFForm, DOFActionForm, DOFResolveForm, QualityReviewForm, Qua
 from datetime import datetime, timedelta
 from werkzeug.utils import secure_filename
 import os, uuid
-from sqlalchemy import or_, and_, func, desc
+from sqlalchemy import or_, and_, func, desc, select
+from sqlalchemy.orm import undefer
 import json
-from export_utils import export_dofs_to_excel, export_dofs_to_pdf
 from utils import allowed_file, save_file, log_activity, notify_for_dof, get_dof_status_counts, can_user_edit_dof, can_user_change_status, send_email_async, optimize_db_operations
 from generate_dof_code import generate_dof_code
+from search_service import filter_dofs_by_search
+from query_options import dof_row_options, dof_detail_options
 import os
 import time
 
@@ -708,326 +710,65 @@ def review_dof(dof_id):
 @dof_bp.route('/dashboard/<int:department_id>')
 @login_required
 def dashboard(department_id=None):
-    # Kullanıcı aktivitelerini yükle
+    # Tüm sayaçlar ve widget listeleri DashboardService ile sabit sayıda sorguda hesaplanır
+    from dashboard_service import DashboardService, SUMMARY
     
-    # Kullanıcının departmanına ve rolüne göre DÖF durum sayılarını getir
-    # get_dof_status_counts fonksiyonuna current_user parametresini gönderiyoruz
-    # böylece kullanıcı yetkilerine göre doğru filtreleme yapılacak
+    current_app.logger.info(f"Dashboard verileri hazırlanıyor: user={current_user.username}, role={current_user.role}")
     
-    from auth_service import AuthService
-    
-    # Yetkiye göre DÖF sayılarını getir
-    current_app.logger.info(f"Dashboard özet kutusu için DÖF sayıları getiriliyor: user={current_user.username}, role={current_user.role}")
-    
-    # İLGİLİ NOT: DÖF sayısı doğru gösterilmesi için ilişkili DÖF'ler haricinde tutulmalı
-    # Yetki kontrollü DÖF sayıları (AuthService ile merkezi yetki kontrolü)
-    # ilişkili DÖF'ler filtrelemesi ~DOF.title.like("[İlişkili #%") ile get_dof_status_counts içinde yapılıyor
-    current_app.logger.info("DASHBOARD: Toplam DÖF sayısı için ilişkili DÖF'ler filtreleniyor")
+    # İlk açılışta sadece sayaçlar hesaplanır; widget'lar /dashboard/widgets ile yüklenir
+    snapshot = DashboardService.build_snapshot(current_user,
+                                               department_id=department_id,
+                                               departments_param=request.args.get('departments'),
+                                               sections=(SUMMARY,))
     
-    # Kullanıcı rolüne göre DÖF sayılarını getir
-    # İlişkili DÖF'leri hariç tut (tüm kullanıcılar için ortak filtre)
-    related_dof_filter = ~DOF.title.like("[İlişkili #%")
-    
-    # Rolüne göre DÖF sayısı hesaplama stratejisini belirle
-    if current_user.role in [UserRole.ADMIN, UserRole.QUALITY_MANAGER]:
-        # Yöneticiler - tüm DÖF'leri görebilir (sadece ilişkili olmayan)
-        total_dof_count = DOF.query.filter(related_dof_filter).count()
-        current_app.logger.info(f"DASHBOARD: Toplam DÖF sayısı (admin/kalite): {total_dof_count}")
-    
-    elif (current_user.role == UserRole.DEPARTMENT_MANAGER or current_user.role == UserRole.FRANCHISE_DEPARTMENT_MANAGER or current_user.role == UserRole.FRANCHISE_DEPARTMENT_MANAGER) and current_user.department_id:
-        # Departman yöneticileri - sadece kendi departmanına atanan DÖF'leri say
-        # "Şevket Mindür" ve "teşekkür" gibi tip/kategori bilgilerini filtrelemek için
-        # Sadece departmana atanan ve oluşturulan DÖF'leri say
-        dept_id = current_user.department_id
-        
-        # Departmana ait kullanıcıları bul
-        dept_users = User.query.filter_by(department_id=dept_id).all()
-        dept_user_ids = [user.id for user in dept_users]
-        
-        # Departmanın DÖF'lerini say: departmana atanan veya departman üyelerinin oluşturduğu
-        total_dof_count = DOF.query.filter(
-            related_dof_filter,
-            or_(
-                DOF.department_id == dept_id,
-                DOF.created_by.in_(dept_user_ids) if dept_user_ids else False
-            )
-        ).count()
-        current_app.logger.info(f"DASHBOARD: Toplam DÖF sayısı (departman yöneticisi): {total_dof_count}, departman={current_user.department_id}")
-    
-    else:
-        # Normal kullanıcılar - filtrelenmiş DÖF'leri görebilir
-        # get_dof_status_counts fonksiyonu ile elde edilen toplamı kullan
-        total_dof_count = None  # get_dof_status_counts'tan gelecek
-        current_app.logger.info(f"DASHBOARD: Normal kullanıcı DÖF toplamı")  
-    
-    # Filtrelenmiş sayılar için normal fonksiyonu kullan (herkes için detaylar gerekli)
-    status_counts = get_dof_status_counts(current_user=current_user)
-    
-    # Eğer özel toplam sayı hesaplandıysa, toplamı güncelle
-    if total_dof_count is not None:
-        status_counts['total'] = total_dof_count
-        
-    # Loglama
-    current_app.logger.info(f"DASHBOARD: Kullanıcı {current_user.username} için gösterilen toplam DÖF sayısı: {status_counts['total']}")
+    return render_template('dashboard.html', snapshot=snapshot)
 
+@dof_bp.route('/dashboard/widgets')
+@login_required
+def dashboard_widgets():
+    """
+    Dashboard widget'larını tek istekte döndürür
 
+    Parametreler: names=assigned_upcoming_deadlines,deadlines,...; departments /
+    department_id dashboard ile aynı filtreyi uygular; format=html ise
+    parçalar data-widget sarmalayıcılarıyla birleştirilmiş HTML olarak döner.
+    Yanıt ETag taşır; değişmeyen içerik için 304 döner.
+    """
+    from dashboard_service import DashboardService, DASHBOARD_WIDGETS
     
-    # Bölge müdürü için çoklu departman filtresi kontrolü
-    selected_departments = []
-    selected_department = None # Geriye dönük uyumluluk için
-    selected_department_names = []
-    
-    # Kullanıcının yönettiği tüm departmanları al
-    managed_departments = current_user.get_managed_departments()
-    managed_dept_ids = [dept.id for dept in managed_departments]
+    names = DashboardService.widget_names(request.args.get('names'))
+    if not names:
+        return jsonify({'error': 'Geçerli widget adı belirtilmedi'}), 400
     
-    # URL'den departmanlara göre filtreleme kontrolü
-    departments_param = request.args.get('departments')
+    snapshot = DashboardService.build_snapshot(current_user,
+                                               department_id=request.args.get('department_id', type=int),
+                                               departments_param=request.args.get('departments'),
+                                               sections=DashboardService.widget_sections(names))
     
-    if departments_param and current_user.role in [UserRole.GROUP_MANAGER, UserRole.PROJECTS_QUALITY_TRACKING, UserRole.BRANCHES_QUALITY_TRACKING]:
-        # Çoklu departman filtreleme - departments=1,2,3 formatında
+    widgets = {}
+    errors = {}
+    for name in names:
+        spec = DASHBOARD_WIDGETS[name]
         try:
-            # Virgülle ayrılmış ID'leri parse et
-            department_ids = [int(d) for d in departments_param.split(',')]
-            # Sadece kullanıcının yönettiği departmanlara izin ver
-            selected_departments = [d_id for d_id in department_ids if d_id in managed_dept_ids]
-            
-            # Seçili departman isimlerini belleğe al
-            for dept in managed_departments:
-                if dept.id in selected_departments:
-                    selected_department_names.append(dept.name)
-                    
-            current_app.logger.info(f"Bölge Müdürü {current_user.username}, {len(selected_departments)} departman filtresi uyguluyor: {selected_department_names}")
-            
+            widgets[name] = render_template(spec['template'],
+                                            items=getattr(snapshot, name),
+                                            empty_message=spec.get('empty_message'),
+                                            overdue=spec.get('overdue', False))
         except Exception as e:
-            current_app.logger.error(f"Departman filtre parametresi hatası: {str(e)}")
-            selected_departments = []
-    
-    # Eski format (tek departman ID'si) için geriye dönük uyumluluk
-    elif department_id and current_user.role in [UserRole.GROUP_MANAGER, UserRole.PROJECTS_QUALITY_TRACKING, UserRole.BRANCHES_QUALITY_TRACKING]:
-        if department_id in managed_dept_ids:
-            selected_department = Department.query.get(department_id)
-            selected_departments = [department_id]
-            selected_department_names = [selected_department.name]
-            current_app.logger.info(f"Bölge Müdürü {current_user.username}, {selected_department.name} departmanını görüntülüyor")
-    
-    # Kalite departmanı için özel sayaçlar
-    # İnceleme bekleyen DÖF'ler hem SUBMITTED hem de IN_REVIEW durumundaki DÖF'leri içerir
-    waiting_review_count = DOF.query.filter(DOF.status.in_([DOFStatus.SUBMITTED, DOFStatus.IN_REVIEW])).count()
-    waiting_resolution_count = DOF.query.filter_by(status=DOFStatus.ASSIGNED).count()
-    
-    # Son eklenen 5 DÖF (genel kategorisi)
-    recent_dofs = DOF.query.order_by(DOF.created_at.desc()).limit(5).all()
-    
-    # Kullanıcıya atanan DÖF'ler
-    assigned_dofs = DOF.query.filter_by(assigned_to=current_user.id)\
-                     .filter(DOF.status != DOFStatus.CLOSED)\
-                     .order_by(DOF.created_at.desc()).limit(5).all()
-    
-    # Kullanıcının yönettiği departmanları belirle
-    user_departments = []
-    managed_dept_ids = []
-    
-    # Kullanıcının rolüne göre yönettiği departmanları getir
-    if current_user.role == UserRole.ADMIN or current_user.role == UserRole.QUALITY_MANAGER:
-        # Admin ve Kalite Yöneticisi tüm departmanları görebilir
-        user_departments = Department.query.filter_by(is_active=True).all()
-        managed_dept_ids = [dept.id for dept in user_departments]
-        
-    elif current_user.role == UserRole.DEPARTMENT_MANAGER or current_user.role == UserRole.FRANCHISE_DEPARTMENT_MANAGER:
-        # Departman yöneticisi veya franchise departman yöneticisi sadece kendi departmanını görür
-        if current_user.department_id:
-            dept = Department.query.get(current_user.department_id)
-            user_departments = [dept]
-            managed_dept_ids = [dept.id]
-                
-    elif current_user.role in [UserRole.GROUP_MANAGER, UserRole.PROJECTS_QUALITY_TRACKING, UserRole.BRANCHES_QUALITY_TRACKING]:
-        # Çoklu departman yöneticisi, yönettiği tüm departmanları görür
-        user_departments = current_user.get_managed_departments()
-        managed_dept_ids = [dept.id for dept in user_departments]
-        
-    elif current_user.role == UserRole.DIRECTOR:
-        # Direktör, altındaki bölge müdürlerinin yönettiği departmanları görür
-        user_departments = current_user.get_managed_departments()
-        managed_dept_ids = [dept.id for dept in user_departments]
-        
-    else:
-        # Normal kullanıcı sadece kendi departmanını görür
-        if current_user.department_id:
-            dept = Department.query.get(current_user.department_id)
-            if dept:
-                user_departments = [dept]
-                managed_dept_ids = [current_user.department_id]
-    
-    # Eğer çoklu departman yöneticisi ve seçilen departmanlar varsa, filtrelemeyi onlara göre yap
-    if current_user.role in [UserRole.GROUP_MANAGER, UserRole.PROJECTS_QUALITY_TRACKING, UserRole.BRANCHES_QUALITY_TRACKING] and selected_departments:
-        # Seçilen departmanları al
-        user_departments = [dept for dept in managed_departments if dept.id in selected_departments]
-        managed_dept_ids = selected_departments
-        
-    print(f"Kullanıcı: {current_user.username}, Yönettiği departmanlar: {[dept.name for dept in user_departments]}")
-    
-    # Departmanların açtığı DÖF'ler
-    dept_created_dofs = []
-    if managed_dept_ids:
-        dept_created_query = DOF.query.join(User, DOF.created_by == User.id)\
-                                .filter(User.department_id.in_(managed_dept_ids))\
-                                .filter(DOF.status != DOFStatus.CLOSED)\
-                                .order_by(DOF.created_at.desc()).limit(5)
-        dept_created_dofs = dept_created_query.all()
-    
-    # Departmanlara atanan DÖF'ler - AuthService kullanarak güvenli ve tutarlı filtreleme
-    dept_assigned_dofs = []
-    if managed_dept_ids:
-        # Yeni merkezi auth service ile yönetilen
-        from auth_service import AuthService
-        
-        # Temel sorguyu oluştur
-        base_query = DOF.query.filter(DOF.department_id.in_(managed_dept_ids)).filter(DOF.status != DOFStatus.CLOSED)
-        
-        # AuthService ile kullanıcıya göre filtreleme uygula
-        filtered_query = AuthService.filter_viewable_dofs(current_user, base_query)
-        
-        # Loglama
-        current_app.logger.info(f"Kullanıcı {current_user.username}, rol={current_user.role}, departmanlarına atanan DÖF'ler yetki filtreli sorgusu")
-        current_app.logger.info(f"Yönetilen departmanlar: {managed_dept_ids}")
-        
-        # Sonuçları getir - sıralama ve limit
-        dept_assigned_dofs = filtered_query.order_by(DOF.created_at.desc()).limit(5).all()
-        
-        # Sonuç kontrolü ve loglama
-        current_app.logger.debug(f"{current_user.username} kullanıcısı için departmanlara atanan DÖF sayısı: {len(dept_assigned_dofs)}")
-        current_app.logger.debug(f"DÖF ID'leri: {[dof.id for dof in dept_assigned_dofs]}")
+            # Bir widget'ın hatası diğerlerini engellemez
+            current_app.logger.error(f"Dashboard widget hatası ({name}): {str(e)}")
+            errors[name] = 'Widget yüklenirken hata oluştu.'
+    
+    if request.args.get('format') == 'html':
+        parts = [f'<div data-widget="{name}">{html}</div>' for name, html in widgets.items()]
+        response = make_response(''.join(parts))
     else:
-        current_app.logger.warning(f"Kullanıcı {current_user.username} için yönetilen departman bulunamadı!")
-    
-    # Eski yöntem - department_dofs
-    department_dofs = []
-    if (current_user.role == UserRole.DEPARTMENT_MANAGER or current_user.role == UserRole.FRANCHISE_DEPARTMENT_MANAGER or current_user.role == UserRole.FRANCHISE_DEPARTMENT_MANAGER) and current_user.department_id:
-        department_dofs = DOF.query.filter_by(department_id=current_user.department_id).filter(DOF.status != DOFStatus.CLOSED).order_by(DOF.created_at.desc()).limit(5).all()
-    
-    # Okunmamış bildirimler
-    unread_notifications = current_user.notifications.filter_by(is_read=False).order_by(Notification.created_at.desc()).limit(5).all()
-    
-    # Admin ve kalite yöneticileri için kullanıcı aktiviteleri
-    user_activities = []
-    system_logs = []
-    
-    if current_user.is_admin() or current_user.is_quality_manager():
-        # User bilgisini de sorguya ekleyerek eager loading ile daha verimli bir sorgu yapılandırıyoruz
-        from sqlalchemy.orm import joinedload
-        user_activities = UserActivity.query.options(joinedload(UserActivity.user))\
-                                      .order_by(UserActivity.created_at.desc())\
-                                      .limit(10)\
-                                      .all()
-        
-        # Aktivite olup olmadığını loglama
-        if not user_activities:
-            current_app.logger.warning(f"Dikkat: Kullanıcı {current_user.id} için aktivite bulunamadı! Bu bir soruna işaret edebilir.")
-        else:
-            current_app.logger.info(f"Bilgi: {len(user_activities)} aktivite bulundu ve dashboard'a yükleniyor.")
-        
-        # Sadece admin için sistem logları
-        if current_user.is_admin():
-            from models import SystemLog
-            system_logs = SystemLog.query.order_by(SystemLog.created_at.desc()).limit(5).all()
-    
-    # Tarihe göre terminleri ayırma
-    # Yerel sistem saatini kullan
-    current_date = datetime.now()
-    future_date = current_date + timedelta(days=30)  # Önümüzdeki 30 gün
-    
-    # Departman filtresi için hazırlık
-    user_dept_id = current_user.department_id if current_user.department_id else None
-    
-    # Departmanıma atanan yaklaşan terminler
-    assigned_upcoming_deadlines = []
-    if user_dept_id:
-        assigned_upcoming_deadlines = DOF.query.filter(
-            DOF.deadline.isnot(None),
-            DOF.deadline > current_date,
-            DOF.deadline <= future_date,
-            DOF.department_id == user_dept_id,
-            DOF.status.in_([DOFStatus.ASSIGNED, DOFStatus.IN_PROGRESS, DOFStatus.PLANNING, DOFStatus.IMPLEMENTATION])
-        ).order_by(DOF.deadline.asc()).limit(5).all()
-    
-    # Departmanımın açtığı yaklaşan terminler
-    created_upcoming_deadlines = []
-    if user_dept_id:
-        # Departman üyelerini bul
-        dept_user_ids = [user.id for user in User.query.filter_by(department_id=user_dept_id).all()]
-        if dept_user_ids:
-            created_upcoming_deadlines = DOF.query.filter(
-                DOF.deadline.isnot(None),
-                DOF.deadline > current_date,
-                DOF.deadline <= future_date,
-                DOF.created_by.in_(dept_user_ids),
-                DOF.status.in_([DOFStatus.ASSIGNED, DOFStatus.IN_PROGRESS, DOFStatus.PLANNING, DOFStatus.IMPLEMENTATION])
-            ).order_by(DOF.deadline.asc()).limit(5).all()
-    
-    # Departmanıma atanan geçmiş terminler
-    assigned_overdue_deadlines = []
-    if user_dept_id:
-        assigned_overdue_deadlines = DOF.query.filter(
-            DOF.deadline.isnot(None),
-            DOF.deadline <= current_date,
-            DOF.department_id == user_dept_id,
-            DOF.status.in_([DOFStatus.ASSIGNED, DOFStatus.IN_PROGRESS, DOFStatus.PLANNING, DOFStatus.IMPLEMENTATION])
-        ).order_by(DOF.deadline.desc()).limit(5).all()
-    
-    # Departmanımın açtığı geçmiş terminler
-    created_overdue_deadlines = []
-    if user_dept_id:
-        # Departman üyelerini bul
-        dept_user_ids = [user.id for user in User.query.filter_by(department_id=user_dept_id).all()]
-        if dept_user_ids:
-            created_overdue_deadlines = DOF.query.filter(
-                DOF.deadline.isnot(None),
-                DOF.deadline <= current_date,
-                DOF.created_by.in_(dept_user_ids),
-                DOF.status.in_([DOFStatus.ASSIGNED, DOFStatus.IN_PROGRESS, DOFStatus.PLANNING, DOFStatus.IMPLEMENTATION])
-            ).order_by(DOF.deadline.desc()).limit(5).all()
-    
-    # Geriye uyumluluk için eski değişkenler
-    upcoming_deadlines = assigned_upcoming_deadlines + created_upcoming_deadlines
-    past_deadlines = assigned_overdue_deadlines + created_overdue_deadlines
-    
-    # Çoklu departman yöneticisi için yönetilen departman listesini ve seçili departmanı şablona gönder
-    managed_departments = []
-    if current_user.role in [UserRole.GROUP_MANAGER, UserRole.PROJECTS_QUALITY_TRACKING, UserRole.BRANCHES_QUALITY_TRACKING]:
-        managed_departments = current_user.get_managed_departments()
-    # Eksik değişkenleri tamamlama
-    notifications = current_user.notifications.filter_by(is_read=False).order_by(Notification.created_at.desc()).limit(5).all()
-    
-    return render_template('dashboard.html', 
-                           status_counts=status_counts,
-                           waiting_review_count=waiting_review_count,
-                           waiting_resolution_count=waiting_resolution_count,
-                           recent_dofs=recent_dofs,
-                           assigned_dofs=assigned_dofs,
-                           dept_created_dofs=dept_created_dofs,
-                           dept_assigned_dofs=dept_assigned_dofs,
-                           user_departments=user_departments,
-                           selected_department=selected_department,  # Geriye dönük uyumluluk için
-                           selected_departments=selected_departments,
-                           selected_department_names=selected_department_names,
-                           upcoming_deadlines=upcoming_deadlines,
-                           past_deadlines=past_deadlines,
-                           # Yeni departman bazlı termin değişkenleri
-                           assigned_upcoming_deadlines=assigned_upcoming_deadlines,
-                           created_upcoming_deadlines=created_upcoming_deadlines,
-                           assigned_overdue_deadlines=assigned_overdue_deadlines,
-                           created_overdue_deadlines=created_overdue_deadlines,
-                           # Bölge müdürü için departman filtreleme desteği
-                           managed_departments=managed_departments,
-                           # Şablonda kullanılan tarih değişkenleri
-                           current_date=current_date,
-                           future_date=future_date,
-                           # Diğer eksik değişkenler
-                           notifications=notifications,
-                           department_dofs=department_dofs,
-                           user_activities=user_activities if 'user_activities' in locals() else [],
-                           system_logs=system_logs if 'system_logs' in locals() else [])
+        response = jsonify({'widgets': widgets, 'errors': errors})
+    
+    # Kullanıcıya özel içerik: tarayıcı saklayabilir ama her seferinde ETag ile doğrular
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.add_etag()
+    return response.make_conditional(request)
 
 @dof_bp.route('/dof/create', methods=['GET', 'POST'])
 @login_required
@@ -1046,7 +787,7 @@ def create_dof():
     if related_dof_id:
         try:
             related_dof = DOF.query.get(related_dof_id)
-            if related_dof:
+            if related_dof and request.method == 'GET':
                 # İlişkili DÖF bilgilerini forma ön yükle
                 form.title.data = f"[İlişkili #{related_dof.id}] {related_dof.title}"
                 form.description.data = f"Bu DÖF, #{related_dof.id} numaralı DÖF ile ilişkilidir.\n\n"
@@ -1092,6 +833,8 @@ def create_dof():
             # priority field has been removed
             
             department_id=assigned_dept_id,
+            # Açan departman oluşturma anında sabitlenir
+            source_department_id=current_user.department_id,
             status=DOFStatus.IN_REVIEW,
             created_by=current_user.id,
             created_at=datetime.now(),
@@ -1102,6 +845,10 @@ def create_dof():
             complaint_date=form.complaint_date.data if form.dof_source.data == DOFSource.CUSTOMER_COMPLAINT else None
         )
         
+        # İlişkili DÖF'ten açıldıysa bağlantıyı kur (ilişkili DÖF'ler sayımlara dahil edilmez)
+        if related_dof:
+            dof.link_related(related_dof)
+        
         # Tek seferde tüm dosyaları ve aksiyonları ekle
         db.session.add(dof)
         db.session.flush()  # ID oluşturmak için flush yap
@@ -1245,9 +992,9 @@ def create_dof():
         flash('DÖF başarıyla oluşturuldu.', 'success')
         return redirect(url_for('dof.detail', dof_id=dof.id))
     
-    return render_template('dof/create.html', form=form)
+    return render_template('dof/create.html', form=form, related_dof=related_dof)
     
-    return render_template('dof/create.html', form=form)
+    return render_template('dof/create.html', form=form, related_dof=related_dof)
 
 # Kalite departmanının DÖF son değerlendirmesi ve kapatması
 @dof_bp.route('/dof/<int:dof_id>/close', methods=['GET', 'POST'])
@@ -1376,6 +1123,13 @@ def close_dof(dof_id):
             db.session.add(action)
             db.session.commit()
             
+            # Kapatılan DÖF artık değişmeyeceği için detay belgelerini önceden hazırla
+            try:
+                from detail_cache import prerender_dof
+                prerender_dof(dof.id)
+            except Exception as e:
+                current_app.logger.warning(f"DÖF #{dof.id} belge hazırlama başlatılamadı: {str(e)}")
+            
             # YENİ MERKEZİ BİLDİRİM SİSTEMİ İLE E-POSTA VE BİLDİRİM GÖNDER
             try:
                 from notification_system import notify_for_dof_event
@@ -1419,14 +1173,9 @@ def dept_created_dofs_widget():
     try:
         current_app.logger.debug(f"Widget: Departmanımın açtığı DÖF'ler yükleniyor, kullanıcı={current_user.username}, rol={current_user.role}")
         
-        # Kullanıcının departmanındaki tüm kullanıcıların oluşturduğu DÖF'leri getir
+        # Kullanıcının departmanının açtığı DÖF'leri getir
         if current_user.department_id:
-            # Departmandaki tüm kullanıcıları bul
-            dept_users = User.query.filter_by(department_id=current_user.department_id).all()
-            dept_user_ids = [user.id for user in dept_users]
-            
-            # Bu kullanıcıların oluşturduğu DÖF'leri getir
-            query = DOF.query.filter(DOF.created_by.in_(dept_user_ids)).order_by(DOF.created_at.desc())
+            query = DOF.query.filter(DOF.source_department_id == current_user.department_id).order_by(DOF.created_at.desc())
         else:
             # Departmanı yoksa sadece kendi DÖF'lerini göster
             query = DOF.query.filter_by(created_by=current_user.id).order_by(DOF.created_at.desc())
@@ -1434,7 +1183,7 @@ def dept_created_dofs_widget():
         # Sayfalama yap
         page = request.args.get('page', 1, type=int)
         per_page = 5  # Her widget 5 kayıt göstersin
-        dofs = query.paginate(page=page, per_page=per_page, error_out=False)
+        dofs = query.options(*dof_row_options()).paginate(page=page, per_page=per_page, error_out=False)
         
         current_app.logger.debug(f"Widget: {current_user.username} için {dofs.total} adet DÖF bulundu")
         
@@ -1526,62 +1275,42 @@ def change_department_api():
         current_app.logger.error(f"API - Departman güncelleme hatası: {str(e)}")
         return jsonify({'success': False, 'message': str(e)}), 500
 
-# DÖF Listesi Excel indirme
-@dof_bp.route('/dof/export/excel', methods=['GET'])
-@login_required
-def export_dofs_excel():
-    # URL parametrelerini al
-    status = request.args.get('status', type=int, default=0)
-    department = request.args.get('department', type=int, default=0)
-    keyword = request.args.get('keyword', default='')
-    date_from = request.args.get('date_from', default='')
-    date_to = request.args.get('date_to', default='')
-    dof_type = request.args.get('dof_type', type=int, default=0)
-    
-    # Log filtresi
-    current_app.logger.info(f"Excel dışa aktarma başlatıldı: status={status}, dept={department}, keyword={keyword}")
-    
-    # Filtreleme parametrelerini session'a kaydet
-    session['last_dof_filter'] = {
-        'status': status,
-        'department': department,
-        'keyword': keyword,
-        'date_from': date_from,
-        'date_to': date_to,
-        'dof_type': dof_type
-    }
+# DÖF listesi dışa aktarımlarının filtreli sorgusu
+def apply_dof_export_filters(query, args):
+    """
+    DÖF listesi dışa aktarım filtrelerini (durum, departman, anahtar kelime,
+    tarih aralığı, DÖF tipi) sorguya uygular; yetki filtresi uygulamaz
     
-    # DOF sorgusu başlat
-    query = DOF.query
+    Geçersiz tarihler yok sayılır (uyarı route'ta gösterilir).
     
-    # İlişkili DÖF'leri filtreleme
-    related_dof_filter = ~DOF.title.like("[İlişkili #%")
-    query = query.filter(related_dof_filter)
-    current_app.logger.info("İlişkili DÖF'ler filtrelendi")
+    Args:
+        query: DOF sorgusu
+        args: request.args veya aynı anahtarları taşıyan MultiDict
+    """
+    status = args.get('status', type=int, default=0)
+    department = args.get('department', type=int, default=0)
+    keyword = args.get('keyword', default='')
+    date_from = args.get('date_from', default='')
+    date_to = args.get('date_to', default='')
+    dof_type = args.get('dof_type', type=int, default=0)
     
     # Durum filtresi
     if status != 0:
         query = query.filter(DOF.status == status)
-        current_app.logger.info(f"Durum filtresi uygulandı: {status}")
     
     # Departman filtresi
     if department != 0:
         query = query.filter(DOF.department_id == department)
-        current_app.logger.info(f"Departman filtresi uygulandı: {department}")
     
-    # Anahtar kelime filtresi
+    # Anahtar kelime filtresi (tam metin arama indeksi üzerinden)
     if keyword:
-        query = query.filter(DOF.title.like(f'%{keyword}%') | DOF.description.like(f'%{keyword}%'))
-        current_app.logger.info(f"Anahtar kelime filtresi uygulandı: {keyword}")
+        query = filter_dofs_by_search(query, keyword)
     
     # Tarih aralığı filtresi
     if date_from:
         try:
-            from_date = datetime.strptime(date_from, '%Y-%m-%d')
-            query = query.filter(DOF.created_at >= from_date)
-            current_app.logger.info(f"Başlangıç tarihi filtresi uygulandı: {from_date}")
+            query = query.filter(DOF.created_at >= datetime.strptime(date_from, '%Y-%m-%d'))
         except ValueError:
-            flash('Geçersiz başlangıç tarihi formatı', 'warning')
             current_app.logger.error(f"Geçersiz başlangıç tarihi: {date_from}")
     
     if date_to:
@@ -1589,81 +1318,57 @@ def export_dofs_excel():
             to_date = datetime.strptime(date_to, '%Y-%m-%d')
             to_date = to_date.replace(hour=23, minute=59, second=59)  # Günün sonuna ayarla
             query = query.filter(DOF.created_at <= to_date)
-            current_app.logger.info(f"Bitiş tarihi filtresi uygulandı: {to_date}")
         except ValueError:
-            flash('Geçersiz bitiş tarihi formatı', 'warning')
             current_app.logger.error(f"Geçersiz bitiş tarihi: {date_to}")
     
     # DOF tipi filtresi
     if dof_type != 0:
         query = query.filter(DOF.dof_type == dof_type)
-        current_app.logger.info(f"DOF tipi filtresi uygulandı: {dof_type}")
+    
+    return query
+
+def build_dof_export_query(user, args):
+    """
+    DÖF listesi Excel/PDF dışa aktarımının filtreli sorgusu
+    
+    İstek dışında (dışa aktarım işlerinde) da çalışır; geçersiz tarihler
+    yok sayılır (uyarı route'ta gösterilir).
+    
+    Args:
+        user: Kullanıcı nesnesi
+        args: request.args veya aynı anahtarları taşıyan MultiDict
+    
+    Returns:
+        Sıralanmamış DOF sorgusu
+    """
+    # İlişkili DÖF'leri filtreleme
+    query = apply_dof_export_filters(DOF.query.filter(DOF.is_related == False), args)
     
     # Kullanıcı yetkisine göre filtrele
-    if current_user.role == UserRole.DEPARTMENT_MANAGER or current_user.role == UserRole.FRANCHISE_DEPARTMENT_MANAGER:
+    if user.role == UserRole.DEPARTMENT_MANAGER or user.role == UserRole.FRANCHISE_DEPARTMENT_MANAGER:
         # Departman yöneticisi için genişletilmiş DOF erişimi
         # 1. Kendi departmanına ait tüm DOF'lar
-        # 2. Departman çalışanları tarafından oluşturulan DOF'lar
+        # 2. Departman tarafından açılan DOF'lar
         # 3. Departman çalışanlarına atanan DOF'lar
-        dept_users = User.query.filter_by(department_id=current_user.department_id).with_entities(User.id).all()
-        dept_user_ids = [u.id for u in dept_users]
+        dept_user_ids = select(User.id).where(User.department_id == user.department_id)
         
         query = query.filter(
             or_(
-                DOF.department_id == current_user.department_id,  # 1. Departmana ait DOF'lar
-                DOF.created_by.in_(dept_user_ids),                # 2. Departman çalışanları tarafından oluşturulan
-                DOF.assigned_to.in_(dept_user_ids)                # 3. Departman çalışanlarına atanan
+                DOF.department_id == user.department_id,         # 1. Departmana ait DOF'lar
+                DOF.source_department_id == user.department_id,  # 2. Departman tarafından açılan
+                DOF.assigned_to.in_(dept_user_ids)               # 3. Departman çalışanlarına atanan
             )
         )
-        current_app.logger.info(f"Genişletilmiş departman yöneticisi filtresi uygulandı: dept_id={current_user.department_id}, dept_users={len(dept_user_ids)} kullanıcı")
-    elif current_user.role == UserRole.USER:
+    elif user.role == UserRole.USER:
         # Normal kullanıcı sadece kendi oluşturduğu veya kendisine atanan DOF'ları görebilir
-        query = query.filter((DOF.created_by == current_user.id) | (DOF.assigned_to == current_user.id))
-        current_app.logger.info(f"Normal kullanıcı filtresi uygulandı: user_id={current_user.id}")
-    
-    # Son sıralama
-    query = query.order_by(DOF.created_at.desc())
+        query = query.filter((DOF.created_by == user.id) | (DOF.assigned_to == user.id))
     
-    try:
-        # Tüm DOF'ları al
-        dofs = query.all()
-        current_app.logger.info(f"Sorgu sonucu: {len(dofs)} DOF kaydı bulundu")
-        
-        # DOF kaydı yoksa hata mesajı göster
-        if len(dofs) == 0:
-            current_app.logger.warning("Seçilen filtrelere göre gösterilecek DOF kaydı bulunamadı")
-            flash("Seçilen filtrelere göre gösterilecek DOF kaydı bulunamadı", "warning")
-            return redirect(url_for('dof.list_dofs'))
-        
-        # Excel dosyasını oluştur
-        try:
-            current_app.logger.info("Excel dosyası oluşturuluyor...")
-            excel_io = export_dofs_to_excel(dofs)
-            current_app.logger.info("Excel dosyası başarıyla oluşturuldu!")
-            
-            # Dosyayı kullanıcıya gönder
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            return send_file(
-                excel_io,
-                as_attachment=True,
-                download_name=f'DOF_Listesi_{timestamp}.xlsx',
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
-        except Exception as e:
-            current_app.logger.error(f"Excel oluşturma hatası: {str(e)}")
-            flash(f"Excel dosyası oluşturulurken hata oluştu: {str(e)}", "danger")
-            return redirect(url_for('dof.list_dofs'))
-    except Exception as e:
-        current_app.logger.error(f"DOF sorgu hatası: {str(e)}")
-        flash(f"DOF kayıtları alınırken hata oluştu: {str(e)}", "danger")
-        return redirect(url_for('dof.list_dofs'))
+    return query
 
-
-# DOF Listesi PDF indirme
-@dof_bp.route('/dof/export/pdf', methods=['GET'])
-@login_required
-def export_dofs_pdf():
-    # URL parametrelerini al
+def _submit_dof_list_export(kind):
+    """DÖF listesi dışa aktarım işini başlatır (Excel ve PDF route'ları ortak)"""
+    from routes.exports import export_job_response
+    
     status = request.args.get('status', type=int, default=0)
     department = request.args.get('department', type=int, default=0)
     keyword = request.args.get('keyword', default='')
@@ -1672,7 +1377,7 @@ def export_dofs_pdf():
     dof_type = request.args.get('dof_type', type=int, default=0)
     
     # Log filtresi
-    current_app.logger.info(f"PDF dışa aktarma başlatıldı: status={status}, dept={department}, keyword={keyword}")
+    current_app.logger.info(f"Dışa aktarma başlatıldı ({kind}): status={status}, dept={department}, keyword={keyword}")
     
     # Filtreleme parametrelerini session'a kaydet
     session['last_dof_filter'] = {
@@ -1684,108 +1389,64 @@ def export_dofs_pdf():
         'dof_type': dof_type
     }
     
-    # DOF sorgusu başlat
-    query = DOF.query
-    
-    # İlişkili DÖF'leri filtreleme
-    related_dof_filter = ~DOF.title.like("[İlişkili #%")
-    query = query.filter(related_dof_filter)
-    current_app.logger.info("İlişkili DÖF'ler filtrelendi")
-    
-    # Durum filtresi
-    if status != 0:
-        query = query.filter(DOF.status == status)
-        current_app.logger.info(f"Durum filtresi uygulandı: {status}")
-    
-    # Departman filtresi
-    if department != 0:
-        query = query.filter(DOF.department_id == department)
-        current_app.logger.info(f"Departman filtresi uygulandı: {department}")
-    
-    # Anahtar kelime filtresi
-    if keyword:
-        query = query.filter(DOF.title.like(f'%{keyword}%') | DOF.description.like(f'%{keyword}%'))
-        current_app.logger.info(f"Anahtar kelime filtresi uygulandı: {keyword}")
-    
-    # Tarih aralığı filtresi
-    if date_from:
-        try:
-            from_date = datetime.strptime(date_from, '%Y-%m-%d')
-            query = query.filter(DOF.created_at >= from_date)
-            current_app.logger.info(f"Başlangıç tarihi filtresi uygulandı: {from_date}")
-        except ValueError:
-            flash('Geçersiz başlangıç tarihi formatı', 'warning')
-            current_app.logger.error(f"Geçersiz başlangıç tarihi: {date_from}")
-    
-    if date_to:
-        try:
-            to_date = datetime.strptime(date_to, '%Y-%m-%d')
-            to_date = to_date.replace(hour=23, minute=59, second=59)  # Günün sonuna ayarla
-            query = query.filter(DOF.created_at <= to_date)
-            current_app.logger.info(f"Bitiş tarihi filtresi uygulandı: {to_date}")
-        except ValueError:
-            flash('Geçersiz bitiş tarihi formatı', 'warning')
-            current_app.logger.error(f"Geçersiz bitiş tarihi: {date_to}")
-    
-    # DOF tipi filtresi
-    if dof_type != 0:
-        query = query.filter(DOF.dof_type == dof_type)
-        current_app.logger.info(f"DOF tipi filtresi uygulandı: {dof_type}")
-    
-    # Kullanıcı yetkisine göre filtrele
-    if current_user.role == UserRole.DEPARTMENT_MANAGER or current_user.role == UserRole.FRANCHISE_DEPARTMENT_MANAGER:
-        # Departman yöneticisi kendi departmanına atanan DOF'ları ve departmanındaki
-        # kullanıcıların oluşturduğu DOF'ları görebilir
-        dept_users = db.session.query(User.id).filter(User.department_id == current_user.department_id).all()
-        dept_user_ids = [u.id for u in dept_users]
-        
-        query = query.filter(
-            (DOF.department_id == current_user.department_id) | 
-            (DOF.created_by.in_(dept_user_ids)) | 
-            (DOF.assigned_to.in_(dept_user_ids))
-        )
-        current_app.logger.info(f"Genişletilmiş departman yöneticisi filtresi uygulandı: dept_id={current_user.department_id}, dept_users={dept_user_ids}")
-    elif current_user.role == UserRole.USER:
-        # Normal kullanıcı sadece kendi oluşturduğu veya kendisine atanan DOF'ları görebilir
-        query = query.filter((DOF.created_by == current_user.id) | (DOF.assigned_to == current_user.id))
-        current_app.logger.info(f"Normal kullanıcı filtresi uygulandı: user_id={current_user.id}")
-    
-    # Son sıralama
-    query = query.order_by(DOF.created_at.desc())
+    # Geçersiz tarihler filtrelenmez, kullanıcı uyarılır
+    for value, label in ((date_from, 'başlangıç'), (date_to, 'bitiş')):
+        if value:
+            try:
+                datetime.strptime(value, '%Y-%m-%d')
+            except ValueError:
+                flash(f'Geçersiz {label} tarihi formatı', 'warning')
     
     try:
-        # Tüm DOF'ları al
-        dofs = query.all()
-        current_app.logger.info(f"Sorgu sonucu: {len(dofs)} DOF kaydı bulundu")
-        
-        # DOF kaydı yoksa hata mesajı göster
-        if len(dofs) == 0:
+        # DOF kaydı yoksa iş açmadan hata mesajı göster
+        if build_dof_export_query(current_user, request.args).with_entities(DOF.id).first() is None:
             current_app.logger.warning("Seçilen filtrelere göre gösterilecek DOF kaydı bulunamadı")
             flash("Seçilen filtrelere göre gösterilecek DOF kaydı bulunamadı", "warning")
             return redirect(url_for('dof.list_dofs'))
-        
-        # PDF dosyasını oluştur
-        try:
-            current_app.logger.info("PDF dosyası oluşturuluyor...")
-            pdf_io = export_dofs_to_pdf(dofs)
-            current_app.logger.info("PDF dosyası başarıyla oluşturuldu!")
-            
-            # Dosyayı kullanıcıya gönder
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            return send_file(
-                pdf_io,
-                as_attachment=True,
-                download_name=f'DOF_Listesi_{timestamp}.pdf',
-                mimetype='application/pdf'
-            )
-        except Exception as e:
-            current_app.logger.error(f"PDF oluşturma hatası: {str(e)}")
-            flash(f"PDF dosyası oluşturulurken hata oluştu: {str(e)}", "danger")
-            return redirect(url_for('dof.list_dofs'))
     except Exception as e:
         current_app.logger.error(f"DOF sorgu hatası: {str(e)}")
         flash(f"DOF kayıtları alınırken hata oluştu: {str(e)}", "danger")
         return redirect(url_for('dof.list_dofs'))
+    
+    # Dosya arka planda hazırlanır (bkz. export_jobs.py)
+    return export_job_response(kind, url_for('dof.list_dofs'))
+
+# DÖF Listesi Excel indirme
+@dof_bp.route('/dof/export/excel', methods=['GET'])
+@login_required
+def export_dofs_excel():
+    return _submit_dof_list_export('dof_list_excel')
+
+# DOF Listesi PDF indirme
+@dof_bp.route('/dof/export/pdf', methods=['GET'])
+@login_required
+def export_dofs_pdf():
+    return _submit_dof_list_export('dof_list_pdf')
+
+# DÖF dosya paketi (detay PDF'leri, işlem geçmişi ve ekler tek ZIP'te)
+@dof_bp.route('/dof/export/dossier', methods=['GET'])
+@login_required
+def export_dof_dossier():
+    """Filtrelenmiş DÖF'lerin dosya paketini akış olarak indirir (bkz. dossier_export.py)"""
+    from flask import Response, stream_with_context
+    from dossier_export import stream_dossier
+    from auth_service import AuthService
+    
+    # Ekler ve işlem geçmişi de pakete girdiği için görünürlük AuthService'ten alınır
+    query = AuthService.filter_viewable_dofs(current_user, apply_dof_export_filters(DOF.query, request.args))
+    if query.with_entities(DOF.id).first() is None:
+        flash("Seçilen filtrelere göre gösterilecek DOF kaydı bulunamadı", "warning")
+        return redirect(url_for('dof.list_dofs', **request.args))
+    
+    current_app.logger.info(f"DÖF dosya paketi başlatıldı: {current_user.username}, filtre={dict(request.args)}")
+    
+    file_name = f"DOF_Dosya_Paketi_{datetime.now().strftime('%Y%m%d_%H%M')}.zip"
+    response = Response(stream_with_context(stream_dossier(query, current_user._get_current_object())), mimetype='application/zip')
+    response.headers['Content-Disposition'] = f'attachment; filename="{file_name}"'
+    response.headers['Cache-Control'] = 'no-store'
+    # Ters vekil sunucu (nginx) yanıtı tamponlamadan iletsin
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 # DÖF ile ilgili route'lar
 @dof_bp.route('/dof/list')
@@ -1807,14 +1468,16 @@ def list_dofs():
     query = DOF.query
     status_param = request.args.get('status')
     dept_id = request.args.get('department', type=int)
-    search_term = request.args.get('search_term', '')
+    # Filtre formu 'keyword' gönderir; eski bağlantılar için 'search_term' de kabul edilir
+    search_term = request.args.get('keyword') or request.args.get('search_term', '')
     
     # Dashboard'dan gelen özel filtreler
     active_only = request.args.get('active_only', type=int)
     pending_approval = request.args.get('pending_approval', type=int)
     
     if search_term:
-        query = query.filter(or_(DOF.title.like(search_term), DOF.description.like(search_term)))
+        # Başlık, açıklama, kök nedenler, aksiyon planı ve yorumlarda tam metin arama
+        query = filter_dofs_by_search(query, search_term)
     
     # Dashboard özel filtreleri
     if active_only == 1:
@@ -1867,14 +1530,8 @@ def list_dofs():
                 dept_id = None
                 
             if dept_id:
-                # Kullanıcıların departmanına göre filtreleme yapmak için
-                # önce o departmana ait tüm kullanıcıları bul
-                dept_users = User.query.filter_by(department_id=dept_id).all()
-                dept_user_ids = [user.id for user in dept_users]
-                
-                # Departmandaki kullanıcıların oluşturduğu DÖF'leri filtrele
-                if dept_user_ids:
-                    query = query.filter(DOF.created_by.in_(dept_user_ids))
+                # DÖF'ü açan departmana göre filtrele
+                query = query.filter(DOF.source_department_id == dept_id)
     except Exception as e:
         current_app.logger.error(f"Oluşturan departman filtreleme hatası: {str(e)}")
     
@@ -1908,11 +1565,10 @@ def list_dofs():
         
         # Departman seçilmişse, bu departmanı görüntüleme yetkisi kontrolü
         if dept_id and dept_id > 0 and current_user.role in [UserRole.GROUP_MANAGER, UserRole.PROJECTS_QUALITY_TRACKING, UserRole.BRANCHES_QUALITY_TRACKING]:
-            managed_departments = current_user.get_managed_departments()
-            managed_dept_ids = [dept.id for dept in managed_departments]
+            from auth_principal import get_principal
             
             # Eğer seçilen departman yönetilen departmanlar listesinde değilse, kullanıcıyı bilgilendir
-            if dept_id not in managed_dept_ids:
+            if not get_principal(current_user).can_see_department(dept_id):
                 flash('Bu departmanın DÖF\'lerini görüntüleme yetkiniz bulunmuyor.', 'warning')
                 # AuthService ile filtrelenmiş sorguya devam edecek, zaten gereksiz DÖF'leri göstermeyecek
     except Exception as e:
@@ -1920,10 +1576,23 @@ def list_dofs():
         # Hata durumunda güvenli tarafta kal - boş sorgu göster
         query = query.filter(DOF.id == -1)  # Hiçbir sonuç gösterme
     
-    # Sıralama ve sayfalama
-    page = request.args.get('page', 1, type=int)
+    # Sıralama ve imleçli (keyset) sayfalama - derin sayfalarda OFFSET taraması ve COUNT(*) yapılmaz
+    from pagination_utils import keyset_paginate
+
+    sort_dir = 'asc' if request.args.get('sort_dir') == 'asc' else 'desc'
     per_page = 5 if is_ajax else 10  # AJAX için daha az sayıda DÖF göster
-    dofs = query.order_by(DOF.created_at.desc()).paginate(page=page, per_page=per_page)
+
+    # Yaklaşık toplam sadece şablon isterse hesaplanır; aynı filtre için kısa süre önbellekte tutulur
+    filter_args = tuple(sorted(
+        (key, value) for key, value in request.args.items(multi=True)
+        if key not in ('after', 'before', 'page', 'ajax', 'sort_dir')
+    ))
+    dofs = keyset_paginate(query, per_page=per_page,
+                           after=request.args.get('after'),
+                           before=request.args.get('before'),
+                           descending=sort_dir == 'desc',
+                           options=dof_row_options(),
+                           count_cache_key=('dof_list', current_user.id, filter_args))
     
     # Performans ölçümü bitiş
     end_time = time.time()
@@ -1938,16 +1607,18 @@ def list_dofs():
                               department=Department)
     
     # Normal sayfa gösterimi
-    return render_template('dof/list.html', 
-                          dofs=dofs, 
-                          form=form, 
-                          status=DOFStatus, 
+    return render_template('dof/list.html',
+                          dofs=dofs,
+                          form=form,
+                          sort_dir=sort_dir,
+                          status=DOFStatus,
                           department=Department)
 
 @dof_bp.route('/dof/<int:dof_id>')
 @login_required
 def detail(dof_id):
-    dof = DOF.query.get_or_404(dof_id)
+    # Şablonun kullandığı tüm ilişkiler (aksiyonlar, ekler, kullanıcılar) tek seferde yüklenir
+    dof = DOF.query.options(*dof_detail_options()).filter(DOF.id == dof_id).first_or_404()
     
     # DÖF düzenleme yetkisi kontrol et
     can_edit = can_user_edit_dof(current_user, dof)
@@ -1969,8 +1640,8 @@ def detail(dof_id):
                 # Debug mesajı
                 print(f"Departman eşleşmesi bulundu: {dof.department.name}, durum: {dof.status}")
     
-    # Aksiyonları getir
-    actions = DOFAction.query.filter_by(dof_id=dof_id).order_by(DOFAction.created_at.desc()).all()
+    # Aksiyonlar (önceden yüklendi), en yeni önce
+    actions = sorted(dof.actions, key=lambda action: (action.created_at or datetime.min, action.id), reverse=True)
     
     # DZ değişkeni - termin tarihi hesaplaması için
     now = datetime.now()
@@ -1978,31 +1649,23 @@ def detail(dof_id):
     # Tarih hesaplaması için timedelta'yı template'e aktar
     time_delta = timedelta
     
-    # Dosya eklerini getir
-    attachments = Attachment.query.filter_by(dof_id=dof_id).all()
+    # Dosya ekleri (önceden yüklendi)
+    attachments = dof.attachments
     
     # Son güncelleme tarihi
     last_update = dof.updated_at
     if actions and actions[0].created_at > last_update:
         last_update = actions[0].created_at
     
-    # Kaynak departman bilgisini al
-    creator_dept = User.query.get(dof.created_by).department
+    # Kaynak departman: oluşturulduğu andaki departman, yoksa oluşturanın departmanı
+    creator_dept = dof.source_department or (dof.creator.department if dof.creator else None)
     source_department = creator_dept.name if creator_dept else "Belirsiz"
     
-    # Log kaydı oluştur
-    log_activity(
-        user_id=current_user.id,
-        action="DÖF Görüntüleme",
-        details=f"DÖF görüntülendi: {dof.title}",
-        ip_address=request.remote_addr,
-        user_agent=request.user_agent.string
-    )
-    
     # Aksiyon formu oluştur
     form = DOFActionForm()
     
-    return render_template('dof/detail.html', 
+    # Önce sayfa oluşturulur: log kaydının commit'i önceden yüklenen ilişkileri expire etmesin
+    html = render_template('dof/detail.html', 
                            dof=dof, 
                            actions=actions,
                            attachments=attachments,
@@ -2015,6 +1678,17 @@ def detail(dof_id):
                            now=datetime.now(),
                            timedelta=timedelta,
                            title="DÖF Detayı")
+    
+    # Log kaydı oluştur
+    log_activity(
+        user_id=current_user.id,
+        action="DÖF Görüntüleme",
+        details=f"DÖF görüntülendi: {dof.title}",
+        ip_address=request.remote_addr,
+        user_agent=request.user_agent.string
+    )
+    
+    return html
 
 @dof_bp.route('/dof/<int:dof_id>/edit', methods=['GET', 'POST'])
 @login_required
@@ -3615,158 +3289,13 @@ def review_source(dof_id):
 @login_required
 def reports():
     """Herkesin erişebileceği DÖF raporları"""
-    from utils import get_dof_status_counts
-    from sqlalchemy import func, and_, or_
-    from datetime import datetime, timedelta
+    from report_service import ReportService
     
-    # Tarih aralıkları
     today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-    thirty_days_ago = today - timedelta(days=30)
-    seven_days_ago = today - timedelta(days=7)
-    this_year = today.replace(month=1, day=1)
-    
-    # Kullanıcının rolüne göre veri filtreleme
-    base_query = DOF.query
-    
-    # Normal kullanıcılar sadece kendi DÖF'lerini görebilir
-    if current_user.role == UserRole.USER:
-        base_query = base_query.filter(
-            or_(
-                DOF.created_by == current_user.id,
-                DOF.assigned_to == current_user.id
-            )
-        )
-    # Departman yöneticileri kendi departmanlarını görebilir
-    elif current_user.role == UserRole.DEPARTMENT_MANAGER or current_user.role == UserRole.FRANCHISE_DEPARTMENT_MANAGER:
-        if current_user.department_id:
-            dept_users = User.query.filter_by(department_id=current_user.department_id).all()
-            dept_user_ids = [user.id for user in dept_users]
-            base_query = base_query.filter(
-                or_(
-                    DOF.created_by.in_(dept_user_ids),
-                    DOF.department_id == current_user.department_id,
-                    DOF.assigned_to == current_user.id
-                )
-            )
-    # Admin ve kalite yöneticileri tüm DÖF'leri görebilir
-    elif current_user.role in [UserRole.ADMIN, UserRole.QUALITY_MANAGER]:
-        # Kalite yöneticisi ve admin için kısıtlama yok - tüm DÖF'leri görebilir
-        pass
-    
-    # URL parametrelerinden filtreleri al
-    department_filter = request.args.get('department_id', type=int)
-    month_filter = request.args.get('month')
-    status_filter = request.args.get('status', type=int)
-    
-    # Departman filtreleme (kalite yöneticisi için)
-    if department_filter and current_user.role in [UserRole.ADMIN, UserRole.QUALITY_MANAGER]:
-        base_query = base_query.filter(DOF.department_id == department_filter)
     
-    # Ay filtreleme (kalite yöneticisi için)
-    if month_filter and current_user.role in [UserRole.ADMIN, UserRole.QUALITY_MANAGER]:
-        # YYYY-MM formatından datetime aralığına çevir
-        try:
-            year, month = map(int, month_filter.split('-'))
-            from datetime import datetime, timedelta
-            month_start = datetime(year, month, 1)
-            if month == 12:
-                month_end = datetime(year + 1, 1, 1) - timedelta(seconds=1)
-            else:
-                month_end = datetime(year, month + 1, 1) - timedelta(seconds=1)
-            base_query = base_query.filter(DOF.created_at.between(month_start, month_end))
-        except (ValueError, TypeError):
-            pass  # Geçersiz tarih formatı, filtreleme yapma
-    
-    # Durum filtreleme (kalite yöneticisi için)
-    if status_filter is not None and current_user.role in [UserRole.ADMIN, UserRole.QUALITY_MANAGER]:
-        base_query = base_query.filter(DOF.status == status_filter)
-    
-    # Filtrelenmiş DÖF'leri al
-    filtered_dofs = base_query.all()
-    accessible_dof_ids = [dof.id for dof in filtered_dofs]
-    
-    # Genel istatistikler (filtrelenmiş veriye göre)
-    # Manuel olarak filtered_dofs üzerinden hesapla
-    stats = {
-        'total_dofs': len(filtered_dofs),
-        'this_month': len([dof for dof in filtered_dofs if dof.created_at >= today.replace(day=1)]),
-        'this_week': len([dof for dof in filtered_dofs if dof.created_at >= seven_days_ago]),
-        'today': len([dof for dof in filtered_dofs if dof.created_at >= today]),
-    }
-    
-    # Kullanıcının oluşturduğu DÖF'ler (filtrelenmiş veriye göre)
-    if current_user.role not in [UserRole.ADMIN, UserRole.QUALITY_MANAGER]:
-        # Normal kullanıcılar için kendi DÖF'lerini filtrele
-        user_created_dofs = [dof for dof in filtered_dofs if dof.created_by == current_user.id]
-        stats['created_total'] = len(user_created_dofs)
-        stats['created_active'] = len([dof for dof in user_created_dofs if dof.status not in [DOFStatus.CLOSED, DOFStatus.REJECTED]])
-        stats['created_closed'] = len([dof for dof in user_created_dofs if dof.status == DOFStatus.CLOSED])
-        
-        # Kullanıcıya atanan DÖF'ler (filtrelenmiş veriye göre)
-        user_assigned_dofs = [dof for dof in filtered_dofs if dof.assigned_to == current_user.id]
-        stats['assigned_total'] = len(user_assigned_dofs)
-        stats['assigned_active'] = len([dof for dof in user_assigned_dofs if dof.status not in [DOFStatus.CLOSED, DOFStatus.REJECTED]])
-        stats['assigned_closed'] = len([dof for dof in user_assigned_dofs if dof.status == DOFStatus.CLOSED])
-        
-        # Departman yöneticisi için ek istatistikler (filtrelenmiş veriye göre)
-        if current_user.role == UserRole.DEPARTMENT_MANAGER or current_user.role == UserRole.FRANCHISE_DEPARTMENT_MANAGER and current_user.department_id:
-            dept_dofs = [dof for dof in filtered_dofs if dof.department_id == current_user.department_id]
-            stats['dept_total'] = len(dept_dofs)
-            stats['dept_active'] = len([dof for dof in dept_dofs if dof.status not in [DOFStatus.CLOSED, DOFStatus.REJECTED]])
-            stats['dept_closed'] = len([dof for dof in dept_dofs if dof.status == DOFStatus.CLOSED])
-    else:
-        # Admin ve kalite yöneticileri için filtrelenmiş sistemin tamamını göster
-        stats['created_total'] = len(filtered_dofs)
-        stats['created_active'] = len([dof for dof in filtered_dofs if dof.status not in [DOFStatus.CLOSED, DOFStatus.REJECTED]])
-        stats['created_closed'] = len([dof for dof in filtered_dofs if dof.status == DOFStatus.CLOSED])
-        stats['assigned_total'] = len(filtered_dofs)
-        stats['assigned_active'] = len([dof for dof in filtered_dofs if dof.status not in [DOFStatus.CLOSED, DOFStatus.REJECTED]])
-        stats['assigned_closed'] = len([dof for dof in filtered_dofs if dof.status == DOFStatus.CLOSED])
-    
-
-    
-    # Durum dağılımı (filtrelenmiş veriye göre)
-    status_counts = []
-    if accessible_dof_ids:
-        # Direkt dictionary kullanarak sayımları yap
-        from collections import Counter
-        status_counter = Counter()
-        for dof in filtered_dofs:
-            if dof.status is not None:
-                status_counter[int(dof.status)] += 1
-        status_counts = list(status_counter.items())
-    
-    # DÖF tipi dağılımı (filtrelenmiş veriye göre)
-    type_counts = []
-    if accessible_dof_ids:
-        type_counter = Counter()
-        for dof in filtered_dofs:
-            if dof.dof_type is not None:
-                type_counter[int(dof.dof_type)] += 1
-        type_counts = list(type_counter.items())
-    
-    # DÖF kaynağı dağılımı (filtrelenmiş veriye göre)
-    source_counts = []
-    if accessible_dof_ids:
-        source_counter = Counter()
-        for dof in filtered_dofs:
-            if dof.dof_source is not None:
-                source_counter[int(dof.dof_source)] += 1
-        source_counts = list(source_counter.items())
-    
-    # Aylık trend (son 6 ay) - filtrelenmiş veriye göre
-    monthly_data = []
-    for i in range(5, -1, -1):
-        month_start = (today - timedelta(days=30*i)).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(seconds=1)
-        
-        # Filtrelenmiş DÖF'ler arasından aylık sayım yap
-        month_count = len([dof for dof in filtered_dofs if month_start <= dof.created_at <= month_end])
-        
-        monthly_data.append({
-            'month': month_start.strftime('%B %Y'),
-            'count': month_count
-        })
+    # Rol ve URL filtrelerine göre sorgu; sayılar DÖF'ler yüklenmeden SQL ile hesaplanır
+    base_query = ReportService.build_query(current_user, request.args)
+    summary = ReportService.build_summary(current_user, base_query, today, request.args)
     
     # Yaklaşan terminler (filtrelenmiş veriye göre)
     future_date = today + timedelta(days=30)
@@ -3775,7 +3304,7 @@ def reports():
         DOF.deadline.between(today, future_date),
         ~DOF.status.in_([DOFStatus.CLOSED, DOFStatus.REJECTED])
     ).order_by(DOF.deadline.asc()).limit(10)
-    upcoming_deadlines = upcoming_deadlines_query.all()
+    upcoming_deadlines = upcoming_deadlines_query.options(*dof_row_options()).all()
     
     # Geçmiş terminler (filtrelenmiş veriye göre)
     overdue_dofs_query = base_query.filter(
@@ -3783,218 +3312,118 @@ def reports():
         DOF.deadline < today,
         ~DOF.status.in_([DOFStatus.CLOSED, DOFStatus.REJECTED])
     ).order_by(DOF.deadline.desc()).limit(10)
-    overdue_dofs = overdue_dofs_query.all()
+    overdue_dofs = overdue_dofs_query.options(*dof_row_options()).all()
     
     # Son oluşturulan DÖF'ler (filtrelenmiş veriye göre)
     if current_user.role in [UserRole.ADMIN, UserRole.QUALITY_MANAGER]:
         # Kalite yöneticisi için filtrelenmiş veriden son DÖF'ler
-        recent_created = base_query.order_by(DOF.created_at.desc()).limit(5).all()
+        recent_created = base_query.options(*dof_row_options()).order_by(DOF.created_at.desc()).limit(5).all()
     else:
         # Diğer kullanıcılar için kendi oluşturdukları
-        recent_created = DOF.query.filter_by(created_by=current_user.id).order_by(DOF.created_at.desc()).limit(5).all()
+        recent_created = DOF.query.options(*dof_row_options()).filter_by(created_by=current_user.id).order_by(DOF.created_at.desc()).limit(5).all()
     
     # Son atanan DÖF'ler
-    recent_assigned = DOF.query.filter_by(assigned_to=current_user.id).order_by(DOF.created_at.desc()).limit(5).all()
+    recent_assigned = DOF.query.options(*dof_row_options()).filter_by(assigned_to=current_user.id).order_by(DOF.created_at.desc()).limit(5).all()
+    
+    # DÖF tablosunun ilk sayfası; sonraki sayfalar report_table parçasından gelir
+    report_dofs = _report_table_page(base_query)
     
     return render_template('dof/reports.html',
-                          stats=stats,
-                          status_counts=status_counts,
-                          type_counts=type_counts,
-                          source_counts=source_counts,
-                          monthly_data=monthly_data,
+                          stats=summary.stats,
+                          status_counts=summary.status_counts,
+                          type_counts=summary.type_counts,
+                          source_counts=summary.source_counts,
+                          monthly_data=summary.monthly_data,
                           upcoming_deadlines=upcoming_deadlines,
                           overdue_dofs=overdue_dofs,
                           recent_created=recent_created,
                           recent_assigned=recent_assigned,
-                          filtered_dofs=filtered_dofs,
+                          report_dofs=report_dofs,
+                          report_filters=_report_filter_args(),
                           DOFStatus=DOFStatus,
                           DOFType=DOFType,
                           DOFSource=DOFSource,
                           UserRole=UserRole)
 
+def _report_filter_args():
+    """Rapor tablosu sayfa bağlantılarında taşınacak filtreler"""
+    from report_service import REPORT_FILTER_ARGS
+    return {key: request.args[key] for key in REPORT_FILTER_ARGS if request.args.get(key)}
+
+def _report_table_page(base_query):
+    """Rapor DÖF tablosunun imleçli sayfası (açıklama önizlemesi dahil)"""
+    from pagination_utils import keyset_paginate
+    from report_service import REPORT_TABLE_PAGE_SIZE
+    
+    return keyset_paginate(base_query, per_page=REPORT_TABLE_PAGE_SIZE,
+                           after=request.args.get('after'),
+                           before=request.args.get('before'),
+                           options=[*dof_row_options(), undefer(DOF.description)])
+
+# Rapor sayfasındaki DÖF tablosu (sayfalı parça)
+@dof_bp.route('/dof/reports/table')
+@login_required
+def report_table():
+    """Rapor sayfasının DÖF tablosunun bir sayfasını HTML parçası olarak döndürür"""
+    from report_service import ReportService
+    
+    base_query = ReportService.build_query(current_user, request.args)
+    return render_template('dof/partials/report_dof_table.html',
+                          report_dofs=_report_table_page(base_query),
+                          report_filters=_report_filter_args(),
+                          DOFStatus=DOFStatus)
+
 # Reports sayfası Excel export (filtrelenmiş)
 @dof_bp.route('/dof/reports/export/excel', methods=['GET'])
 @login_required
 def export_reports_excel():
-    """Reports sayfasından filtrelenmiş verileri Excel olarak dışa aktar"""
-    # Reports route'undan aynı filtreleme mantığını kullan
-    from sqlalchemy import func, and_, or_
-    from datetime import datetime, timedelta
-    
-    # Tarih aralıkları
-    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-    
-    # Kullanıcının rolüne göre veri filtreleme
-    base_query = DOF.query
-    
-    # Normal kullanıcılar sadece kendi DÖF'lerini görebilir
-    if current_user.role == UserRole.USER:
-        base_query = base_query.filter(
-            or_(
-                DOF.created_by == current_user.id,
-                DOF.assigned_to == current_user.id
-            )
-        )
-    # Departman yöneticileri kendi departmanlarını görebilir
-    elif current_user.role == UserRole.DEPARTMENT_MANAGER or current_user.role == UserRole.FRANCHISE_DEPARTMENT_MANAGER:
-        if current_user.department_id:
-            dept_users = User.query.filter_by(department_id=current_user.department_id).all()
-            dept_user_ids = [user.id for user in dept_users]
-            base_query = base_query.filter(
-                or_(
-                    DOF.created_by.in_(dept_user_ids),
-                    DOF.department_id == current_user.department_id,
-                    DOF.assigned_to == current_user.id
-                )
-            )
-    # Admin ve kalite yöneticileri tüm DÖF'leri görebilir
-    elif current_user.role in [UserRole.ADMIN, UserRole.QUALITY_MANAGER]:
-        # Kalite yöneticisi ve admin için kısıtlama yok - tüm DÖF'leri görebilir
-        pass
-    
-    # URL parametrelerinden filtreleri al
-    department_filter = request.args.get('department_id', type=int)
-    month_filter = request.args.get('month')
-    status_filter = request.args.get('status', type=int)
-    
-    # Departman filtreleme (kalite yöneticisi için)
-    if department_filter and current_user.role in [UserRole.ADMIN, UserRole.QUALITY_MANAGER]:
-        base_query = base_query.filter(DOF.department_id == department_filter)
+    """Reports sayfasından filtrelenmiş verileri Excel olarak dışa aktar (arka plan işi)"""
+    from routes.exports import export_job_response
     
-    # Ay filtreleme (kalite yöneticisi için)
-    if month_filter and current_user.role in [UserRole.ADMIN, UserRole.QUALITY_MANAGER]:
-        # YYYY-MM formatından datetime aralığına çevir
-        try:
-            year, month = map(int, month_filter.split('-'))
-            from datetime import datetime, timedelta
-            month_start = datetime(year, month, 1)
-            if month == 12:
-                month_end = datetime(year + 1, 1, 1) - timedelta(seconds=1)
-            else:
-                month_end = datetime(year, month + 1, 1) - timedelta(seconds=1)
-            base_query = base_query.filter(DOF.created_at.between(month_start, month_end))
-        except (ValueError, TypeError):
-            pass  # Geçersiz tarih formatı, filtreleme yapma
-    
-    # Durum filtreleme (kalite yöneticisi için)
-    if status_filter is not None and current_user.role in [UserRole.ADMIN, UserRole.QUALITY_MANAGER]:
-        base_query = base_query.filter(DOF.status == status_filter)
-    
-    # Filtrelenmiş DÖF'leri al
-    dofs = base_query.order_by(DOF.created_at.desc()).all()
-    
-    # Excel dosyasını oluştur
-    try:
-        current_app.logger.info(f"Reports Excel dosyası oluşturuluyor: {len(dofs)} DÖF")
-        excel_io = export_dofs_to_excel(dofs)
-        
-        # Dosyayı kullanıcıya gönder
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        return send_file(
-            excel_io,
-            as_attachment=True,
-            download_name=f'DOF_Raporu_{timestamp}.xlsx',
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-    except Exception as e:
-        current_app.logger.error(f"Reports Excel oluşturma hatası: {str(e)}")
-        flash(f"Excel dosyası oluşturulurken hata oluştu: {str(e)}", "danger")
-        return redirect(url_for('dof.reports'))
+    # Filtreler iş içinde ReportService.build_query ile aynı şekilde uygulanır
+    current_app.logger.info("Reports Excel dışa aktarımı başlatıldı")
+    return export_job_response('report_excel', url_for('dof.reports'))
 
 # Reports sayfası PDF export (filtrelenmiş)
 @dof_bp.route('/dof/reports/export/pdf', methods=['GET'])
 @login_required
 def export_reports_pdf():
-    """Reports sayfasından filtrelenmiş verileri PDF olarak dışa aktar"""
-    # Reports route'undan aynı filtreleme mantığını kullan
-    from sqlalchemy import func, and_, or_
-    from datetime import datetime, timedelta
+    """Reports sayfasından filtrelenmiş verileri PDF olarak dışa aktar (arka plan işi)"""
+    from routes.exports import export_job_response
     
-    # Tarih aralıkları
-    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-    
-    # Kullanıcının rolüne göre veri filtreleme
-    base_query = DOF.query
-    
-    # Normal kullanıcılar sadece kendi DÖF'lerini görebilir
-    if current_user.role == UserRole.USER:
-        base_query = base_query.filter(
-            or_(
-                DOF.created_by == current_user.id,
-                DOF.assigned_to == current_user.id
-            )
-        )
-    # Departman yöneticileri kendi departmanlarını görebilir
-    elif current_user.role == UserRole.DEPARTMENT_MANAGER or current_user.role == UserRole.FRANCHISE_DEPARTMENT_MANAGER:
-        if current_user.department_id:
-            dept_users = User.query.filter_by(department_id=current_user.department_id).all()
-            dept_user_ids = [user.id for user in dept_users]
-            base_query = base_query.filter(
-                or_(
-                    DOF.created_by.in_(dept_user_ids),
-                    DOF.department_id == current_user.department_id,
-                    DOF.assigned_to == current_user.id
-                )
-            )
-    # Admin ve kalite yöneticileri tüm DÖF'leri görebilir
-    elif current_user.role in [UserRole.ADMIN, UserRole.QUALITY_MANAGER]:
-        # Kalite yöneticisi ve admin için kısıtlama yok - tüm DÖF'leri görebilir
-        pass
-    
-    # URL parametrelerinden filtreleri al
-    department_filter = request.args.get('department_id', type=int)
-    month_filter = request.args.get('month')
-    status_filter = request.args.get('status', type=int)
-    
-    # Departman filtreleme (kalite yöneticisi için)
-    if department_filter and current_user.role in [UserRole.ADMIN, UserRole.QUALITY_MANAGER]:
-        base_query = base_query.filter(DOF.department_id == department_filter)
-    
-    # Ay filtreleme (kalite yöneticisi için)
-    if month_filter and current_user.role in [UserRole.ADMIN, UserRole.QUALITY_MANAGER]:
-        # YYYY-MM formatından datetime aralığına çevir
-        try:
-            year, month = map(int, month_filter.split('-'))
-            from datetime import datetime, timedelta
-            month_start = datetime(year, month, 1)
-            if month == 12:
-                month_end = datetime(year + 1, 1, 1) - timedelta(seconds=1)
-            else:
-                month_end = datetime(year, month + 1, 1) - timedelta(seconds=1)
-            base_query = base_query.filter(DOF.created_at.between(month_start, month_end))
-        except (ValueError, TypeError):
-            pass  # Geçersiz tarih formatı, filtreleme yapma
-    
-    # Durum filtreleme (kalite yöneticisi için)
-    if status_filter is not None and current_user.role in [UserRole.ADMIN, UserRole.QUALITY_MANAGER]:
-        base_query = base_query.filter(DOF.status == status_filter)
-    
-    # Filtrelenmiş DÖF'leri al
-    dofs = base_query.order_by(DOF.created_at.desc()).all()
-    
-    # PDF dosyasını oluştur
-    try:
-        current_app.logger.info(f"Reports PDF dosyası oluşturuluyor: {len(dofs)} DÖF")
-        pdf_io = export_dofs_to_pdf(dofs)
-        
-        # Dosyayı kullanıcıya gönder
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        return send_file(
-            pdf_io,
-            as_attachment=True,
-            download_name=f'DOF_Raporu_{timestamp}.pdf',
-            mimetype='application/pdf'
-        )
-    except Exception as e:
-        current_app.logger.error(f"Reports PDF oluşturma hatası: {str(e)}")
-        flash(f"PDF dosyası oluşturulurken hata oluştu: {str(e)}", "danger")
-        return redirect(url_for('dof.reports'))
+    current_app.logger.info("Reports PDF dışa aktarımı başlatıldı")
+    return export_job_response('report_pdf', url_for('dof.reports'))
+
+def _send_detail_document(dof, kind, download_name):
+    """Detay belgesini önbellekten gönderir; ETag eşleşirse belge üretilmeden 304 döner"""
+    from detail_cache import document_digest, get_document
+    
+    digest = document_digest(dof, kind)
+    if request.if_none_match.contains(digest):
+        response = current_app.response_class(status=304)
+        response.set_etag(digest)
+    else:
+        document = get_document(dof, kind, digest)
+        if document.path:
+            response = send_file(document.path, mimetype=document.mimetype, as_attachment=True,
+                                 download_name=download_name, etag=document.etag, max_age=0)
+        else:
+            response = make_response(document.data)
+            response.headers['Content-Type'] = document.mimetype
+            response.headers['Content-Disposition'] = f'attachment; filename="{download_name}"'
+            if document.etag:
+                response.set_etag(document.etag)
+    
+    # Yetkiye bağlı içerik: sadece tarayıcıda sakla, her seferinde ETag ile doğrula
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
 
 # DÖF Detayı PDF Export
 @dof_bp.route('/dof/<int:dof_id>/export/pdf')
 @login_required
 def export_dof_detail_pdf(dof_id):
-    """DÖF detayını PDF olarak dışa aktar"""
+    """DÖF detayını PDF olarak dışa aktar (bkz. detail_cache.py)"""
     dof = DOF.query.get_or_404(dof_id)
     
     # Yetki kontrolü (detay sayfasını görebilen herkes PDF'i de indirebilir)
@@ -4003,17 +3432,7 @@ def export_dof_detail_pdf(dof_id):
         return redirect(url_for('dof.list_dofs'))
     
     try:
-        from export_utils import create_dof_detail_pdf
-        
-        # PDF oluştur
-        pdf_content = create_dof_detail_pdf(dof)
-        
-        # Response oluştur
-        response = make_response(pdf_content)
-        response.headers['Content-Type'] = 'application/pdf'
-        response.headers['Content-Disposition'] = f'attachment; filename="DOF_{dof_id}_Detay.pdf"'
-        
-        return response
+        return _send_detail_document(dof, 'pdf', f'DOF_{dof_id}_Detay.pdf')
         
     except Exception as e:
         current_app.logger.error(f"PDF export hatası: {str(e)}")
@@ -4024,7 +3443,7 @@ def export_dof_detail_pdf(dof_id):
 @dof_bp.route('/dof/<int:dof_id>/export/excel')
 @login_required
 def export_dof_detail_excel(dof_id):
-    """DÖF detayını Excel olarak dışa aktar"""
+    """DÖF detayını Excel olarak dışa aktar (bkz. detail_cache.py)"""
     dof = DOF.query.get_or_404(dof_id)
     
     # Yetki kontrolü
@@ -4033,17 +3452,7 @@ def export_dof_detail_excel(dof_id):
         return redirect(url_for('dof.list_dofs'))
     
     try:
-        from export_utils import create_dof_detail_excel
-        
-        # Excel oluştur
-        excel_content = create_dof_detail_excel(dof)
-        
-        # Response oluştur
-        response = make_response(excel_content)
-        response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        response.headers['Content-Disposition'] = f'attachment; filename="DOF_{dof_id}_Detay.xlsx"'
-        
-        return response
+        return _send_detail_document(dof, 'excel', f'DOF_{dof_id}_Detay.xlsx')
         
     except Exception as e:
         current_app.logger.error(f"Excel export hatası: {str(e)}")
@@ -4053,24 +3462,27 @@ def export_dof_detail_excel(dof_id):
 # Yetki kontrolü fonksiyonu
 def can_view_dof(dof, user):
     """Kullanıcının DÖF'ü görüntüleme yetkisi var mı kontrol et"""
-    if user.role in [UserRole.ADMIN, UserRole.QUALITY_MANAGER]:
+    from auth_principal import get_principal
+    
+    principal = get_principal(user)
+    if principal.sees_all:
         return True
     
-    if user.role == UserRole.DEPARTMENT_MANAGER or user.role == UserRole.FRANCHISE_DEPARTMENT_MANAGER:
-        if user.department_id:
+    if principal.role == UserRole.DEPARTMENT_MANAGER or principal.role == UserRole.FRANCHISE_DEPARTMENT_MANAGER:
+        if principal.department_id:
             # Kendi departmanına ait DÖF'leri görebilir
-            if dof.department_id == user.department_id:
+            if dof.department_id == principal.department_id:
                 return True
-            # Kendi departmanı çalışanları tarafından oluşturulan DÖF'leri görebilir
-            if dof.creator and dof.creator.department_id == user.department_id:
+            # Kendi departmanının açtığı DÖF'leri görebilir (source_department_id)
+            if principal.is_source_department(dof):
                 return True
             # Kendisine atanan DÖF'leri görebilir
-            if dof.assigned_to == user.id:
+            if dof.assigned_to == principal.user_id:
                 return True
     
-    if user.role == UserRole.USER:
+    if principal.role == UserRole.USER:
         # Kendi oluşturduğu veya kendisine atanan DÖF'leri görebilir
-        if dof.created_by == user.id or dof.assigned_to == user.id:
+        if dof.created_by == principal.user_id or dof.assigned_to == principal.user_id:
             return True
     
     return False
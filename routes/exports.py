@@ -0,0 +1,130 @@
+"""
+Dışa Aktarım İşleri Routes
+--------------------------
+Arka planda hazırlanan Excel/PDF dışa aktarımlarının durum sayfası, durum
+API'si ve indirme route'ları (bkz. export_jobs.py).
+
+Dışa aktarım route'ları (DÖF listesi, raporlar, sistem raporu, teşekkür
+bildirimleri) export_job_response ile iş başlatır:
+    - Tarayıcı: /exports/<iş kimliği> durum sayfasına yönlendirilir; sayfa
+      ilerlemeyi izler ve dosya hazır olunca indirmeyi başlatır.
+    - Accept: application/json: 202 ve iş durumu (status_url, download_url).
+"""
+
+import os
+
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, jsonify, abort, send_file
+from flask_login import login_required, current_user
+
+from extensions import db
+from export_jobs import (EXPORT_KINDS, DONE, ExportQueueFull, submit_export_job, get_export_job,
+                         can_access_job)
+
+exports_bp = Blueprint('exports', __name__)
+
+
+def _wants_json():
+    return request.accept_mimetypes.best_match(['text/html', 'application/json']) == 'application/json'
+
+
+def _safe_back_url(value, default):
+    # Sadece uygulama içi yollar (açık yönlendirme olmaması için)
+    if value and value.startswith('/') and not value.startswith('//'):
+        return value
+    return default
+
+
+def job_payload(job):
+    """İş durumunun JSON gösterimi"""
+    kind = EXPORT_KINDS.get(job.kind)
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'label': kind.label if kind else job.kind,
+        'status': job.status,
+        'progress': job.progress,
+        'message': job.message,
+        'file_name': job.file_name,
+        'file_size': job.file_size,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'expires_at': job.expires_at.isoformat() if job.expires_at else None,
+        'status_url': url_for('exports.job_status', job_id=job.id),
+        'download_url': url_for('exports.download', job_id=job.id) if job.status == DONE else None,
+    }
+
+
+def export_job_response(kind, back_url):
+    """
+    Dışa aktarım işini başlatır ve isteğe uygun yanıtı döndürür
+
+    Args:
+        kind: export_jobs.EXPORT_KINDS anahtarı
+        back_url: Hata durumunda ve durum sayfasındaki geri bağlantısında kullanılan adres
+    """
+    try:
+        job = submit_export_job(kind, current_user, request.args)
+    except ExportQueueFull:
+        message = 'Şu anda çok sayıda dışa aktarım hazırlanıyor, lütfen birkaç dakika sonra tekrar deneyin.'
+        current_app.logger.warning(f"Dışa aktarım kuyruğu dolu: {kind} ({current_user.username})")
+        if _wants_json():
+            return jsonify({'error': message}), 503
+        flash(message, 'warning')
+        return redirect(back_url)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Dışa aktarım işi başlatılamadı ({kind}): {str(e)}")
+        if _wants_json():
+            return jsonify({'error': 'Dışa aktarım başlatılamadı.'}), 500
+        flash(f"Dışa aktarım başlatılırken hata oluştu: {str(e)}", 'danger')
+        return redirect(back_url)
+
+    if _wants_json():
+        response = jsonify(job_payload(job))
+        response.status_code = 202
+        response.headers['Location'] = url_for('exports.job_status', job_id=job.id)
+        return response
+    return redirect(url_for('exports.job_page', job_id=job.id, back=back_url))
+
+
+def _get_job_or_404(job_id):
+    job = get_export_job(job_id)
+    if job is None or not can_access_job(job, current_user):
+        abort(404)
+    return job
+
+
+@exports_bp.route('/exports/<job_id>')
+@login_required
+def job_page(job_id):
+    """İşin ilerlemesini izleyen ve hazır olunca indirmeyi başlatan sayfa"""
+    job = _get_job_or_404(job_id)
+    if _wants_json():
+        return jsonify(job_payload(job))
+
+    return render_template('exports/job.html',
+                           job=job_payload(job),
+                           back_url=_safe_back_url(request.args.get('back'), url_for('dof.dashboard')))
+
+
+@exports_bp.route('/exports/<job_id>/status')
+@login_required
+def job_status(job_id):
+    """İş durumu (JSON)"""
+    response = jsonify(job_payload(_get_job_or_404(job_id)))
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+@exports_bp.route('/exports/<job_id>/download')
+@login_required
+def download(job_id):
+    """Hazırlanan dosyayı indirir; süresi dolan dosyalar için 410 döner"""
+    job = _get_job_or_404(job_id)
+    if job.status != DONE:
+        abort(409)
+    if not job.file_path or not os.path.exists(job.file_path):
+        abort(410)
+
+    return send_file(job.file_path, as_attachment=True, download_name=job.file_name,
+                     mimetype=job.mimetype, max_age=0)
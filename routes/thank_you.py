@@ -5,7 +5,7 @@ Müşteri İlişkileri departmanı yöneticilerinin dışarıdan gelen teşekkü
 kaydetmesi ve yönetmesi için gerekli route'ları içerir.
 """
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, send_file
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
 from flask_login import login_required, current_user
 from datetime import datetime
 from functools import wraps
@@ -412,72 +412,38 @@ def report_thank_you():
                            dept_counts=dept_counts, 
                            month_counts=month_counts)
 
+def thank_you_export_query(user):
+    """Kullanıcının dışa aktarabileceği teşekkür bildirimleri (en yeni önce)"""
+    query = ThankYou.query.order_by(ThankYou.created_at.desc())
+    
+    # Admin ve kalite yöneticileri tüm teşekkürleri görebilir
+    if user.role in [UserRole.ADMIN, UserRole.QUALITY_MANAGER]:
+        return query
+    # Departman yöneticileri kendi departmanlarına gelen teşekkürleri görebilir
+    if user.role == UserRole.DEPARTMENT_MANAGER:
+        return query.filter_by(department_id=user.department_id)
+    return query.filter(db.false())
+
+def _submit_thank_you_export(kind):
+    """Teşekkür bildirimi dışa aktarım işini başlatır (bkz. export_jobs.py)"""
+    from routes.exports import export_job_response
+    
+    # Yetki kontrolü
+    if not (current_user.role in [UserRole.ADMIN, UserRole.QUALITY_MANAGER] or 
+            (current_user.role == UserRole.DEPARTMENT_MANAGER and current_user.department_id == 2)):
+        flash('Bu işlem için yetkiniz bulunmuyor.', 'danger')
+        return redirect(url_for('thank_you.list_thank_you'))
+    
+    return export_job_response(kind, url_for('thank_you.list_thank_you'))
+
 @thank_you_bp.route('/export/excel')
 @login_required
 def export_thank_you_excel():
     """Teşekkür bildirimlerini Excel formatında dışa aktar"""
-    try:
-        # Yetki kontrolü
-        if not (current_user.role in [UserRole.ADMIN, UserRole.QUALITY_MANAGER] or 
-                (current_user.role == UserRole.DEPARTMENT_MANAGER and current_user.department_id == 2)):
-            flash('Bu işlem için yetkiniz bulunmuyor.', 'danger')
-            return redirect(url_for('thank_you.list_thank_you'))
-        
-        # Admin ve kalite yöneticileri tüm teşekkürleri görebilir
-        if current_user.role in [UserRole.ADMIN, UserRole.QUALITY_MANAGER]:
-            thank_yous = ThankYou.query.order_by(ThankYou.created_at.desc()).all()
-        # Departman yöneticileri kendi departmanlarına gelen teşekkürleri görebilir
-        elif current_user.role == UserRole.DEPARTMENT_MANAGER:
-            thank_yous = ThankYou.query.filter_by(department_id=current_user.department_id).order_by(ThankYou.created_at.desc()).all()
-        else:
-            thank_yous = []
-        
-        # Excel dosyasını oluştur
-        output = export_thank_you_to_excel(thank_yous)
-        
-        # Dosyayı indir
-        return send_file(
-            output,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            download_name=f'tesekkur_bildirimleri_{datetime.now().strftime("%Y%m%d%H%M%S")}.xlsx',
-            as_attachment=True
-        )
-    except Exception as e:
-        current_app.logger.error(f"Excel dışa aktarma hatası: {str(e)}")
-        flash('Excel dosyası oluşturulurken bir hata oluştu.', 'danger')
-        return redirect(url_for('thank_you.list_thank_you'))
+    return _submit_thank_you_export('thank_you_excel')
 
 @thank_you_bp.route('/export/pdf')
 @login_required
 def export_thank_you_pdf():
     """Teşekkür bildirimlerini PDF formatında dışa aktar"""
-    try:
-        # Yetki kontrolü
-        if not (current_user.role in [UserRole.ADMIN, UserRole.QUALITY_MANAGER] or 
-                (current_user.role == UserRole.DEPARTMENT_MANAGER and current_user.department_id == 2)):
-            flash('Bu işlem için yetkiniz bulunmuyor.', 'danger')
-            return redirect(url_for('thank_you.list_thank_you'))
-        
-        # Admin ve kalite yöneticileri tüm teşekkürleri görebilir
-        if current_user.role in [UserRole.ADMIN, UserRole.QUALITY_MANAGER]:
-            thank_yous = ThankYou.query.order_by(ThankYou.created_at.desc()).all()
-        # Departman yöneticileri kendi departmanlarına gelen teşekkürleri görebilir
-        elif current_user.role == UserRole.DEPARTMENT_MANAGER:
-            thank_yous = ThankYou.query.filter_by(department_id=current_user.department_id).order_by(ThankYou.created_at.desc()).all()
-        else:
-            thank_yous = []
-        
-        # PDF dosyasını oluştur
-        output = export_thank_you_to_pdf(thank_yous)
-        
-        # Dosyayı indir
-        return send_file(
-            output,
-            mimetype='application/pdf',
-            download_name=f'tesekkur_bildirimleri_{datetime.now().strftime("%Y%m%d%H%M%S")}.pdf',
-            as_attachment=True
-        )
-    except Exception as e:
-        current_app.logger.error(f"PDF dışa aktarma hatası: {str(e)}")
-        flash('PDF dosyası oluşturulurken bir hata oluştu.', 'danger')
-        return redirect(url_for('thank_you.list_thank_you'))
+    return _submit_thank_you_export('thank_you_pdf')
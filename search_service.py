@@ -0,0 +1,387 @@
+"""
+DÖF Tam Metin Arama
+-------------------
+DÖF başlığı, açıklaması, kök nedenleri (root_cause1..5), aksiyon planı ve
+aksiyon yorumları üzerinde sıralı (ranked) tam metin arama modülü.
+
+- Her DÖF için metinler Türkçe'ye uygun şekilde normalize edilip
+  (İ/I/ı -> i, ş -> s, ğ -> g, ç -> c, ö -> o, ü -> u) dof_search_documents
+  tablosunda tek bir doküman olarak tutulur. Sorgular da aynı şekilde
+  normalize edildiği için "işçi", "İŞÇİ" ve "isci" aynı sonucu verir.
+- Arama altyapısı veritabanına göre seçilir:
+    mysql       : dof_search_documents.content üzerinde FULLTEXT indeks
+    sqlite_fts5 : dof_search_fts FTS5 sanal tablosu (yerel geliştirme/test)
+    like        : FULLTEXT/FTS5 olmayan ortamlar için LIKE yedeği
+  SEARCH_BACKEND ayarıyla zorlanabilir.
+- Dokümanlar her session flush'ında değişen DÖF ve aksiyonlar için aynı
+  transaction içinde yeniden oluşturulur.
+- Sonuçlar her zaman AuthService.filter_viewable_dofs ile süzülür.
+
+Kullanım:
+    python search_service.py            # indeksi yeniden oluştur
+    python search_service.py --dry-run  # sadece eksik/fazla dokümanları raporla
+"""
+
+import re
+import sys
+from datetime import datetime
+
+from sqlalchemy import event, select, text, literal, and_, Integer, Float, inspect as sa_inspect
+
+from extensions import db
+from models import DOF, DOFAction, DOFSearchDocument
+
+# Dokümana dahil edilen DÖF alanları
+INDEXED_DOF_FIELDS = ('title', 'description', 'root_cause1', 'root_cause2', 'root_cause3',
+                      'root_cause4', 'root_cause5', 'action_plan')
+
+# MySQL TEXT kolonu sınırının altında kal
+MAX_DOCUMENT_LENGTH = 60000
+
+# Sorgu başına en fazla terim ve en kısa terim uzunluğu
+MAX_QUERY_TERMS = 8
+MIN_TERM_LENGTH = 2
+
+BATCH_SIZE = 500
+
+FTS_TABLE = 'dof_search_fts'
+
+# Büyük harfler lower() öncesi çevrilir ('İ'.lower() birleşik nokta üretir)
+_UPPER_FOLD = str.maketrans({'İ': 'i', 'I': 'i'})
+_LOWER_FOLD = str.maketrans({'ı': 'i', 'ş': 's', 'ğ': 'g', 'ç': 'c', 'ö': 'o', 'ü': 'u',
+                             'â': 'a', 'î': 'i', 'û': 'u'})
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+_listeners_registered = False
+
+
+def normalize_text(value):
+    """Metni Türkçe karakterleri katlayarak küçük harfli kelime dizisine çevirir"""
+    if not value:
+        return ''
+    folded = value.translate(_UPPER_FOLD).lower().translate(_LOWER_FOLD)
+    return ' '.join(_TOKEN_PATTERN.findall(folded))
+
+
+def search_terms(query_text):
+    """Arama metnini normalize edilmiş, tekrarsız terimlere ayırır"""
+    terms = []
+    for term in normalize_text(query_text).split():
+        if len(term) >= MIN_TERM_LENGTH and term not in terms:
+            terms.append(term)
+    return terms[:MAX_QUERY_TERMS]
+
+
+class MySQLFulltextBackend:
+    """dof_search_documents.content üzerinde FULLTEXT (BOOLEAN MODE) arama"""
+    name = 'mysql'
+
+    def ensure(self, connection):
+        existing = {index['name'] for index in sa_inspect(connection).get_indexes(DOFSearchDocument.__tablename__)}
+        if 'ix_dof_search_documents_content' not in existing:
+            connection.exec_driver_sql(
+                "ALTER TABLE dof_search_documents ADD FULLTEXT INDEX ix_dof_search_documents_content (content)"
+            )
+            return True
+        return False
+
+    def sync(self, connection, documents, removed_ids):
+        # Doküman tablosu zaten FULLTEXT indeksli
+        pass
+
+    def match_select(self, terms):
+        from sqlalchemy.dialects.mysql import match
+        # Her terim zorunlu ve önek eşleşmeli: +terim*
+        score = match(DOFSearchDocument.content, against=' '.join(f'+{term}*' for term in terms)).in_boolean_mode()
+        return select(DOFSearchDocument.dof_id.label('dof_id'), score.label('score')).where(score > 0)
+
+
+class SQLiteFTS5Backend:
+    """dof_search_fts FTS5 sanal tablosu üzerinde bm25 sıralı arama"""
+    name = 'sqlite_fts5'
+
+    def ensure(self, connection):
+        exists = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+        ).first()
+        if exists:
+            return False
+        connection.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(content, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        # Mevcut dokümanları aktar
+        connection.exec_driver_sql(
+            f"INSERT INTO {FTS_TABLE} (rowid, content) SELECT dof_id, content FROM dof_search_documents"
+        )
+        return True
+
+    def sync(self, connection, documents, removed_ids):
+        # Sanal tablo create_all ile oluşmadığından ilk yazmada yoksa oluştur
+        self.ensure(connection)
+        ids = [(dof_id,) for dof_id in removed_ids] + [(dof_id,) for dof_id, _ in documents]
+        if ids:
+            connection.exec_driver_sql(f"DELETE FROM {FTS_TABLE} WHERE rowid = ?", ids)
+        if documents:
+            connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE} (rowid, content) VALUES (?, ?)", documents)
+
+    def match_select(self, terms):
+        # bm25 küçük değer = daha iyi eşleşme; skor büyükten küçüğe sıralanabilsin diye negatiflenir
+        return text(
+            f"SELECT rowid AS dof_id, -bm25({FTS_TABLE}) AS score "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :fts_query"
+        ).bindparams(fts_query=' '.join(f'"{term}"*' for term in terms))\
+         .columns(dof_id=Integer, score=Float)
+
+
+class LikeBackend:
+    """Tam metin indeksi olmayan veritabanları için normalize doküman üzerinde LIKE"""
+    name = 'like'
+
+    def ensure(self, connection):
+        return False
+
+    def sync(self, connection, documents, removed_ids):
+        pass
+
+    def match_select(self, terms):
+        return select(DOFSearchDocument.dof_id.label('dof_id'), literal(1.0).label('score'))\
+            .where(and_(*[DOFSearchDocument.content.like(f'%{term}%') for term in terms]))
+
+
+BACKENDS = {
+    MySQLFulltextBackend.name: MySQLFulltextBackend,
+    SQLiteFTS5Backend.name: SQLiteFTS5Backend,
+    LikeBackend.name: LikeBackend,
+}
+
+_backend_cache = {}
+
+
+def _fts5_available(connection):
+    """SQLite derlemesinde FTS5 eklentisi var mı?"""
+    try:
+        connection.exec_driver_sql("CREATE VIRTUAL TABLE IF NOT EXISTS temp.fts5_probe USING fts5(content)")
+        connection.exec_driver_sql("DROP TABLE temp.fts5_probe")
+        return True
+    except Exception:
+        return False
+
+
+def get_backend(connection=None):
+    """Veritabanı türüne (veya SEARCH_BACKEND ayarına) göre arama altyapısını döndürür"""
+    from flask import current_app
+
+    connection = connection or db.session.connection()
+    dialect = connection.dialect.name
+    configured = current_app.config.get('SEARCH_BACKEND')
+
+    if configured not in BACKENDS:
+        if dialect == 'mysql':
+            configured = MySQLFulltextBackend.name
+        elif dialect == 'sqlite':
+            cache_key = ('sqlite_fts5', str(connection.engine.url))
+            if cache_key not in _backend_cache:
+                _backend_cache[cache_key] = _fts5_available(connection)
+            configured = SQLiteFTS5Backend.name if _backend_cache[cache_key] else LikeBackend.name
+        else:
+            configured = LikeBackend.name
+
+    return BACKENDS[configured]()
+
+
+def _build_documents(connection, dof_ids):
+    """Verilen DÖF'ler için (dof_id, normalize içerik) dokümanlarını oluşturur"""
+    columns = [getattr(DOF, field) for field in INDEXED_DOF_FIELDS]
+    dof_rows = connection.execute(select(DOF.id, *columns).where(DOF.id.in_(dof_ids))).all()
+    parts = {row[0]: [value for value in row[1:] if value] for row in dof_rows}
+
+    comment_rows = connection.execute(
+        select(DOFAction.dof_id, DOFAction.comment)
+        .where(DOFAction.dof_id.in_(list(parts)), DOFAction.comment.isnot(None))
+        .order_by(DOFAction.dof_id, DOFAction.created_at, DOFAction.id)
+    ).all() if parts else []
+    for dof_id, comment in comment_rows:
+        parts[dof_id].append(comment)
+
+    return [(dof_id, normalize_text(' '.join(values))[:MAX_DOCUMENT_LENGTH])
+            for dof_id, values in sorted(parts.items())]
+
+
+def reindex_dofs(connection, dof_ids):
+    """
+    Verilen DÖF'lerin dokümanlarını aynı bağlantı (transaction) üzerinde yeniden oluşturur.
+    Artık var olmayan DÖF'lerin dokümanları silinir.
+    """
+    dof_ids = sorted({dof_id for dof_id in dof_ids if dof_id is not None})
+    if not dof_ids:
+        return 0
+
+    table = DOFSearchDocument.__table__
+    backend = get_backend(connection)
+    now = datetime.now()
+    written = 0
+
+    for start in range(0, len(dof_ids), BATCH_SIZE):
+        batch = dof_ids[start:start + BATCH_SIZE]
+        documents = _build_documents(connection, batch)
+        found = {dof_id for dof_id, _ in documents}
+        removed = [dof_id for dof_id in batch if dof_id not in found]
+
+        connection.execute(table.delete().where(table.c.dof_id.in_(batch)))
+        if documents:
+            connection.execute(table.insert(), [
+                {'dof_id': dof_id, 'content': content, 'updated_at': now}
+                for dof_id, content in documents
+            ])
+        backend.sync(connection, documents, removed)
+        written += len(documents)
+
+    return written
+
+
+def _changed_dof_ids(session):
+    """Flush edilen değişikliklerden dokümanı etkilenen DÖF ID'lerini toplar"""
+    dof_ids = set()
+
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, DOF):
+            dof_ids.add(obj.id)
+        elif isinstance(obj, DOFAction) and obj.comment:
+            dof_ids.add(obj.dof_id)
+
+    for obj in session.dirty:
+        if isinstance(obj, DOF):
+            state = sa_inspect(obj)
+            if any(state.attrs[field].history.has_changes() for field in INDEXED_DOF_FIELDS):
+                dof_ids.add(obj.id)
+        elif isinstance(obj, DOFAction):
+            state = sa_inspect(obj)
+            if state.attrs.comment.history.has_changes() or state.attrs.dof_id.history.has_changes():
+                dof_ids.add(obj.dof_id)
+                dof_ids.update(value for value in state.attrs.dof_id.history.deleted if value)
+
+    return dof_ids
+
+
+def _after_flush(session, flush_context):
+    # Yeni DÖF'lerin ID'leri ve yeni yorumlar bu noktada veritabanında
+    dof_ids = _changed_dof_ids(session)
+    if dof_ids:
+        reindex_dofs(session.connection(), dof_ids)
+
+
+def register_search_index_listeners():
+    """Flush dinleyicisini uygulama oturumuna bir kez bağlar"""
+    global _listeners_registered
+    if _listeners_registered:
+        return
+    event.listen(db.session, 'after_flush', _after_flush)
+    _listeners_registered = True
+
+
+def _match_subquery(terms):
+    return get_backend().match_select(terms).subquery('search_matches')
+
+
+def filter_dofs_by_search(query, query_text):
+    """
+    DÖF sorgusunu arama metniyle eşleşen kayıtlara daraltır (sıralamaya dokunmaz)
+
+    Arama metninden terim çıkmazsa sorgu değiştirilmeden döner.
+    """
+    terms = search_terms(query_text)
+    if not terms:
+        return query
+    matches = _match_subquery(terms)
+    return query.filter(DOF.id.in_(select(matches.c.dof_id)))
+
+
+def search_dofs(user, query_text, limit=20, offset=0):
+    """
+    Kullanıcının görebildiği DÖF'ler içinde sıralı arama yapar
+
+    Returns:
+        list: (DOF, skor) çiftleri, en iyi eşleşme önce
+    """
+    from auth_service import AuthService
+
+    terms = search_terms(query_text)
+    if not terms:
+        return []
+
+    matches = _match_subquery(terms)
+    query = DOF.query.join(matches, matches.c.dof_id == DOF.id)
+    query = AuthService.filter_viewable_dofs(user, query)
+    return query.add_columns(matches.c.score)\
+        .order_by(matches.c.score.desc(), DOF.created_at.desc(), DOF.id.desc())\
+        .offset(offset).limit(limit).all()
+
+
+def rebuild_search_index(dry_run=False):
+    """
+    Arama dokümanlarını DÖF tablosundan yeniden oluşturur ve eksik/fazla dokümanları raporlar
+
+    Args:
+        dry_run: True ise sadece sapmalar raporlanır, indeks değiştirilmez
+
+    Returns:
+        dict: DÖF sayısı, eksik ve fazla doküman ID'leri
+    """
+    dof_ids = {row[0] for row in db.session.execute(select(DOF.id)).all()}
+    document_ids = {row[0] for row in db.session.execute(select(DOFSearchDocument.dof_id)).all()}
+
+    missing = sorted(dof_ids - document_ids)
+    extra = sorted(document_ids - dof_ids)
+
+    written = 0
+    if not dry_run:
+        try:
+            connection = db.session.connection()
+            get_backend(connection).ensure(connection)
+            written = reindex_dofs(connection, dof_ids | document_ids)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    return {
+        'total_dofs': len(dof_ids),
+        'missing': missing,
+        'extra': extra,
+        'indexed': written,
+        'rebuilt': not dry_run,
+    }
+
+
+def ensure_search_index():
+    """Arama altyapısını hazırlar; doküman tablosu boşsa (ilk kurulum) DÖF'lerden doldurur"""
+    connection = db.session.connection()
+    get_backend(connection).ensure(connection)
+    db.session.commit()
+
+    if DOFSearchDocument.query.first() is None and DOF.query.first() is not None:
+        return rebuild_search_index()
+    return None
+
+
+# Bu script doğrudan çalıştırıldığında
+if __name__ == "__main__":
+    from app import app
+
+    dry_run = '--dry-run' in sys.argv
+    with app.app_context():
+        print("===== DÖF ARAMA İNDEKSİ =====")
+        print(f"Başlangıç: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}")
+        print(f"Arama altyapısı: {get_backend().name}")
+
+        result = rebuild_search_index(dry_run=dry_run)
+
+        print(f"DÖF sayısı: {result['total_dofs']}")
+        print(f"Eksik doküman: {len(result['missing'])}, fazla doküman: {len(result['extra'])}")
+        if result['rebuilt']:
+            print(f"{result['indexed']} DÖF yeniden indekslendi.")
+        elif result['missing'] or result['extra']:
+            print("--dry-run: indeks değiştirilmedi.")
+
+        print(f"Bitiş: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}")
+        sys.exit(1 if (result['missing'] or result['extra']) and dry_run else 0)
@@ -5,10 +5,62 @@
 DÖF istatistikleri için yardımcı fonksiyonlar
 """
 
+from sqlalchemy import Float
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
 from app import db
 from models import DOFStatus
 
 
+# DÖF durum kodlarının istatistik sözlüğündeki anahtar karşılıkları
+STATUS_KEYS = {
+    DOFStatus.DRAFT: 'draft',
+    DOFStatus.SUBMITTED: 'submitted',
+    DOFStatus.IN_REVIEW: 'in_review',
+    DOFStatus.ASSIGNED: 'assigned',
+    DOFStatus.IN_PROGRESS: 'in_progress',
+    DOFStatus.RESOLVED: 'resolved',
+    DOFStatus.CLOSED: 'closed',
+    DOFStatus.REJECTED: 'rejected',
+    DOFStatus.PLANNING: 'planning',
+    DOFStatus.IMPLEMENTATION: 'implementation',
+    DOFStatus.COMPLETED: 'completed',
+    DOFStatus.SOURCE_REVIEW: 'source_review',
+}
+
+
+class seconds_between(FunctionElement):
+    """
+    İki tarih kolonu arasındaki farkı saniye olarak veren SQL ifadesi
+    (MySQL: TIMESTAMPDIFF, SQLite: julianday farkı, PostgreSQL: EXTRACT(EPOCH))
+
+    Kullanım:
+        func.avg(seconds_between(DOF.created_at, DOF.closed_at))
+    """
+    type = Float()
+    inherit_cache = True
+    name = 'seconds_between'
+
+
+@compiles(seconds_between)
+def _seconds_between_default(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return f"((julianday({compiler.process(end, **kw)}) - julianday({compiler.process(start, **kw)})) * 86400.0)"
+
+
+@compiles(seconds_between, 'mysql')
+def _seconds_between_mysql(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return f"TIMESTAMPDIFF(SECOND, {compiler.process(start, **kw)}, {compiler.process(end, **kw)})"
+
+
+@compiles(seconds_between, 'postgresql')
+def _seconds_between_postgresql(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return f"EXTRACT(EPOCH FROM ({compiler.process(end, **kw)} - {compiler.process(start, **kw)}))"
+
+
 def get_default_status_dict():
     """
     Varsayılan DÖF durum sayılarını içeren sözlük
@@ -30,6 +82,64 @@ def get_default_status_dict():
     }
 
 
+def add_summary_totals(counts):
+    """
+    Dashboard kartlarında kullanılan özet toplamları sözlüğe ekler
+    """
+    # Devam Eden: Aktif durumda olan DÖF'ler (taslak ve kapatılan hariç)
+    counts['in_progress_total'] = (
+        counts['submitted'] + counts['in_review'] + counts['assigned'] +
+        counts['in_progress'] + counts['planning'] + counts['implementation'] +
+        counts['completed'] + counts['source_review']
+    )
+    
+    # Atanmayı Bekleyen: İncelemede olan DÖF'ler (2. aşama)
+    counts['pending_approval'] = counts['in_review']
+    
+    # Kapatılan: Tamamlanan ve çözülmüş DÖF'ler
+    counts['closed_total'] = counts['closed'] + counts['resolved']
+    
+    return counts
+
+
+def count_dof_statuses(query, extra_counts=None):
+    """
+    Verilen DÖF sorgusunun durum dağılımını tek bir toplama sorgusu ile hesaplar.
+    DÖF satırları Python tarafına hiç yüklenmez; her durum için koşullu
+    SUM(CASE ...) sütunu üretilir ve tek satırlık sonuç okunur.
+    
+    Args:
+        query: Filtrelenmiş DÖF sorgusu (DOF.query veya db.session.query(DOF))
+        extra_counts: {anahtar: koşul} - aynı sorguda sayılacak ek koşullar
+        
+    Returns:
+        Durum sayıları, 'total', özet toplamlar ve ek sayaçları içeren sözlük
+    """
+    from models import DOF
+    from sqlalchemy import func, case
+    
+    extra_counts = extra_counts or {}
+    
+    columns = [func.count(DOF.id)]
+    columns += [func.sum(case((DOF.status == status, 1), else_=0)) for status in STATUS_KEYS]
+    columns += [func.sum(case((condition, 1), else_=0)) for condition in extra_counts.values()]
+    
+    row = query.with_entities(*columns).order_by(None).one()
+    
+    counts = get_default_status_dict()
+    counts['total'] = int(row[0] or 0)
+    
+    status_values = row[1:1 + len(STATUS_KEYS)]
+    for key, value in zip(STATUS_KEYS.values(), status_values):
+        counts[key] = int(value or 0)
+    
+    extra_values = row[1 + len(STATUS_KEYS):]
+    for key, value in zip(extra_counts.keys(), extra_values):
+        counts[key] = int(value or 0)
+    
+    return add_summary_totals(counts)
+
+
 def get_dof_status_counts(department_id=None, user_id=None, current_user=None):
     """
     DÖF'lerin durum bazında sayılarını kullanıcı yetkisine göre filtreli şekilde getir
@@ -45,8 +155,8 @@ def get_dof_status_counts(department_id=None, user_id=None, current_user=None):
     Returns:
         DöF sayılarını içeren sözlük
     """
-    from models import DOF, User, UserRole
-    from sqlalchemy import func, or_
+    from models import DOF, UserRole
+    from sqlalchemy import or_
     from flask import current_app
     import sys
     
@@ -57,19 +167,11 @@ def get_dof_status_counts(department_id=None, user_id=None, current_user=None):
     if user_id:
         base_query = base_query.filter(DOF.created_by == user_id)
     elif department_id:
-        # Departman kullanıcılarını bul
-        dept_users = User.query.filter_by(department_id=department_id).all()
-        dept_user_ids = [user.id for user in dept_users]
-        
-        # Departman filtresi uygula
-        if dept_user_ids:
-            base_query = base_query.filter(or_(
-                DOF.department_id == department_id,
-                DOF.created_by.in_(dept_user_ids)
-            ))
-        else:
-            # Sadece departmana atanan DÖF'leri filtrele
-            base_query = base_query.filter(DOF.department_id == department_id)
+        # Departmana atanan VEYA departmanın açtığı DÖF'ler
+        base_query = base_query.filter(or_(
+            DOF.department_id == department_id,
+            DOF.source_department_id == department_id
+        ))
     
     # Eğer current_user belirtilmişse ve normal admin veya kalite yöneticisi değilse,
     # yönetilen departmanların DÖF'lerini göster
@@ -93,50 +195,7 @@ def get_dof_status_counts(department_id=None, user_id=None, current_user=None):
         except Exception as e:
             current_app.logger.error(f"DÖF özet sayıları filtreleme hatası: {str(e)}")
     
-    # Duruma göre gruplama için yeniden sorgu oluştur
-    query = db.session.query(DOF.status, func.count(DOF.id)).select_from(base_query.subquery())
-    
-    # Duruma göre gruplama ve sonuç
-    result = query.group_by(DOF.status).all()
-    
-    # Boş sonuç sözlüğü oluştur
-    counts = get_default_status_dict()
-    
-    # Toplam sayıyı hesapla
-    total = 0
-    
-    # Durum sayılarını doldur
-    for status, count in result:
-        total += count
-        if status == DOFStatus.DRAFT:
-            counts['draft'] = count
-        elif status == DOFStatus.SUBMITTED:
-            counts['submitted'] = count
-        elif status == DOFStatus.IN_REVIEW:
-            counts['in_review'] = count
-        elif status == DOFStatus.ASSIGNED:
-            counts['assigned'] = count
-        elif status == DOFStatus.IN_PROGRESS:
-            counts['in_progress'] = count
-        elif status == DOFStatus.RESOLVED:
-            counts['resolved'] = count
-        elif status == DOFStatus.CLOSED:
-            counts['closed'] = count
-        elif status == DOFStatus.REJECTED:
-            counts['rejected'] = count
-        elif status == DOFStatus.PLANNING:
-            counts['planning'] = count
-        elif status == DOFStatus.IMPLEMENTATION:
-            counts['implementation'] = count
-        elif status == DOFStatus.COMPLETED:
-            counts['completed'] = count
-        elif status == DOFStatus.SOURCE_REVIEW:
-            counts['source_review'] = count
-    
-    # Toplam değerini güncelle
-    counts['total'] = total
-    
-    return counts
+    return count_dof_statuses(base_query)
 
 
 def get_dof_status_counts_for_multiple_departments(department_ids):
@@ -144,64 +203,12 @@ def get_dof_status_counts_for_multiple_departments(department_ids):
     Birden fazla departmana ait DÖF'lerin durum bazında sayılarını getir
     Bölge müdürleri gibi birden fazla departmanı yöneten kullanıcılar için
     """
-    from models import DOF, User
-    from sqlalchemy import func, or_
+    from status_counters import get_counter_status_counts
     
     if not department_ids:
         # Boş liste gönderilmişse boş sonuç döndür
         return get_default_status_dict()
     
-    # Başlangıç sorgusu
-    query = db.session.query(DOF.status, func.count(DOF.id))
-    
-    # Departmanlara atanan veya departman üyeleri tarafından oluşturulan DÖF'leri filtrele
-    # Önce tüm departmanlardaki kullanıcıları bul
-    dept_users = User.query.filter(User.department_id.in_(department_ids)).all()
-    dept_user_ids = [user.id for user in dept_users]
-    
-    # Filtreleme yap
-    query = query.filter(or_(
-        DOF.department_id.in_(department_ids),  # Bu departmanlardan birine atanan DÖF'ler
-        DOF.created_by.in_(dept_user_ids)  # Bu departmanlardaki kullanıcıların oluşturduğu DÖF'ler
-    ))
-    
-    # Duruma göre gruplama ve sonuç
-    result = query.group_by(DOF.status).all()
-    
-    counts = get_default_status_dict()
-    
-    # Toplam sayıyı hesapla
-    total = 0
-    
-    # Sonuçları counts sözlüğüne ekle
-    for status, count in result:
-        total += count
-        if status == DOFStatus.DRAFT:
-            counts['draft'] = count
-        elif status == DOFStatus.SUBMITTED:
-            counts['submitted'] = count
-        elif status == DOFStatus.IN_REVIEW:
-            counts['in_review'] = count
-        elif status == DOFStatus.ASSIGNED:
-            counts['assigned'] = count
-        elif status == DOFStatus.IN_PROGRESS:
-            counts['in_progress'] = count
-        elif status == DOFStatus.RESOLVED:
-            counts['resolved'] = count
-        elif status == DOFStatus.CLOSED:
-            counts['closed'] = count
-        elif status == DOFStatus.REJECTED:
-            counts['rejected'] = count
-        elif status == DOFStatus.PLANNING:
-            counts['planning'] = count
-        elif status == DOFStatus.IMPLEMENTATION:
-            counts['implementation'] = count
-        elif status == DOFStatus.COMPLETED:
-            counts['completed'] = count
-        elif status == DOFStatus.SOURCE_REVIEW:
-            counts['source_review'] = count
-    
-    # Toplam değerini güncelle
-    counts['total'] = total
-    
-    return counts
+    # Departmanlara atanan veya departman üyeleri tarafından oluşturulan DÖF'ler
+    # durum sayaçları tablosundan departman sayısı kadar satır okunarak hesaplanır
+    return get_counter_status_counts(department_ids=department_ids, source_department_ids=department_ids)
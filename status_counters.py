@@ -0,0 +1,350 @@
+"""
+DÖF Durum Sayaçları
+-------------------
+dof_status_counters tablosunu (departman, kaynak departman, durum) anahtarıyla
+artımlı olarak güncel tutan modül.
+
+- Her session flush'ında eklenen, silinen ve durumu/departmanı değişen DÖF'ler
+  tespit edilir ve sayaç farkları aynı transaction içinde upsert edilir.
+  Böylece review_dof, add_dof_action, resolve_dof, mark_as_completed,
+  review_action_plan, review_source ve close_dof gibi tüm durum geçişleri
+  ayrı bir kod eklemeden sayaçlara yansır.
+- Okumalar DÖF tablosunu taramak yerine departman sayısı kadar satır okur.
+- rebuild_status_counters() sayaçları DÖF tablosundan yeniden hesaplar ve
+  tespit edilen sapmaları raporlar (doğrudan çalıştırılabilir).
+- check_status_counters() her gece zamanlayıcıdan çalışır: sapmaları loglar ve
+  STATUS_COUNTER_AUTO_REPAIR açıksa sayaçları yeniden oluşturur.
+
+Kaynak departman, DÖF'ün source_department_id kolonudur (oluşturulduğu anda
+oluşturan kullanıcının departmanı; aynı flush dinleyicisi yeni DÖF'lerde boşsa
+doldurur). Departmanı olmayan DÖF/kullanıcılar için 0 değeri kullanılır (NULL
+değerler unique anahtarda çakışma üretmediği için).
+
+Kullanım:
+    python status_counters.py            # sayaçları yeniden oluştur
+    python status_counters.py --dry-run  # sadece sapmaları raporla
+"""
+
+import sys
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import event, select, func, or_, inspect as sa_inspect
+
+from extensions import db
+from models import DOF, User, DOFStatusCounter
+
+# Sayaç anahtarını etkileyen DÖF alanları
+# (İlişkili DÖF'ler sayaçlara dahil edilmez; diğer tüm sayımlarla tutarlı)
+TRACKED_ATTRIBUTES = ('status', 'department_id', 'source_department_id', 'is_related')
+
+_listeners_registered = False
+
+
+def _is_counted(is_related):
+    return not is_related
+
+
+def _counter_key(department_id, source_department_id, status):
+    return (department_id or 0, source_department_id or 0, status)
+
+
+def _creator_departments(connection, user_ids):
+    """Kullanıcı ID -> departman ID eşlemesini tek sorguda getirir"""
+    user_ids = {uid for uid in user_ids if uid is not None}
+    if not user_ids:
+        return {}
+    rows = connection.execute(
+        select(User.id, User.department_id).where(User.id.in_(user_ids))
+    ).all()
+    return {row.id: row.department_id for row in rows}
+
+
+def stamp_source_departments(session):
+    """Açan departmanı boş olan yeni DÖF'lere oluşturanın departmanını yazar"""
+    new_dofs = [obj for obj in session.new
+                if isinstance(obj, DOF) and obj.source_department_id is None and obj.created_by is not None]
+    if not new_dofs:
+        return
+    creator_departments = _creator_departments(session.connection(), [obj.created_by for obj in new_dofs])
+    for obj in new_dofs:
+        obj.source_department_id = creator_departments.get(obj.created_by)
+
+
+def _collect_deltas(session):
+    """Flush edilecek DÖF değişikliklerinden sayaç farklarını hesaplar"""
+    new_dofs = [obj for obj in session.new if isinstance(obj, DOF)]
+    deleted_dofs = [obj for obj in session.deleted if isinstance(obj, DOF) and obj.id is not None]
+    changed_dofs = []
+    for obj in session.dirty:
+        if not isinstance(obj, DOF) or obj.id is None:
+            continue
+        state = sa_inspect(obj)
+        if any(state.attrs[name].history.has_changes() for name in TRACKED_ATTRIBUTES):
+            changed_dofs.append(obj)
+
+    if not (new_dofs or deleted_dofs or changed_dofs):
+        return Counter()
+
+    connection = session.connection()
+
+    # Eski değerler veritabanından okunur; sayaçlar veritabanındaki hali yansıtır.
+    # Satırlar kilitlenerek okunur: aynı DÖF'ü değiştiren eşzamanlı transaction
+    # commit edene kadar beklenir ve onun yazdığı durum eski değer kabul edilir
+    # (kilitsiz okumada iki transaction da aynı eski durumu düşüp sayaç kayardı).
+    old_rows = {}
+    existing_ids = [obj.id for obj in deleted_dofs + changed_dofs]
+    if existing_ids:
+        rows = connection.execute(
+            select(DOF.id, DOF.status, DOF.department_id, DOF.source_department_id, DOF.is_related)
+            .where(DOF.id.in_(existing_ids))
+            .with_for_update()
+        ).all()
+        old_rows = {row.id: row for row in rows}
+
+    deltas = Counter()
+
+    def add_current(obj, sign):
+        status = obj.status if obj.status is not None else 0  # DOFStatus.DRAFT varsayılanı
+        if _is_counted(obj.is_related):
+            deltas[_counter_key(obj.department_id, obj.source_department_id, status)] += sign
+
+    def add_old(dof_id, sign):
+        row = old_rows.get(dof_id)
+        if row is not None and row.status is not None and _is_counted(row.is_related):
+            deltas[_counter_key(row.department_id, row.source_department_id, row.status)] += sign
+
+    for obj in new_dofs:
+        add_current(obj, 1)
+    for obj in deleted_dofs:
+        add_old(obj.id, -1)
+    for obj in changed_dofs:
+        add_old(obj.id, -1)
+        add_current(obj, 1)
+
+    return Counter({key: delta for key, delta in deltas.items() if delta != 0})
+
+
+def _upsert_statement(connection, values):
+    """Veritabanı türüne göre 'ekle ya da artır' ifadesi üretir"""
+    table = DOFStatusCounter.__table__
+    dialect = connection.dialect.name
+
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table).values(values)
+        return stmt.on_duplicate_key_update(
+            dof_count=table.c.dof_count + stmt.inserted.dof_count,
+            updated_at=stmt.inserted.updated_at
+        )
+
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(table).values(values)
+    return stmt.on_conflict_do_update(
+        index_elements=['department_id', 'source_department_id', 'status'],
+        set_={
+            'dof_count': table.c.dof_count + stmt.excluded.dof_count,
+            'updated_at': stmt.excluded.updated_at,
+        }
+    )
+
+
+def apply_counter_deltas(connection, deltas):
+    """Sayaç farklarını verilen bağlantı (transaction) üzerinde uygular"""
+    if not deltas:
+        return
+    now = datetime.now()
+    values = [
+        {
+            'department_id': department_id,
+            'source_department_id': source_department_id,
+            'status': status,
+            'dof_count': delta,
+            'updated_at': now,
+        }
+        for (department_id, source_department_id, status), delta in sorted(deltas.items())
+    ]
+    connection.execute(_upsert_statement(connection, values))
+
+
+def _before_flush(session, flush_context, instances):
+    stamp_source_departments(session)
+    deltas = _collect_deltas(session)
+    if deltas:
+        apply_counter_deltas(session.connection(), deltas)
+
+
+def register_status_counter_listeners():
+    """Flush dinleyicisini uygulama oturumuna bir kez bağlar"""
+    global _listeners_registered
+    if _listeners_registered:
+        return
+    event.listen(db.session, 'before_flush', _before_flush)
+    _listeners_registered = True
+
+
+def _actual_counts():
+    """Sayaçların olması gereken değerlerini DÖF tablosundan hesaplar"""
+    department_key = func.coalesce(DOF.department_id, 0)
+    source_key = func.coalesce(DOF.source_department_id, 0)
+    rows = db.session.query(department_key, source_key, DOF.status, func.count(DOF.id))\
+        .filter(DOF.is_related == False, DOF.status.isnot(None))\
+        .group_by(department_key, source_key, DOF.status)\
+        .all()
+    return {(dept, source, status): count for dept, source, status, count in rows}
+
+
+def rebuild_status_counters(dry_run=False):
+    """
+    Sayaçları DÖF tablosundan yeniden hesaplar ve sapmaları raporlar
+
+    Args:
+        dry_run: True ise sadece sapmalar raporlanır, tablo değiştirilmez
+
+    Returns:
+        dict: Kontrol edilen anahtar sayısı ve sapma listesi
+    """
+    actual = _actual_counts()
+    stored = {
+        (row.department_id, row.source_department_id, row.status): row.dof_count
+        for row in DOFStatusCounter.query.all()
+    }
+
+    drift = []
+    for key in sorted(set(actual) | set(stored)):
+        expected = actual.get(key, 0)
+        current = stored.get(key, 0)
+        if expected != current:
+            drift.append({
+                'department_id': key[0],
+                'source_department_id': key[1],
+                'status': key[2],
+                'stored': current,
+                'actual': expected,
+            })
+
+    if drift and not dry_run:
+        try:
+            DOFStatusCounter.query.delete()
+            now = datetime.now()
+            db.session.add_all([
+                DOFStatusCounter(department_id=dept, source_department_id=source,
+                                 status=status, dof_count=count, updated_at=now)
+                for (dept, source, status), count in actual.items() if count
+            ])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    return {
+        'total_keys': len(actual),
+        'total_dofs': sum(actual.values()),
+        'drift': drift,
+        'rebuilt': bool(drift) and not dry_run,
+    }
+
+
+def check_status_counters():
+    """
+    Sayaçları DÖF tablosuyla karşılaştırır (zamanlanmış görev)
+
+    Sapma varsa loglanır; STATUS_COUNTER_AUTO_REPAIR açıksa sayaçlar
+    yeniden oluşturulur.
+
+    Returns:
+        dict: rebuild_status_counters sonucu
+    """
+    from flask import current_app
+
+    result = rebuild_status_counters(dry_run=True)
+    if not result['drift']:
+        current_app.logger.info(f"DÖF durum sayaçları tutarlı: {result['total_keys']} anahtar, "
+                                f"{result['total_dofs']} DÖF")
+        return result
+
+    for item in result['drift']:
+        current_app.logger.warning(
+            f"DÖF durum sayacı sapması: departman={item['department_id']} "
+            f"kaynak={item['source_department_id']} durum={item['status']}: "
+            f"sayaç={item['stored']} gerçek={item['actual']}")
+
+    if current_app.config.get('STATUS_COUNTER_AUTO_REPAIR', True):
+        result = rebuild_status_counters()
+        current_app.logger.warning(f"DÖF durum sayaçları yeniden oluşturuldu: "
+                                   f"{len(result['drift'])} anahtarda sapma vardı")
+    else:
+        current_app.logger.warning(f"DÖF durum sayaçlarında {len(result['drift'])} anahtarda sapma var "
+                                   f"(otomatik onarım kapalı; python status_counters.py ile onarılabilir)")
+    return result
+
+
+def ensure_status_counters():
+    """Sayaç tablosu boşsa (ilk kurulum) DÖF tablosundan doldurur"""
+    if DOFStatusCounter.query.first() is None and DOF.query.first() is not None:
+        return rebuild_status_counters()
+    return None
+
+
+def get_counter_status_counts(department_ids=None, source_department_ids=None):
+    """
+    Durum sayılarını sayaç tablosundan okur
+
+    Args:
+        department_ids: Atanan departman filtresi
+        source_department_ids: Açan departman filtresi
+        (İkisi birlikte verilirse VEYA ile birleştirilir; hiçbiri verilmezse tüm DÖF'ler)
+
+    Returns:
+        stats_utils.count_dof_statuses ile aynı yapıda sözlük
+    """
+    from stats_utils import STATUS_KEYS, get_default_status_dict, add_summary_totals
+
+    query = db.session.query(DOFStatusCounter.status, func.sum(DOFStatusCounter.dof_count))
+
+    conditions = []
+    if department_ids is not None:
+        conditions.append(DOFStatusCounter.department_id.in_(department_ids))
+    if source_department_ids is not None:
+        conditions.append(DOFStatusCounter.source_department_id.in_(source_department_ids))
+    if conditions:
+        query = query.filter(or_(*conditions))
+
+    counts = get_default_status_dict()
+    for status, count in query.group_by(DOFStatusCounter.status).all():
+        count = int(count or 0)
+        counts['total'] += count
+        key = STATUS_KEYS.get(status)
+        if key:
+            counts[key] = count
+
+    return add_summary_totals(counts)
+
+
+# Bu script doğrudan çalıştırıldığında
+if __name__ == "__main__":
+    from app import app
+
+    dry_run = '--dry-run' in sys.argv
+    with app.app_context():
+        print("===== DÖF DURUM SAYAÇLARI MUTABAKATI =====")
+        print(f"Başlangıç: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}")
+
+        result = rebuild_status_counters(dry_run=dry_run)
+
+        print(f"Kontrol edilen anahtar: {result['total_keys']} ({result['total_dofs']} DÖF)")
+        print(f"Sapma bulunan anahtar: {len(result['drift'])}")
+        for item in result['drift']:
+            print(f"  departman={item['department_id']} kaynak={item['source_department_id']} "
+                  f"durum={item['status']}: sayaç={item['stored']} gerçek={item['actual']}")
+
+        if result['rebuilt']:
+            print("Sayaçlar yeniden oluşturuldu.")
+        elif dry_run and result['drift']:
+            print("--dry-run: sayaçlar değiştirilmedi.")
+
+        print(f"Bitiş: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}")
+        sys.exit(1 if result['drift'] and dry_run else 0)
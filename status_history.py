@@ -0,0 +1,221 @@
+"""
+DÖF Durum Geçmişi
+-----------------
+dof_status_history tablosuna her durum geçişini (önceki durum, yeni durum,
+zaman, kullanıcı) yazan modül. Tablo sadece eklemeyle büyür; satırlar
+güncellenmez ve DÖF silinse de silinmez.
+
+- Her session flush'ında yeni DÖF'ler için oluşturma satırı (önceki durum
+  boş) ve durumu değişen DÖF'ler için geçiş satırı aynı transaction içinde
+  eklenir. Böylece tüm iş akışı adımları ayrı bir kod eklemeden kaydedilir.
+- backfill_status_history() geçmişi olmayan DÖF'ler için satırları
+  DOFAction.old_status/new_status kayıtlarından ve DÖF oluşturma tarihinden
+  üretir (doğrudan çalıştırılabilir).
+
+Süre analizleri bu tablo üzerinden cycle_analytics modülünde yapılır.
+
+Kullanım:
+    python status_history.py            # eksik geçmişi doldur
+    python status_history.py --dry-run  # sadece eksik DÖF sayısını raporla
+"""
+
+import sys
+from datetime import datetime
+
+from sqlalchemy import event, select, inspect as sa_inspect
+
+from extensions import db
+from models import DOF, DOFAction, DOFStatus, DOFStatusHistory
+
+# Aksiyon tipi: durum değişikliği
+STATUS_CHANGE_ACTION = 2
+
+BATCH_SIZE = 500
+
+_PENDING_STATUS_KEY = 'dof_status_history_old'
+
+_listeners_registered = False
+
+
+def _current_user_id():
+    """İsteği yapan kullanıcı (istek dışında veya anonim ise None)"""
+    try:
+        from flask_login import current_user
+        if current_user and current_user.is_authenticated:
+            return current_user.id
+    except Exception:
+        pass
+    return None
+
+
+def _status_changed_dofs(session):
+    """Durumu değişen kayıtlı DÖF'ler"""
+    changed = []
+    for obj in session.dirty:
+        if isinstance(obj, DOF) and obj.id is not None and obj.status is not None \
+                and sa_inspect(obj).attrs.status.history.has_changes():
+            changed.append(obj)
+    return changed
+
+
+def _before_flush(session, flush_context, instances):
+    # Eski durum veritabanından okunur (commit sonrası süresi dolan alanlarda
+    # nesne geçmişi önceki değeri içermez)
+    changed = _status_changed_dofs(session)
+    if not changed:
+        return
+
+    rows = session.connection().execute(
+        select(DOF.id, DOF.status).where(DOF.id.in_([obj.id for obj in changed]))
+    ).all()
+    session.info.setdefault(_PENDING_STATUS_KEY, {}).update({row.id: row.status for row in rows})
+
+
+def _after_flush(session, flush_context):
+    # Yeni DÖF'lerin ID'leri bu noktada atanmış durumda
+    old_statuses = session.info.pop(_PENDING_STATUS_KEY, {})
+    now = datetime.now()
+    rows = []
+
+    for obj in session.new:
+        if isinstance(obj, DOF) and obj.id is not None:
+            rows.append({
+                'dof_id': obj.id,
+                'from_status': None,
+                'to_status': obj.status if obj.status is not None else DOFStatus.DRAFT,
+                'at': obj.created_at or now,
+                'user_id': obj.created_by,
+            })
+
+    user_id = None
+    for obj in _status_changed_dofs(session):
+        from_status = old_statuses.get(obj.id)
+        if from_status == obj.status:
+            continue
+        if user_id is None:
+            user_id = _current_user_id()
+        rows.append({
+            'dof_id': obj.id,
+            'from_status': from_status,
+            'to_status': obj.status,
+            'at': now,
+            'user_id': user_id,
+        })
+
+    if rows:
+        session.connection().execute(DOFStatusHistory.__table__.insert(), rows)
+
+
+def register_status_history_listeners():
+    """Flush dinleyicilerini uygulama oturumuna bir kez bağlar"""
+    global _listeners_registered
+    if _listeners_registered:
+        return
+    event.listen(db.session, 'before_flush', _before_flush)
+    event.listen(db.session, 'after_flush', _after_flush)
+    _listeners_registered = True
+
+
+def _history_from_actions(dof, actions):
+    """Bir DÖF'ün geçmiş satırlarını oluşturma kaydı ve durum değişikliği aksiyonlarından üretir"""
+    initial_status = actions[0].old_status if actions and actions[0].old_status is not None else dof.status
+    rows = [{
+        'dof_id': dof.id,
+        'from_status': None,
+        'to_status': initial_status if initial_status is not None else DOFStatus.DRAFT,
+        'at': dof.created_at or (actions[0].created_at if actions else datetime.now()),
+        'user_id': dof.created_by,
+    }]
+    for action in actions:
+        if action.new_status is None or action.created_at is None:
+            continue
+        rows.append({
+            'dof_id': dof.id,
+            'from_status': action.old_status,
+            'to_status': action.new_status,
+            'at': action.created_at,
+            'user_id': action.user_id,
+        })
+    return rows
+
+
+def backfill_status_history(dry_run=False):
+    """
+    Geçmişi olmayan DÖF'ler için durum geçmişini aksiyon kayıtlarından oluşturur
+
+    Args:
+        dry_run: True ise sadece eksik DÖF'ler raporlanır, tablo değiştirilmez
+
+    Returns:
+        dict: Eksik DÖF sayısı ve eklenen satır sayısı
+    """
+    dof_ids = {row[0] for row in db.session.execute(select(DOF.id)).all()}
+    covered = {row[0] for row in db.session.execute(select(DOFStatusHistory.dof_id).distinct()).all()}
+    missing = sorted(dof_ids - covered)
+
+    written = 0
+    if missing and not dry_run:
+        try:
+            connection = db.session.connection()
+            for start in range(0, len(missing), BATCH_SIZE):
+                batch = missing[start:start + BATCH_SIZE]
+                dofs = connection.execute(
+                    select(DOF.id, DOF.status, DOF.created_at, DOF.created_by).where(DOF.id.in_(batch))
+                ).all()
+                actions = {}
+                for action in connection.execute(
+                    select(DOFAction.dof_id, DOFAction.old_status, DOFAction.new_status,
+                           DOFAction.created_at, DOFAction.user_id)
+                    .where(DOFAction.dof_id.in_(batch),
+                           DOFAction.action_type == STATUS_CHANGE_ACTION,
+                           DOFAction.new_status.isnot(None))
+                    .order_by(DOFAction.dof_id, DOFAction.created_at, DOFAction.id)
+                ):
+                    actions.setdefault(action.dof_id, []).append(action)
+
+                rows = []
+                for dof in dofs:
+                    rows.extend(_history_from_actions(dof, actions.get(dof.id, [])))
+                if rows:
+                    connection.execute(DOFStatusHistory.__table__.insert(), rows)
+                written += len(rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    return {
+        'total_dofs': len(dof_ids),
+        'missing': len(missing),
+        'written': written,
+        'backfilled': bool(missing) and not dry_run,
+    }
+
+
+def ensure_status_history():
+    """Geçmiş tablosu boşsa (ilk kurulum) aksiyon kayıtlarından doldurur"""
+    if DOFStatusHistory.query.first() is None and DOF.query.first() is not None:
+        return backfill_status_history()
+    return None
+
+
+# Bu script doğrudan çalıştırıldığında
+if __name__ == "__main__":
+    from app import app
+
+    dry_run = '--dry-run' in sys.argv
+    with app.app_context():
+        print("===== DÖF DURUM GEÇMİŞİ =====")
+        print(f"Başlangıç: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}")
+
+        result = backfill_status_history(dry_run=dry_run)
+
+        print(f"DÖF sayısı: {result['total_dofs']}")
+        print(f"Geçmişi olmayan DÖF: {result['missing']}")
+        if result['backfilled']:
+            print(f"{result['written']} geçmiş satırı eklendi.")
+        elif dry_run and result['missing']:
+            print("--dry-run: geçmiş tablosu değiştirilmedi.")
+
+        print(f"Bitiş: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}")
+        sys.exit(1 if result['missing'] and dry_run else 0)
@@ -0,0 +1,201 @@
+"""
+DÖF Satır Akışı (CSV / NDJSON)
+------------------------------
+/api/dofs/export.csv ve /api/dofs/export.ndjson uçlarının satır üreticisi.
+
+- Filtreler Excel dışa aktarımıyla aynıdır (apply_dof_export_filters);
+  görünürlük AuthService.filter_viewable_dofs ile uygulanır.
+- Sorgu sunucu tarafı imleçle (stream_results, yield_per) çalıştırılır;
+  ORM nesnesi oluşturulmaz, sadece gereken kolonlar okunur. Başlık satırı
+  sorgu çalışmadan, ilk satır okunur okunmaz gönderilir; sonraki satırlar
+  ~CHUNK_SIZE'lık parçalar halinde akar. Bellekte en fazla bir parti satır ve bir çıktı parçası bulunur.
+- actions=True ile DÖF'ler işlemleriyle (DOFAction) dış birleştirilir: her
+  işlem ayrı satırdır, DÖF kolonları tekrarlanır; işlemi olmayan DÖF tek
+  satır olarak boş işlem kolonlarıyla gelir.
+- Satırlar en yeni DÖF önce (id sıralı) gelir; işlemler oluşturulma sırasıyla.
+- Ad kolonları (*_name) Türkçe karakterleriyle gerçek adlardır; kullanıcı ve
+  departman adları akış başında tek sorguyla yüklenir. Boş veya bulunamayan
+  id'ler için ad null'dır (yer tutucu metin yazılmaz).
+
+Kullanım (route içinde):
+    return Response(stream_with_context(stream_dof_rows(query, 'csv')), mimetype='text/csv')
+"""
+
+import csv
+import io
+import json
+
+from flask import current_app
+
+from extensions import db
+from models import DOF, DOFAction, User, Department
+
+# Sunucu tarafı imleçten bir seferde alınan satır sayısı
+FETCH_SIZE = 1000
+
+# Çıktı bu boyuta ulaşınca akışa verilir
+CHUNK_SIZE = 64 * 1024
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+DOF_COLUMNS = ['id', 'code', 'title', 'description', 'status', 'status_name', 'dof_type', 'dof_type_name',
+               'dof_source', 'dof_source_name', 'department_id', 'department_name', 'source_department_id',
+               'created_by', 'created_by_name', 'assigned_to', 'assigned_to_name', 'created_at', 'updated_at',
+               'due_date', 'closed_at', 'deadline', 'completion_date', 'root_cause1', 'root_cause2',
+               'root_cause3', 'root_cause4', 'root_cause5', 'action_plan']
+
+ACTION_COLUMNS = ['action_id', 'action_user_id', 'action_user_name', 'action_comment',
+                  'action_old_status', 'action_new_status', 'action_created_at']
+
+
+def _selected_columns(actions):
+    columns = [DOF.id, DOF.code, DOF.title, DOF.description, DOF.status, DOF.dof_type, DOF.dof_source,
+               DOF.department_id, DOF.source_department_id, DOF.created_by, DOF.assigned_to,
+               DOF.created_at, DOF.updated_at, DOF.due_date, DOF.closed_at, DOF.deadline,
+               DOF.completion_date, DOF.root_cause1, DOF.root_cause2, DOF.root_cause3,
+               DOF.root_cause4, DOF.root_cause5, DOF.action_plan]
+    if actions:
+        columns += [DOFAction.id.label('action_id'), DOFAction.user_id.label('action_user_id'),
+                    DOFAction.comment.label('action_comment'), DOFAction.old_status.label('action_old_status'),
+                    DOFAction.new_status.label('action_new_status'),
+                    DOFAction.created_at.label('action_created_at')]
+    return columns
+
+
+def build_stream_statement(query, actions=False):
+    """
+    Filtrelenmiş DÖF sorgusundan akış için kolon seçen, sıralı ifadeyi üretir
+
+    Args:
+        query: Görünürlük filtresi uygulanmış DOF sorgusu
+        actions: True ise işlemlerle dış birleştirilir (işlem başına bir satır)
+    """
+    query = query.order_by(None)
+    if actions:
+        query = query.outerjoin(DOFAction, DOFAction.dof_id == DOF.id)\
+                     .order_by(DOF.id.desc(), DOFAction.created_at, DOFAction.id)
+    else:
+        query = query.order_by(DOF.id.desc())
+    return query.with_entities(*_selected_columns(actions)).statement
+
+
+class _Names:
+    """Kullanıcı ve departman adlarını tek seferde yükler; bulunamayan id için None döner"""
+
+    def __init__(self):
+        self.users = {
+            row.id: f"{row.first_name} {row.last_name}"
+            for row in db.session.query(User.id, User.first_name, User.last_name)
+        }
+        self.departments = dict(db.session.query(Department.id, Department.name))
+
+    def user(self, user_id):
+        return self.users.get(user_id)
+
+    def department(self, department_id):
+        return self.departments.get(department_id)
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def _row_values(row, names, actions):
+    """Sonuç satırını kolon sırasıyla değer listesine çevirir (tarihler ISO 8601)"""
+    from export_utils import get_dof_status_name, get_dof_type_name, get_dof_source_name
+
+    values = [
+        row.id,
+        row.code or f"DOF-{row.id}",
+        row.title,
+        row.description,
+        row.status,
+        get_dof_status_name(row.status),
+        row.dof_type,
+        get_dof_type_name(row.dof_type),
+        row.dof_source,
+        get_dof_source_name(row.dof_source),
+        row.department_id,
+        names.department(row.department_id),
+        row.source_department_id,
+        row.created_by,
+        names.user(row.created_by),
+        row.assigned_to,
+        names.user(row.assigned_to),
+        _iso(row.created_at),
+        _iso(row.updated_at),
+        _iso(row.due_date),
+        _iso(row.closed_at),
+        _iso(row.deadline),
+        _iso(row.completion_date),
+        row.root_cause1,
+        row.root_cause2,
+        row.root_cause3,
+        row.root_cause4,
+        row.root_cause5,
+        row.action_plan,
+    ]
+    if actions:
+        values += [
+            row.action_id,
+            row.action_user_id,
+            names.user(row.action_user_id),
+            row.action_comment,
+            row.action_old_status,
+            row.action_new_status,
+            _iso(row.action_created_at),
+        ]
+    return values
+
+
+def stream_dof_rows(query, fmt, actions=False):
+    """
+    Filtrelenmiş DÖF'leri CSV veya NDJSON olarak parça parça üretir
+
+    Args:
+        query: Kullanıcının görebileceği DOF sorgusu (AuthService.filter_viewable_dofs)
+        fmt: 'csv' veya 'ndjson'
+        actions: True ise işlemler düzleştirilerek eklenir
+
+    Yields:
+        str: Çıktı parçaları (CSV'de ilk parça başlık satırıdır)
+    """
+    columns = DOF_COLUMNS + (ACTION_COLUMNS if actions else [])
+    output = io.StringIO()
+    writer = csv.writer(output) if fmt == 'csv' else None
+
+    # Başlık sorgu beklenmeden gönderilir (istemci hemen yanıt almaya başlar)
+    if writer is not None:
+        writer.writerow(columns)
+        yield output.getvalue()
+        output.seek(0)
+        output.truncate()
+
+    # Adlar baştan tek seferde yüklenir: imleç açıkken bağlantıda başka sorgu çalışmaz
+    names = _Names()
+    statement = build_stream_statement(query, actions)
+    result = db.session.execute(statement.execution_options(stream_results=True, yield_per=FETCH_SIZE))
+    count = 0
+    try:
+        for row in result:
+            values = _row_values(row, names, actions)
+            if writer is not None:
+                writer.writerow(values)
+            else:
+                output.write(json.dumps(dict(zip(columns, values)), ensure_ascii=False))
+                output.write('\n')
+            count += 1
+            # İlk satır beklemeden gönderilir; sonrası parça boyutuna ulaşınca
+            if count == 1 or output.tell() >= CHUNK_SIZE:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate()
+        if output.tell():
+            yield output.getvalue()
+    finally:
+        # İstemci bağlantıyı keserse imleç kapatılır (kalan satırlar okunmaz)
+        result.close()
+    current_app.logger.info(f"DÖF satır akışı ({fmt}) tamamlandı: {count} satır")
@@ -96,7 +96,7 @@ def test_add_comment():
             
             # Kontrol et
             saved_action = DOFAction.query.get(action.id)
-            attachments = saved_action.attachments.all()
+            attachments = saved_action.attachments
             print(f"📎 Kaydedilen ek sayısı: {len(attachments)}")
             
             for att in attachments:
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+DÖF dosya paketinin (ZIP) içeriğini rol bazında AuthService yetkileriyle
+karşılaştıran doğrulama scripti
+
+Her rol için bir aktif kullanıcıyla /dof/export/dossier indirilir; paketteki
+DOF_<id> klasörleri, kullanıcının DÖF listesinde gördüğü (filter_viewable_dofs)
+DÖF'lerle birebir aynı olmalıdır.
+
+Kullanım:
+    python test_dossier_access.py
+    python test_dossier_access.py status=3 department=2   # liste filtreleriyle
+"""
+
+import io
+import sys
+import os
+import zipfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import app, db
+from models import DOF, User
+from auth_service import AuthService
+
+
+def expected_dof_ids(user):
+    """Kullanıcının görmesi gereken DÖF id'leri (DÖF listesiyle aynı görünürlük)"""
+    query = AuthService.filter_viewable_dofs(user, DOF.query)
+    return {dof_id for (dof_id,) in query.with_entities(DOF.id)}
+
+
+def dossier_dof_ids(client, args):
+    """Paketi indirir ve içindeki DÖF klasörlerinin id'lerini döndürür (boş paket: yönlendirme)"""
+    response = client.get('/dof/export/dossier', query_string=args)
+    if response.status_code == 302:
+        return set()
+    if response.status_code != 200:
+        raise RuntimeError(f"HTTP {response.status_code}")
+    archive = zipfile.ZipFile(io.BytesIO(response.data))
+    return {int(name.split('/', 1)[0][len('DOF_'):]) for name in archive.namelist() if name.startswith('DOF_')}
+
+
+def test_dossier_access(args=None):
+    """Her rolden bir kullanıcı için paket içeriğini yetkilerle karşılaştır"""
+    args = args or {}
+
+    print("=" * 70)
+    print("🔒 DÖF DOSYA PAKETİ YETKİ TESTİ")
+    print("=" * 70)
+
+    with app.app_context():
+        users = {}
+        for user in User.query.filter_by(active=True).order_by(User.id):
+            users.setdefault(user.role, user)
+
+        expected = {}
+        for role, user in users.items():
+            expected[role] = expected_dof_ids(user)
+            if args:
+                from routes.dof import apply_dof_export_filters
+                expected[role] &= {dof_id for (dof_id,) in
+                                   apply_dof_export_filters(DOF.query, args).with_entities(DOF.id)}
+        usernames = {role: (user.id, user.username) for role, user in users.items()}
+
+    # İstekler uygulama bağlamı dışında yapılır: aksi halde istekler dıştaki bağlamın
+    # g nesnesini (oturum açan kullanıcı, yetki öznesi) paylaşır
+    errors = 0
+    for role, (user_id, username) in sorted(usernames.items()):
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+        received = dossier_dof_ids(client, args)
+
+        extra = received - expected[role]
+        missing = expected[role] - received
+        if extra or missing:
+            errors += 1
+            print(f"❌ {username} (rol={role}): pakette {len(received)}, beklenen {len(expected[role])}")
+            if extra:
+                print(f"   • yetkisiz DÖF'ler: {sorted(extra)[:20]}")
+            if missing:
+                print(f"   • eksik DÖF'ler: {sorted(missing)[:20]}")
+        else:
+            print(f"✅ {username} (rol={role}): {len(received)} DÖF")
+
+    print("\n" + "=" * 70)
+    if errors:
+        print(f"❌ {errors} rol için paket içeriği yetkilerle eşleşmedi")
+    else:
+        print(f"✅ {len(usernames)} rolün tamamı için paket içeriği yetkilerle eşleşti")
+    print("=" * 70)
+    return errors == 0
+
+
+if __name__ == "__main__":
+    filters = dict(arg.split('=', 1) for arg in sys.argv[1:] if '=' in arg)
+    success = test_dossier_access(filters)
+    sys.exit(0 if success else 1)
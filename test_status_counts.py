@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Toplama sorgusu ile hesaplanan DÖF durum sayılarını, DÖF satırlarının
+tek tek sayılmasıyla elde edilen sonuçla karşılaştıran doğrulama scripti
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import app, db
+from models import DOF, User
+from auth_service import AuthService
+from stats_utils import STATUS_KEYS, count_dof_statuses, get_default_status_dict, add_summary_totals
+from utils import get_dof_status_counts
+
+
+def manual_counts(query):
+    """Eski yöntem: tüm DÖF'leri yükleyip Python tarafında say"""
+    counts = get_default_status_dict()
+    dofs = query.all()
+    for dof in dofs:
+        key = STATUS_KEYS.get(dof.status)
+        if key:
+            counts[key] += 1
+    counts['total'] = len(dofs)
+    return add_summary_totals(counts)
+
+
+def test_status_counts():
+    """Her kullanıcı için toplama sorgusu ile manuel sayımı karşılaştır"""
+
+    with app.app_context():
+        print("=" * 70)
+        print("📊 DÖF DURUM SAYILARI DOĞRULAMA TESTİ")
+        print("=" * 70)
+
+        errors = 0
+        users = User.query.filter_by(active=True).all()
+
+        for user in users:
+            base_query = db.session.query(DOF).filter(DOF.is_related == False)
+            base_query = AuthService.filter_viewable_dofs(user, base_query)
+
+            expected = manual_counts(base_query)
+            aggregated = count_dof_statuses(base_query)
+            with app.test_request_context():
+                from_utils = get_dof_status_counts(current_user=user)
+
+            mismatches = [key for key in expected if expected[key] != aggregated.get(key)]
+            if from_utils['total'] != aggregated['total']:
+                mismatches.append('utils.total')
+
+            if mismatches:
+                errors += 1
+                print(f"❌ {user.username} (rol={user.role}): farklı alanlar {mismatches}")
+                for key in mismatches:
+                    print(f"   • {key}: manuel={expected.get(key)} toplama={aggregated.get(key)}")
+            else:
+                print(f"✅ {user.username} (rol={user.role}): toplam={aggregated['total']}")
+
+        print("\n" + "=" * 70)
+        if errors:
+            print(f"❌ {errors} kullanıcı için sayılar eşleşmedi")
+        else:
+            print(f"✅ {len(users)} kullanıcının tamamı için sayılar eşleşti")
+        print("=" * 70)
+        return errors == 0
+
+
+if __name__ == "__main__":
+    success = test_status_counts()
+    sys.exit(0 if success else 1)
@@ -776,17 +776,24 @@ def get_dof_status_counts(department_id=None, user_id=None, current_user=None):
     Returns:
         DöF sayılarını içeren sözlük
     """
-    from models import DOF, User, UserRole
-    from sqlalchemy import func, or_
+    from models import DOF, UserRole
+    from sqlalchemy import or_
     from flask import current_app
     import sys
     
+    # Yetki filtresi gerektirmeyen sayımlar DÖF tablosu yerine durum sayaçlarından okunur
+    if not user_id and (current_user is None or current_user.role in [UserRole.ADMIN, UserRole.QUALITY_MANAGER]):
+        from status_counters import get_counter_status_counts
+        if department_id:
+            return get_counter_status_counts(department_ids=[department_id], source_department_ids=[department_id])
+        return get_counter_status_counts()
+    
     # Başlangıç sorgusu
     base_query = db.session.query(DOF)
     
     # İlişkili DÖF'leri filtreleme
-    # İlişkili DÖF'ler başlığında "[İlişkili #" prefix'i içerir
-    related_dof_filter = ~DOF.title.like("[İlişkili #%")
+    # İlişkili DÖF'ler is_related bayrağı ile işaretlidir (indeksli kolon)
+    related_dof_filter = DOF.is_related == False
     base_query = base_query.filter(related_dof_filter)
     current_app.logger.info("DÖF özet sayıları için ilişkili DÖF'ler filtrelendi")
     
@@ -794,19 +801,11 @@ def get_dof_status_counts(department_id=None, user_id=None, current_user=None):
     if user_id:
         base_query = base_query.filter(DOF.created_by == user_id)
     elif department_id:
-        # Departman kullanıcılarını bul
-        dept_users = User.query.filter_by(department_id=department_id).all()
-        dept_user_ids = [user.id for user in dept_users]
-        
-        # Departman filtresi uygula
-        if dept_user_ids:
-            base_query = base_query.filter(or_(
-                DOF.department_id == department_id,
-                DOF.created_by.in_(dept_user_ids)
-            ))
-        else:
-            # Sadece departmana atanan DÖF'leri filtrele
-            base_query = base_query.filter(DOF.department_id == department_id)
+        # Departmana atanan VEYA departmanın açtığı DÖF'ler
+        base_query = base_query.filter(or_(
+            DOF.department_id == department_id,
+            DOF.source_department_id == department_id
+        ))
     
     # Eğer current_user belirtilmişse ve normal admin veya kalite yöneticisi değilse,
     # yönetilen departmanların DÖF'lerini göster
@@ -830,315 +829,17 @@ def get_dof_status_counts(department_id=None, user_id=None, current_user=None):
         except Exception as e:
             current_app.logger.error(f"DÖF özet sayıları filtreleme hatası: {str(e)}")
     
-    # Debug için hangi DÖF'lerin bulunduğunu kontrol et
-    all_dofs = base_query.all()
-    current_app.logger.info(f"DEBUG - Bulunan DÖF'ler: {[(dof.id, dof.title, dof.status) for dof in all_dofs]}")
-    
-    # Duruma göre gruplama için yeniden sorgu oluştur
-    query = db.session.query(DOF.status, func.count(DOF.id)).select_from(base_query.subquery())
-    
-    # Duruma göre gruplama ve sonuç
-    result = query.group_by(DOF.status).all()
-    
-    # Debug logging için durum sayılarını logla
-    current_app.logger.info(f"DEBUG - Durum sayıları raw query sonucu: {result}")
-    
-    counts = {
-        'draft': 0,
-        'submitted': 0,
-        'in_review': 0,
-        'assigned': 0,
-        'in_progress': 0,
-        'resolved': 0,
-        'closed': 0,
-        'rejected': 0,
-        'planning': 0,
-        'implementation': 0,
-        'completed': 0,
-        'source_review': 0,
-        'total': 0
-    }
-    
-    total = 0
-    for status, count in result:
-        total += count
-        current_app.logger.info(f"DEBUG - Durum {status} için sayı: {count}")
-        if status == DOFStatus.DRAFT:
-            counts['draft'] = count
-        elif status == DOFStatus.SUBMITTED:
-            counts['submitted'] = count
-        elif status == DOFStatus.IN_REVIEW:
-            counts['in_review'] = count
-        elif status == DOFStatus.ASSIGNED:
-            counts['assigned'] = count
-        elif status == DOFStatus.IN_PROGRESS:
-            counts['in_progress'] = count
-        elif status == DOFStatus.RESOLVED:
-            counts['resolved'] = count
-        elif status == DOFStatus.CLOSED:
-            counts['closed'] = count
-        elif status == DOFStatus.REJECTED:
-            counts['rejected'] = count
-        elif status == DOFStatus.PLANNING:
-            counts['planning'] = count
-        elif status == DOFStatus.IMPLEMENTATION:
-            counts['implementation'] = count
-        elif status == DOFStatus.COMPLETED:
-            counts['completed'] = count
-        elif status == DOFStatus.SOURCE_REVIEW:
-            counts['source_review'] = count
-    
-    counts['total'] = total
-    
-    # MANUEL SAYIM FIX: SQL GROUP BY sorunu için manuel sayım kullan
-    from models import DOF
-    all_dofs_manual = base_query.all()
-    
-    # Manuel sayım
-    manual_counts = {}
-    for dof in all_dofs_manual:
-        if dof.status in manual_counts:
-            manual_counts[dof.status] += 1
-        else:
-            manual_counts[dof.status] = 1
-    
-    # Manuel sayımdan counts'u yeniden oluştur
-    counts = {
-        'draft': 0,
-        'submitted': 0,
-        'in_review': 0,
-        'assigned': 0,
-        'in_progress': 0,
-        'resolved': 0,
-        'closed': 0,
-        'rejected': 0,
-        'planning': 0,
-        'implementation': 0,
-        'completed': 0,
-        'source_review': 0,
-        'total': 0
-    }
-    
-    for status_enum, count in manual_counts.items():
-        if status_enum == DOFStatus.DRAFT:
-            counts['draft'] = count
-        elif status_enum == DOFStatus.SUBMITTED:
-            counts['submitted'] = count
-        elif status_enum == DOFStatus.IN_REVIEW:
-            counts['in_review'] = count
-        elif status_enum == DOFStatus.ASSIGNED:
-            counts['assigned'] = count
-        elif status_enum == DOFStatus.IN_PROGRESS:
-            counts['in_progress'] = count
-        elif status_enum == DOFStatus.RESOLVED:
-            counts['resolved'] = count
-        elif status_enum == DOFStatus.CLOSED:
-            counts['closed'] = count
-        elif status_enum == DOFStatus.REJECTED:
-            counts['rejected'] = count
-        elif status_enum == DOFStatus.PLANNING:
-            counts['planning'] = count
-        elif status_enum == DOFStatus.IMPLEMENTATION:
-            counts['implementation'] = count
-        elif status_enum == DOFStatus.COMPLETED:
-            counts['completed'] = count
-        elif status_enum == DOFStatus.SOURCE_REVIEW:
-            counts['source_review'] = count
-    
-    counts['total'] = len(all_dofs_manual)
-    
-    # Yeni dashboard için özel hesaplamalar ekle
-    # Devam Eden: Aktif durumda olan DÖF'ler (taslak ve kapatılan hariç)
-    counts['in_progress_total'] = (
-        counts['submitted'] + counts['in_review'] + counts['assigned'] + 
-        counts['in_progress'] + counts['planning'] + counts['implementation'] + 
-        counts['completed'] + counts['source_review']
-    )
-    
-    # Atanmayı Bekleyen: İncelemede olan DÖF'ler (2. aşama)
-    counts['pending_approval'] = counts['in_review']
-    
-    # Kapatılan: Tamamlanan ve çözülmüş DÖF'ler
-    counts['closed_total'] = counts['closed'] + counts['resolved']
-    
-    return counts
+    # Durum sayıları tek bir toplama sorgusu ile hesaplanır (DÖF satırları yüklenmez)
+    from stats_utils import count_dof_statuses
+    return count_dof_statuses(base_query)
 
 def get_department_stats():
     """
     Departman bazında DÖF istatistiklerini detaylı şekilde getir
+    (bkz. department_stats.DepartmentStatsService - GROUP BY sorguları ile hesaplanır)
     """
-    from models import DOF, Department, DOFAction, User
-    from datetime import datetime, timedelta
-    from sqlalchemy import func, and_, or_
-    from app import db
-    
-    # Tüm departmanları al
-    departments = Department.query.all()
-    stats = []
-    
-    # Bugün ve son 30 gün için sorgularda kullanılacak tarihler
-    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-    thirty_days_ago = today - timedelta(days=30)
-    seven_days_ago = today - timedelta(days=7)
-    
-    for dept in departments:
-        # DEPARTMANA ATANAN DÖF'ıER
-        assigned_dofs = DOF.query.filter_by(department_id=dept.id).all()
-        
-        # Toplam atanan DÖF sayısı
-        assigned_total = len(assigned_dofs)
-        assigned_closed = len([d for d in assigned_dofs if d.status == DOFStatus.CLOSED])
-        assigned_rejected = len([d for d in assigned_dofs if d.status == DOFStatus.REJECTED])
-        assigned_active = assigned_total - assigned_closed - assigned_rejected
-        
-        # Atanan DÖF'lerin durum dağılımı
-        assigned_draft = len([d for d in assigned_dofs if d.status == DOFStatus.DRAFT])
-        assigned_submitted = len([d for d in assigned_dofs if d.status == DOFStatus.SUBMITTED])
-        assigned_in_review = len([d for d in assigned_dofs if d.status == DOFStatus.IN_REVIEW])
-        assigned_assigned = len([d for d in assigned_dofs if d.status == DOFStatus.ASSIGNED])
-        assigned_in_progress = len([d for d in assigned_dofs if d.status == DOFStatus.IN_PROGRESS])
-        assigned_resolved = len([d for d in assigned_dofs if d.status == DOFStatus.RESOLVED])
-        assigned_planning = len([d for d in assigned_dofs if d.status == DOFStatus.PLANNING])
-        assigned_implementation = len([d for d in assigned_dofs if d.status == DOFStatus.IMPLEMENTATION])
-        assigned_completed = len([d for d in assigned_dofs if d.status == DOFStatus.COMPLETED])
-        assigned_source_review = len([d for d in assigned_dofs if d.status == DOFStatus.SOURCE_REVIEW])
-        
-        # Son 30 günde atanan DÖF sayısı
-        assigned_recent = len([d for d in assigned_dofs if d.created_at >= thirty_days_ago])
-        
-        # Öncelik alanı kaldırıldı
-        assigned_high_priority = 0
-        assigned_medium_priority = 0
-        assigned_low_priority = 0
-        
-        # Termini geçmiş atanan DÖF'ler
-        assigned_overdue = len([d for d in assigned_dofs if d.deadline and d.deadline < today and d.status not in [DOFStatus.CLOSED, DOFStatus.REJECTED]])
-        
-        # Son 7 gün içinde kapatılan atanan DÖF'ler
-        assigned_recently_closed = len([d for d in assigned_dofs if d.status == DOFStatus.CLOSED and d.closed_at and d.closed_at >= seven_days_ago])
-        
-        # DEPARTMANIN AÇTIĞI DÖF'LER
-        # Departman üyelerinin ID'lerini al
-        dept_user_ids = [u.id for u in User.query.filter_by(department_id=dept.id).all()]
-        
-        # Departman üyeleri tarafından oluşturulan DÖF'leri al
-        created_dofs = DOF.query.filter(DOF.created_by.in_(dept_user_ids)).all() if dept_user_ids else []
-        
-        # Toplam açılan DÖF sayısı
-        created_total = len(created_dofs)
-        created_closed = len([d for d in created_dofs if d.status == DOFStatus.CLOSED])
-        created_rejected = len([d for d in created_dofs if d.status == DOFStatus.REJECTED])
-        created_active = created_total - created_closed - created_rejected
-        
-        # Açılan DÖF'lerin durum dağılımı
-        created_draft = len([d for d in created_dofs if d.status == DOFStatus.DRAFT])
-        created_submitted = len([d for d in created_dofs if d.status == DOFStatus.SUBMITTED])
-        created_in_review = len([d for d in created_dofs if d.status == DOFStatus.IN_REVIEW])
-        created_assigned = len([d for d in created_dofs if d.status == DOFStatus.ASSIGNED])
-        created_in_progress = len([d for d in created_dofs if d.status == DOFStatus.IN_PROGRESS])
-        created_resolved = len([d for d in created_dofs if d.status == DOFStatus.RESOLVED])
-        created_planning = len([d for d in created_dofs if d.status == DOFStatus.PLANNING])
-        created_implementation = len([d for d in created_dofs if d.status == DOFStatus.IMPLEMENTATION])
-        created_completed = len([d for d in created_dofs if d.status == DOFStatus.COMPLETED])
-        created_source_review = len([d for d in created_dofs if d.status == DOFStatus.SOURCE_REVIEW])
-        
-        # Son 30 günde açılan DÖF sayısı
-        created_recent = len([d for d in created_dofs if d.created_at >= thirty_days_ago])
-        
-        # Ortalama çözüm süresi hesaplama
-        avg_resolution_time = 0
-        if assigned_closed > 0:
-            # Kapatılmış DÖF'lerin ID'lerini al
-            closed_dof_ids = [d.id for d in assigned_dofs if d.status == DOFStatus.CLOSED]
-            
-            # Ortalama çözüm süresini hesapla
-            resolution_time_result = db.session.query(
-                func.avg(DOFAction.created_at - DOF.created_at)
-            ).join(DOF, DOF.id == DOFAction.dof_id).filter(
-                DOFAction.action_type == 2,        # Durum değişikliği
-                DOFAction.new_status == 6,        # Kapatıldı
-                DOF.id.in_(closed_dof_ids)
-            ).scalar()
-            
-            # Gün cinsinden süreyi elde et
-            if resolution_time_result is not None:
-                try:
-                    # timedelta nesnesi ise
-                    avg_resolution_time = round(resolution_time_result.total_seconds() / (24 * 3600), 1)
-                except AttributeError:
-                    # Decimal/Float değeri ise
-                    avg_resolution_time = round(float(resolution_time_result) / (24 * 3600), 1)
-        
-        # DÖF tipi dağılımı (düzeltici/önleyici)
-        corrective_count = len([d for d in assigned_dofs if d.dof_type == 1])  # Düzeltici
-        preventive_count = len([d for d in assigned_dofs if d.dof_type == 2])  # Önleyici
-        
-        # Tüm istatistikleri tek bir sozlükte birleştir
-        stats.append({
-            'department': dept.name,
-            
-            # Toplam istatistikler
-            'total': assigned_total,
-            'closed': assigned_closed,
-            'active': assigned_active,
-            'rejected': assigned_rejected,
-            
-            # Yüzdeler
-            'closed_percent': round((assigned_closed / assigned_total * 100) if assigned_total > 0 else 0, 1),
-            'active_percent': round((assigned_active / assigned_total * 100) if assigned_total > 0 else 0, 1),
-            'rejected_percent': round((assigned_rejected / assigned_total * 100) if assigned_total > 0 else 0, 1),
-            
-            # Ortalama çözüm süresi
-            'avg_resolution_time': avg_resolution_time,
-            
-            # Atanan DÖF istatistikleri
-            'assigned_total': assigned_total,
-            'assigned_active': assigned_active,
-            'assigned_closed': assigned_closed,
-            'assigned_rejected': assigned_rejected,
-            'assigned_draft': assigned_draft,
-            'assigned_submitted': assigned_submitted,
-            'assigned_in_review': assigned_in_review,
-            'assigned_assigned': assigned_assigned,
-            'assigned_in_progress': assigned_in_progress,
-            'assigned_resolved': assigned_resolved,
-            'assigned_planning': assigned_planning,
-            'assigned_implementation': assigned_implementation,
-            'assigned_completed': assigned_completed,
-            'assigned_source_review': assigned_source_review,
-            'assigned_recent': assigned_recent,
-            'assigned_high_priority': assigned_high_priority,
-            'assigned_medium_priority': assigned_medium_priority,
-            'assigned_low_priority': assigned_low_priority,
-            'assigned_overdue': assigned_overdue,
-            'assigned_recently_closed': assigned_recently_closed,
-            
-            # Açılan DÖF istatistikleri
-            'created_total': created_total,
-            'created_active': created_active,
-            'created_closed': created_closed,
-            'created_rejected': created_rejected,
-            'created_draft': created_draft,
-            'created_submitted': created_submitted,
-            'created_in_review': created_in_review,
-            'created_assigned': created_assigned,
-            'created_in_progress': created_in_progress,
-            'created_resolved': created_resolved,
-            'created_planning': created_planning,
-            'created_implementation': created_implementation,
-            'created_completed': created_completed,
-            'created_source_review': created_source_review,
-            'created_recent': created_recent,
-            
-            # DÖF tipi istatistikleri
-            'corrective_count': corrective_count,
-            'preventive_count': preventive_count
-        })
-    
-    # İstatistikleri toplam DÖF sayısına göre sırala (atanan + oluşturulan toplam, büyükten küçüğe)
-    stats.sort(key=lambda x: (x['assigned_total'] + x['created_total']), reverse=True)
-    
-    return stats
+    from department_stats import DepartmentStatsService
+    return DepartmentStatsService.department_stats()
 
 def can_user_edit_dof(user, dof):
     """
@@ -1146,16 +847,20 @@ def can_user_edit_dof(user, dof):
     """
     from models import UserRole, DOFStatus
     from flask import current_app
+    from auth_principal import get_principal
     
     current_app.logger.info(f"Yetki kontrolü - Kullanıcı: {user.full_name} (Rol: {user.role}), DÖF: #{dof.id} (Durum: {dof.status})")
     
+    # Rol, departman ve departman kullanıcıları istek başına bir kez hesaplanır
+    principal = get_principal(user)
+    
     # Admin her zaman düzenleyebilir
-    if user.role == UserRole.ADMIN:
+    if principal.role == UserRole.ADMIN:
         current_app.logger.info("Admin yetkisi - Erişim verildi")
         return True
     
     # Kalite yöneticileri inceleme aşamasındaki, planlama aşamasındaki ve çözülmüş DÖF'leri değerlendirebilir
-    if user.role == UserRole.QUALITY_MANAGER:
+    if principal.role == UserRole.QUALITY_MANAGER:
         # Çözüm aşamalarına erişim
         if dof.status in [DOFStatus.SUBMITTED, DOFStatus.IN_REVIEW, DOFStatus.PLANNING, DOFStatus.RESOLVED]:
             return True
@@ -1166,44 +871,28 @@ def can_user_edit_dof(user, dof):
             return True
         
         # Kalite yöneticisi aynı zamanda kaynak departman yöneticisi ise tamamlanmış DÖF'leri inceleyebilir
-        if dof.creator and dof.creator.department_id == user.department_id and dof.status == DOFStatus.COMPLETED:
+        if principal.is_source_department(dof) and dof.status == DOFStatus.COMPLETED:
             return True
             
         return False
     
     # Oluşturan kişi (tüm aşamalarda yorum ekleyebilir)
-    if dof.created_by == user.id:
+    if dof.created_by == principal.user_id:
         current_app.logger.info("DÖF oluşturan kişi yetkisi - Erişim verildi")
         return True
     
     # Departman yöneticileri ve franchise departman yöneticileri kendi departmanına ait DÖF'lere her zaman erişebilir
-    if (user.role == UserRole.DEPARTMENT_MANAGER or user.role == UserRole.FRANCHISE_DEPARTMENT_MANAGER) and dof.department_id == user.department_id:
+    if (principal.role == UserRole.DEPARTMENT_MANAGER or principal.role == UserRole.FRANCHISE_DEPARTMENT_MANAGER) and dof.department_id == principal.department_id:
         current_app.logger.info("Atanan departman yöneticisi yetkisi - Erişim verildi")
         return True
-            
-    # DÖF'u oluşturan kişi (tamamlanan DÖF'leri değerlendirebilir)
-    if dof.created_by == user.id and dof.status == DOFStatus.COMPLETED:
-        return True
         
     # Kaynak departman yöneticisi (tamamlanan DÖF'leri inceleyebilir veya kaynak değerlendirme yapabilir)
-    if (user.role == UserRole.DEPARTMENT_MANAGER or user.role == UserRole.FRANCHISE_DEPARTMENT_MANAGER) and user.department_id is not None:
-        # DÖF'u açan departman ise ve tamamlanmış durumda veya kaynak değerlendirme aşamasında
-        # DÖF'u oluşturan kişinin departmanını kontrol ediyoruz
-        if dof.creator and dof.creator.department_id == user.department_id:
+    if (principal.role == UserRole.DEPARTMENT_MANAGER or principal.role == UserRole.FRANCHISE_DEPARTMENT_MANAGER) and principal.department_id is not None:
+        # DÖF'u açan departman ise (DÖF'ün source_department_id'si) ve tamamlanmış
+        # durumda veya kaynak değerlendirme aşamasında
+        if principal.is_source_department(dof):
             if dof.status in [10, 11]:  # 10: COMPLETED, 11: SOURCE_REVIEW
                 return True
-        
-        # Veya DÖF'u oluşturan kişinin departmanı kaynak departman ise
-        # Circular import'u önlemek için lazy import kullan
-        try:
-            from models import User
-            creator = User.query.get(dof.created_by)
-            if creator and creator.department_id == user.department_id:
-                if dof.status in [10, 11]:  # 10: COMPLETED, 11: SOURCE_REVIEW
-                    return True
-        except ImportError:
-            current_app.logger.error("User modeli import edilemedi")
-            pass
     
     return False
 
@@ -1291,47 +980,44 @@ def can_user_change_status(user, dof, new_status):
     Kullanıcının DÖF durumunu değiştirme yetkisi olup olmadığını kontrol et
     """
     from models import UserRole, DOFStatus
+    from auth_principal import get_principal
+    
+    principal = get_principal(user)
     
     # Öncelikle rol bazlı kısıtlamaları kontrol et
-    possible_statuses = get_next_possible_statuses(dof.status, user.role)
+    possible_statuses = get_next_possible_statuses(dof.status, principal.role)
     
     # Eğer yeni durum olası durumlar listesinde yoksa, değişiklik yapılamaz
     if new_status not in possible_statuses:
         return False
     
     # Normal kullanıcılar sadece kendi oluşturdukları taslakları gönderebilir
-    if user.role == UserRole.USER:
-        if dof.created_by != user.id:
+    if principal.role == UserRole.USER:
+        if dof.created_by != principal.user_id:
             return False
         if dof.status != DOFStatus.DRAFT or new_status != DOFStatus.SUBMITTED:
             return False
     
     # Departman yöneticileri ve franchise departman yöneticileri için özel kontroller
-    if user.role == UserRole.DEPARTMENT_MANAGER or user.role == UserRole.FRANCHISE_DEPARTMENT_MANAGER:
+    if principal.role == UserRole.DEPARTMENT_MANAGER or principal.role == UserRole.FRANCHISE_DEPARTMENT_MANAGER:
         # Tamamlandı veya Kaynak İncelemesi durumunda kaynak departman için, DÖF'un oluşturan departman için özel izin
         if dof.status in [10, 11] and new_status in [5, 4]:  # 10: COMPLETED, 11: SOURCE_REVIEW, 5: RESOLVED, 4: IN_PROGRESS
-            # DÖF'u açan departman mı kontrol et (DÖF'u oluşturan kişinin departmanı)
-            if dof.creator and dof.creator.department_id == user.department_id:
-                return True
-            
-            # DÖF'u oluşturan kişinin departmanı kaynak departman mı kontrol et
-            from models import User
-            creator = User.query.get(dof.created_by)
-            if creator and creator.department_id == user.department_id:
+            # DÖF'u açan departman mı kontrol et (DÖF'ün source_department_id'si)
+            if principal.is_source_department(dof):
                 return True
                 
             # DÖF'u doğrudan oluşturan kişi mi kontrol et
-            if dof.created_by == user.id:
+            if dof.created_by == principal.user_id:
                 return True
         
         # Diğer durumlar için sadece atanan departman yöneticileri değişiklik yapabilir
-        elif dof.department_id != user.department_id:
+        elif dof.department_id != principal.department_id:
             return False
         
     # Kalite yöneticileri için özel kontroller
-    if user.role == UserRole.QUALITY_MANAGER:
+    if principal.role == UserRole.QUALITY_MANAGER:
         # Eğer kalite yöneticisi aynı zamanda kaynak departman yöneticisi ise, tamamlanmış DÖF'ler için onay verebilir
-        if dof.status == DOFStatus.COMPLETED and dof.creator and dof.creator.department_id == user.department_id:
+        if dof.status == DOFStatus.COMPLETED and principal.is_source_department(dof):
             if new_status in [DOFStatus.RESOLVED, DOFStatus.IN_PROGRESS]:  # Çözüldü veya Çözümden Memnun Değilim
                 return True
         
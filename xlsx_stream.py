@@ -0,0 +1,210 @@
+"""
+Akışlı XLSX Yazıcı
+------------------
+Büyük dışa aktarımlar için sabit bellekli, yalnızca yazılabilen Excel (xlsx)
+çalışma kitabı. Her sayfanın satırları yazıldıkça geçici dosyaya aktarılır;
+kapanışta sayfalar sütun genişlikleriyle birlikte zip paketine kopyalanır.
+
+xlsxwriter'ın constant_memory modu hücre başına biçim ve tip kontrolü yaptığı
+için milyonlarca hücrede dakikalar sürer. Dışa aktarımlar sadece metin ve sayı
+yazdığından sayfa XML'i doğrudan üretilir (satır içi metinler, kalın başlık
+satırı, otomatik sütun genişliği).
+
+Kullanım:
+    from xlsx_stream import StreamingWorkbook
+
+    workbook = StreamingWorkbook(output)
+    sheet = workbook.add_sheet('DOF_Listesi', ['ID', 'Baslik'])
+    sheet.append([1, 'Örnek'])
+    workbook.close()
+"""
+
+import tempfile
+import zipfile
+
+# Excel'in izin verdiği en geniş sütun ve en uzun hücre metni
+MAX_COLUMN_WIDTH = 255
+MAX_CELL_LENGTH = 32767
+
+# Satırlar geçici dosyaya bu sayıda biriktirilerek yazılır
+ROW_BUFFER_SIZE = 500
+
+# XML'e özel karakterler kaçırılır, XML 1.0'da geçersiz kontrol karakterleri atılır
+_XML_TEXT = str.maketrans({
+    '&': '&amp;', '<': '&lt;', '>': '&gt;',
+    **{chr(code): None for code in range(32) if code not in (9, 10, 13)}
+})
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '{sheets}</Types>'
+)
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/></Relationships>'
+)
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets>{sheets}</sheets></workbook>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '{sheets}<Relationship Id="rIdStyles" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/></Relationships>'
+)
+
+# Stil 0: varsayılan, stil 1: kalın ve kenarlıklı başlık
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="2"><border><left/><right/><top/><bottom/><diagonal/></border>'
+    '<border><left style="thin"/><right style="thin"/><top style="thin"/><bottom style="thin"/><diagonal/></border>'
+    '</borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="1" xfId="0" applyFont="1" applyBorder="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+_SHEET_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+)
+
+
+def _text_cell(value, style=''):
+    text = value[:MAX_CELL_LENGTH].translate(_XML_TEXT)
+    return f'<c{style} t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+class StreamingSheet:
+    """Satırları sırayla geçici dosyaya yazan çalışma sayfası"""
+
+    def __init__(self, name, columns):
+        self.name = name
+        self.rows = 0
+        self.widths = [len(column) + 2 for column in columns]
+        self._buffer = []
+        self._data = tempfile.TemporaryFile(mode='w+', encoding='utf-8')
+        self._data.write('<row>' + ''.join(_text_cell(column, ' s="1"') for column in columns) + '</row>')
+
+    def append(self, values):
+        """
+        Bir veri satırı ekler
+
+        Args:
+            values: Hücre değerleri (int/float sayı olarak, None boş, diğerleri metin olarak yazılır)
+        """
+        cells = []
+        widths = self.widths
+        for idx, value in enumerate(values):
+            if value is None or value == '':
+                cells.append('<c/>')
+                continue
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                text = str(value)
+                cells.append(f'<c><v>{text}</v></c>')
+            else:
+                text = str(value)
+                cells.append(_text_cell(text))
+            width = len(text) + 2
+            if width > widths[idx]:
+                widths[idx] = width
+        self._buffer.append('<row>' + ''.join(cells) + '</row>')
+        self.rows += 1
+        if len(self._buffer) >= ROW_BUFFER_SIZE:
+            self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            self._data.write(''.join(self._buffer))
+            self._buffer = []
+
+    def _write_to(self, target):
+        """Sayfa XML'ini (sütun genişlikleri + satırlar) zip girdisine yazar"""
+        self._flush()
+        columns = ''.join(
+            f'<col min="{idx}" max="{idx}" width="{min(width, MAX_COLUMN_WIDTH)}" customWidth="1"/>'
+            for idx, width in enumerate(self.widths, start=1)
+        )
+        target.write((_SHEET_HEADER + f'<cols>{columns}</cols><sheetData>').encode('utf-8'))
+        self._data.seek(0)
+        while True:
+            chunk = self._data.read(1024 * 1024)
+            if not chunk:
+                break
+            target.write(chunk.encode('utf-8'))
+        target.write(b'</sheetData></worksheet>')
+
+    def close(self):
+        self._data.close()
+
+
+class StreamingWorkbook:
+    """Sabit bellekli xlsx çalışma kitabı; close() ile dosyaya yazılır"""
+
+    def __init__(self, output):
+        """
+        Args:
+            output: Yazılabilir ikili dosya nesnesi (ör. tempfile.TemporaryFile())
+        """
+        self.output = output
+        self.sheets = []
+
+    def add_sheet(self, name, columns):
+        """Başlık satırı yazılmış yeni bir sayfa ekler"""
+        sheet = StreamingSheet(name[:31], columns)
+        self.sheets.append(sheet)
+        return sheet
+
+    def close(self):
+        """Paketi oluşturur ve sayfaların geçici dosyalarını siler"""
+        try:
+            with zipfile.ZipFile(self.output, 'w', zipfile.ZIP_DEFLATED) as package:
+                sheet_types = ''.join(
+                    f'<Override PartName="/xl/worksheets/sheet{idx}.xml" '
+                    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                    for idx in range(1, len(self.sheets) + 1)
+                )
+                package.writestr('[Content_Types].xml', _CONTENT_TYPES.format(sheets=sheet_types))
+                package.writestr('_rels/.rels', _ROOT_RELS)
+                package.writestr('xl/workbook.xml', _WORKBOOK.format(sheets=''.join(
+                    f'<sheet name="{sheet.name.translate(_XML_TEXT)}" sheetId="{idx}" r:id="rId{idx}"/>'
+                    for idx, sheet in enumerate(self.sheets, start=1)
+                )))
+                package.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS.format(sheets=''.join(
+                    f'<Relationship Id="rId{idx}" '
+                    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+                    f'Target="worksheets/sheet{idx}.xml"/>'
+                    for idx in range(1, len(self.sheets) + 1)
+                )))
+                package.writestr('xl/styles.xml', _STYLES)
+                for idx, sheet in enumerate(self.sheets, start=1):
+                    with package.open(f'xl/worksheets/sheet{idx}.xml', 'w', force_zip64=True) as target:
+                        sheet._write_to(target)
+        finally:
+            for sheet in self.sheets:
+                sheet.close()